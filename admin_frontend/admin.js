@@ -9,6 +9,9 @@ class AdminPanel {
         this.currentPage = 'dashboard';
         this.currentPeriod = 7;
         this.csrfToken = null;
+        this.eventSource = null;
+        this.liveFeedLost = false;
+        this.dashboardGames = null;
 
         this.init();
     }
@@ -150,6 +153,8 @@ class AdminPanel {
             console.error('Logout error:', error);
         }
 
+        this.stopLiveFeed();
+
         // Tüm client-side verileri temizle
         this.isLoggedIn = false;
         this.csrfToken = null;
@@ -240,6 +245,81 @@ class AdminPanel {
             this.loadRecentGames(),
             this.loadTopPlayers()
         ]);
+        this.startLiveFeed();
+    }
+
+    // ========================================
+    // Live Feed (/admin/events)
+    // ========================================
+
+    startLiveFeed() {
+        if (this.eventSource || !window.EventSource || !this.isLoggedIn) return;
+
+        // Kopunca EventSource Last-Event-ID ile kendisi yeniden bağlanır,
+        // kaçırılan oyunlar sunucudaki ring'den tekrar gönderilir
+        const source = new EventSource(`${this.apiUrl}/admin/events`, { withCredentials: true });
+        this.eventSource = source;
+
+        source.addEventListener('ready', (e) => {
+            const data = JSON.parse(e.data);
+            // Kaçırılan olaylar artık gönderilemiyor: özetleri REST'ten yeniden yükle
+            if (data.reset || this.liveFeedLost) {
+                this.liveFeedLost = false;
+                this.loadStats();
+                this.loadRecentGames();
+            }
+        });
+
+        source.addEventListener('game', (e) => {
+            this.applyLiveGame(JSON.parse(e.data).game);
+        });
+
+        source.onerror = () => {
+            if (source.readyState !== EventSource.CLOSED) return;
+            // 401/403/503: tarayıcı tekrar denemez, biraz sonra baştan bağlan
+            this.eventSource = null;
+            this.liveFeedLost = true;
+            setTimeout(() => this.startLiveFeed(), 30000);
+        };
+    }
+
+    stopLiveFeed() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+    }
+
+    applyLiveGame(game) {
+        const games = this.dashboardGames;
+        if (games) {
+            const stake = parseFloat(game.stake_amount || 0);
+            const win = parseFloat(game.win_amount || 0);
+            games.total += 1;
+            games.total_wins += game.outcome === 'WIN' ? 1 : 0;
+            games.total_bets += stake;
+            games.total_payouts += win;
+            games.house_profit = games.total_bets - games.total_payouts;
+            games.win_rate = games.total_wins / games.total * 100;
+
+            const byType = games.by_type.find(t => t.game_type === game.game_type);
+            if (byType) {
+                byType.count = (parseInt(byType.count) || 0) + 1;
+            } else {
+                games.by_type.push({ game_type: game.game_type, count: 1 });
+            }
+            this.renderGameStats(games);
+        }
+
+        const tbody = document.getElementById('recentGamesBody');
+        if (!tbody) return;
+        if (!tbody.querySelector('tr[data-game-id]')) {
+            tbody.innerHTML = '';
+        }
+        tbody.insertAdjacentHTML('afterbegin', this.renderRecentGameRow(game));
+        while (tbody.rows.length > 10) {
+            tbody.deleteRow(-1);
+        }
     }
 
     async loadStats() {
@@ -252,35 +332,19 @@ class AdminPanel {
                 const data = await response.json();
                 console.log('Dashboard stats:', data);
 
-                // Update stat cards
-                const totalGames = data.games?.total || 0;
-                const uniquePlayers = data.games?.unique_players || 0;
-                const totalBets = data.games?.total_bets || 0;
-                const houseProfit = data.games?.house_profit || 0;
-
-                document.getElementById('totalGames').textContent = totalGames.toLocaleString();
-                document.getElementById('uniquePlayers').textContent = uniquePlayers.toLocaleString();
-                document.getElementById('totalBets').textContent = `₿${totalBets.toFixed(2)}`;
-                document.getElementById('houseProfit').textContent = `₿${houseProfit.toFixed(2)}`;
-
-                // Update win rate
-                const winRate = parseFloat(data.games?.win_rate) || 0;
-                const winRateEl = document.getElementById('winRate');
-                const winRateCircle = document.querySelector('.win-rate-circle');
-
-                if (winRateEl) {
-                    winRateEl.textContent = `${winRate.toFixed(1)}%`;
-                }
-                if (winRateCircle) {
-                    const degrees = winRate * 3.6;
-                    winRateCircle.style.background =
-                        `conic-gradient(var(--success) ${degrees}deg, var(--bg-tertiary) ${degrees}deg)`;
-                }
-
-                console.log('Win rate:', winRate);
-
-                // Update game distribution
-                this.renderGameDistribution(data.games?.by_type || [], totalGames);
+                // Canlı akıştan gelen oyunlar bu değerlerin üzerine eklenir
+                const total = data.games?.total || 0;
+                this.dashboardGames = {
+                    total,
+                    unique_players: data.games?.unique_players || 0,
+                    total_bets: data.games?.total_bets || 0,
+                    total_payouts: data.games?.total_payouts || 0,
+                    house_profit: data.games?.house_profit || 0,
+                    win_rate: parseFloat(data.games?.win_rate) || 0,
+                    total_wins: Math.round((parseFloat(data.games?.win_rate) || 0) * total / 100),
+                    by_type: data.games?.by_type || []
+                };
+                this.renderGameStats(this.dashboardGames);
 
                 // Update transactions
                 const transactions = data.transactions || [];
@@ -307,6 +371,31 @@ class AdminPanel {
         }
     }
 
+    renderGameStats(games) {
+        // Update stat cards
+        document.getElementById('totalGames').textContent = games.total.toLocaleString();
+        document.getElementById('uniquePlayers').textContent = games.unique_players.toLocaleString();
+        document.getElementById('totalBets').textContent = `₿${games.total_bets.toFixed(2)}`;
+        document.getElementById('houseProfit').textContent = `₿${games.house_profit.toFixed(2)}`;
+
+        // Update win rate
+        const winRate = games.win_rate;
+        const winRateEl = document.getElementById('winRate');
+        const winRateCircle = document.querySelector('.win-rate-circle');
+
+        if (winRateEl) {
+            winRateEl.textContent = `${winRate.toFixed(1)}%`;
+        }
+        if (winRateCircle) {
+            const degrees = winRate * 3.6;
+            winRateCircle.style.background =
+                `conic-gradient(var(--success) ${degrees}deg, var(--bg-tertiary) ${degrees}deg)`;
+        }
+
+        // Update game distribution
+        this.renderGameDistribution(games.by_type.slice(), games.total);
+    }
+
     renderGameDistribution(gameTypes, total) {
         const container = document.getElementById('gameDistribution');
         if (!container) return;
@@ -363,23 +452,27 @@ class AdminPanel {
                     return;
                 }
 
-                tbody.innerHTML = games.map(game => `
-                    <tr>
-                        <td>#${game.game_id}</td>
-                        <td>${game.player_email}</td>
-                        <td>${this.getGameIcon(game.game_type)} ${game.game_type}</td>
-                        <td>₿${parseFloat(game.stake_amount || 0).toFixed(2)}</td>
-                        <td>₿${parseFloat(game.win_amount || 0).toFixed(2)}</td>
-                        <td><span class="status-badge ${game.outcome?.toLowerCase()}">${game.outcome || '-'}</span></td>
-                        <td>${this.formatDate(game.started_at)}</td>
-                    </tr>
-                `).join('');
+                tbody.innerHTML = games.map(game => this.renderRecentGameRow(game)).join('');
             }
         } catch (error) {
             console.error('Load recent games error:', error);
         }
     }
 
+    renderRecentGameRow(game) {
+        return `
+            <tr data-game-id="${game.game_id}">
+                <td>#${game.game_id}</td>
+                <td>${game.player_email || '-'}</td>
+                <td>${this.getGameIcon(game.game_type)} ${game.game_type}</td>
+                <td>₿${parseFloat(game.stake_amount || 0).toFixed(2)}</td>
+                <td>₿${parseFloat(game.win_amount || 0).toFixed(2)}</td>
+                <td><span class="status-badge ${game.outcome?.toLowerCase()}">${game.outcome || '-'}</span></td>
+                <td>${this.formatDate(game.started_at)}</td>
+            </tr>
+        `;
+    }
+
     async loadTopPlayers() {
         try {
             const response = await fetch(`${this.apiUrl}/admin/dashboard/top-players?days=${this.currentPeriod}`, {
@@ -661,16 +754,6 @@ class AdminPanel {
                     return;
                 }
 
-                // Get rules for each rule set
-                const rulePromises = ruleSets.map(rs =>
-                    fetch(`${this.apiUrl}/admin/rule-sets/${rs.rule_set_id}`, { credentials: 'include' })
-                        .then(r => r.ok ? r.json() : { rules: [] })
-                        .catch(() => ({ rules: [] }))
-                );
-
-                const rulesData = await Promise.all(rulePromises);
-                console.log('Rules data:', rulesData);
-
                 const ruleNames = {
                     'coinflip_payout': '🪙 Coin Flip',
                     'roulette_number_payout': '🎰 Roulette Number',
@@ -680,9 +763,11 @@ class AdminPanel {
                     'blackjack_normal_payout': '🃏 BJ Normal'
                 };
 
-                container.innerHTML = ruleSets.map((rs, i) => {
-                    const rules = rulesData[i]?.rules || [];
+                container.innerHTML = ruleSets.map(rs => {
+                    // Liste kuralları ve kesin house edge hesabını birlikte döndürür
+                    const rules = rs.rules || [];
                     const houseEdge = rs.house_edge || 5.0;
+                    const check = rs.house_edge_check;
 
                     return `
                         <div class="ruleset-card ${rs.is_active ? 'active' : ''}">
@@ -695,6 +780,12 @@ class AdminPanel {
                             <div class="ruleset-info">
                                 <p>${rs.description || 'No description'}</p>
                                 <span class="house-edge">House Edge: ${houseEdge}%</span>
+                                ${check ? `
+                                    <span class="house-edge ${check.consistent ? '' : 'mismatch'}"
+                                          title="Exact edge of coinflip and roulette bets from the payouts">
+                                        ${check.consistent ? '✓' : '⚠'} Computed: ${this.formatEdgeRange(check)}
+                                    </span>
+                                ` : ''}
                             </div>
                             <div class="ruleset-rules">
                                 ${rules.length > 0 ? rules.map(rule => `
@@ -731,7 +822,39 @@ class AdminPanel {
         }
     }
 
+    formatEdgeRange(check) {
+        const low = check.min_pct.toFixed(2);
+        const high = check.max_pct.toFixed(2);
+        return low === high ? `${low}%` : `${low}–${high}%`;
+    }
+
+    async simulateRuleSet(ruleSetId) {
+        // Aktif etmeden önce oyuncuya dönüşü göster; simülasyon yoksa (NumPy, limit) null
+        try {
+            const response = await fetch(`${this.apiUrl}/admin/rule-sets/${ruleSetId}/simulate`, {
+                method: 'POST',
+                headers: this.getSecureHeaders(),
+                credentials: 'include',
+                body: JSON.stringify({ rounds: 200000 })
+            });
+            if (!response.ok) return null;
+
+            const data = await response.json();
+            return Object.entries(data.results)
+                .map(([betType, stats]) => `${betType}: RTP ${(stats.rtp * 100).toFixed(2)}% (±${((stats.ci95[1] - stats.rtp) * 100).toFixed(2)})`)
+                .join('\n');
+        } catch (error) {
+            console.error('Simulate rule set error:', error);
+            return null;
+        }
+    }
+
     async activateRuleSet(ruleSetId) {
+        const summary = await this.simulateRuleSet(ruleSetId);
+        if (summary && !confirm(`Simulated return to player (200,000 rounds per bet type):\n\n${summary}\n\nActivate this rule set?`)) {
+            return;
+        }
+
         try {
             const response = await fetch(`${this.apiUrl}/admin/rule-sets/${ruleSetId}/activate`, {
                 method: 'POST',
@@ -0,0 +1,5 @@
+from game_api.aio import create_async_app
+
+# Oyun ve wallet endpoint'leri için async mod (bkz. game_api/aio/__init__.py)
+#   hypercorn asgi:app --bind 0.0.0.0:3002 --workers 2
+app = create_async_app()
@@ -0,0 +1,119 @@
+"""
+Eşzamanlı bağlantı kapasitesi - threaded (gunicorn gthread) ve async (hypercorn) modu karşılaştırır
+
+Her seviyede N keep-alive bağlantı açılır; her bağlantı süre dolana kadar
+aynı GET isteğini tekrarlar. Threaded modda eşzamanlı istek sayısı
+worker x thread ile sınırlıdır, fazlası kuyrukta bekler ve gecikme artar;
+async modda sınır veritabanı pool'udur (ASYNC_DB_POOL_SIZE).
+
+    # İki sunucu da RATELIMIT_ENABLED=false ile başlatılır
+    RATELIMIT_ENABLED=false WEB_WORKERS=2 WEB_THREADS=8 gunicorn -c gunicorn.conf.py run:app
+    RATELIMIT_ENABLED=false hypercorn asgi:app --bind 0.0.0.0:3002 --workers 2
+
+    python benchmarks/concurrency.py --url http://127.0.0.1:3001 --login admin@example.com:admin
+    python benchmarks/concurrency.py --url http://127.0.0.1:3002 --login admin@example.com:admin \\
+        --session-url http://127.0.0.1:3001
+
+Login threaded sunucuda yapılır (--session-url); iki mod aynı session'ı kullanır.
+Varsayılan yol /game/blackjack/active: session + kullanıcı durumu + shard sorgusu.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlparse
+from http_load import login, percentile
+
+
+async def connection_loop(host, port, request_bytes, deadline, timeout, latencies, errors):
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+        return
+
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                writer.write(request_bytes)
+                status = await asyncio.wait_for(read_response(reader), timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                return
+            if status != 200:
+                errors[status] = errors.get(status, 0) + 1
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+
+async def read_response(reader):
+    """Status kodunu döndür, gövdeyi Content-Length kadar oku"""
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def run_level(host, port, request_bytes, connections, duration, timeout):
+    latencies = []
+    errors = {}
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        connection_loop(host, port, request_bytes, deadline, timeout, latencies, errors)
+        for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent connection capacity benchmark')
+    parser.add_argument('--url', default='http://127.0.0.1:3001', help='Server under test')
+    parser.add_argument('--session-url', help='Server to log in on (default: --url)')
+    parser.add_argument('--path', default='/game/blackjack/active', help='GET path to request')
+    parser.add_argument('--login', required=True, help='email:password')
+    parser.add_argument('--levels', default='25,50,100,200,400,800', help='Comma separated connection counts')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per level')
+    parser.add_argument('--timeout', type=float, default=5, help='Per request timeout (s); slower counts as failed')
+    args = parser.parse_args()
+
+    target = urlparse(args.url)
+    host, port = target.hostname, target.port or 80
+    session_target = urlparse(args.session_url or args.url)
+    cookie = login(session_target.hostname, session_target.port or 80, args.login)
+
+    request_bytes = (
+        f"GET {args.path} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        f"Cookie: {cookie}\r\n"
+        f"Connection: keep-alive\r\n\r\n"
+    ).encode()
+
+    print(f"{args.url}{args.path}  {args.duration:.0f}s per level, timeout {args.timeout:.0f}s")
+    print(f"{'conns':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean ms':>8}  errors")
+    for connections in (int(level) for level in args.levels.split(',')):
+        latencies, errors, elapsed = asyncio.run(
+            run_level(host, port, request_bytes, connections, args.duration, args.timeout)
+        )
+        latencies.sort()
+        if latencies:
+            print(f"{connections:>6} {len(latencies) / elapsed:>8.0f} "
+                  f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f} "
+                  f"{statistics.mean(latencies) * 1000:>8.1f}  {errors or '-'}")
+        else:
+            print(f"{connections:>6} {'-':>8} {'-':>8} {'-':>8} {'-':>8}  {errors}")
+
+
+if __name__ == '__main__':
+    main()
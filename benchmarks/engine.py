@@ -0,0 +1,79 @@
+"""
+Oyun motoru benchmark'ı - Flask ve MySQL olmadan oyun mantığının hızı
+
+Her motorla (game_api.engine) arka arkaya el oynar; saniyedeki el sayısını
+ve gözlenen oyuncuya dönüşü (toplam ödeme / toplam bahis) yazar. Blackjack
+elleri view'larla aynı basit stratejiyle oynanır: 17'ye kadar kart çek.
+
+Kullanım:
+    python benchmarks/engine.py
+    python benchmarks/engine.py --rounds 500000 --seed 42
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_api.engine import (  # noqa: E402
+    BlackjackEngine, CoinflipEngine, RouletteEngine, calculate_hand_value
+)
+
+
+def play_coinflip(engine, rounds):
+    paid = 0.0
+    for _ in range(rounds):
+        paid += engine.play(1.0, 'yazi')[2]
+    return paid
+
+
+def play_roulette(engine, rounds, bet_type, bet_value):
+    paid = 0.0
+    for _ in range(rounds):
+        paid += engine.play(1.0, bet_type, bet_value)[1]
+    return paid
+
+
+def play_blackjack(engine, rounds, stand_on):
+    paid = 0.0
+    for _ in range(rounds):
+        deck, player_hand, dealer_hand = engine.deal()
+        player_value = calculate_hand_value(player_hand)
+        is_blackjack = player_value == 21
+        while player_value < stand_on:
+            player_value = engine.hit(deck, player_hand)
+        if player_value > 21:
+            continue  # bust: stake lost
+        paid += engine.stand(1.0, deck, player_hand, dealer_hand, is_blackjack)[1]
+    return paid
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=None, help='Tekrarlanabilir sonuç için')
+    parser.add_argument('--stand-on', type=int, default=17, help='Blackjack: oyuncu bu değerde durur')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = [
+        ('coinflip', lambda n: play_coinflip(CoinflipEngine(rng=rng), n)),
+        ('roulette number', lambda n: play_roulette(RouletteEngine(rng=rng), n, 'number', 17)),
+        ('roulette color', lambda n: play_roulette(RouletteEngine(rng=rng), n, 'color', 'red')),
+        ('roulette parity', lambda n: play_roulette(RouletteEngine(rng=rng), n, 'parity', 'even')),
+        ('blackjack', lambda n: play_blackjack(BlackjackEngine(rng=rng), n, args.stand_on)),
+    ]
+
+    print(f"\n{args.rounds:,} rounds per game, default payouts")
+    print(f"   {'game':<18}{'rounds/s':>12}{'RTP':>10}")
+    for name, run in cases:
+        started = time.perf_counter()
+        paid = run(args.rounds)
+        elapsed = time.perf_counter() - started
+        print(f"   {name:<18}{args.rounds / elapsed:>12,.0f}{paid / args.rounds * 100:>9.2f}%")
+
+
+if __name__ == '__main__':
+    main()
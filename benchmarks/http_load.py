@@ -0,0 +1,119 @@
+"""
+HTTP load generator - Çalışan bir sunucuya eşzamanlı keep-alive istekleri gönderir
+
+Her thread kendi HTTP/1.1 bağlantısını açık tutar ve süre dolana kadar aynı
+isteği tekrarlar. Throughput, gecikme yüzdelikleri ve durum kodu dağılımı
+raporlanır. Development server ile gunicorn profillerini karşılaştırmak için:
+
+    python run.py                                   # Werkzeug dev server
+    gunicorn -c gunicorn.conf.py run:app            # production
+
+    python benchmarks/http_load.py --path /health --concurrency 64 --duration 20
+    python benchmarks/http_load.py --path /wallets/me --login admin@example.com:admin
+
+Not: /health rate limit dışıdır. Login gerektiren endpoint'lerde tek kullanıcı
+varsayılan limitlere takılır; ölçüm sırasında sunucuyu RATELIMIT_ENABLED=false
+ile başlatın (429 oranı "statuses" satırında görünür).
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+
+def login(host, port, credentials):
+    """Login olup session cookie'sini döndür"""
+    email, password = credentials.split(':', 1)
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request('POST', '/login', body=json.dumps({'email': email, 'password': password}),
+                 headers={'Content-Type': 'application/json'})
+    response = conn.getresponse()
+    response.read()
+    if response.status != 200:
+        raise SystemExit(f"Login failed: HTTP {response.status}")
+    cookie = response.getheader('Set-Cookie', '').split(';', 1)[0]
+    conn.close()
+    return cookie
+
+
+def worker(host, port, path, headers, deadline, latencies, statuses, lock):
+    local_latencies = []
+    local_statuses = Counter()
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            local_statuses[response.status] += 1
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+        except (OSError, http.client.HTTPException) as e:
+            local_statuses[type(e).__name__] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        local_latencies.append(time.perf_counter() - started)
+
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        statuses.update(local_statuses)
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent keep-alive HTTP load generator')
+    parser.add_argument('--url', default='http://127.0.0.1:3001', help='Server base URL')
+    parser.add_argument('--path', default='/health', help='GET path to request')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent connections')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds to run')
+    parser.add_argument('--login', help='email:password to log in first (for authenticated paths)')
+    args = parser.parse_args()
+
+    target = urlparse(args.url)
+    host, port = target.hostname, target.port or 80
+
+    headers = {'Connection': 'keep-alive'}
+    if args.login:
+        headers['Cookie'] = login(host, port, args.login)
+
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    threads = [
+        threading.Thread(target=worker, args=(host, port, args.path, headers, deadline, latencies, statuses, lock))
+        for _ in range(args.concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"GET {args.path}  concurrency={args.concurrency}  duration={elapsed:.1f}s")
+    print(f"  requests : {len(latencies)}  ({len(latencies) / elapsed:.0f} req/s)")
+    if latencies:
+        print(f"  latency  : p50={percentile(latencies, 50) * 1000:.1f} ms  "
+              f"p95={percentile(latencies, 95) * 1000:.1f} ms  "
+              f"p99={percentile(latencies, 99) * 1000:.1f} ms  "
+              f"mean={statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"  statuses : {dict(statuses)}")
+
+
+if __name__ == '__main__':
+    main()
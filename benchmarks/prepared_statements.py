@@ -0,0 +1,85 @@
+"""
+Prepared statement benchmark - text protocol vs bağlantı başına prepare edilmiş statement
+
+Settlement yolundaki sorguları (wallet lock, game/bet/payout insert) aynı
+bağlantıda tekrar tekrar çalıştırır ve statement başına ortalama süreyi
+karşılaştırır. Tüm yazmalar rollback edilir.
+
+Kullanım (MySQL çalışıyor ve game_db oluşturulmuş olmalı):
+    python benchmarks/prepared_statements.py --user-id 2 --iterations 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_api.config import Config  # noqa: E402
+from game_api.database import _connect  # noqa: E402
+from game_api.services.game_service import (  # noqa: E402
+    SQL_INSERT_GAME, SQL_INSERT_BET, SQL_INSERT_PAYOUT
+)
+from game_api.services.wallet_service import SQL_WALLET_FOR_UPDATE  # noqa: E402
+from game_api.utils.statements import StatementCursor, get_statement_stats  # noqa: E402
+
+
+def run_round(conn, user_id, iterations):
+    """Bir settlement turundaki dört sorguyu `iterations` kez çalıştır, statement başına süreleri döndür"""
+    cursor = StatementCursor(conn)
+    timings = {'wallet_lock': 0.0, 'insert_game': 0.0, 'insert_bet': 0.0, 'insert_payout': 0.0}
+
+    conn.start_transaction()
+    try:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            cursor.execute(SQL_WALLET_FOR_UPDATE, (user_id,))
+            cursor.fetchone()
+            timings['wallet_lock'] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            cursor.execute(SQL_INSERT_GAME, (user_id, None, 'coinflip'))
+            game_id = cursor.lastrowid
+            timings['insert_game'] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            cursor.execute(SQL_INSERT_BET, (game_id, user_id, 'choice', 'yazi', 1.0))
+            bet_id = cursor.lastrowid
+            timings['insert_bet'] += time.perf_counter() - started
+
+            started = time.perf_counter()
+            cursor.execute(SQL_INSERT_PAYOUT, (bet_id, 0, 'LOSS'))
+            timings['insert_payout'] += time.perf_counter() - started
+    finally:
+        conn.rollback()
+        cursor.close()
+
+    return {name: total / iterations * 1_000_000 for name, total in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user-id', type=int, required=True, help='Wallet\'ı olan bir kullanıcı')
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    for mode, enabled in (('text', False), ('prepared', True)):
+        Config.DB_PREPARED_STATEMENTS = enabled
+        conn = _connect()
+        try:
+            run_round(conn, args.user_id, 50)  # ısınma
+            results[mode] = run_round(conn, args.user_id, args.iterations)
+        finally:
+            conn.close()
+
+    print(f"\n{args.iterations} iterations per statement (µs/statement)")
+    print(f"   {'statement':<15}{'text':>10}{'prepared':>10}{'saving':>10}")
+    for name in results['text']:
+        text, prep = results['text'][name], results['prepared'][name]
+        print(f"   {name:<15}{text:>10.1f}{prep:>10.1f}{(1 - prep / text) * 100:>9.1f}%")
+    print(f"   statement stats: {get_statement_stats()}")
+
+
+if __name__ == '__main__':
+    main()
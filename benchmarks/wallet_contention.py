@@ -0,0 +1,86 @@
+"""
+Wallet contention benchmark - pessimistic vs optimistic concurrency
+
+Aynı wallet üzerinde eşzamanlı coinflip settlement'ları çalıştırır ve her iki
+WALLET_CONCURRENCY_MODE için throughput, gecikme ve hata dağılımını raporlar.
+
+Kullanım (MySQL çalışıyor ve game_db oluşturulmuş olmalı):
+    python benchmarks/wallet_contention.py --user-id 2 --threads 16 --ops 200
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_api.config import Config  # noqa: E402
+from game_api.services.game_service import GameService  # noqa: E402
+from game_api.services.wallet_service import WalletService  # noqa: E402
+
+
+def run_mode(mode, user_id, threads, ops, bet):
+    Config.WALLET_CONCURRENCY_MODE = mode
+
+    latencies = []
+    errors = Counter()
+    lock = threading.Lock()
+
+    def worker(seed):
+        local_latencies = []
+        local_errors = Counter()
+        for i in range(ops):
+            is_win = (seed + i) % 2 == 0
+            started = time.perf_counter()
+            result = GameService.process_game(
+                user_id, 'coinflip', bet, 'choice', 'yazi',
+                {'result': 'yazi' if is_win else 'tura', 'choice': 'yazi', 'is_win': is_win},
+                is_win, bet * 1.95 if is_win else 0
+            )
+            local_latencies.append(time.perf_counter() - started)
+            if not result['success']:
+                local_errors[result.get('error', 'unknown')] += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors.update(local_errors)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    total = len(latencies)
+
+    def pct(p):
+        return latencies[min(total - 1, int(total * p))] * 1000
+
+    print(f"\n[{mode}] {threads} threads x {ops} ops on user {user_id}")
+    print(f"   throughput: {total / elapsed:.1f} ops/s ({elapsed:.2f}s)")
+    print(f"   latency p50={pct(0.50):.1f}ms p95={pct(0.95):.1f}ms p99={pct(0.99):.1f}ms")
+    print(f"   failures: {dict(errors) or 'none'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user-id', type=int, required=True, help='Benchmark için kullanılacak kullanıcı')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--ops', type=int, default=200, help='Thread başına işlem sayısı')
+    parser.add_argument('--bet', type=float, default=1.0)
+    parser.add_argument('--modes', default='pessimistic,optimistic')
+    args = parser.parse_args()
+
+    # Tüm bahisleri karşılayacak kadar bakiye yükle
+    WalletService.deposit(args.user_id, args.threads * args.ops * args.bet * 2)
+
+    for mode in args.modes.split(','):
+        run_mode(mode.strip(), args.user_id, args.threads, args.ops, args.bet)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""
+Statik dosya build'i - frontend/ ve admin_frontend/ için minify, fingerprint ve ön sıkıştırma
+
+Her site için Config.STATIC_DIST_DIR/<site>/ altına yazar:
+    script.3f2a9c1b0d.js      minify edilmiş, içerik hash'li isim (immutable cache)
+    script.3f2a9c1b0d.js.gz   gzip -9
+    script.3f2a9c1b0d.js.br   brotli -q 11 (brotli kuruluysa)
+    index.html (+ .gz/.br)    hash'li isimlere referans verir, her seferinde doğrulanır
+    manifest.json             {"script.js": "script.3f2a9c1b0d.js", ...}
+
+Ayrıca OpenAPI spec'i Config.APISPEC_FILE'a yazılır; SWAGGER_UI=false iken
+sunucu /apispec.json'u Flasgger yüklemeden bu dosyadan servis eder.
+
+Sunucu manifest.json varsa dosyaları buradan servis eder (frontend_routes);
+yoksa kaynak klasörler eskisi gibi servis edilir. Build sonrası sunucu
+yeniden başlatılmalıdır.
+
+JS/CSS minify için rjsmin / rcssmin kuruluysa onlar kullanılır. Kurulu
+değilse CSS'ten yorumlar ve fazla boşluklar atılır, JS olduğu gibi kopyalanır
+(ön sıkıştırma yine yapılır).
+
+Kullanım:
+    python build_static.py
+    python build_static.py --clean      # eski hash'li dosyaları da sil
+    python build_static.py --skip-apispec
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from game_api.config import Config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SITES = {
+    'frontend': os.path.join(BASE_DIR, 'frontend'),
+    'admin_frontend': os.path.join(BASE_DIR, 'admin_frontend'),
+}
+FINGERPRINTED = ('.js', '.css')
+COMPRESSED = ('.js', '.css', '.html', '.svg', '.json', '.txt')
+
+# CSS: string'ler, yorumlar, boşluklar ve geri kalan her şey
+_CSS_TOKEN = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|(\s+)|([^"'/\s]+|/)''', re.S)
+# Bu karakterlerin yanındaki boşluk anlamsız (":" seçicilerde anlamlı olduğu için yok)
+_CSS_TIGHT = set('{};,>')
+
+
+def minify_css(text):
+    if rcssmin is not None:
+        return rcssmin.cssmin(text)
+
+    tokens = []
+    for string, comment, space, other in _CSS_TOKEN.findall(text):
+        if comment:
+            if comment.startswith('/*!'):  # lisans yorumları kalır
+                tokens.append(comment)
+        elif space:
+            tokens.append(' ')
+        else:
+            tokens.append(string or other)
+
+    out = []
+    for i, token in enumerate(tokens):
+        if token == ' ':
+            prev = out[-1][-1:] if out else ''
+            nxt = tokens[i + 1][:1] if i + 1 < len(tokens) else ''
+            if not prev or not nxt or prev in _CSS_TIGHT or nxt in _CSS_TIGHT or nxt == ' ':
+                continue
+        out.append(token)
+    return ''.join(out).replace(';}', '}')
+
+
+def minify_js(text):
+    # Parser olmadan JS'i güvenli küçültmek mümkün değil (string, regex, template literal)
+    if rjsmin is not None:
+        return rjsmin.jsmin(text)
+    return text
+
+
+def fingerprint(name, data):
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+def write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    written = [(path, len(data))]
+
+    if path.endswith(COMPRESSED):
+        variants = [('.gz', gzip.compress(data, 9, mtime=0))]  # mtime=0: aynı girdi -> aynı çıktı
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+                written.append((path + suffix, len(compressed)))
+    return written
+
+
+def build_site(name, source_dir, out_dir, clean):
+    if clean and os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = {}
+    written = []
+    files = sorted(f for f in os.listdir(source_dir) if os.path.isfile(os.path.join(source_dir, f)))
+
+    for filename in files:
+        if not filename.endswith(FINGERPRINTED):
+            continue
+        with open(os.path.join(source_dir, filename), encoding='utf-8') as f:
+            text = f.read()
+        data = (minify_css(text) if filename.endswith('.css') else minify_js(text)).encode('utf-8')
+        manifest[filename] = fingerprint(filename, data)
+        written += write(os.path.join(out_dir, manifest[filename]), data)
+
+    # HTML ve diğer dosyalar sabit isimle; HTML'deki referanslar hash'li isimlere
+    reference = re.compile(r'''((?:href|src)=["'])([^"'?#]+)(["'])''')
+    for filename in files:
+        if filename.endswith(FINGERPRINTED):
+            continue
+        with open(os.path.join(source_dir, filename), 'rb') as f:
+            data = f.read()
+        if filename.endswith('.html'):
+            html = data.decode('utf-8')
+            html = reference.sub(lambda m: m.group(1) + manifest.get(m.group(2), m.group(2)) + m.group(3), html)
+            data = html.encode('utf-8')
+        written += write(os.path.join(out_dir, filename), data)
+
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"{name} -> {out_dir}")
+    for path, size in written:
+        print(f"  {os.path.relpath(path, out_dir):<40} {size:>9,} B")
+
+
+def build_apispec(path):
+    """Uygulamayı veritabanına bağlanmadan kur, spec'i Flasgger ile üret"""
+    from game_api import create_app
+    from game_api.apispec import generate_spec
+    from game_api.utils.json_provider import dumps_bytes
+
+    spec = generate_spec(create_app(init_database=False))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(dumps_bytes(spec))
+    print(f"apispec -> {path} ({len(spec.get('paths', {}))} paths)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Minify, fingerprint and precompress frontend assets')
+    parser.add_argument('--out', default=Config.STATIC_DIST_DIR, help='Output directory')
+    parser.add_argument('--clean', action='store_true', help='Remove previous builds (old hashed files) first')
+    parser.add_argument('--skip-apispec', action='store_true', help='Do not regenerate the OpenAPI spec')
+    args = parser.parse_args()
+
+    print(f"minify: js={'rjsmin' if rjsmin else 'none'}, css={'rcssmin' if rcssmin else 'builtin'}; "
+          f"precompress: gzip{', brotli' if brotli else ''}")
+    for name, source_dir in SITES.items():
+        build_site(name, source_dir, os.path.join(args.out, name), args.clean)
+    if not args.skip_apispec:
+        build_apispec(Config.APISPEC_FILE)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Password hash kalibrasyonu - Hedef süreye uyan en güçlü werkzeug parametrelerini seçer
+
+Bu makinede scrypt (N = 2^14 .. 2^18, r=8, p=1) ve pbkdf2:sha256 iterasyon
+sayılarını ölçer; hedef süreyi aşmayan en yüksek maliyeti önerir. Önerilen
+değer PASSWORD_HASH_METHOD olarak set edilir, mevcut kullanıcılar bir sonraki
+girişlerinde yeni parametrelerle yeniden hash'lenir.
+
+Kullanım:
+    python calibrate_hash.py --target-ms 100
+    python calibrate_hash.py --target-ms 50 --algorithm pbkdf2
+"""
+import argparse
+import statistics
+import time
+from werkzeug.security import generate_password_hash
+
+SCRYPT_CANDIDATES = [f'scrypt:{2 ** exp}:8:1' for exp in range(14, 19)]
+PBKDF2_CANDIDATES = [f'pbkdf2:sha256:{n}' for n in (200000, 400000, 600000, 900000, 1200000)]
+
+
+def measure(method, samples):
+    """Bir hash'in ortanca süresi (ms)"""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        generate_password_hash('calibration-password', method)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(candidates, target_ms, samples):
+    chosen = None
+    for method in candidates:
+        elapsed = measure(method, samples)
+        fits = elapsed <= target_ms
+        print(f"{method:<28} {elapsed:8.1f} ms {'ok' if fits else 'too slow'}")
+        if not fits:
+            break
+        chosen = method
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pick password hash parameters for a target latency')
+    parser.add_argument('--target-ms', type=float, default=100, help='Max time per hash (ms)')
+    parser.add_argument('--algorithm', choices=['scrypt', 'pbkdf2'], default='scrypt')
+    parser.add_argument('--samples', type=int, default=5, help='Measurements per candidate')
+    args = parser.parse_args()
+
+    candidates = SCRYPT_CANDIDATES if args.algorithm == 'scrypt' else PBKDF2_CANDIDATES
+    chosen = calibrate(candidates, args.target_ms, args.samples)
+
+    if chosen is None:
+        print(f"\nEven the cheapest {args.algorithm} setting exceeds {args.target_ms} ms; keeping {candidates[0]}")
+        chosen = candidates[0]
+
+    print(f"\nPASSWORD_HASH_METHOD={chosen}")
+
+
+if __name__ == '__main__':
+    main()
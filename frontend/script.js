@@ -10,6 +10,15 @@ class GameManager {
         this.activeGame = 'coinflip';
         this.gameHistory = [];
         this.csrfToken = null;
+        this.ruleSet = null;
+
+        // Canlı olaylar (/me/ws)
+        this.socket = null;
+        this.socketTimer = null;
+        this.socketRetry = 0;
+        this.lastEventId = null;
+        this.bjPending = false;
+        this.bjLastState = null;
 
         this.init();
     }
@@ -156,12 +165,20 @@ class GameManager {
 
     async checkAuth() {
         try {
-            const response = await fetch(`${this.apiUrl}/me`, {
+            // Profil, bakiye, CSRF token ve aktif oyun tek istekte
+            const response = await fetch(`${this.apiUrl}/bootstrap`, {
                 credentials: 'include'
             });
 
             if (response.ok) {
-                const user = await response.json();
+                const data = await response.json();
+                const user = data.user;
+                if (data.active_game && data.active_game.has_active_game) {
+                    user.has_active_game = true;
+                    user.active_game = data.active_game;
+                }
+                this.csrfToken = data.csrf_token;
+                this.ruleSet = data.rule_set;
                 this.currentUser = user;
                 await this.onLogin(user);
             }
@@ -248,8 +265,10 @@ class GameManager {
         this.historySection.classList.remove('hidden');
         this.userEmail.textContent = user.email;
 
-        // CSRF token al
-        await this.fetchCsrfToken();
+        // CSRF token al (bootstrap ile geldiyse tekrar isteme)
+        if (!this.csrfToken) {
+            await this.fetchCsrfToken();
+        }
 
         // Eğer user objesinde balance varsa direkt kullan, yoksa fetch et
         if (user.balance !== undefined && user.balance !== null) {
@@ -260,6 +279,7 @@ class GameManager {
         }
 
         this.enableGameControls();
+        this.connectEvents();
 
         // Aktif oyun kontrolü
         if (user.has_active_game && user.active_game) {
@@ -336,6 +356,7 @@ class GameManager {
 
 
     onLogout() {
+        this.disconnectEvents();
         this.guestButtons.classList.remove('hidden');
         this.userInfo.classList.add('hidden');
         this.walletButtons.classList.add('hidden');
@@ -417,6 +438,89 @@ class GameManager {
         }
     }
 
+    // ========================================
+    // Live Events (/me/ws)
+    // ========================================
+
+    connectEvents() {
+        if (this.socket || !window.WebSocket || !this.currentUser) return;
+
+        // Kopunca son olay id'siyle bağlan; aradaki olaylar sunucudan tekrar gelir
+        const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const query = this.lastEventId ? `?last_event_id=${encodeURIComponent(this.lastEventId)}` : '';
+        const socket = new WebSocket(`${scheme}://${window.location.host}/me/ws${query}`);
+        this.socket = socket;
+
+        socket.onopen = () => {
+            this.socketRetry = 0;
+        };
+
+        socket.onmessage = (e) => {
+            this.handleLiveEvent(JSON.parse(e.data));
+        };
+
+        socket.onclose = () => {
+            if (this.socket !== socket) return;  // disconnectEvents() kapattı
+            this.socket = null;
+            // Async sunucu yoksa ya da bağlantı düştüyse artan aralıklarla tekrar dene
+            const delay = Math.min(60000, 1000 * 2 ** this.socketRetry++);
+            this.socketTimer = setTimeout(() => this.connectEvents(), delay);
+        };
+    }
+
+    disconnectEvents() {
+        clearTimeout(this.socketTimer);
+        const socket = this.socket;
+        this.socket = null;
+        this.socketRetry = 0;
+        this.lastEventId = null;
+        if (socket) socket.close();
+    }
+
+    handleLiveEvent(message) {
+        if (message.id) {
+            this.lastEventId = message.id;
+        }
+
+        switch (message.event) {
+            case 'ready':
+                // Kaçırılan olaylar gönderilemiyor: bakiyeyi yeniden oku
+                if (message.data.reset) this.fetchBalance();
+                break;
+            case 'balance':
+                this.balance = message.data.balance;
+                this.updateBalanceDisplay();
+                break;
+            case 'blackjack':
+                this.applyBlackjackState(message.data);
+                break;
+            case 'rules':
+                this.ruleSet = message.data.rule_set;
+                this.showNotification('Payout rules have been updated.', 'success');
+                break;
+        }
+    }
+
+    applyBlackjackState(data) {
+        // Bu sekmenin kendi isteğinin yankısı: cevap zaten (ya da birazdan) çizilir
+        if (this.bjPending || JSON.stringify([data.player_hand, data.status]) === this.bjLastState) return;
+
+        const isOver = data.status !== 'playing';
+        if (!isOver && !this.bjGameActive) {
+            // El başka bir sekmede başlatıldı
+            this.bjGameActive = true;
+            this.bjBetSection.classList.add('hidden');
+            this.bjActions.classList.remove('hidden');
+            this.bjPlayBtn.classList.add('hidden');
+        }
+        if (!this.bjGameActive) return;
+
+        this.renderBlackjackHands(data, isOver);
+        if (isOver) {
+            this.endBlackjack(data);
+        }
+    }
+
     updateBalanceDisplay() {
         this.balanceValue.textContent = this.balance.toFixed(2);
     }
@@ -943,6 +1047,7 @@ class GameManager {
 
         this.bjPlayBtn.disabled = true;
         this.bjMessage.classList.add('hidden');
+        this.bjPending = true;
 
         try {
             const response = await fetch(`${this.apiUrl}/game/blackjack/start`, {
@@ -976,10 +1081,13 @@ class GameManager {
             console.error('Blackjack start error:', error);
             this.showNotification('Bağlantı hatası!', 'error');
             this.bjPlayBtn.disabled = false;
+        } finally {
+            this.bjPending = false;
         }
     }
 
     async blackjackHit() {
+        this.bjPending = true;
         try {
             const response = await fetch(`${this.apiUrl}/game/blackjack/hit`, {
                 method: 'POST',
@@ -1002,10 +1110,13 @@ class GameManager {
         } catch (error) {
             console.error('Blackjack hit error:', error);
             this.showNotification('Bağlantı hatası!', 'error');
+        } finally {
+            this.bjPending = false;
         }
     }
 
     async blackjackStand() {
+        this.bjPending = true;
         try {
             const response = await fetch(`${this.apiUrl}/game/blackjack/stand`, {
                 method: 'POST',
@@ -1024,10 +1135,14 @@ class GameManager {
         } catch (error) {
             console.error('Blackjack stand error:', error);
             this.showNotification('Bağlantı hatası!', 'error');
+        } finally {
+            this.bjPending = false;
         }
     }
 
     renderBlackjackHands(data, showAllDealer = false) {
+        this.bjLastState = JSON.stringify([data.player_hand, data.status]);
+
         // Clear cards
         this.dealerCards.innerHTML = '';
         this.playerCards.innerHTML = '';
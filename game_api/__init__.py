@@ -3,21 +3,33 @@ from flask_session import Session
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from flasgger import Swagger
 
 from .config import Config
+from .apispec import init_swagger
+from .ratelimit import DEFAULT_LIMITS, route_cost  # "sqlite://" storage şemasını da kaydeder
+from .utils.compression import compress_response
+from .utils.json_provider import OddJSONProvider
 
 # Global limiter instance
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://",
+    default_limits=DEFAULT_LIMITS,
+    default_limits_cost=route_cost,
+    storage_uri=Config.RATELIMIT_STORAGE_URI,
+    strategy=Config.RATELIMIT_STRATEGY,
 )
 
 
-def create_app():
+def create_app(init_database=True):
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = OddJSONProvider(app)
+
+    # ======================
+    # Compression
+    # ======================
+    # after_request'ler ters sırada çalışır: ilk kaydedilen en son çalışır
+    app.after_request(compress_response)
 
     CORS(
         app,
@@ -33,38 +45,7 @@ def create_app():
     # ======================
     # Swagger (Flasgger)
     # ======================
-    swagger_template = {
-        "swagger": "2.0",
-        "info": {
-            "title": "Casino Game API",
-            "description": "Session-based authentication + CSRF protected API",
-            "version": "1.0.0"
-        },
-        "securityDefinitions": {
-            "sessionAuth": {
-                "type": "apiKey",
-                "in": "cookie",
-                "name": "session"
-            }
-        }
-    }
-
-    swagger_config = {
-        "headers": [],
-        "specs": [
-            {
-                "endpoint": "apispec",
-                "route": "/apispec.json",
-                "rule_filter": lambda rule: True,
-                "model_filter": lambda tag: True,
-            }
-        ],
-        "static_url_path": "/flasgger_static",
-        "swagger_ui": True,
-        "specs_route": "/apidocs/",
-    }
-
-    Swagger(app, template=swagger_template, config=swagger_config)
+    init_swagger(app)
 
     # ======================
     # Rate Limiter
@@ -79,6 +60,36 @@ def create_app():
             'retry_after': e.description
         }), 429
 
+    # ======================
+    # Database Circuit Breaker
+    # ======================
+    from .circuit_breaker import CircuitOpenError
+
+    @app.errorhandler(CircuitOpenError)
+    def db_unavailable_handler(e):
+        response = jsonify({
+            'message': 'Database temporarily unavailable, please try again later.',
+            'error': 'db_unavailable',
+            'retry_after': e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+
+    # ======================
+    # Password Hashing Queue
+    # ======================
+    from .utils.passwords import PasswordHasherBusy
+
+    @app.errorhandler(PasswordHasherBusy)
+    def hasher_busy_handler(e):
+        response = jsonify({
+            'message': 'Server is busy, please try again shortly.',
+            'error': 'hasher_busy',
+            'retry_after': e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+
     # ======================
     # Blueprints
     # ======================
@@ -100,14 +111,22 @@ def create_app():
     from .blackjack import blackjack_bp
     app.register_blueprint(blackjack_bp)
 
+    from .bootstrap import bootstrap_bp
+    app.register_blueprint(bootstrap_bp)
+
     from .admin import admin_bp
     app.register_blueprint(admin_bp)
 
+    from .health import health_bp
+    app.register_blueprint(health_bp)
+
     # ======================
     # DB Init
     # ======================
-    from .database import init_db
-    init_db()
+    # build_static.py spec üretirken veritabanına dokunmaz
+    if init_database:
+        from .database import init_db
+        init_db()
 
     # ======================
     # Frontend Routes
@@ -1,15 +1,126 @@
-from flask import Blueprint, jsonify, request
-from .database import get_db_connection
+import heapq
+from itertools import islice
+from flask import Blueprint, Response, jsonify, request
+from .config import Config
+from .database import get_db_connection, note_write, replica_read
+from .events import bus, sse_stream
+from .sharding import fan_out
 from .auth import admin_required
+from .rules import get_rule_set_names
 from .services.game_service import GameService
+from .services.user_service import UserService
 from .utils.logger import admin_logger
 from .utils.csrf import csrf_required
+from .utils.streaming import CursorBatches, batched, stream_json_array
 from mysql.connector import Error
 
 admin_bp = Blueprint('admin', __name__)
 
+# Rate limiter
+def get_limiter():
+    from . import limiter
+    return limiter
+
+
+def get_user_emails(user_ids):
+    """
+    User ID'lerini email'lere eşler (users tablosu directory veritabanında)
+
+    Returns:
+        dict: {user_id: email}
+    """
+    user_ids = sorted(set(user_ids))
+    if not user_ids:
+        return {}
+
+    conn = get_db_connection()
+    if not conn:
+        raise ConnectionError("Database connection failed")
+
+    cursor = conn.cursor()
+    try:
+        placeholders = ', '.join(['%s'] * len(user_ids))
+        cursor.execute(f"SELECT user_id, email FROM users WHERE user_id IN ({placeholders})", user_ids)
+        return dict(cursor.fetchall())
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def attach_wallets(users):
+    """
+    Kullanıcı satırlarına bakiye ve para birimini ekle (wallets shard'larda)
+
+    Returns:
+        list: aynı satırlar, balance ve currency alanlarıyla
+    """
+    user_ids = [user['user_id'] for user in users]
+    placeholders = ', '.join(['%s'] * len(user_ids))
+
+    def fetch_wallets(shard_cursor):
+        shard_cursor.execute(
+            f"SELECT user_id, balance, currency FROM wallets WHERE user_id IN ({placeholders})",
+            user_ids
+        )
+        return shard_cursor.fetchall()
+
+    wallets = {w['user_id']: w for rows in fan_out(fetch_wallets) for w in rows}
+    for user in users:
+        wallet = wallets.get(user['user_id'], {})
+        user['balance'] = wallet.get('balance')
+        user['currency'] = wallet.get('currency')
+    return users
+
+SQL_USER_PAGE = """
+    SELECT u.user_id, u.email, u.status, u.is_admin, u.created_at
+    FROM users u
+    {where}
+    ORDER BY u.created_at DESC, u.user_id DESC
+    LIMIT %s
+"""
+
+
+def fetch_user_page(after=None):
+    """
+    Bir sayfa kullanıcı (keyset: created_at, user_id azalan)
+
+    Bağlantı sayfa okunur okunmaz bırakılır; attach_wallets() aynı pool'dan
+    bağlantı alırken stream bir bağlantıyı tutmaz (eşzamanlı export'lar pool'u
+    tüketmez).
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise ConnectionError("Database connection failed")
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        if after is None:
+            cursor.execute(SQL_USER_PAGE.format(where=''), (Config.STREAM_BATCH_SIZE,))
+        else:
+            created_at, user_id = after
+            cursor.execute(
+                SQL_USER_PAGE.format(where="WHERE u.created_at < %s OR (u.created_at = %s AND u.user_id < %s)"),
+                (created_at, created_at, user_id, Config.STREAM_BATCH_SIZE)
+            )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def user_batches(page):
+    """Sayfaları bakiyeleriyle üret; ilk sayfa view'da okunur (hata 500 dönebilsin)"""
+    while page:
+        yield attach_wallets(page)
+        if len(page) < Config.STREAM_BATCH_SIZE:
+            return
+        last = page[-1]
+        page = fetch_user_page((last['created_at'], last['user_id']))
+
+
 @admin_bp.route('/admin/users', methods=['GET'])
 @admin_required
+@replica_read
 def list_users():
     """
     List all users (Admin only)
@@ -51,25 +162,13 @@ def list_users():
       403:
         description: Admin access required
     """
-    conn = get_db_connection()
-    if not conn: return jsonify({'message': 'Database error'}), 500
-    
-    cursor = conn.cursor(dictionary=True)
     try:
-        query = """
-            SELECT u.user_id, u.email, u.status, u.is_admin, u.created_at, w.balance, w.currency
-            FROM users u
-            LEFT JOIN wallets w ON u.user_id = w.user_id
-            ORDER BY u.created_at DESC
-        """
-        cursor.execute(query)
-        users = cursor.fetchall()
-        return jsonify(users)
-    except Error as e:
+        first_page = fetch_user_page()
+    except (ConnectionError, Error) as e:
         return jsonify({'message': f'Error: {e}'}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+    # Kullanıcılar sayfa sayfa okunur; bakiyeler her sayfa için shard'lardan
+    return stream_json_array(user_batches(first_page))
 
 @admin_bp.route('/admin/user/<int:user_id>/ban', methods=['POST'])
 @admin_required
@@ -141,6 +240,8 @@ def ban_user(user_id):
 
         cursor.execute("UPDATE users SET status = 'BANNED' WHERE user_id = %s", (user_id,))
         conn.commit()
+        note_write()
+        UserService.invalidate(user_id)
         return jsonify({'message': 'User banned.'})
     except Error as e:
         return jsonify({'message': f'Error: {e}'}), 500
@@ -208,6 +309,8 @@ def unban_user(user_id):
     try:
         cursor.execute("UPDATE users SET status = 'ACTIVE' WHERE user_id = %s", (user_id,))
         conn.commit()
+        note_write()
+        UserService.invalidate(user_id)
         return jsonify({'message': 'User ban removed.'})
     except Error as e:
         return jsonify({'message': f'Error: {e}'}), 500
@@ -217,6 +320,7 @@ def unban_user(user_id):
 
 @admin_bp.route('/admin/user/<int:user_id>/history', methods=['GET'])
 @admin_required
+@replica_read
 def user_history(user_id):
     """
     Get user transaction history (Admin only)
@@ -260,7 +364,7 @@ def user_history(user_id):
       404:
         description: User wallet not found
     """
-    conn = get_db_connection()
+    conn = get_db_connection(shard_key=user_id)
     if not conn: return jsonify({'message': 'Database error'}), 500
     
     cursor = conn.cursor(dictionary=True)
@@ -269,8 +373,10 @@ def user_history(user_id):
         cursor.execute("SELECT wallet_id FROM wallets WHERE user_id = %s", (user_id,))
         wallet = cursor.fetchone()
         if not wallet:
+            cursor.close()
+            conn.close()
             return jsonify({'message': 'Wallet not found'}), 404
-            
+
         wallet_id = wallet['wallet_id']
         
         # Get transactions
@@ -282,18 +388,18 @@ def user_history(user_id):
             LIMIT 50
         """
         cursor.execute(query, (wallet_id,))
-        history = cursor.fetchall()
-        return jsonify(history)
     except Error as e:
-        return jsonify({'message': f'Error: {e}'}), 500
-    finally:
         cursor.close()
         conn.close()
+        return jsonify({'message': f'Error: {e}'}), 500
+    
+    return stream_json_array(CursorBatches(cursor, conn))
 
 # ============= DASHBOARD APIs =============
 
 @admin_bp.route('/admin/dashboard/stats', methods=['GET'])
 @admin_required
+@replica_read
 def dashboard_stats():
     """
     Get dashboard statistics (Admin only)
@@ -373,12 +479,7 @@ def dashboard_stats():
     """
     days = request.args.get('days', 30, type=int)
     
-    conn = get_db_connection()
-    if not conn: 
-        return jsonify({'message': 'Database error'}), 500
-    
-    cursor = conn.cursor(dictionary=True)
-    try:
+    def shard_stats(cursor):
         # General game statistics
         cursor.execute("""
             SELECT 
@@ -408,16 +509,60 @@ def dashboard_stats():
             AND g.started_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
             GROUP BY game_type
         """, (days,))
-        game_type_stats_raw = cursor.fetchall()
+        game_types = cursor.fetchall()
+        
+        # Total balance
+        cursor.execute("SELECT COALESCE(SUM(balance), 0) as total_balance FROM wallets")
+        wallet_stats = cursor.fetchone()
+        
+        # Transaction statistics
+        cursor.execute("""
+            SELECT 
+                tx_type,
+                COUNT(*) as count,
+                COALESCE(SUM(amount), 0) as total_amount
+            FROM transactions
+            WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+            GROUP BY tx_type
+        """, (days,))
+        transactions = cursor.fetchall()
+        
+        # Games per rule set (rule_sets directory veritabanında)
+        cursor.execute("""
+            SELECT rule_set_id, COUNT(*) as game_count
+            FROM games
+            GROUP BY rule_set_id
+        """)
+        rule_set_games = cursor.fetchall()
+        
+        return game_stats, game_types, wallet_stats, transactions, rule_set_games
+    
+    conn = get_db_connection()
+    if not conn: 
+        return jsonify({'message': 'Database error'}), 500
+    
+    cursor = conn.cursor(dictionary=True)
+    try:
+        # Shard'larda paralel çalıştır ve birleştir (her kullanıcı tek shard'da,
+        # bu yüzden unique_players toplanabilir)
+        shard_results = fan_out(shard_stats)
+        
+        game_stats = {
+            key: sum((r[0][key] or 0) for r in shard_results)
+            for key in ('total_games', 'unique_players', 'total_bets', 'total_payouts', 'total_wins', 'total_losses')
+        }
         
         # Format and ensure all game types are present
         game_types_map = {}
-        for gt in game_type_stats_raw:
-            game_types_map[gt['game_type']] = {
-                'game_type': gt['game_type'],
-                'count': int(gt['count'] or 0),
-                'total_bets': float(gt['total_bets'] or 0)
-            }
+        for r in shard_results:
+            for gt in r[1]:
+                entry = game_types_map.setdefault(gt['game_type'], {
+                    'game_type': gt['game_type'],
+                    'count': 0,
+                    'total_bets': 0.0
+                })
+                entry['count'] += int(gt['count'] or 0)
+                entry['total_bets'] += float(gt['total_bets'] or 0)
         
         # Ensure all three game types are represented
         for game_type in ['coinflip', 'roulette', 'blackjack']:
@@ -442,53 +587,28 @@ def dashboard_stats():
         user_stats = cursor.fetchone()
         
         # Total balance
-        cursor.execute("SELECT COALESCE(SUM(balance), 0) as total_balance FROM wallets")
-        wallet_stats = cursor.fetchone()
-        
-        # Transaction statistics
-        cursor.execute("""
-            SELECT 
-                tx_type,
-                COUNT(*) as count,
-                COALESCE(SUM(amount), 0) as total_amount
-            FROM transactions
-            WHERE created_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-            GROUP BY tx_type
-        """, (days,))
-        tx_stats_raw = cursor.fetchall()
+        wallet_stats = {'total_balance': sum((r[2]['total_balance'] or 0) for r in shard_results)}
         
         # Ensure we always have DEPOSIT and WITHDRAW entries
-        tx_stats = []
-        deposit_found = False
-        withdraw_found = False
-        for tx in tx_stats_raw:
-            tx_stats.append({
-                'tx_type': tx['tx_type'],
-                'count': int(tx['count'] or 0),
-                'total_amount': float(tx['total_amount'] or 0)
-            })
-            if tx['tx_type'] == 'DEPOSIT':
-                deposit_found = True
-            if tx['tx_type'] == 'WITHDRAW':
-                withdraw_found = True
+        tx_totals = {'DEPOSIT': {'count': 0, 'total_amount': 0.0}, 'WITHDRAW': {'count': 0, 'total_amount': 0.0}}
+        for r in shard_results:
+            for tx in r[3]:
+                totals = tx_totals.setdefault(tx['tx_type'], {'count': 0, 'total_amount': 0.0})
+                totals['count'] += int(tx['count'] or 0)
+                totals['total_amount'] += float(tx['total_amount'] or 0)
         
-        if not deposit_found:
-            tx_stats.append({'tx_type': 'DEPOSIT', 'count': 0, 'total_amount': 0})
-        if not withdraw_found:
-            tx_stats.append({'tx_type': 'WITHDRAW', 'count': 0, 'total_amount': 0})
+        tx_stats = [{'tx_type': tx_type, **totals} for tx_type, totals in tx_totals.items()]
         
         # Rule set statistics
-        cursor.execute("""
-            SELECT 
-                rs.rule_set_id,
-                rs.name,
-                rs.is_active,
-                COUNT(g.game_id) as game_count
-            FROM rule_sets rs
-            LEFT JOIN games g ON g.rule_set_id = rs.rule_set_id
-            GROUP BY rs.rule_set_id
-        """)
+        rule_set_games = {}
+        for r in shard_results:
+            for row in r[4]:
+                rule_set_games[row['rule_set_id']] = rule_set_games.get(row['rule_set_id'], 0) + row['game_count']
+        
+        cursor.execute("SELECT rule_set_id, name, is_active FROM rule_sets ORDER BY rule_set_id")
         rule_stats = cursor.fetchall()
+        for rs in rule_stats:
+            rs['game_count'] = rule_set_games.get(rs['rule_set_id'], 0)
         
         # Calculations
         total_bets = float(game_stats['total_bets'] or 0)
@@ -525,7 +645,7 @@ def dashboard_stats():
             'rule_sets': rule_stats
         })
         
-    except Error as e:
+    except (Error, ConnectionError) as e:
         admin_logger.error(f"Dashboard stats error: {e}")
         return jsonify({'message': f'Error: {e}'}), 500
     finally:
@@ -534,6 +654,7 @@ def dashboard_stats():
 
 @admin_bp.route('/admin/dashboard/recent-games', methods=['GET'])
 @admin_required
+@replica_read
 def recent_games():
     """
     Get recent games (Admin only)
@@ -596,60 +717,119 @@ def recent_games():
     limit = request.args.get('limit', 20, type=int)
     game_type = request.args.get('game_type')
     
-    conn = get_db_connection()
-    if not conn: 
-        return jsonify({'message': 'Database error'}), 500
+    sql = """
+        SELECT 
+            g.game_id,
+            g.game_type,
+            g.game_result,
+            g.started_at,
+            g.ended_at,
+            g.user_id,
+            g.rule_set_id,
+            b.stake_amount,
+            p.win_amount,
+            p.outcome
+        FROM games g
+        LEFT JOIN bets b ON b.game_id = g.game_id
+        LEFT JOIN payouts p ON p.bet_id = b.bet_id
+        WHERE g.status = 'COMPLETED'
+    """
+    params = []
     
-    cursor = conn.cursor(dictionary=True)
-    try:
-        sql = """
-            SELECT 
-                g.game_id,
-                g.game_type,
-                g.game_result,
-                g.started_at,
-                g.ended_at,
-                u.email as player_email,
-                rs.name as rule_set_name,
-                b.stake_amount,
-                p.win_amount,
-                p.outcome
-            FROM games g
-            JOIN users u ON g.user_id = u.user_id
-            LEFT JOIN rule_sets rs ON g.rule_set_id = rs.rule_set_id
-            LEFT JOIN bets b ON b.game_id = g.game_id
-            LEFT JOIN payouts p ON p.bet_id = b.bet_id
-            WHERE g.status = 'COMPLETED'
-        """
-        params = []
-        
-        if game_type:
-            sql += " AND g.game_type = %s"
-            params.append(game_type)
-        
-        sql += " ORDER BY g.started_at DESC LIMIT %s"
-        params.append(limit)
-        
+    if game_type:
+        sql += " AND g.game_type = %s"
+        params.append(game_type)
+    
+    sql += " ORDER BY g.started_at DESC LIMIT %s"
+    params.append(limit)
+    
+    def shard_recent(cursor):
         cursor.execute(sql, params)
-        games = cursor.fetchall()
+        return cursor.fetchall()
+    
+    def with_names(games):
+        # users ve rule_sets directory veritabanında - parça başına birer sorgu
+        emails = get_user_emails(game['user_id'] for game in games)
+        rule_set_names = get_rule_set_names(game['rule_set_id'] for game in games)
         
-        # Format amounts
         for game in games:
-            if game['stake_amount']:
-                game['stake_amount'] = float(game['stake_amount'])
-            if game['win_amount']:
-                game['win_amount'] = float(game['win_amount'])
-        
-        return jsonify(games)
-        
-    except Error as e:
+            game['player_email'] = emails.get(game.pop('user_id'))
+            game['rule_set_name'] = rule_set_names.get(game.pop('rule_set_id'))
+        return games
+    
+    try:
+        shard_rows = fan_out(shard_recent)
+    except (Error, ConnectionError) as e:
         return jsonify({'message': f'Error: {e}'}), 500
-    finally:
-        cursor.close()
-        conn.close()
+    
+    # Her shard'ın son `limit` oyunu zaten sıralı -> birleştirerek kes
+    games = islice(heapq.merge(*shard_rows, key=lambda game: game['started_at'], reverse=True), limit)
+    return stream_json_array(with_names(batch) for batch in batched(games))
+
+@admin_bp.route('/admin/events', methods=['GET'])
+@get_limiter().exempt
+@admin_required
+def live_events():
+    """
+    Live game feed (Admin only)
+
+    ---
+    tags:
+      - Admin Dashboard
+    summary: Server-sent events stream of settled games
+    description: |
+      Streams every game settled by this server process as `game` events
+      (the game row plus running totals since the process started), so the
+      dashboard does not have to poll recent-games and stats.
+
+      The first event is `ready`. Its `reset` flag is true when the
+      requested `Last-Event-ID` can no longer be replayed (too old or from
+      another process); the client should then reload the dashboard over
+      REST. Otherwise missed events are replayed from a bounded ring.
+      Slow clients whose buffer fills up are disconnected and resume with
+      `Last-Event-ID`. Streams close after EVENTS_STREAM_MAX_AGE seconds
+      and reconnect automatically.
+    security:
+      - session: []
+      - admin: []
+    produces:
+      - text/event-stream
+    parameters:
+      - in: header
+        name: Last-Event-ID
+        type: string
+        required: false
+        description: Resume after this event (sent automatically by EventSource)
+      - in: query
+        name: last_event_id
+        type: string
+        required: false
+        description: Same as the Last-Event-ID header
+    responses:
+      200:
+        description: Event stream
+      401:
+        description: Not authenticated
+      403:
+        description: Admin access required
+      503:
+        description: Too many open streams on this server process
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription = bus.subscribe(last_event_id, topics={'game'})
+    if subscription is None:
+        return jsonify({'message': 'Too many live event streams, try again later'}), 503
+    
+    response = Response(sse_stream(subscription), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: olayları tamponlama
+    # Client koptuğunda generator hiç başlamamış olabilir
+    response.call_on_close(lambda: bus.unsubscribe(subscription))
+    return response
 
 @admin_bp.route('/admin/dashboard/top-players', methods=['GET'])
 @admin_required
+@replica_read
 def top_players():
     """
     Get top players (Admin only)
@@ -726,74 +906,71 @@ def top_players():
     days = request.args.get('days', 30, type=int)
     limit = request.args.get('limit', 10, type=int)
     
-    conn = get_db_connection()
-    if not conn: 
-        return jsonify({'message': 'Database error'}), 500
-    
-    cursor = conn.cursor(dictionary=True)
-    try:
-        # Most active
-        cursor.execute("""
+    # Oyuncu başına toplamlar - bir kullanıcının tüm oyunları tek shard'da, bu yüzden
+    # her shard'ın ilk `limit` oyuncusu birleştirilip kesilince sonuç kesin olur.
+    # CTE bir kez hesaplanır, üç sıralama aynı toplamlardan alınır.
+    rankings = {
+        'most_active': ('game_count', lambda p: p['game_count']),
+        'top_winners': ('total_payouts - total_bets', lambda p: p['total_payouts'] - p['total_bets']),
+        'top_losers': ('total_bets - total_payouts', lambda p: p['total_bets'] - p['total_payouts']),
+    }
+    sql = """
+        WITH totals AS (
             SELECT 
-                u.user_id,
-                u.email,
+                g.user_id,
                 COUNT(g.game_id) as game_count,
                 COALESCE(SUM(b.stake_amount), 0) as total_bets,
                 COALESCE(SUM(p.win_amount), 0) as total_payouts
-            FROM users u
-            JOIN games g ON g.user_id = u.user_id
+            FROM games g
             LEFT JOIN bets b ON b.game_id = g.game_id
             LEFT JOIN payouts p ON p.bet_id = b.bet_id
             WHERE g.started_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-            GROUP BY u.user_id
-            ORDER BY game_count DESC
-            LIMIT %s
-        """, (days, limit))
-        most_active = cursor.fetchall()
+            GROUP BY g.user_id
+        )
+    """ + " UNION ALL ".join(
+        f"(SELECT '{name}' AS ranking, t.* FROM totals t ORDER BY {order} DESC LIMIT %s)"
+        for name, (order, _) in rankings.items()
+    )
+    
+    def shard_players(cursor):
+        cursor.execute(sql, (days, *[limit] * len(rankings)))
+        ranked = {name: [] for name in rankings}
+        for player in cursor.fetchall():
+            ranked[player.pop('ranking')].append(player)
+        return ranked
+    
+    try:
+        shard_rows = fan_out(shard_players)
         
-        # Top winners
-        cursor.execute("""
-            SELECT 
-                u.user_id,
-                u.email,
-                COALESCE(SUM(p.win_amount), 0) as total_winnings,
-                COALESCE(SUM(b.stake_amount), 0) as total_bets,
-                (COALESCE(SUM(p.win_amount), 0) - COALESCE(SUM(b.stake_amount), 0)) as net_profit
-            FROM users u
-            JOIN games g ON g.user_id = u.user_id
-            LEFT JOIN bets b ON b.game_id = g.game_id
-            LEFT JOIN payouts p ON p.bet_id = b.bet_id
-            WHERE g.started_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-            GROUP BY u.user_id
-            ORDER BY net_profit DESC
-            LIMIT %s
-        """, (days, limit))
-        top_winners = cursor.fetchall()
+        def top(name):
+            # UNION ALL sırayı korumaz: shard başına en fazla `limit` satır, burada sıralanır
+            key = rankings[name][1]
+            ranked = (sorted(rows[name], key=key, reverse=True) for rows in shard_rows)
+            return list(islice(heapq.merge(*ranked, key=key, reverse=True), limit))
         
-        # Top losers
-        cursor.execute("""
-            SELECT 
-                u.user_id,
-                u.email,
-                COALESCE(SUM(b.stake_amount), 0) as total_bets,
-                COALESCE(SUM(p.win_amount), 0) as total_winnings,
-                (COALESCE(SUM(b.stake_amount), 0) - COALESCE(SUM(p.win_amount), 0)) as net_loss
-            FROM users u
-            JOIN games g ON g.user_id = u.user_id
-            LEFT JOIN bets b ON b.game_id = g.game_id
-            LEFT JOIN payouts p ON p.bet_id = b.bet_id
-            WHERE g.started_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-            GROUP BY u.user_id
-            ORDER BY net_loss DESC
-            LIMIT %s
-        """, (days, limit))
-        top_losers = cursor.fetchall()
+        most_active = top('most_active')
+        top_winners = top('top_winners')
+        top_losers = top('top_losers')
+        
+        emails = get_user_emails(p['user_id'] for p in most_active + top_winners + top_losers)
         
-        # Format amounts
-        for player in most_active + top_winners + top_losers:
-            for key in ['total_bets', 'total_payouts', 'total_winnings', 'net_profit', 'net_loss']:
-                if key in player and player[key]:
-                    player[key] = float(player[key])
+        def row(player, **fields):
+            return {'user_id': player['user_id'], 'email': emails.get(player['user_id']), **fields}
+        
+        most_active = [
+            row(p, game_count=p['game_count'], total_bets=p['total_bets'], total_payouts=p['total_payouts'])
+            for p in most_active
+        ]
+        top_winners = [
+            row(p, total_winnings=p['total_payouts'], total_bets=p['total_bets'],
+                net_profit=p['total_payouts'] - p['total_bets'])
+            for p in top_winners
+        ]
+        top_losers = [
+            row(p, total_bets=p['total_bets'], total_winnings=p['total_payouts'],
+                net_loss=p['total_bets'] - p['total_payouts'])
+            for p in top_losers
+        ]
         
         return jsonify({
             'period_days': days,
@@ -802,14 +979,12 @@ def top_players():
             'top_losers': top_losers
         })
         
-    except Error as e:
+    except (Error, ConnectionError) as e:
         return jsonify({'message': f'Error: {e}'}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 @admin_bp.route('/admin/user/<int:user_id>/games', methods=['GET'])
 @admin_required
+@replica_read
 def user_games(user_id):
     """
     Get a user's game history (Admin only)
@@ -875,5 +1050,4 @@ def user_games(user_id):
     offset = request.args.get('offset', 0, type=int)
     game_type = request.args.get('game_type')
     
-    games = GameService.get_user_games(user_id, game_type, limit, offset)
-    return jsonify(games)
+    return stream_json_array(GameService.get_user_games(user_id, game_type, limit, offset))
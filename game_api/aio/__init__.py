@@ -0,0 +1,90 @@
+"""
+Async (ASGI) serving modu - oyun ve wallet endpoint'leri asyncio üzerinde
+
+Threaded Flask modunda her bekleyen istek bir thread tutar; blackjack'in
+çok adımlı akışları ve wallet transaction'ları MySQL beklerken thread'ler
+boşta kalır. Bu modda aynı endpoint'ler Quart + aiomysql ile çalışır:
+MySQL beklenirken event loop diğer bağlantılara devam eder.
+
+Kapsam (aynı URL, aynı cevaplar):
+    GET  /wallets/me, POST /wallets/me/deposit, /wallets/me/withdraw
+    POST /game/coinflip/play, /game/roulette/play
+    GET  /game/blackjack/active, POST /game/blackjack/resume, start, hit, stand
+    GET  /health
+    WS   /me/ws  (oyuncu olayları: bakiye, blackjack eli, rule set; bkz. aio/events.py)
+
+Login/register/logout, admin ve diğer endpoint'ler threaded sunucuda kalır;
+iki mod aynı session dosyalarını, circuit breaker'ları, rate limit
+sayaçlarını ve Idempotency-Key kayıtlarını paylaşır. Önde bir reverse proxy yukarıdaki yolları async
+sunucuya, kalanları threaded sunucuya yönlendirir.
+
+Çalıştırma:
+    hypercorn asgi:app --bind 0.0.0.0:3002 --workers 2
+"""
+from quart import Quart, jsonify
+from ..circuit_breaker import CLOSED, CircuitOpenError
+from ..config import Config
+from ..database import db_breaker
+from ..events import bus
+from .auth import save_session
+from .database import close_pools
+
+
+def create_async_app():
+    app = Quart(__name__)
+    app.config.from_object(Config)
+
+    # ======================
+    # Session
+    # ======================
+    @app.after_request
+    async def persist_session(response):
+        save_session()
+        return response
+
+    @app.after_websocket
+    async def persist_websocket_session(response):
+        save_session()
+        return response
+
+    # ======================
+    # Database Circuit Breaker
+    # ======================
+    @app.errorhandler(CircuitOpenError)
+    async def db_unavailable_handler(e):
+        response = jsonify({
+            'message': 'Database temporarily unavailable, please try again later.',
+            'error': 'db_unavailable',
+            'retry_after': e.retry_after
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+
+    @app.after_serving
+    async def shutdown():
+        await close_pools()
+
+    # ======================
+    # Blueprints
+    # ======================
+    from .wallet import wallet_bp
+    app.register_blueprint(wallet_bp)
+
+    from .games import coinflip_bp, roulette_bp, blackjack_bp
+    app.register_blueprint(coinflip_bp)
+    app.register_blueprint(roulette_bp)
+    app.register_blueprint(blackjack_bp)
+
+    # Oyuncu WebSocket'leri thread tutmaz; threaded sunucudaki admin akışı sınırı burada geçerli değil
+    bus.max_subscribers = Config.ASYNC_EVENTS_MAX_SUBSCRIBERS
+    from .events import events_bp
+    app.register_blueprint(events_bp)
+
+    @app.route('/health', methods=['GET'])
+    async def health():
+        state = db_breaker.state
+        if state != CLOSED:
+            return jsonify({'status': 'degraded', 'database': state}), 503
+        return jsonify({'status': 'ok', 'database': state}), 200
+
+    return app
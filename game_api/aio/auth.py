@@ -0,0 +1,115 @@
+"""
+Async mod için session, login_required ve csrf_required
+
+Session'lar threaded moddaki Flask-Session dosyalarından okunur; login,
+register ve logout threaded sunucuda kalır, async endpoint'ler aynı
+"session" cookie'siyle çalışır. Session yalnızca değiştiğinde (aktif
+blackjack eli) aynı dosyaya geri yazılır.
+"""
+from functools import wraps
+from cachelib.file import FileSystemCache
+from quart import g, has_websocket_context, jsonify, request, websocket
+from aiomysql import MySQLError
+from ..config import Config
+from ..services.user_service import UserService, UNKNOWN, MISS, SQL_USER_STATUS, LOGIN_REQUIRED_ERROR
+from ..utils.csrf import (
+    CSRF_HEADER_NAME, CSRF_SESSION_KEY, compare_session_token, csrf_error, token_from_body,
+    validate_signed_csrf_token,
+)
+from ..utils.logger import auth_logger
+from .database import fetch_one
+
+# Flask-Session FileSystemSessionInterface varsayılanlarıyla aynı
+SESSION_COOKIE_NAME = 'session'
+SESSION_KEY_PREFIX = 'session:'
+_store = FileSystemCache(Config.SESSION_FILE_DIR, threshold=500, mode=0o600)
+
+
+def current_session():
+    """
+    İsteğin session dict'i (ilk çağrıda dosyadan okunur)
+
+    Session dosyaları küçüktür ve yerel diskte durur; okuma event loop'ta yapılır.
+    """
+    if 'session' not in g:
+        cookies = websocket.cookies if has_websocket_context() else request.cookies
+        sid = cookies.get(SESSION_COOKIE_NAME)
+        data = _store.get(SESSION_KEY_PREFIX + sid) if sid else None
+        g.session_sid = sid if data is not None else None
+        g.session = dict(data or {})
+        g.session_modified = False
+    return g.session
+
+
+def mark_session_modified():
+    g.session_modified = True
+
+
+def save_session():
+    """after_request: değişen session'ı aynı dosyaya yaz (boşaldıysa sil)"""
+    if not g.get('session_modified') or not g.get('session_sid'):
+        return
+    key = SESSION_KEY_PREFIX + g.session_sid
+    if g.session:
+        _store.set(key, g.session, timeout=int(Config.PERMANENT_SESSION_LIFETIME.total_seconds()))
+    else:
+        _store.delete(key)
+
+
+async def get_user_status(user_id):
+    """UserService.get_status karşılığı; aynı process içi cache kullanılır"""
+    status = UserService.cached(user_id)
+    if status is not MISS:
+        return status
+
+    try:
+        row = await fetch_one(SQL_USER_STATUS, (user_id,))
+    except (ConnectionError, MySQLError) as e:
+        auth_logger.error(f"User status lookup error: user={user_id}, {e}")
+        return UNKNOWN
+
+    status = {'status': row['status'], 'is_admin': bool(row['is_admin'])} if row else None
+    UserService.remember(user_id, status)
+    return status
+
+
+def login_required(f):
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        session = current_session()
+        if 'user_id' not in session:
+            return jsonify(LOGIN_REQUIRED_ERROR), 401
+
+        # Karar threaded login_required ile ortak (UserService.check_session)
+        error, modified = UserService.check_session(session, await get_user_status(session['user_id']))
+        if modified:
+            mark_session_modified()
+        if error:
+            body, status_code = error
+            return jsonify(body), status_code
+        return await f(*args, **kwargs)
+
+    return decorated_function
+
+
+def validate_csrf_token(token):
+    if Config.CSRF_MODE == 'signed':
+        return validate_signed_csrf_token(token, g.session_sid)
+
+    return compare_session_token(current_session().get(CSRF_SESSION_KEY), token)
+
+
+def csrf_required(f):
+    """utils.csrf.csrf_required karşılığı (header veya JSON body'deki csrf_token)"""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        token = request.headers.get(CSRF_HEADER_NAME) or token_from_body(await request.get_json(silent=True))
+
+        error = csrf_error(token, validate_csrf_token)
+        if error:
+            body, status_code = error
+            return jsonify(body), status_code
+
+        return await f(*args, **kwargs)
+
+    return decorated_function
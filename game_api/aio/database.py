@@ -0,0 +1,170 @@
+"""
+Async veritabanı katmanı - aiomysql pool'ları ve transaction retry
+
+game_api.database ve utils.db_utils ile aynı kurallar geçerlidir:
+  - shard_key (user_id) verilirse kullanıcının shard'ı, yoksa directory (DB_CONFIG)
+  - bağlantı hataları aynı circuit breaker'lara yazılır; breaker açıksa
+    CircuitOpenError fırlatılır (uygulama 503 döner)
+  - deadlock / lock wait timeout'ta unit of work jitter'lı backoff ile
+    yeniden çalıştırılır, sayaçlar /metrics'teki transaction_retries'a eklenir
+
+Pool'lar ilk kullanımda açılır ve event loop'a bağlıdır; create_async_app()
+kapanırken close_pools() çağırır. Pool doluyken bekleyen istekler thread
+tutmaz, event loop diğer isteklere devam eder.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+import aiomysql
+from aiomysql import MySQLError
+from ..config import Config
+from ..database import db_breaker
+from ..sharding import is_sharded, shard_index, _breaker, _shard_config
+from ..utils.db_utils import Rollback, RETRYABLE_ERRNOS, _backoff_delay, _record_retry, db_logger
+
+_pools = {}  # 'directory' veya shard index -> aiomysql.Pool
+_pools_lock = asyncio.Lock()
+
+
+def _target(shard_key):
+    """(pool anahtarı, bağlantı ayarları, breaker)"""
+    if shard_key is not None and is_sharded():
+        index = shard_index(shard_key)
+        return index, _shard_config(index), _breaker(index)
+    return 'directory', Config.DB_CONFIG, db_breaker
+
+
+async def _get_pool(target, config):
+    pool = _pools.get(target)
+    if pool is None:
+        async with _pools_lock:
+            pool = _pools.get(target)
+            if pool is None:
+                # autocommit=True: okumalar transaction açmaz, bağlantı pool'a temiz döner.
+                # Yazmalar run_in_transaction() içinde açık BEGIN/COMMIT ile yapılır.
+                pool = await aiomysql.create_pool(
+                    host=config['host'],
+                    port=config.get('port', 3306),
+                    user=config['user'],
+                    password=config['password'],
+                    db=config['database'],
+                    minsize=1,
+                    maxsize=Config.ASYNC_DB_POOL_SIZE,
+                    autocommit=True,
+                    connect_timeout=Config.DB_CONNECT_TIMEOUT,
+                    # Shard'larda AUTO_INCREMENT offset'i (sharding._shard_config)
+                    init_command=config.get('init_command'),
+                )
+                _pools[target] = pool
+    return pool
+
+
+@asynccontextmanager
+async def connection(shard_key=None):
+    """
+    Pool'dan bağlantı al
+
+        async with connection(shard_key=user_id) as conn:
+            ...
+
+    Raises:
+        CircuitOpenError: Breaker açıksa (bağlantı denenmez)
+        ConnectionError: Bağlantı kurulamazsa
+    """
+    target, config, breaker = _target(shard_key)
+    breaker.before_call()
+    try:
+        pool = await _get_pool(target, config)
+        conn = await pool.acquire()
+    except (MySQLError, OSError) as e:
+        breaker.record_failure()
+        db_logger.error(f"Async database connection error ({target}): {e}")
+        raise ConnectionError("Database connection failed") from e
+    breaker.record_success()
+
+    try:
+        yield conn
+    finally:
+        # Transaction açık kalmışsa (iptal edilen istek) aiomysql bağlantıyı kapatır
+        await pool.release(conn)
+
+
+async def fetch_one(sql, params=(), shard_key=None):
+    """Tek satır okuma (dictionary)"""
+    async with connection(shard_key) as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, params)
+            return await cursor.fetchone()
+
+
+async def fetch_all(sql, params=(), shard_key=None):
+    """Çok satırlı okuma (dictionary listesi)"""
+    async with connection(shard_key) as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            await cursor.execute(sql, params)
+            return await cursor.fetchall()
+
+
+async def execute(sql, params=(), shard_key=None):
+    """Tek ifadelik yazma (autocommit); etkilenen satır sayısını döndürür"""
+    async with connection(shard_key) as conn:
+        async with conn.cursor() as cursor:
+            return await cursor.execute(sql, params)
+
+
+async def run_in_transaction(work, site, isolation_level=None, max_attempts=None, shard_key=None):
+    """
+    utils.db_utils.run_in_transaction'ın async karşılığı
+
+    `await work(conn, cursor)` her denemede baştan çağrılır; cursor
+    aiomysql.DictCursor'dır. Rollback(result) fırlatılırsa transaction geri
+    alınır ve result döner.
+
+    Raises:
+        CircuitOpenError, ConnectionError: Bağlantı alınamazsa
+        aiomysql.MySQLError: Tekrar denenemeyen ya da denemeleri tükenen hatalar
+    """
+    attempts = max_attempts or Config.DB_TX_MAX_ATTEMPTS
+
+    async with connection(shard_key) as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cursor:
+            for attempt in range(1, attempts + 1):
+                try:
+                    if isolation_level:
+                        # Sadece sıradaki transaction için geçerli
+                        await cursor.execute(f"SET TRANSACTION ISOLATION LEVEL {isolation_level}")
+                    await conn.begin()
+                    result = await work(conn, cursor)
+                    await conn.commit()
+                    return result
+                except Rollback as r:
+                    await conn.rollback()
+                    return r.result
+                except MySQLError as e:
+                    await conn.rollback()
+                    errno = e.args[0] if e.args else None
+                    if errno not in RETRYABLE_ERRNOS:
+                        raise
+                    if attempt == attempts:
+                        _record_retry(site, errno, exhausted=True)
+                        db_logger.error(f"Transaction {site} failed after {attempts} attempts: {e}")
+                        raise
+                    _record_retry(site, errno)
+                    db_logger.warning(f"Transaction {site} retry {attempt}/{attempts - 1}: {e}")
+                    await asyncio.sleep(_backoff_delay(attempt))
+
+
+async def close_pools():
+    """Tüm pool'ları kapat (serving sonu)"""
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        pool.close()
+        await pool.wait_closed()
+
+
+def get_pool_stats():
+    """Pool doluluk bilgisi (metrics için)"""
+    return {
+        str(target): {'size': pool.size, 'free': pool.freesize, 'max': pool.maxsize}
+        for target, pool in _pools.items()
+    }
@@ -0,0 +1,86 @@
+"""
+Async oyuncu olayları - /me/ws WebSocket
+
+Her bağlantı kendi kullanıcısının 'balance' ve 'blackjack' olaylarını ve
+herkese giden 'rules' olaylarını alır. Olaylar threaded worker'lardan da
+gelir (broker, bkz. game_api/events.py). Bağlantılar event loop'ta bekler,
+thread tutmaz; bu yüzden oyuncu kanalı yalnızca async sunucudadır.
+
+Mesajlar JSON metinleridir:
+    {"id": "<epoch>-<sıra>", "event": "balance", "data": {"balance": 120.0, "reason": "deposit"}}
+
+İlk mesaj 'ready'dir; data.reset true ise kaçırılan olaylar gönderilemiyor,
+client bakiyeyi REST'ten yeniden okur. Client yeniden bağlanırken son id'yi
+?last_event_id= ile gönderir. Bağlantı Config.EVENTS_STREAM_MAX_AGE sonunda
+kapanır (ban ve oturum süresi yeniden kontrol edilir).
+"""
+import asyncio
+from urllib.parse import urlparse
+from quart import Blueprint, jsonify, websocket
+from ..config import Config
+from ..events import bus, ready_data
+from .auth import login_required, current_session
+
+PLAYER_TOPICS = frozenset({'balance', 'blackjack', 'rules'})
+
+events_bp = Blueprint('events', __name__)
+
+
+def same_origin():
+    """Cross-site WebSocket hijacking'e karşı: tarayıcının Origin'i bu host olmalı"""
+    origin = websocket.headers.get('Origin')
+    return origin is None or urlparse(origin).netloc == websocket.host
+
+
+def message(event_id, topic, data):
+    # data zaten JSON; olay başına yeniden encode edilmez
+    return f'{{"id":"{event_id}","event":"{topic}","data":{data}}}'
+
+
+@events_bp.websocket('/me/ws')
+@login_required
+async def player_events():
+    if not same_origin():
+        return jsonify({'message': 'Cross-origin WebSocket connections are not allowed.'}), 403
+
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def waker():
+        # Relay thread'inden çağrılır
+        try:
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:  # loop kapandı
+            pass
+
+    subscription = bus.subscribe(
+        websocket.args.get('last_event_id'), topics=PLAYER_TOPICS,
+        user_id=current_session()['user_id'], waker=waker
+    )
+    if subscription is None:
+        return jsonify({'message': 'Too many live connections, try again later.'}), 503
+
+    deadline = loop.time() + Config.EVENTS_STREAM_MAX_AGE
+    try:
+        await websocket.accept()
+        await websocket.send(message(subscription.start_id, 'ready', ready_data(subscription)))
+
+        while True:
+            wake.clear()
+            events = subscription.get()
+            for seq, topic, _, data in events:
+                await websocket.send(message(bus.event_id(seq), topic, data))
+            if events:
+                continue
+            if subscription.closed:
+                return
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(wake.wait(), min(Config.EVENTS_HEARTBEAT, remaining))
+            except asyncio.TimeoutError:
+                await websocket.send('{"event":"ping"}')
+    finally:
+        bus.unsubscribe(subscription)
@@ -0,0 +1,427 @@
+"""
+Async oyun endpoint'leri - coinflip, roulette ve blackjack
+
+Oyun mantığı game_api.engine'den; doğrulama, SQL'ler ve cevap gövdeleri
+threaded modüllerden (game_api.coinflip, roulette, blackjack) gelir; burada yalnızca veritabanı
+erişimi await edilir. Blueprint ve fonksiyon isimleri aynıdır, böylece
+endpoint isimleri (ve rate limit sayaçları) iki modda ortaktır.
+
+Durum versiyonu SQLite'a yazılır (yazma kilidi, busy timeout); event loop'u
+bekletmemesi için thread'de güncellenir.
+"""
+import asyncio
+from quart import Blueprint, jsonify, request
+from aiomysql import MySQLError
+from .. import coinflip, roulette
+from ..blackjack import (
+    SQL_ACTIVE_GAME, SQL_CANCEL_GAME, SQL_CREATE_GAME, SQL_CREATE_BET, SQL_SAVE_GAME_STATE,
+    SQL_END_GAME, SQL_CREATE_PAYOUT, load_game_state, encode_game_state, encode_game_result,
+    active_game_response,
+)
+from ..engine import CoinflipEngine, RouletteEngine, BlackjackEngine, get_deck, calculate_hand_value
+from ..events import publish, publish_game
+from ..services.wallet_service import WalletService, SQL_WALLET_BALANCE
+from ..utils.db_utils import Rollback
+from ..utils.etag import bump_state_version
+from .auth import login_required, csrf_required, current_session, mark_session_modified
+from .database import fetch_one, execute, run_in_transaction
+from .idempotency import idempotent, is_idempotent_replay
+from .ratelimit import limit
+from .services import AsyncGameService, AsyncWalletService, get_active_rules
+
+coinflip_bp = Blueprint('coinflip', __name__)
+roulette_bp = Blueprint('roulette', __name__)
+blackjack_bp = Blueprint('blackjack', __name__)
+
+
+def hand_response(user_id, body):
+    """blackjack.hand_response karşılığı"""
+    publish('blackjack', body, user_id=user_id)
+    return jsonify(body)
+
+
+@coinflip_bp.route('/game/coinflip/play', methods=['POST'])
+@limit("60 per minute", exempt_when=is_idempotent_replay)  # 60 games per minute
+@login_required
+@csrf_required
+@idempotent
+async def play_coinflip():
+    user_id = current_session().get('user_id')
+
+    error, bet = coinflip.validate_bet(await request.get_json(silent=True))
+    if error:
+        return jsonify({'message': error}), 400
+    bet_amount, choice = bet
+
+    rule_set_id, rules = await get_active_rules()
+    game_result, is_win, payout_amount = CoinflipEngine(rules).play(bet_amount, choice)
+
+    result = await AsyncGameService.process_game(
+        user_id, rule_set_id, 'coinflip', bet_amount, 'choice', choice,
+        {'result': game_result, 'choice': choice, 'is_win': is_win},
+        is_win, payout_amount
+    )
+
+    if not result['success']:
+        body, status = coinflip.game_error(result, bet_amount)
+        return jsonify(body), status
+
+    return jsonify(coinflip.game_response(choice, game_result, is_win, payout_amount, result['new_balance'])), 200
+
+
+@roulette_bp.route('/game/roulette/play', methods=['POST'])
+@limit("60 per minute", exempt_when=is_idempotent_replay)  # 60 games per minute
+@login_required
+@csrf_required
+@idempotent
+async def play_roulette():
+    user_id = current_session().get('user_id')
+
+    error, bet = roulette.validate_bet(await request.get_json(silent=True))
+    if error:
+        return jsonify({'message': error}), 400
+    amount, bet_type, bet_value = bet
+
+    rule_set_id, rules = await get_active_rules()
+    game_result, payout = RouletteEngine(rules).play(amount, bet_type, bet_value)
+    is_win = game_result['is_win']
+
+    result = await AsyncGameService.process_game(
+        user_id, rule_set_id, 'roulette', amount, bet_type, bet_value, game_result, is_win, payout
+    )
+
+    if not result['success']:
+        body, status = roulette.game_error(result)
+        return jsonify(body), status
+
+    return jsonify(roulette.game_response(game_result, payout, result['new_balance'])), 200
+
+
+# ======================
+# Blackjack
+# ======================
+
+async def load_active_game(user_id):
+    """Session'da oynanan el yoksa veritabanındaki aktif oyunu yükle"""
+    session = current_session()
+    game = session.get('bj_game')
+    if game and game.get('status') == 'playing':
+        return game
+
+    game_row = await fetch_one(SQL_ACTIVE_GAME, (user_id,), shard_key=user_id)
+    if game_row:
+        game = load_game_state(game_row)
+        if game:
+            game['bet_id'] = game_row['bet_id']
+            session['bj_game'] = game
+            mark_session_modified()
+    return game
+
+
+@blackjack_bp.route('/game/blackjack/active', methods=['GET'])
+@limit()
+@login_required
+async def check_active_game():
+    user_id = current_session().get('user_id')
+
+    try:
+        game_row = await fetch_one(SQL_ACTIVE_GAME, (user_id,), shard_key=user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error'}), 500
+
+    if game_row:
+        game_state = load_game_state(game_row)
+        if game_state:
+            return jsonify(active_game_response(game_row, game_state))
+
+    return jsonify({'has_active_game': False})
+
+
+@blackjack_bp.route('/game/blackjack/resume', methods=['POST'])
+@limit()
+@login_required
+@csrf_required
+async def resume_game():
+    session = current_session()
+    user_id = session.get('user_id')
+
+    try:
+        game_row = await fetch_one(SQL_ACTIVE_GAME, (user_id,), shard_key=user_id)
+        if not game_row:
+            return jsonify({'message': 'No active game found!'}), 404
+
+        game_state = load_game_state(game_row)
+        if not game_state:
+            # Orphaned game - clean it up and tell user to start new game
+            await execute(SQL_CANCEL_GAME, (game_row['game_id'],), shard_key=user_id)
+            return jsonify({
+                'message': 'Game state corrupted. Game cancelled. Please start a new game.',
+                'has_active_game': False
+            }), 404
+
+        game_state['bet_id'] = game_row['bet_id']
+        session['bj_game'] = game_state
+        mark_session_modified()
+
+        wallet = await fetch_one(SQL_WALLET_BALANCE, (game_state['wallet_id'],), shard_key=user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error'}), 500
+
+    return jsonify({
+        'message': 'Game continues',
+        'player_hand': game_state['player_hand'],
+        'dealer_card': game_state['dealer_hand'][0],
+        'player_value': calculate_hand_value(game_state['player_hand']),
+        'status': 'playing',
+        'new_balance': float(wallet['balance']) if wallet else 0
+    })
+
+
+@blackjack_bp.route('/game/blackjack/start', methods=['POST'])
+@limit("30 per minute")  # 30 new games per minute
+@login_required
+@csrf_required
+async def start_game():
+    session = current_session()
+    user_id = session.get('user_id')
+    data = await request.get_json(silent=True)
+
+    if not data or 'amount' not in data:
+        return jsonify({'message': 'Bet amount is required!'}), 400
+
+    try:
+        amount = float(data['amount'])
+        if amount <= 0: raise ValueError
+    except ValueError:
+        return jsonify({'message': 'Invalid bet amount!'}), 400
+
+    rule_set_id, _ = await get_active_rules()
+
+    async def work(conn, cursor):
+        await cursor.execute(SQL_ACTIVE_GAME, (user_id,))
+        active_game = await cursor.fetchone()
+        if active_game:
+            if load_game_state(active_game) is None:
+                # Orphaned game - clean it up and continue
+                await cursor.execute(SQL_CANCEL_GAME, (active_game['game_id'],))
+            else:
+                raise Rollback(({
+                    'message': 'You already have an active game!',
+                    'has_active_game': True,
+                    'game_id': active_game['game_id']
+                }, 400))
+
+        has_enough, wallet = await AsyncWalletService.reserve(user_id, amount, cursor)
+        if not wallet or not has_enough:
+            raise Rollback(({'message': 'Insufficient balance!'}, 400))
+
+        await cursor.execute(SQL_CREATE_GAME, (user_id, rule_set_id))
+        game_id = cursor.lastrowid
+
+        await cursor.execute(SQL_CREATE_BET, (game_id, user_id, 'blackjack', str(amount), amount))
+        bet_id = cursor.lastrowid
+
+        deck, player_hand, dealer_hand = BlackjackEngine().deal()
+        await cursor.execute(
+            SQL_SAVE_GAME_STATE,
+            (encode_game_state(deck, player_hand, dealer_hand, amount, wallet['wallet_id']), game_id)
+        )
+
+        # Deduct balance (last write of the transaction)
+        status, new_balance = await AsyncWalletService.settle(wallet, amount, 0, cursor)
+        if status == 'INSUFFICIENT':
+            raise Rollback(({'message': 'Insufficient balance!'}, 400))
+        if status == 'CONFLICT':
+            raise Rollback(({'message': 'Wallet is busy, please try again.'}, 409))
+
+        return {
+            'game_id': game_id,
+            'bet_id': bet_id,
+            'deck': deck,
+            'player_hand': player_hand,
+            'dealer_hand': dealer_hand,
+            'bet_amount': amount,
+            'wallet_id': wallet['wallet_id'],
+            'status': 'playing',
+            'new_balance': new_balance
+        }
+
+    try:
+        game = await run_in_transaction(work, site='blackjack.start', isolation_level=WalletService.isolation_level(),
+                                        shard_key=user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error!'}), 500
+    except MySQLError as e:
+        return jsonify({'message': f'Error: {e}'}), 500
+
+    if not isinstance(game, dict):
+        body, status = game
+        return jsonify(body), status
+
+    new_balance = game.pop('new_balance')
+    session['bj_game'] = game
+    await asyncio.to_thread(bump_state_version, user_id)
+    WalletService.publish_balance(user_id, new_balance, 'blackjack')
+
+    player_hand = game['player_hand']
+    player_value = calculate_hand_value(player_hand)
+
+    # Check for immediate Blackjack
+    if player_value == 21:
+        return await finish_game(user_id, game, True)
+
+    return hand_response(user_id, {
+        'player_hand': player_hand,
+        'dealer_card': game['dealer_hand'][0],
+        'player_value': player_value,
+        'status': 'playing',
+        'new_balance': new_balance
+    })
+
+
+@blackjack_bp.route('/game/blackjack/hit', methods=['POST'])
+@limit()
+@login_required
+@csrf_required
+async def hit():
+    session = current_session()
+    user_id = session.get('user_id')
+
+    try:
+        game = await load_active_game(user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error'}), 500
+
+    if not game or game.get('status') != 'playing':
+        return jsonify({'message': 'No active game!'}), 400
+
+    deck = game['deck']
+    player_hand = game['player_hand']
+    dealer_hand = game['dealer_hand']
+
+    player_value = BlackjackEngine.hit(deck, player_hand)
+    busted = player_value > 21
+
+    if busted:
+        # Draw dealer's second card now (player busted, game over)
+        BlackjackEngine.reveal_dealer(deck, dealer_hand)
+
+    async def work(conn, cursor):
+        await cursor.execute(
+            SQL_SAVE_GAME_STATE,
+            (encode_game_state(deck, player_hand, dealer_hand, game['bet_amount'], game['wallet_id']), game['game_id'])
+        )
+        if busted:
+            await cursor.execute(SQL_END_GAME, (encode_game_result(player_hand, dealer_hand, 'bust', 0), game['game_id']))
+            await cursor.execute(SQL_CREATE_PAYOUT, (game['bet_id'], 0, 'LOSS'))
+
+    try:
+        await run_in_transaction(work, site='blackjack.hit', shard_key=user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error'}), 500
+    except MySQLError as e:
+        return jsonify({'message': f'Error: {e}'}), 500
+
+    if busted:
+        session.pop('bj_game', None)
+        await asyncio.to_thread(bump_state_version, user_id)
+        publish_game(game['game_id'], user_id, 'blackjack', game['bet_amount'], 0, 'LOSS',
+                     email=session.get('email'))
+        return hand_response(user_id, {
+            'player_hand': player_hand,
+            'player_value': player_value,
+            'dealer_hand': dealer_hand,
+            'dealer_value': calculate_hand_value(dealer_hand),
+            'status': 'bust',
+            'message': 'Bust! You lost.'
+        })
+
+    session['bj_game'] = game
+    mark_session_modified()
+
+    # SECURITY: Send only dealer's open card, no hidden card (not drawn yet)
+    return hand_response(user_id, {
+        'player_hand': player_hand,
+        'player_value': player_value,
+        'dealer_card': dealer_hand[0],
+        'dealer_value': '?',
+        'status': 'playing'
+    })
+
+
+@blackjack_bp.route('/game/blackjack/stand', methods=['POST'])
+@limit()
+@login_required
+@csrf_required
+async def stand():
+    user_id = current_session().get('user_id')
+
+    try:
+        game = await load_active_game(user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error'}), 500
+
+    if not game or game.get('status') != 'playing':
+        return jsonify({'message': 'No active game!'}), 400
+
+    return await finish_game(user_id, game, False)
+
+
+async def finish_game(user_id, game, is_blackjack=False):
+    """blackjack.handle_game_end karşılığı"""
+    session = current_session()
+    amount = game['bet_amount']
+    player_hand = game['player_hand']
+    dealer_hand = game['dealer_hand']
+
+    _, rules = await get_active_rules()
+    result, payout, message = BlackjackEngine(rules).stand(
+        amount, game.get('deck') or get_deck(), player_hand, dealer_hand, is_blackjack
+    )
+    outcome = 'WIN' if result in ['win', 'blackjack'] else 'LOSS'
+
+    async def work(conn, cursor):
+        # SECURITY: Prevent race condition with Row lock (for payout, pessimistic mode only)
+        wallet_row = await AsyncWalletService.get_wallet(user_id, cursor, for_update=not WalletService.is_optimistic())
+        if not wallet_row:
+            raise Rollback(({'message': 'Wallet not found!'}, 404))
+
+        await cursor.execute(SQL_END_GAME, (encode_game_result(player_hand, dealer_hand, result, payout), game['game_id']))
+
+        await cursor.execute(SQL_CREATE_PAYOUT, (game['bet_id'], payout, outcome))
+
+        # Update balance if won (last write of the transaction)
+        if payout > 0:
+            status, new_balance = await AsyncWalletService.settle(wallet_row, 0, payout, cursor)
+            return new_balance
+        return wallet_row['balance']
+
+    try:
+        new_balance = await run_in_transaction(work, site='blackjack.end', isolation_level=WalletService.isolation_level(),
+                                               shard_key=user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error'}), 500
+    except MySQLError as e:
+        return jsonify({'message': f'Error: {e}'}), 500
+
+    if isinstance(new_balance, tuple):
+        body, status = new_balance
+        return jsonify(body), status
+
+    session.pop('bj_game', None)
+    await asyncio.to_thread(bump_state_version, user_id)
+    publish_game(game['game_id'], user_id, 'blackjack', amount, payout, outcome, email=session.get('email'))
+    if payout > 0:
+        WalletService.publish_balance(user_id, new_balance, 'blackjack')
+
+    return hand_response(user_id, {
+        'player_hand': player_hand,
+        'dealer_hand': dealer_hand,
+        'player_value': calculate_hand_value(player_hand),
+        'dealer_value': calculate_hand_value(dealer_hand),
+        'result': result,
+        'status': 'finished',
+        'message': message,
+        'payout': payout,
+        'new_balance': new_balance
+    })
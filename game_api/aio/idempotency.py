@@ -0,0 +1,140 @@
+"""
+Async mod Idempotency-Key desteği - utils.idempotency ile aynı tablo, cache ve kararlar
+
+Anahtarlar threaded sunucunun idempotency_keys tablosuna (kullanıcının
+shard'ı) yazılır; aynı anahtarla hangi sunucuya gelinirse gelinsin kayıtlı
+cevap döner. Kararlar (check_key, check_entry, should_store) ve process içi
+LRU threaded taraftakilerle ortaktır, burada yalnızca sorgular await edilir.
+
+Kullanım (threaded taraftaki sırayla):
+    @coinflip_bp.route('/game/coinflip/play', methods=['POST'])
+    @limit("60 per minute", exempt_when=is_idempotent_replay)
+    @login_required
+    @csrf_required
+    @idempotent
+    async def play_coinflip(): ...
+"""
+from functools import wraps
+from aiomysql import MySQLError
+from quart import Response, g, jsonify, make_response, request
+from ..config import Config
+from ..utils.idempotency import (
+    REPLAY_HEADER, SQL_LOOKUP, SQL_PURGE_EXPIRED, SQL_RESERVE, SQL_RELEASE, SQL_STORE, ERRNO_DUPLICATE,
+    request_key, fingerprint, check_key, check_entry, should_store, entry_from_row, stored, cache_get,
+    idempotency_logger,
+)
+from .auth import current_session
+from .database import connection, fetch_one
+
+
+async def _fingerprint():
+    return fingerprint(request.method, request.path, await request.get_data())
+
+
+async def _lookup(cache_key):
+    """Önce LRU, sonra veritabanı"""
+    entry = cache_get(cache_key)
+    if entry is not None:
+        return entry
+
+    user_id, key = cache_key
+    try:
+        row = await fetch_one(SQL_LOOKUP, (user_id, key), shard_key=user_id)
+    except (ConnectionError, MySQLError) as e:
+        idempotency_logger.error(f"Idempotency lookup error: {e}")
+        return None
+    return entry_from_row(cache_key, row)
+
+
+async def _reserve(user_id, key, request_fingerprint):
+    """True: rezerve edildi, False: başka istek rezerve etmiş, None: veritabanı hatası"""
+    try:
+        async with connection(shard_key=user_id) as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(SQL_PURGE_EXPIRED, (user_id,))
+                await cursor.execute(SQL_RESERVE, (user_id, key, request_fingerprint, Config.IDEMPOTENCY_TTL))
+        return True
+    except MySQLError as e:
+        if e.args and e.args[0] == ERRNO_DUPLICATE:
+            return False
+        idempotency_logger.error(f"Idempotency reserve error: {e}")
+        return None
+    except ConnectionError:
+        return None
+
+
+async def _complete(user_id, key, request_fingerprint, response):
+    """Cevabı kaydet; geçici hatalarda rezervasyonu kaldır"""
+    try:
+        async with connection(shard_key=user_id) as conn:
+            async with conn.cursor() as cursor:
+                if not should_store(response.status_code):
+                    await cursor.execute(SQL_RELEASE, (user_id, key))
+                else:
+                    body = await response.get_data(as_text=True)
+                    await cursor.execute(SQL_STORE, (response.status_code, body, response.mimetype, user_id, key))
+                    stored((user_id, key), request_fingerprint, response.status_code, body, response.mimetype)
+    except (ConnectionError, MySQLError) as e:
+        idempotency_logger.error(f"Idempotency store error: {e}")
+
+
+def _replay(entry):
+    _, _, status, body, mimetype = entry
+    response = Response(body, status=status, mimetype=mimetype)
+    response.headers[REPLAY_HEADER] = 'true'
+    return response
+
+
+async def is_idempotent_replay():
+    """limit(exempt_when=...): kayıtlı cevabı olan tekrar istekler rate limit'e sayılmaz"""
+    cache_key = request_key(request.headers, current_session())
+    if cache_key is None or check_key(cache_key[1]):
+        return False
+
+    entry = await _lookup(cache_key)
+    g.idempotency_lookup = (cache_key, entry)
+    return isinstance(entry, tuple) and entry[1] == await _fingerprint()
+
+
+def idempotent(f):
+    """utils.idempotency.idempotent karşılığı; header yoksa view normal çalışır"""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        cache_key = request_key(request.headers, current_session())
+        if cache_key is None:
+            return await f(*args, **kwargs)
+
+        user_id, key = cache_key
+        error = check_key(key)
+        if error:
+            body, status_code = error
+            return jsonify(body), status_code
+
+        request_fingerprint = await _fingerprint()
+
+        lookup = g.pop('idempotency_lookup', None)
+        entry = lookup[1] if lookup and lookup[0] == cache_key else await _lookup(cache_key)
+        if entry is None:
+            reserved = await _reserve(user_id, key, request_fingerprint)
+            if reserved is None:
+                return await f(*args, **kwargs)
+            if reserved:
+                try:
+                    response = await make_response(await f(*args, **kwargs))
+                except BaseException:
+                    # İptal edilen istek de rezervasyonu bırakır
+                    await _complete(user_id, key, request_fingerprint, Response('', status=500))
+                    raise
+                await _complete(user_id, key, request_fingerprint, response)
+                return response
+            # Aynı anda gelen başka bir istek rezerve etti
+            entry = await _lookup(cache_key)
+
+        error = check_entry(entry, request_fingerprint)
+        if error:
+            body, status_code = error
+            return jsonify(body), status_code
+
+        return _replay(entry)
+
+    return decorated_function
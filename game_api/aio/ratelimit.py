@@ -0,0 +1,60 @@
+"""
+Async mod rate limit - Flask-Limiter ile aynı storage, strateji ve sayaç anahtarları
+
+Anahtarlar Flask-Limiter'ınkilerle aynıdır (LIMITER/<ip>/<endpoint>/<limit>);
+async blueprint'ler threaded olanlarla aynı endpoint isimlerini kullandığı için
+bir kullanıcı hangi moda giderse gitsin aynı sayacı tüketir.
+"""
+import asyncio
+from functools import wraps
+from limits import parse_many
+from limits.storage import storage_from_string
+from limits.strategies import STRATEGIES
+from quart import jsonify, request
+from ..config import Config
+from ..ratelimit import DEFAULT_LIMITS  # "sqlite://" şemasını da kaydeder
+
+_limiter = STRATEGIES[Config.RATELIMIT_STRATEGY](storage_from_string(Config.RATELIMIT_STORAGE_URI))
+
+
+def _hit(items, remote_addr, endpoint, cost):
+    """Limitleri sırayla say; aşılan ilk limit veya None"""
+    for item in items:
+        if not _limiter.hit(item, remote_addr, endpoint, cost=cost):
+            return item
+    return None
+
+
+def limit(limit_string=None, exempt_when=None):
+    """
+    Endpoint'e rate limit uygula
+
+    limit_string verilmezse Flask tarafındaki gibi DEFAULT_LIMITS,
+    Config.RATELIMIT_ROUTE_COSTS ağırlığıyla uygulanır. exempt_when
+    (async, ör. aio.idempotency.is_idempotent_replay) True dönerse istek sayılmaz.
+    """
+    items = parse_many(limit_string) if limit_string else [
+        item for default in DEFAULT_LIMITS for item in parse_many(default)
+    ]
+
+    def decorator(f):
+        @wraps(f)
+        async def decorated_function(*args, **kwargs):
+            if not Config.RATELIMIT_ENABLED or (exempt_when and await exempt_when()):
+                return await f(*args, **kwargs)
+
+            endpoint = request.endpoint
+            cost = 1 if limit_string else Config.RATELIMIT_ROUTE_COSTS.get(endpoint, 1)
+            # SQLite storage yazma kilidi alır (çekişmede busy timeout kadar bekler): thread'de
+            exceeded = await asyncio.to_thread(_hit, items, request.remote_addr, endpoint, cost)
+            if exceeded is not None:
+                return jsonify({
+                    'message': 'Çok fazla istek gönderdiniz. Lütfen biraz bekleyin.',
+                    'error': 'rate_limit_exceeded',
+                    'retry_after': str(exceeded)
+                }), 429
+            return await f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
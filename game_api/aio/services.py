@@ -0,0 +1,165 @@
+"""
+Async services - WalletService / GameService'in aiomysql üzerindeki karşılıkları
+
+Karar mantığı (bakiye kontrolü, concurrency modu, optimistic retry, kayıtlar,
+sonuç dict'leri) services/settlement.py'deki adımlardır; burada yalnızca
+sorgular await edilerek çalıştırılır. Threaded service'ler aynı adımları
+kullanır, davranış iki tarafta ayrı ayrı değiştirilmez.
+"""
+import asyncio
+from aiomysql import MySQLError
+from ..services import settlement
+from ..services.settlement import Reply
+from ..services.wallet_service import WalletService
+from ..utils.logger import game_logger
+from .auth import current_session
+from .database import fetch_all, run_in_transaction
+
+# Aktif rule set ve kuralları tek sorguda (directory)
+SQL_ACTIVE_RULES = """
+    SELECT rs.rule_set_id, r.rule_type, r.rule_param
+    FROM rule_sets rs
+    LEFT JOIN rules r ON r.rule_set_id = rs.rule_set_id
+    WHERE rs.is_active = TRUE
+    ORDER BY rs.rule_set_id
+"""
+
+
+async def get_active_rules():
+    """
+    Aktif rule set ID'si ve {rule_type: float} kuralları
+
+    rules.get_active_rule_set_id + get_active_rule_value karşılığı; bir oyun
+    için tek round trip. Hata durumunda (None, {}) döner, oyunlar varsayılan
+    çarpanları kullanır.
+    """
+    try:
+        rows = await fetch_all(SQL_ACTIVE_RULES)
+    except (ConnectionError, MySQLError) as e:
+        game_logger.error(f"Active rules fetch error: {e}")
+        return None, {}
+
+    if not rows:
+        return None, {}
+
+    rule_set_id = rows[0]['rule_set_id']
+    rules = {}
+    for row in rows:
+        if row['rule_set_id'] != rule_set_id or not row['rule_type'] or not row['rule_param']:
+            continue
+        try:
+            rules.setdefault(row['rule_type'], float(row['rule_param']))
+        except (ValueError, TypeError):
+            pass
+    return rule_set_id, rules
+
+
+async def run_steps(steps, cursor):
+    """settlement.run_steps'in async karşılığı (aiomysql.DictCursor)"""
+    reply = None
+    while True:
+        try:
+            query = steps.send(reply)
+        except StopIteration as stop:
+            return stop.value
+        await cursor.execute(query.sql, query.params)
+        reply = Reply(await cursor.fetchone() if query.fetch else None, cursor.rowcount, cursor.lastrowid)
+
+
+class AsyncWalletService:
+    """
+    WalletService'in async karşılığı (bkz. WalletService concurrency modları)
+    """
+
+    @staticmethod
+    async def get_wallet(user_id: int, cursor, for_update: bool = False):
+        return await run_steps(settlement.get_wallet(user_id, for_update), cursor)
+
+    @staticmethod
+    async def reserve(user_id: int, amount: float, cursor) -> tuple:
+        """Returns: (has_enough, wallet) - wallet bulunamazsa (False, None)"""
+        return await run_steps(settlement.reserve(user_id, amount), cursor)
+
+    @staticmethod
+    async def get_balance(wallet_id: int, cursor) -> float:
+        return await run_steps(settlement.get_balance(wallet_id), cursor)
+
+    @staticmethod
+    async def settle(wallet: dict, debit_amount: float, credit_amount: float, cursor) -> tuple:
+        """
+        Bahis ve ödeme farkını tek UPDATE ile uygula (transaction'ın son yazması)
+
+        Returns:
+            (status, balance) - status: 'OK', 'INSUFFICIENT' veya 'CONFLICT'
+        """
+        return await run_steps(settlement.settle(wallet, debit_amount, credit_amount), cursor)
+
+    @staticmethod
+    async def _transfer(user_id: int, amount: float, tx_type: str) -> dict:
+        """deposit / withdraw: settlement.transfer tek transaction'da"""
+        async def work(conn, cursor):
+            return await run_steps(settlement.transfer(user_id, amount, tx_type), cursor)
+
+        try:
+            result = await run_in_transaction(
+                work, site=f'wallet.{tx_type.lower()}', isolation_level=WalletService.isolation_level(),
+                shard_key=user_id
+            )
+        except ConnectionError:
+            return settlement.db_unavailable_result()
+        except MySQLError as e:
+            game_logger.error(f"{tx_type.title()} error: {e}")
+            return settlement.db_error_result('İşlem hatası')
+
+        if result['success']:
+            # Commit sonrası işler SQLite'a yazar (durum versiyonu): event loop yerine thread'de
+            await asyncio.to_thread(settlement.transfer_committed, user_id, amount, tx_type, result)
+
+        return result
+
+    @staticmethod
+    async def deposit(user_id: int, amount: float) -> dict:
+        """WalletService.deposit karşılığı"""
+        return await AsyncWalletService._transfer(user_id, amount, 'DEPOSIT')
+
+    @staticmethod
+    async def withdraw(user_id: int, amount: float) -> dict:
+        """WalletService.withdraw karşılığı"""
+        return await AsyncWalletService._transfer(user_id, amount, 'WITHDRAW')
+
+
+class AsyncGameService:
+    """
+    GameService.process_game'in async karşılığı
+    """
+
+    @staticmethod
+    async def process_game(user_id: int, rule_set_id, game_type: str, bet_amount: float, bet_type: str,
+                           bet_value: str, game_result: dict, is_win: bool, payout_amount: float) -> dict:
+        """
+        Bakiye kontrolü, game/bet/payout kayıtları ve bakiye güncellemesi tek transaction'da
+
+        rule_set_id get_active_rules()'tan gelir. Dönüş değeri GameService.process_game ile aynıdır.
+        """
+        async def work(conn, cursor):
+            return await run_steps(settlement.play(
+                user_id, rule_set_id, game_type, bet_amount, bet_type, bet_value,
+                game_result, is_win, payout_amount
+            ), cursor)
+
+        try:
+            result = await run_in_transaction(
+                work, site=f'game.{game_type}', isolation_level=WalletService.isolation_level(),
+                shard_key=user_id
+            )
+        except ConnectionError:
+            return settlement.db_unavailable_result()
+        except MySQLError as e:
+            game_logger.error(f"Game processing error: {e}")
+            return settlement.db_error_result('Oyun sırasında bir hata oluştu')
+
+        if result['success']:
+            await asyncio.to_thread(settlement.game_committed, user_id, game_type, bet_amount, is_win,
+                                    payout_amount, result, email=current_session().get('email'))
+
+        return result
@@ -0,0 +1,87 @@
+"""
+Async wallet endpoint'leri - game_api.wallet ile aynı URL, endpoint ismi ve cevaplar
+"""
+from quart import Blueprint, jsonify, request
+from aiomysql import MySQLError
+from ..wallet import SQL_WALLET_INFO, wallet_or_new, parse_amount, deposit_error, withdraw_error
+from .auth import login_required, csrf_required, current_session
+from .database import fetch_one
+from .idempotency import idempotent, is_idempotent_replay
+from .ratelimit import limit
+from .services import AsyncWalletService
+
+wallet_bp = Blueprint('wallet', __name__)
+
+
+@wallet_bp.route('/wallets/me', methods=['GET'])
+@limit()
+@login_required
+async def get_my_wallet():
+    session = current_session()
+    user_id = session.get('user_id')
+
+    try:
+        wallet_info = wallet_or_new(await fetch_one(SQL_WALLET_INFO, (user_id,), shard_key=user_id))
+    except ConnectionError:
+        return jsonify({'message': 'Database server error!'}), 500
+    except MySQLError as e:
+        print(f"Wallet fetch error: {e}")
+        return jsonify({'message': 'An error occurred while fetching wallet details.'}), 500
+
+    if not wallet_info:
+        return jsonify({'message': 'Wallet not found!'}), 404
+
+    wallet_info = {'email': session.get('email'), **wallet_info}
+    wallet_info['balance'] = float(wallet_info['balance'])
+
+    return jsonify({'wallet': wallet_info}), 200
+
+
+@wallet_bp.route('/wallets/me/deposit', methods=['POST'])
+@limit("20 per hour", exempt_when=is_idempotent_replay)  # 20 deposits per hour
+@login_required
+@csrf_required
+@idempotent
+async def deposit_to_wallet():
+    session = current_session()
+
+    error, amount = parse_amount(await request.get_json(silent=True), 'Amount is required!')
+    if error:
+        return jsonify({'message': error}), 400
+
+    result = await AsyncWalletService.deposit(session.get('user_id'), amount)
+
+    if not result['success']:
+        body, status = deposit_error(result)
+        return jsonify(body), status
+
+    return jsonify({
+        'message': f'Success! {amount} VIRTUAL added to your wallet.',
+        'user': session.get('email'),
+        'new_balance': result['new_balance']
+    }), 200
+
+
+@wallet_bp.route('/wallets/me/withdraw', methods=['POST'])
+@limit("10 per hour", exempt_when=is_idempotent_replay)  # 10 withdrawals per hour
+@login_required
+@csrf_required
+@idempotent
+async def withdraw_from_wallet():
+    session = current_session()
+
+    error, amount = parse_amount(await request.get_json(silent=True), 'Withdrawal amount is required!')
+    if error:
+        return jsonify({'message': error}), 400
+
+    result = await AsyncWalletService.withdraw(session.get('user_id'), amount)
+
+    if not result['success']:
+        body, status = withdraw_error(result, amount)
+        return jsonify(body), status
+
+    return jsonify({
+        'message': f'Success! {amount} VIRTUAL withdrawn from your wallet.',
+        'user': session.get('email'),
+        'new_balance': result['new_balance']
+    }), 200
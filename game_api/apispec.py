@@ -0,0 +1,121 @@
+"""
+OpenAPI spec - /apispec.json bir kez üretilir, serialize edilmiş bytes olarak servis edilir
+
+Flasgger spec'i view docstring'lerindeki YAML'dan üretir; hem import'u
+(~350 ms) hem de her /apispec.json isteğinde yeniden serialize etmesi
+pahalıdır. İki mod:
+
+    SWAGGER_UI=true   Flasgger yüklenir (/apidocs/ arayüzü). Spec ilk istekte
+                      üretilir, bytes ve sıkıştırılmış halleri cache'lenir.
+    SWAGGER_UI=false  Flasgger hiç import edilmez. Spec build sırasında
+                      üretilmiş dosyadan (Config.APISPEC_FILE) okunur:
+                          python build_static.py
+
+Production'da SWAGGER_UI varsayılan olarak kapalıdır.
+"""
+import os
+import threading
+from flask import current_app, request
+from .config import Config
+from .utils.compression import ENCODINGS, compress
+from .utils.json_provider import dumps_bytes
+from .utils.logger import error_logger
+
+SWAGGER_TEMPLATE = {
+    "swagger": "2.0",
+    "info": {
+        "title": "Casino Game API",
+        "description": "Session-based authentication + CSRF protected API",
+        "version": "1.0.0"
+    },
+    "securityDefinitions": {
+        "sessionAuth": {
+            "type": "apiKey",
+            "in": "cookie",
+            "name": "session"
+        }
+    }
+}
+
+SWAGGER_CONFIG = {
+    "headers": [],
+    "specs": [
+        {
+            "endpoint": "apispec",
+            "route": "/apispec.json",
+            "rule_filter": lambda rule: True,
+            "model_filter": lambda tag: True,
+        }
+    ],
+    "static_url_path": "/flasgger_static",
+    "swagger_ui": True,
+    "specs_route": "/apidocs/",
+}
+
+
+class CachedSpec:
+    """Spec gövdesi ve encoding başına sıkıştırılmış halleri; ilk kullanımda bir kez üretilir"""
+
+    def __init__(self, load):
+        self._load = load
+        self._bodies = None
+        self._lock = threading.Lock()
+
+    def _get_bodies(self):
+        if self._bodies is None:
+            with self._lock:
+                if self._bodies is None:
+                    data = self._load()
+                    bodies = {None: data}
+                    for encoding in ENCODINGS:
+                        bodies[encoding] = compress(data, encoding)
+                    self._bodies = bodies
+        return self._bodies
+
+    def response(self):
+        bodies = self._get_bodies()
+        encoding = request.accept_encodings.best_match(ENCODINGS)
+        response = current_app.response_class(bodies[encoding], mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+def generate_spec(app):
+    """
+    Uygulamanın spec'ini Flasgger ile üret (build_static.py)
+
+    Returns:
+        dict: Swagger 2.0 spec
+    """
+    swagger = getattr(app, 'swag', None)
+    if swagger is None:
+        from flasgger import Swagger
+        swagger = Swagger(app, template=SWAGGER_TEMPLATE, config=SWAGGER_CONFIG)
+    with app.test_request_context():
+        return swagger.get_apispecs('apispec')
+
+
+def init_swagger(app):
+    """Seçili moda göre Swagger UI'ı veya yalnızca cache'lenmiş /apispec.json'u kaydet"""
+    if Config.SWAGGER_UI:
+        from flasgger import Swagger
+
+        swagger = Swagger(app, template=SWAGGER_TEMPLATE, config=SWAGGER_CONFIG)
+        spec = CachedSpec(lambda: dumps_bytes(swagger.get_apispecs('apispec')))
+        # Flasgger'ın view'ı her istekte jsonify eder; aynı URL cache'ten döner
+        app.view_functions['flasgger.apispec'] = spec.response
+        return
+
+    if not os.path.isfile(Config.APISPEC_FILE):
+        error_logger.warning(
+            f"{Config.APISPEC_FILE} not found, /apispec.json is disabled (run: python build_static.py)"
+        )
+        return
+
+    def load():
+        with open(Config.APISPEC_FILE, 'rb') as f:
+            return f.read()
+
+    app.add_url_rule('/apispec.json', 'apispec', CachedSpec(load).response)
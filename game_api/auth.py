@@ -1,9 +1,14 @@
 from functools import wraps
 from flask import jsonify, request, session, Blueprint
-from werkzeug.security import generate_password_hash, check_password_hash
-from .database import get_db_connection
+from .database import get_db_connection, note_write, replica_read
+from .circuit_breaker import CircuitOpenError
+from .sharding import is_sharded
 from .utils.logger import auth_logger
 from .utils.csrf import get_csrf_token, csrf_required
+from .utils.etag import conditional_get
+from .utils.streaming import stream_json_array
+from .utils.passwords import hash_password, verify_password, rehash_if_needed
+from .utils.audit import log_action
 from mysql.connector import Error
 
 auth_bp = Blueprint('auth', __name__)
@@ -17,8 +22,16 @@ def get_limiter():
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
+        # Lazy import: services -> rules -> auth döngüsü
+        from .services.user_service import UserService, LOGIN_REQUIRED_ERROR
         if 'user_id' not in session:
-            return jsonify({'message': 'You must log in to perform this action.'}), 401
+            return jsonify(LOGIN_REQUIRED_ERROR), 401
+
+        # Ban ve silinme session süresini beklemeden etkili olur
+        error, _ = UserService.check_session(session, UserService.get_status(session['user_id']))
+        if error:
+            body, status_code = error
+            return jsonify(body), status_code
         return f(*args, **kwargs)
 
     return decorated_function
@@ -35,6 +48,91 @@ def admin_required(f):
     return decorated_function
 
 
+# Login: kullanıcı, bakiye ve aktif blackjack oyunu tek sorguda
+SQL_LOGIN = """
+    SELECT u.user_id, u.email, u.password_hash, u.is_admin, u.status, w.balance,
+           ag.game_id AS active_game_id, ag.game_state AS active_game_state,
+           ag.started_at AS active_game_started_at
+    FROM users u
+    LEFT JOIN wallets w ON w.user_id = u.user_id
+    LEFT JOIN games ag ON ag.game_id = (
+        SELECT g.game_id FROM games g
+        WHERE g.user_id = u.user_id AND g.game_type = 'blackjack' AND g.status = 'ACTIVE'
+        ORDER BY g.started_at DESC
+        LIMIT 1
+    )
+    WHERE u.email = %s
+"""
+
+# Sharding açıkken: directory'de kullanıcı, shard'da bakiye + aktif oyun
+SQL_LOGIN_USER = "SELECT user_id, email, password_hash, is_admin, status FROM users WHERE email = %s"
+SQL_LOGIN_STATE = """
+    SELECT w.balance,
+           ag.game_id AS active_game_id, ag.game_state AS active_game_state,
+           ag.started_at AS active_game_started_at
+    FROM wallets w
+    LEFT JOIN games ag ON ag.game_id = (
+        SELECT g.game_id FROM games g
+        WHERE g.user_id = w.user_id AND g.game_type = 'blackjack' AND g.status = 'ACTIVE'
+        ORDER BY g.started_at DESC
+        LIMIT 1
+    )
+    WHERE w.user_id = %s
+"""
+
+
+def fetch_login_state(user_id):
+    """Kullanıcının shard'ından bakiye ve aktif oyun (sharding açıkken)"""
+    empty = {'balance': None, 'active_game_id': None, 'active_game_state': None, 'active_game_started_at': None}
+    conn = get_db_connection(shard_key=user_id)
+    if conn is None:
+        raise ConnectionError(f"Shard connection failed for user {user_id}")
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(SQL_LOGIN_STATE, (user_id,))
+        return cursor.fetchone() or empty
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def create_sharded_wallet(user_id):
+    """Yeni kullanıcının wallet'ını shard'ında oluştur (varsa dokunma)"""
+    try:
+        conn = get_db_connection(shard_key=user_id)
+    except CircuitOpenError:
+        return False
+    if conn is None:
+        return False
+    cursor = conn.cursor()
+    try:
+        cursor.execute("INSERT IGNORE INTO wallets (user_id) VALUES (%s)", (user_id,))
+        conn.commit()
+        return True
+    except Error as e:
+        print(f"Wallet creation error: {e}")
+        return False
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_sharded_balance(user_id):
+    """Kullanıcının shard'ındaki bakiye (wallet yoksa None)"""
+    conn = get_db_connection(shard_key=user_id)
+    if conn is None:
+        return None
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT balance FROM wallets WHERE user_id = %s", (user_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    finally:
+        cursor.close()
+        conn.close()
+
+
 @auth_bp.route('/register', methods=['POST'])
 @get_limiter().limit("5 per hour")  # 5 registrations per hour (spam protection)
 def register_user():
@@ -105,7 +203,7 @@ def register_user():
     if not is_valid:
         return jsonify({'message': error}), 400
     
-    hashed_password = generate_password_hash(password)
+    hashed_password = hash_password(password)
     conn = None
     cursor = None
     try:
@@ -116,9 +214,16 @@ def register_user():
         user_val = (email, hashed_password)
         cursor.execute(sql_insert_user, user_val)
         new_user_id = cursor.lastrowid
-        sql_insert_wallet = "INSERT INTO wallets (user_id) VALUES (%s)"
-        cursor.execute(sql_insert_wallet, (new_user_id,))
-        conn.commit()
+        if not is_sharded():
+            sql_insert_wallet = "INSERT INTO wallets (user_id) VALUES (%s)"
+            cursor.execute(sql_insert_wallet, (new_user_id,))
+            conn.commit()
+        else:
+            # Wallet kullanıcının shard'ında - user kaydı önce commit edilir.
+            # Wallet yazılamazsa ilk wallet işleminde oluşturulur (settlement.get_wallet)
+            conn.commit()
+            if not create_sharded_wallet(new_user_id):
+                auth_logger.warning(f"Wallet for user {new_user_id} not created, will be created on first use")
         return jsonify({'message': 'User and wallet created successfully!', 'user_id': new_user_id}), 201
     except Error as e:
         if e.errno == 1062: return jsonify({'message': 'This email address is already in use.'}), 409
@@ -182,58 +287,57 @@ def login_user():
         conn = get_db_connection()
         if conn is None: return jsonify({'message': 'Database server error!'}), 500
         cursor = conn.cursor(dictionary=True)
-        sql = "SELECT user_id, email, password_hash, is_admin, status FROM users WHERE email = %s"
-        cursor.execute(sql, (email,))
-        user = cursor.fetchone()
+        if is_sharded():
+            # Wallet ve oyunlar kullanıcının shard'ında: directory + shard'da birer sorgu
+            cursor.execute(SQL_LOGIN_USER, (email,))
+            user = cursor.fetchone()
+            if user:
+                user.update(fetch_login_state(user['user_id']))
+        else:
+            # Kullanıcı, bakiye ve aktif oyun tek sorguda
+            cursor.execute(SQL_LOGIN, (email,))
+            user = cursor.fetchone()
 
-        if user and check_password_hash(user['password_hash'], password):
+        if user and verify_password(user['password_hash'], password):
             if user['status'] == 'BANNED':
                 return jsonify({'message': 'Your account has been banned.'}), 403
 
+            # Hash parametreleri değiştiyse şifreyi yeni parametrelerle kaydet
+            new_hash = rehash_if_needed(user['password_hash'], password)
+            if new_hash:
+                cursor.execute(
+                    "UPDATE users SET password_hash = %s WHERE user_id = %s",
+                    (new_hash, user['user_id'])
+                )
+                conn.commit()
+
             session['user_id'] = user['user_id']
             session['email'] = user['email']
             session['is_admin'] = user['is_admin']
             
-            # Get user balance
-            cursor.execute("SELECT balance FROM wallets WHERE user_id = %s", (user['user_id'],))
-            wallet = cursor.fetchone()
-            balance = float(wallet['balance']) if wallet else 0.0
-            
-            # Check for active blackjack game
-            cursor.execute("""
-                SELECT game_id, game_state, started_at 
-                FROM games 
-                WHERE user_id = %s AND game_type = 'blackjack' AND status = 'ACTIVE'
-                ORDER BY started_at DESC LIMIT 1
-            """, (user['user_id'],))
-            active_game = cursor.fetchone()
-            
             response_data = {
                 'message': 'Login successful!',
                 'email': user['email'],
                 'is_admin': bool(user['is_admin']),
-                'balance': balance
+                'balance': user['balance'] if user['balance'] is not None else 0.0
             }
             
-            if active_game and active_game.get('game_state'):
+            if user['active_game_id'] and user['active_game_state']:
                 response_data['has_active_game'] = True
                 response_data['active_game'] = {
-                    'game_id': active_game['game_id'],
+                    'game_id': user['active_game_id'],
                     'game_type': 'blackjack',
-                    'started_at': active_game['started_at'].isoformat() if active_game['started_at'] else None
+                    'started_at': user['active_game_started_at']
                 }
             
-            # Login log record
-            ip_address = request.remote_addr
-            cursor.execute(
-                "INSERT INTO logs (user_id, action_type, ip_address) VALUES (%s, 'LOGIN', %s)",
-                (user['user_id'], ip_address)
-            )
-            conn.commit()
+            # Login log record (arka planda yazılır)
+            log_action(user['user_id'], 'LOGIN', request.remote_addr)
             
             return jsonify(response_data), 200
         else:
             return jsonify({'message': 'Invalid email or password!'}), 401
+    except ConnectionError:
+        return jsonify({'message': 'Database server error!'}), 500
     except Error as e:
         print(f"Login error: {e}")
         return jsonify({'message': 'An error occurred during login. Please try again.'}), 500
@@ -292,21 +396,8 @@ def logout_user():
     """
     user_id = session.get('user_id')
     
-    # Logout log record
-    try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor()
-            ip_address = request.remote_addr
-            cursor.execute(
-                "INSERT INTO logs (user_id, action_type, ip_address) VALUES (%s, 'LOGOUT', %s)",
-                (user_id, ip_address)
-            )
-            conn.commit()
-            cursor.close()
-            conn.close()
-    except Error:
-        pass  # Log error is not critical
+    # Logout log record (arka planda yazılır)
+    log_action(user_id, 'LOGOUT', request.remote_addr)
     
     session.clear()
     return jsonify({'message': 'Logged out successfully.'}), 200
@@ -346,6 +437,8 @@ def get_csrf_token_endpoint():
 
 @auth_bp.route('/me', methods=['GET'])
 @login_required
+@conditional_get
+@replica_read
 def get_current_user():
     """
     Get current user information
@@ -383,6 +476,8 @@ def get_current_user():
               type: number
               format: float
               example: 500.00
+      304:
+        description: Not modified - If-None-Match matches the current ETag (no database query)
       401:
         description: Not authenticated
       404:
@@ -396,20 +491,27 @@ def get_current_user():
     
     cursor = conn.cursor(dictionary=True)
     try:
-        cursor.execute("""
-            SELECT u.user_id, u.email, u.status, u.is_admin, u.created_at, w.balance
-            FROM users u
-            LEFT JOIN wallets w ON u.user_id = w.user_id
-            WHERE u.user_id = %s
-        """, (user_id,))
+        if is_sharded():
+            cursor.execute("""
+                SELECT user_id, email, status, is_admin, created_at
+                FROM users
+                WHERE user_id = %s
+            """, (user_id,))
+            user = cursor.fetchone()
+            if user:
+                user['balance'] = get_sharded_balance(user_id)
+        else:
+            cursor.execute("""
+                SELECT u.user_id, u.email, u.status, u.is_admin, u.created_at, w.balance
+                FROM users u
+                LEFT JOIN wallets w ON u.user_id = w.user_id
+                WHERE u.user_id = %s
+            """, (user_id,))
+            user = cursor.fetchone()
         
-        user = cursor.fetchone()
         if not user:
             return jsonify({'message': 'User not found'}), 404
         
-        if user['balance']:
-            user['balance'] = float(user['balance'])
-        
         return jsonify(user)
         
     except Error as e:
@@ -421,6 +523,8 @@ def get_current_user():
 
 @auth_bp.route('/me/games', methods=['GET'])
 @login_required
+@conditional_get
+@replica_read
 def get_my_games():
     """
     Get current user's game history
@@ -472,6 +576,8 @@ def get_my_games():
               outcome:
                 type: string
                 enum: [WIN, LOSS]
+      304:
+        description: Not modified - If-None-Match matches the current ETag (no database query)
       401:
         description: Not authenticated
     """
@@ -482,12 +588,13 @@ def get_my_games():
     offset = request.args.get('offset', 0, type=int)
     game_type = request.args.get('game_type')
     
-    games = GameService.get_user_games(user_id, game_type, limit, offset)
-    return jsonify(games)
+    return stream_json_array(GameService.get_user_games(user_id, game_type, limit, offset))
 
 
 @auth_bp.route('/me/stats', methods=['GET'])
 @login_required
+@conditional_get
+@replica_read
 def get_my_stats():
     """
     Get current user's game statistics
@@ -537,6 +644,8 @@ def get_my_stats():
             profit:
               type: number
               example: 20.00
+      304:
+        description: Not modified - If-None-Match matches the current ETag (no database query)
       401:
         description: Not authenticated
     """
@@ -637,16 +746,17 @@ def change_password():
         cursor.execute("SELECT password_hash FROM users WHERE user_id = %s", (user_id,))
         user = cursor.fetchone()
         
-        if not user or not check_password_hash(user['password_hash'], current_password):
+        if not user or not verify_password(user['password_hash'], current_password):
             return jsonify({'message': 'Incorrect current password!'}), 401
         
         # Hash new password and update
-        new_hash = generate_password_hash(new_password)
+        new_hash = hash_password(new_password)
         cursor.execute(
             "UPDATE users SET password_hash = %s WHERE user_id = %s",
             (new_hash, user_id)
         )
         conn.commit()
+        note_write()
         
         return jsonify({'message': 'Password changed successfully!'})
         
@@ -1,10 +1,15 @@
-import random
 import json
 from flask import Blueprint, request, jsonify, session
-from .database import get_db_connection
+from .database import get_db_connection, note_write
+from .engine import BlackjackEngine, get_deck, calculate_hand_value
+from .events import publish, publish_game
 from .auth import login_required
-from .rules import get_active_rule_value, get_active_rule_set_id
+from .rules import ActiveRules, get_active_rule_set_id
+from .services.wallet_service import WalletService
 from .utils.csrf import csrf_required
+from .utils.db_utils import run_in_transaction, Rollback
+from .utils.etag import bump_state_version
+from .utils.json_provider import dumps, loads
 from mysql.connector import Error
 
 blackjack_bp = Blueprint('blackjack', __name__)
@@ -14,47 +19,64 @@ def get_limiter():
     from . import limiter
     return limiter
 
-# Default Blackjack payouts (used if no rule in rule system)
-DEFAULT_BLACKJACK_PAYOUT = 2.5  # 3:2 payout
-DEFAULT_NORMAL_PAYOUT = 2.0     # Normal win
-
-# Card values
-SUITS = ['H', 'D', 'C', 'S'] # Hearts, Diamonds, Clubs, Spades
-RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-
-def get_deck():
-    return [{'suit': s, 'rank': r} for s in SUITS for r in RANKS]
-
-def calculate_hand_value(hand):
-    value = 0
-    aces = 0
-    for card in hand:
-        rank = card['rank']
-        if rank in ['J', 'Q', 'K']:
-            value += 10
-        elif rank == 'A':
-            aces += 1
-            value += 11
-        else:
-            value += int(rank)
-    
-    while value > 21 and aces:
-        value -= 10
-        aces -= 1
-    
-    return value
+# Shared by the threaded (Flask) and async (game_api.aio) endpoints
+SQL_ACTIVE_GAME = """
+    SELECT g.*, b.bet_id 
+    FROM games g
+    LEFT JOIN bets b ON g.game_id = b.game_id
+    WHERE g.user_id = %s AND g.game_type = 'blackjack' AND g.status = 'ACTIVE'
+    ORDER BY g.started_at DESC
+    LIMIT 1
+"""
+SQL_CREATE_GAME = """
+    INSERT INTO games (user_id, rule_set_id, game_type, status)
+    VALUES (%s, %s, 'blackjack', 'ACTIVE')
+"""
+SQL_CREATE_BET = """
+    INSERT INTO bets (game_id, user_id, bet_type, bet_value, stake_amount)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+SQL_SAVE_GAME_STATE = "UPDATE games SET game_state = %s WHERE game_id = %s"
+SQL_CANCEL_GAME = """
+    UPDATE games SET status = 'CANCELLED', ended_at = NOW() 
+    WHERE game_id = %s
+"""
+SQL_END_GAME = """
+    UPDATE games 
+    SET game_result = %s, game_state = NULL, ended_at = NOW(), status = 'COMPLETED'
+    WHERE game_id = %s
+"""
+SQL_CREATE_PAYOUT = """
+    INSERT INTO payouts (bet_id, win_amount, outcome)
+    VALUES (%s, %s, %s)
+"""
 
 
-def save_game_state(cursor, game_id, deck, player_hand, dealer_hand, bet_amount, wallet_id):
-    """Save game state to database"""
-    game_state = json.dumps({
+def encode_game_state(deck, player_hand, dealer_hand, bet_amount, wallet_id):
+    return dumps({
         'deck': deck,
         'player_hand': player_hand,
         'dealer_hand': dealer_hand,
         'bet_amount': bet_amount,
         'wallet_id': wallet_id
     })
-    cursor.execute("UPDATE games SET game_state = %s WHERE game_id = %s", (game_state, game_id))
+
+
+def encode_game_result(player_hand, dealer_hand, result, payout):
+    return dumps({
+        'player_hand': player_hand,
+        'dealer_hand': dealer_hand,
+        'player_value': calculate_hand_value(player_hand),
+        'dealer_value': calculate_hand_value(dealer_hand),
+        'result': result,
+        'payout': payout
+    })
+
+
+def save_game_state(cursor, game_id, deck, player_hand, dealer_hand, bet_amount, wallet_id):
+    """Save game state to database"""
+    game_state = encode_game_state(deck, player_hand, dealer_hand, bet_amount, wallet_id)
+    cursor.execute(SQL_SAVE_GAME_STATE, (game_state, game_id))
 
 
 def load_game_state(game_row):
@@ -63,7 +85,7 @@ def load_game_state(game_row):
         return None
     
     try:
-        state = json.loads(game_row['game_state']) if isinstance(game_row['game_state'], str) else game_row['game_state']
+        state = loads(game_row['game_state']) if isinstance(game_row['game_state'], str) else game_row['game_state']
         return {
             'game_id': game_row['game_id'],
             'bet_id': game_row.get('bet_id'),
@@ -80,17 +102,29 @@ def load_game_state(game_row):
 
 def get_active_blackjack_game(cursor, user_id):
     """Kullanıcının aktif blackjack oyununu getir"""
-    cursor.execute("""
-        SELECT g.*, b.bet_id 
-        FROM games g
-        LEFT JOIN bets b ON g.game_id = b.game_id
-        WHERE g.user_id = %s AND g.game_type = 'blackjack' AND g.status = 'ACTIVE'
-        ORDER BY g.started_at DESC
-        LIMIT 1
-    """, (user_id,))
+    cursor.execute(SQL_ACTIVE_GAME, (user_id,))
     return cursor.fetchone()
 
 
+def hand_response(user_id, body):
+    """Cevap gövdesini döndür; aynısını kullanıcının diğer oturumlarına da yayınla"""
+    publish('blackjack', body, user_id=user_id)
+    return jsonify(body)
+
+
+def active_game_response(game_row, game_state):
+    """GET /game/blackjack/active body for a resumable game"""
+    return {
+        'has_active_game': True,
+        'game_id': game_row['game_id'],
+        'bet_amount': game_state['bet_amount'],
+        'player_hand': game_state['player_hand'],
+        'dealer_card': game_state['dealer_hand'][0],
+        'player_value': calculate_hand_value(game_state['player_hand']),
+        'started_at': game_row['started_at'].isoformat() if game_row['started_at'] else None
+    }
+
+
 @blackjack_bp.route('/game/blackjack/active', methods=['GET'])
 @login_required
 def check_active_game():
@@ -150,7 +184,7 @@ def check_active_game():
     """
     user_id = session.get('user_id')
     
-    conn = get_db_connection()
+    conn = get_db_connection(shard_key=user_id)
     if not conn:
         return jsonify({'message': 'Database error'}), 500
     
@@ -161,16 +195,7 @@ def check_active_game():
         if game_row:
             game_state = load_game_state(game_row)
             if game_state:
-                player_value = calculate_hand_value(game_state['player_hand'])
-                return jsonify({
-                    'has_active_game': True,
-                    'game_id': game_row['game_id'],
-                    'bet_amount': game_state['bet_amount'],
-                    'player_hand': game_state['player_hand'],
-                    'dealer_card': game_state['dealer_hand'][0],
-                    'player_value': player_value,
-                    'started_at': game_row['started_at'].isoformat() if game_row['started_at'] else None
-                })
+                return jsonify(active_game_response(game_row, game_state))
         
         return jsonify({'has_active_game': False})
         
@@ -245,7 +270,7 @@ def resume_game():
     """
     user_id = session.get('user_id')
     
-    conn = get_db_connection()
+    conn = get_db_connection(shard_key=user_id)
     if not conn:
         return jsonify({'message': 'Database error'}), 500
     
@@ -259,11 +284,9 @@ def resume_game():
         game_state = load_game_state(game_row)
         if not game_state:
             # Orphaned game - clean it up and tell user to start new game
-            cursor.execute("""
-                UPDATE games SET status = 'CANCELLED', ended_at = NOW() 
-                WHERE game_id = %s
-            """, (game_row['game_id'],))
+            cursor.execute(SQL_CANCEL_GAME, (game_row['game_id'],))
             conn.commit()
+            note_write()
             return jsonify({
                 'message': 'Game state corrupted. Game cancelled. Please start a new game.',
                 'has_active_game': False
@@ -374,6 +397,8 @@ def start_game():
         description: Not authenticated
       403:
         description: Invalid CSRF token
+      409:
+        description: Wallet busy (concurrent update), retry the request
     """
     user_id = session.get('user_id')
     data = request.get_json()
@@ -387,41 +412,27 @@ def start_game():
     except ValueError:
         return jsonify({'message': 'Invalid bet amount!'}), 400
 
-    conn = None
-    cursor = None
-    try:
-        conn = get_db_connection()
-        if conn is None: return jsonify({'message': 'Database error!'}), 500
-        
-        conn.start_transaction()
-        cursor = conn.cursor(dictionary=True)
-        
+    def work(conn, cursor):
         active_game = get_active_blackjack_game(cursor, user_id)
         if active_game:
             # Check if game state is valid, if not clean it up
             game_state = load_game_state(active_game)
             if game_state is None:
                 # Orphaned game - clean it up
-                cursor.execute("""
-                    UPDATE games SET status = 'CANCELLED', ended_at = NOW() 
-                    WHERE game_id = %s
-                """, (active_game['game_id'],))
+                cursor.execute(SQL_CANCEL_GAME, (active_game['game_id'],))
                 # Continue to create new game
             else:
-                conn.rollback()
-                return jsonify({
+                raise Rollback((jsonify({
                     'message': 'You already have an active game!',
                     'has_active_game': True,
                     'game_id': active_game['game_id']
-                }), 400
+                }), 400))
         
-        # Check balance
-        cursor.execute("SELECT wallet_id, balance FROM wallets WHERE user_id = %s FOR UPDATE", (user_id,))
-        wallet = cursor.fetchone()
+        # Check balance (row lock only in pessimistic mode)
+        has_enough, wallet = WalletService.reserve(user_id, amount, cursor)
         
-        if not wallet or float(wallet['balance']) < amount:
-            conn.rollback()
-            return jsonify({'message': 'Insufficient balance!'}), 400
+        if not wallet or not has_enough:
+            raise Rollback((jsonify({'message': 'Insufficient balance!'}), 400))
             
         wallet_id = wallet['wallet_id']
         
@@ -429,40 +440,27 @@ def start_game():
         rule_set_id = get_active_rule_set_id()
         
         # Create game record
-        sql_create_game = """
-            INSERT INTO games (user_id, rule_set_id, game_type, status)
-            VALUES (%s, %s, 'blackjack', 'ACTIVE')
-        """
-        cursor.execute(sql_create_game, (user_id, rule_set_id))
+        cursor.execute(SQL_CREATE_GAME, (user_id, rule_set_id))
         game_id = cursor.lastrowid
         
-        # Deduct balance
-        cursor.execute("UPDATE wallets SET balance = balance - %s WHERE wallet_id = %s", (amount, wallet_id))
-        
         # Create bet record
-        sql_create_bet = """
-            INSERT INTO bets (game_id, user_id, bet_type, bet_value, stake_amount)
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        cursor.execute(sql_create_bet, (game_id, user_id, 'blackjack', str(amount), amount))
+        cursor.execute(SQL_CREATE_BET, (game_id, user_id, 'blackjack', str(amount), amount))
         bet_id = cursor.lastrowid
         
         # Initialize Game State
-        deck = get_deck()
-        random.shuffle(deck)
-        
-        player_hand = [deck.pop(), deck.pop()]
-        # SECURITY: Deal only 1 card to Dealer, draw second card when game ends
-        # This prevents hidden card leakage in API response
-        dealer_hand = [deck.pop()]
+        deck, player_hand, dealer_hand = BlackjackEngine().deal()
         
         # Save game state to database
         save_game_state(cursor, game_id, deck, player_hand, dealer_hand, amount, wallet_id)
         
-        conn.commit()
+        # Deduct balance (last write of the transaction)
+        status, new_balance = WalletService.settle(wallet, amount, 0, cursor)
+        if status == 'INSUFFICIENT':
+            raise Rollback((jsonify({'message': 'Insufficient balance!'}), 400))
+        if status == 'CONFLICT':
+            raise Rollback((jsonify({'message': 'Wallet is busy, please try again.'}), 409))
         
-        # Save to session (for performance)
-        session['bj_game'] = {
+        return {
             'game_id': game_id,
             'bet_id': bet_id,
             'deck': deck,
@@ -470,29 +468,43 @@ def start_game():
             'dealer_hand': dealer_hand,
             'bet_amount': amount,
             'wallet_id': wallet_id,
-            'status': 'playing'
-        }
-        
-        player_value = calculate_hand_value(player_hand)
-        
-        # Check for immediate Blackjack
-        if player_value == 21:
-            return handle_game_end(game_id, bet_id, wallet_id, amount, player_hand, dealer_hand, True)
-            
-        return jsonify({
-            'player_hand': player_hand,
-            'dealer_card': dealer_hand[0],
-            'player_value': player_value,
             'status': 'playing',
-            'new_balance': float(wallet['balance']) - amount
-        })
+            'new_balance': new_balance
+        }
 
+    try:
+        game = run_in_transaction(work, site='blackjack.start', isolation_level=WalletService.isolation_level(),
+                                  shard_key=user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error!'}), 500
     except Error as e:
-        if conn: conn.rollback()
         return jsonify({'message': f'Error: {e}'}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+
+    if not isinstance(game, dict):
+        return game
+    
+    new_balance = game.pop('new_balance')
+    bump_state_version(user_id)
+    WalletService.publish_balance(user_id, new_balance, 'blackjack')
+    
+    # Save to session (for performance)
+    session['bj_game'] = game
+    
+    player_hand = game['player_hand']
+    dealer_hand = game['dealer_hand']
+    player_value = calculate_hand_value(player_hand)
+    
+    # Check for immediate Blackjack
+    if player_value == 21:
+        return handle_game_end(game['game_id'], game['bet_id'], game['wallet_id'], amount, player_hand, dealer_hand, True)
+        
+    return hand_response(user_id, {
+        'player_hand': player_hand,
+        'dealer_card': dealer_hand[0],
+        'player_value': player_value,
+        'status': 'playing',
+        'new_balance': new_balance
+    })
 
 
 @blackjack_bp.route('/game/blackjack/hit', methods=['POST'])
@@ -565,7 +577,7 @@ def hit():
     
     # Load from database if game not in session
     if not game or game.get('status') != 'playing':
-        conn = get_db_connection()
+        conn = get_db_connection(shard_key=user_id)
         cursor = conn.cursor(dictionary=True)
         game_row = get_active_blackjack_game(cursor, user_id)
         
@@ -585,59 +597,38 @@ def hit():
     player_hand = game['player_hand']
     
     # Deal card
-    card = deck.pop()
-    player_hand.append(card)
-    
-    player_value = calculate_hand_value(player_hand)
-    
-    # Update game state
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    save_game_state(cursor, game['game_id'], deck, player_hand, game['dealer_hand'], game['bet_amount'], game['wallet_id'])
-    conn.commit()
+    player_value = BlackjackEngine.hit(deck, player_hand)
     
+    dealer_hand = game['dealer_hand']
     if player_value > 21:
-        # End game on Bust
-        game_id = game['game_id']
-        bet_id = game['bet_id']
-        
-        # SECURITY: Start transaction
-        conn.start_transaction()
-        
         # Draw dealer's second card now (player busted, game over)
-        dealer_hand = game['dealer_hand']
-        while len(dealer_hand) < 2:
-            dealer_hand.append(deck.pop())
-        
+        BlackjackEngine.reveal_dealer(deck, dealer_hand)
         dealer_value = calculate_hand_value(dealer_hand)
+    
+    def work(conn, cursor):
+        # Update game state
+        save_game_state(cursor, game['game_id'], deck, player_hand, dealer_hand, game['bet_amount'], game['wallet_id'])
         
-        # Save game result
-        game_result_json = json.dumps({
-            'player_hand': player_hand,
-            'dealer_hand': dealer_hand,
-            'player_value': player_value,
-            'dealer_value': dealer_value,
-            'result': 'bust',
-            'payout': 0
-        })
-        cursor.execute("""
-            UPDATE games 
-            SET game_result = %s, game_state = NULL, ended_at = NOW(), status = 'COMPLETED'
-            WHERE game_id = %s
-        """, (game_result_json, game_id))
-        
-        # Create payout record (LOSS)
-        cursor.execute("""
-            INSERT INTO payouts (bet_id, win_amount, outcome)
-            VALUES (%s, 0, 'LOSS')
-        """, (bet_id,))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
+        if player_value > 21:
+            # End game on Bust - save game result
+            cursor.execute(SQL_END_GAME, (encode_game_result(player_hand, dealer_hand, 'bust', 0), game['game_id']))
+            
+            # Create payout record (LOSS)
+            cursor.execute(SQL_CREATE_PAYOUT, (game['bet_id'], 0, 'LOSS'))
+    
+    try:
+        run_in_transaction(work, site='blackjack.hit', shard_key=user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error'}), 500
+    except Error as e:
+        return jsonify({'message': f'Error: {e}'}), 500
+    
+    if player_value > 21:
         session.pop('bj_game', None)
-        return jsonify({
+        # Game history and stats changed
+        bump_state_version(user_id)
+        publish_game(game['game_id'], user_id, 'blackjack', game['bet_amount'], 0, 'LOSS')
+        return hand_response(user_id, {
             'player_hand': player_hand,
             'player_value': player_value,
             'dealer_hand': dealer_hand,
@@ -648,11 +639,9 @@ def hit():
     
     # Update session
     session['bj_game'] = game
-    cursor.close()
-    conn.close()
     
     # SECURITY: Send only dealer's open card, no hidden card (not drawn yet)
-    return jsonify({
+    return hand_response(user_id, {
         'player_hand': player_hand,
         'player_value': player_value,
         'dealer_card': game['dealer_hand'][0],  # Sadece açık kart
@@ -742,7 +731,7 @@ def stand():
     
     # Load from database if game not in session
     if not game or game.get('status') != 'playing':
-        conn = get_db_connection()
+        conn = get_db_connection(shard_key=user_id)
         cursor = conn.cursor(dictionary=True)
         game_row = get_active_blackjack_game(cursor, user_id)
         
@@ -773,128 +762,62 @@ def handle_game_end(game_id, bet_id, wallet_id, amount, player_hand, dealer_hand
     """Handle game end"""
     user_id = session.get('user_id')
     
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    deck = session.get('bj_game', {}).get('deck', get_deck())
     
-    try:
-        conn.start_transaction()
-        
-        # SECURITY: Prevent race condition with Row lock (for payout)
-        cursor.execute("SELECT balance FROM wallets WHERE wallet_id = %s FOR UPDATE", (wallet_id,))
-        wallet_row = cursor.fetchone()
+    # SECURITY: Draw dealer's second card now (game over), then to 17, and determine winner
+    engine = BlackjackEngine(ActiveRules())
+    result, payout, message = engine.stand(amount, deck, player_hand, dealer_hand, is_blackjack)
+    
+    player_value = calculate_hand_value(player_hand)
+    dealer_value = calculate_hand_value(dealer_hand)
+    
+    outcome = 'WIN' if result in ['win', 'blackjack'] else 'LOSS'
+    
+    def work(conn, cursor):
+        # SECURITY: Prevent race condition with Row lock (for payout, pessimistic mode only)
+        wallet_row = WalletService.get_wallet(user_id, cursor, for_update=not WalletService.is_optimistic())
         if not wallet_row:
-            conn.rollback()
-            return jsonify({'message': 'Wallet not found!'}), 404
-        
-        deck = session.get('bj_game', {}).get('deck', get_deck())
-        
-        # SECURITY: Draw dealer's second card now (game over)
-        # Dealer initially only had 1 card
-        while len(dealer_hand) < 2:
-            if deck:
-                dealer_hand.append(deck.pop())
-            else:
-                break
-        
-        # Dealer continues to draw until 17
-        while calculate_hand_value(dealer_hand) < 17:
-            if deck:
-                dealer_hand.append(deck.pop())
-            else:
-                break
-        
-        player_value = calculate_hand_value(player_hand)
-        dealer_value = calculate_hand_value(dealer_hand)
-        
-        # Determine winner
-        payout = 0
-        result = ''
-        message = ''
-        
-        if is_blackjack and player_value == 21 and len(player_hand) == 2:
-            # Player has blackjack
-            if dealer_value == 21 and len(dealer_hand) == 2:
-                result = 'push'
-                payout = amount
-                message = 'Both sides Blackjack! Push.'
-            else:
-                result = 'blackjack'
-                payout_multiplier = get_active_rule_value('blackjack_payout', DEFAULT_BLACKJACK_PAYOUT)
-                payout = amount * payout_multiplier
-                message = f'BLACKJACK! You won! (+{payout:.2f})'
-        elif dealer_value > 21:
-            result = 'win'
-            payout_multiplier = get_active_rule_value('blackjack_normal_payout', DEFAULT_NORMAL_PAYOUT)
-            payout = amount * payout_multiplier
-            message = f'Dealer busted! You won! (+{payout:.2f})'
-        elif player_value > dealer_value:
-            result = 'win'
-            payout_multiplier = get_active_rule_value('blackjack_normal_payout', DEFAULT_NORMAL_PAYOUT)
-            payout = amount * payout_multiplier
-            message = f'You won! (+{payout:.2f})'
-        elif player_value < dealer_value:
-            result = 'lose'
-            payout = 0
-            message = 'You lost.'
-        else:
-            result = 'push'
-            payout = amount
-            message = 'Push! Bet returned.'
-        
-        # Update balance if won (wallet is already locked with FOR UPDATE)
-        if payout > 0:
-            cursor.execute(
-                "UPDATE wallets SET balance = balance + %s WHERE wallet_id = %s",
-                (payout, wallet_id)
-            )
+            raise Rollback((jsonify({'message': 'Wallet not found!'}), 404))
         
         # Save game result
-        game_result_json = json.dumps({
-            'player_hand': player_hand,
-            'dealer_hand': dealer_hand,
-            'player_value': player_value,
-            'dealer_value': dealer_value,
-            'result': result,
-            'payout': payout
-        })
-        
-        cursor.execute("""
-            UPDATE games 
-            SET game_result = %s, game_state = NULL, ended_at = NOW(), status = 'COMPLETED'
-            WHERE game_id = %s
-        """, (game_result_json, game_id))
+        cursor.execute(SQL_END_GAME, (encode_game_result(player_hand, dealer_hand, result, payout), game_id))
         
         # Create payout record
-        outcome = 'WIN' if result in ['win', 'blackjack'] else 'LOSS'
-        cursor.execute("""
-            INSERT INTO payouts (bet_id, win_amount, outcome)
-            VALUES (%s, %s, %s)
-        """, (bet_id, payout, outcome))
-        
-        conn.commit()
-        
-        # Get new balance
-        cursor.execute("SELECT balance FROM wallets WHERE wallet_id = %s", (wallet_id,))
-        new_balance = float(cursor.fetchone()['balance'])
-        
-        # Clear session
-        session.pop('bj_game', None)
-        
-        return jsonify({
-            'player_hand': player_hand,
-            'dealer_hand': dealer_hand,
-            'player_value': player_value,
-            'dealer_value': dealer_value,
-            'result': result,
-            'status': 'finished',
-            'message': message,
-            'payout': payout,
-            'new_balance': new_balance
-        })
+        cursor.execute(SQL_CREATE_PAYOUT, (bet_id, payout, outcome))
         
+        # Update balance if won (last write of the transaction)
+        if payout > 0:
+            status, new_balance = WalletService.settle(wallet_row, 0, payout, cursor)
+            return new_balance
+        return wallet_row['balance']
+    
+    try:
+        new_balance = run_in_transaction(work, site='blackjack.end', isolation_level=WalletService.isolation_level(),
+                                         shard_key=user_id)
+    except ConnectionError:
+        return jsonify({'message': 'Database error'}), 500
     except Error as e:
-        conn.rollback()
         return jsonify({'message': f'Error: {e}'}), 500
-    finally:
-        cursor.close()
-        conn.close()
+    
+    if isinstance(new_balance, tuple):
+        return new_balance
+    
+    # Clear session
+    session.pop('bj_game', None)
+    # Balance (on a payout) and game history changed
+    bump_state_version(user_id)
+    publish_game(game_id, user_id, 'blackjack', amount, payout, outcome)
+    if payout > 0:
+        WalletService.publish_balance(user_id, new_balance, 'blackjack')
+    
+    return hand_response(user_id, {
+        'player_hand': player_hand,
+        'dealer_hand': dealer_hand,
+        'player_value': player_value,
+        'dealer_value': dealer_value,
+        'result': result,
+        'status': 'finished',
+        'message': message,
+        'payout': payout,
+        'new_balance': new_balance
+    })
@@ -0,0 +1,190 @@
+from flask import jsonify, Blueprint, session
+from mysql.connector import Error
+from .auth import login_required
+from .blackjack import get_active_blackjack_game, load_game_state, calculate_hand_value
+from .database import get_db_connection
+from .engine import DEFAULT_PAYOUT_TABLE
+from .events import publish
+from .sharding import is_sharded
+from .utils.csrf import get_csrf_token
+from .utils.logger import error_logger
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+def _fetch_profile(cursor, user_id):
+    cursor.execute("""
+        SELECT u.user_id, u.email, u.status, u.is_admin, u.created_at, w.balance
+        FROM users u
+        LEFT JOIN wallets w ON u.user_id = w.user_id
+        WHERE u.user_id = %s
+    """, (user_id,))
+    return cursor.fetchone()
+
+
+def _fetch_payout_table(cursor):
+    """Aktif rule set'in kuralları, eksikler varsayılanla doldurulur"""
+    cursor.execute("""
+        SELECT rs.rule_set_id, rs.name, r.rule_type, r.rule_param
+        FROM rule_sets rs
+        LEFT JOIN rules r ON r.rule_set_id = rs.rule_set_id
+        WHERE rs.is_active = TRUE
+    """)
+    rows = cursor.fetchall()
+
+    payouts = dict(DEFAULT_PAYOUT_TABLE)
+    for row in rows:
+        if row['rule_type'] in payouts and row['rule_param']:
+            try:
+                payouts[row['rule_type']] = float(row['rule_param'])
+            except (TypeError, ValueError):
+                pass
+
+    return {
+        'rule_set_id': rows[0]['rule_set_id'] if rows else None,
+        'name': rows[0]['name'] if rows else None,
+        'payouts': payouts
+    }
+
+
+def _active_game(cursor, user_id):
+    """check_active_game() ile aynı içerik"""
+    game_row = get_active_blackjack_game(cursor, user_id)
+    game_state = load_game_state(game_row)
+    if not game_state:
+        return {'has_active_game': False}
+
+    return {
+        'has_active_game': True,
+        'game_id': game_row['game_id'],
+        'game_type': 'blackjack',
+        'bet_amount': game_state['bet_amount'],
+        'player_hand': game_state['player_hand'],
+        'dealer_card': game_state['dealer_hand'][0],
+        'player_value': calculate_hand_value(game_state['player_hand']),
+        'started_at': game_row['started_at']
+    }
+
+
+def publish_rule_set():
+    """Aktif ödeme tablosunu tüm oyunculara yayınla (rule set değişikliğinden sonra)"""
+    conn = get_db_connection()
+    if not conn:
+        return
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        publish('rules', {'rule_set': _fetch_payout_table(cursor)})
+    except Error as e:
+        error_logger.error(f"Rule set publish error: {e}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@bootstrap_bp.route('/bootstrap', methods=['GET'])
+@login_required
+def bootstrap():
+    """
+    Client bootstrap
+
+    ---
+    tags:
+      - User
+    summary: Everything the client needs on page load
+    description: |
+      Returns the profile with wallet balance, a CSRF token, the active
+      blackjack game (if any) and the active payout table in one response.
+      Replaces the `/me`, `/csrf-token`, `/wallets/me` and
+      `/game/blackjack/active` calls made on startup.
+    security:
+      - session: []
+    responses:
+      200:
+        description: Bootstrap data
+        schema:
+          type: object
+          properties:
+            user:
+              type: object
+              description: Same fields as GET /me
+            csrf_token:
+              type: string
+              example: a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6
+            active_game:
+              type: object
+              description: Same fields as GET /game/blackjack/active, plus game_type
+              properties:
+                has_active_game:
+                  type: boolean
+                  example: false
+            rule_set:
+              type: object
+              properties:
+                rule_set_id:
+                  type: integer
+                  example: 1
+                name:
+                  type: string
+                  example: Default Rules
+                payouts:
+                  type: object
+                  description: Payout multiplier per rule type (defaults filled in)
+                  example:
+                    coinflip_payout: 1.95
+                    roulette_number_payout: 35
+      401:
+        description: Not authenticated
+      404:
+        description: User not found
+    """
+    user_id = session.get('user_id')
+
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'message': 'Database error'}), 500
+
+    cursor = conn.cursor(dictionary=True)
+    shard_conn = None
+    try:
+        if is_sharded():
+            cursor.execute("""
+                SELECT user_id, email, status, is_admin, created_at
+                FROM users
+                WHERE user_id = %s
+            """, (user_id,))
+            user = cursor.fetchone()
+            rule_set = _fetch_payout_table(cursor)
+            if not user:
+                return jsonify({'message': 'User not found'}), 404
+
+            # Wallet ve oyunlar kullanıcının shard'ında
+            shard_conn = get_db_connection(shard_key=user_id)
+            if not shard_conn:
+                return jsonify({'message': 'Database error'}), 500
+            cursor.close()
+            cursor = shard_conn.cursor(dictionary=True)
+            cursor.execute("SELECT balance FROM wallets WHERE user_id = %s", (user_id,))
+            wallet = cursor.fetchone()
+            user['balance'] = wallet['balance'] if wallet else None
+        else:
+            user = _fetch_profile(cursor, user_id)
+            if not user:
+                return jsonify({'message': 'User not found'}), 404
+            rule_set = _fetch_payout_table(cursor)
+
+        active_game = _active_game(cursor, user_id)
+
+    except Error as e:
+        return jsonify({'message': f'Error: {e}'}), 500
+    finally:
+        cursor.close()
+        conn.close()
+        if shard_conn:
+            shard_conn.close()
+
+    return jsonify({
+        'user': user,
+        'csrf_token': get_csrf_token(),
+        'active_game': active_game,
+        'rule_set': rule_set
+    })
@@ -0,0 +1,107 @@
+"""
+Event broker - Olayları aynı makinedeki tüm worker process'lere dağıtır
+
+events.EventBus tek process içinde çalışır; gunicorn worker'ları ve async
+sunucu ayrı process'lerdir. Broker, olayların tek bir sıraya yazıldığı ve
+her process'in okuduğu paylaşılan bir log'dur:
+
+    EVENTS_BROKER_URI=sqlite:////var/run/oddcity/events.sqlite3   (varsayılan: game_api/events.sqlite3)
+    EVENTS_BROKER_URI=memory://                                    (tek process, broker yok)
+
+SQLite dosyası Redis pub/sub gibi gerçek bir broker'ın yerel karşılığıdır:
+yazmalar tek dosya kilidiyle sıralanır, id'ler (AUTOINCREMENT) tüm
+process'lerde aynıdır ve Last-Event-ID hangi worker'a bağlanılırsa bağlanılsın
+geçerli kalır. Son Config.EVENTS_REPLAY_SIZE kadar kayıt tutulur.
+
+Bağlantılar thread (ve fork sonrası process) başına açılır, WAL modunda
+çalışır (bkz. ratelimit.SQLiteStorage).
+"""
+import os
+import sqlite3
+import threading
+from urllib.parse import urlparse
+
+
+def create_broker(uri):
+    """URI'ye göre broker; memory:// için None (olaylar process içinde kalır)"""
+    scheme = urlparse(uri).scheme
+    if scheme == 'memory':
+        return None
+    if scheme == 'sqlite':
+        return SQLiteBroker(urlparse(uri).path[1:] or 'events.sqlite3')
+    raise ValueError(f"Unsupported EVENTS_BROKER_URI: {uri}")
+
+
+class SQLiteBroker:
+    """
+    Paylaşılan olay log'u
+
+    URI: sqlite:///relative/path.db veya sqlite:////absolute/path.db
+    """
+
+    def __init__(self, path, timeout=1.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                user_id INTEGER,
+                data TEXT NOT NULL
+            )
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        # Dosya yeniden oluşturulursa epoch değişir, eski id'ler reset'e düşer
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (os.urandom(4).hex(),))
+
+    def _conn(self):
+        # Thread (ve fork sonrası process) başına bir bağlantı
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def epoch(self):
+        return self._conn().execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+    def last_id(self):
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def append(self, events):
+        """
+        Olayları tek transaction'da yaz
+
+        Args:
+            events: [(topic, user_id, data_json), ...]
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO events (topic, user_id, data) VALUES (?, ?, ?)", events)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def read_after(self, after_id, limit=1000):
+        """after_id'den sonraki olaylar: [(id, topic, user_id, data_json), ...]"""
+        return self._conn().execute(
+            "SELECT id, topic, user_id, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit)
+        ).fetchall()
+
+    def prune(self, keep):
+        """Son `keep` olay dışındakileri sil"""
+        self._conn().execute(
+            "DELETE FROM events WHERE id <= (SELECT COALESCE(MAX(id), 0) FROM events) - ?", (keep,)
+        )
@@ -0,0 +1,158 @@
+"""
+Circuit breaker - Veritabanı erişilemezken istekleri bekletmeden reddeder
+
+Durumlar:
+  - CLOSED: Normal çalışma, bağlantılar denenir.
+  - OPEN: Art arda hata eşiği aşıldı, bağlantı denenmeden CircuitOpenError fırlatılır.
+  - HALF_OPEN: Arka plandaki probe bağlantı deniyor; istekler hâlâ reddedilir.
+
+Probe başarılı olursa breaker tekrar CLOSED olur.
+"""
+import logging
+import threading
+import time
+
+CLOSED = 'CLOSED'
+OPEN = 'OPEN'
+HALF_OPEN = 'HALF_OPEN'
+
+# utils.db_utils ile aynı logger (utils paketi database'i import ettiği için burada kullanılamaz)
+db_logger = logging.getLogger('game_api.db')
+
+
+class CircuitOpenError(Exception):
+    """Breaker açıkken fırlatılır, uygulama 503 döner"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit '{name}' is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Art arda hata sayan, thread-safe circuit breaker
+
+    Kullanım:
+        breaker = CircuitBreaker('mysql', probe=lambda: connect().close())
+
+        breaker.before_call()      # OPEN ise CircuitOpenError
+        try:
+            conn = connect()
+        except Error:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+    """
+
+    def __init__(self, name, probe, failure_threshold=5, probe_interval=5.0):
+        self.name = name
+        self.probe = probe
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._next_probe_at = None
+        self._probe_thread = None
+
+        # Metrics
+        self._total_failures = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    @property
+    def state(self):
+        return self._state
+
+    def before_call(self):
+        """Bağlantı denemeden önce çağrılır; breaker açıksa hemen hata fırlatır"""
+        with self._lock:
+            if self._state == CLOSED:
+                return
+            self._rejected += 1
+            retry_after = max(1, int(round((self._next_probe_at or time.monotonic()) - time.monotonic())))
+        raise CircuitOpenError(self.name, retry_after)
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            self._total_failures += 1
+            if self._state == CLOSED and self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        """Lock tutulurken çağrılır"""
+        self._state = OPEN
+        self._opened_at = time.time()
+        self._next_probe_at = time.monotonic() + self.probe_interval
+        self._times_opened += 1
+        db_logger.error(
+            f"Circuit '{self.name}' opened after {self._consecutive_failures} consecutive failures"
+        )
+
+        if self._probe_thread is None or not self._probe_thread.is_alive():
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop, name=f'{self.name}-probe', daemon=True
+            )
+            self._probe_thread.start()
+
+    def _probe_loop(self):
+        """Breaker kapanana kadar arka planda periyodik bağlantı dene"""
+        while True:
+            time.sleep(self.probe_interval)
+
+            with self._lock:
+                self._state = HALF_OPEN
+
+            try:
+                self.probe()
+            except Exception as e:
+                with self._lock:
+                    self._state = OPEN
+                    self._next_probe_at = time.monotonic() + self.probe_interval
+                db_logger.warning(f"Circuit '{self.name}' probe failed: {e}")
+                continue
+
+            with self._lock:
+                self._state = CLOSED
+                self._consecutive_failures = 0
+                self._opened_at = None
+                self._next_probe_at = None
+            db_logger.info(f"Circuit '{self.name}' closed, database reachable again")
+            return
+
+    def after_fork(self):
+        """
+        Fork sonrası child process'te çağrılır
+
+        Probe thread'i fork'a taşınmaz; breaker açıksa child'da yeniden başlatılır.
+        """
+        self._lock = threading.Lock()
+        self._probe_thread = None
+        if self._state != CLOSED:
+            self._state = OPEN
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop, name=f'{self.name}-probe', daemon=True
+            )
+            self._probe_thread.start()
+
+    def stats(self):
+        """Metrics / health endpoint'i için anlık durum"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'state': self._state,
+                'consecutive_failures': self._consecutive_failures,
+                'failure_threshold': self.failure_threshold,
+                'total_failures': self._total_failures,
+                'rejected': self._rejected,
+                'times_opened': self._times_opened,
+                'opened_at': self._opened_at,
+            }
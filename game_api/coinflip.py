@@ -1,11 +1,10 @@
-import random
-import json
 from flask import jsonify, request, Blueprint, session
-from .database import get_db_connection
 from .auth import login_required
-from .rules import get_active_rule_value, get_active_rule_set_id
+from .engine import CoinflipEngine, CHOICES
+from .rules import ActiveRules
+from .services.game_service import GameService
 from .utils.csrf import csrf_required
-from mysql.connector import Error
+from .utils.idempotency import idempotent, is_idempotent_replay
 
 coinflip_bp = Blueprint('coinflip', __name__)
 
@@ -14,13 +13,61 @@ def get_limiter():
     from . import limiter
     return limiter
 
-# Default payout multiplier (used if no rule in rule system)
-DEFAULT_PAYOUT_MULTIPLIER = 1.95
+# Shared by the threaded (Flask) and async (game_api.aio) endpoints
+def validate_bet(data):
+    """Returns (error message, None) or (None, (bet_amount, choice))"""
+    if not data or 'amount' not in data or 'choice' not in data:
+        return 'Bet (amount) and choice are required!', None
+
+    try:
+        bet_amount = float(data['amount'])
+        choice = str(data['choice']).lower()
+    except ValueError:
+        return 'Bet (amount) must be a valid number!', None
+
+    if bet_amount <= 0:
+        return 'Bet must be greater than zero!', None
+
+    if choice not in CHOICES:
+        return "Choice must be 'yazi' (heads) or 'tura' (tails)!", None
+
+    return None, (bet_amount, choice)
+
+
+def game_error(result, bet_amount):
+    """(body, status) for a failed GameService.process_game result"""
+    error = result.get('error')
+    if error == 'db_unavailable':
+        return {'message': 'Database server error!'}, 500
+    if error == 'wallet_not_found':
+        return {'message': 'Wallet not found!'}, 404
+    if error == 'insufficient_balance':
+        return {
+            'message': 'Insufficient balance!',
+            'current_balance': result['current_balance'],
+            'bet_amount': bet_amount
+        }, 403
+    if error == 'wallet_conflict':
+        return {'message': 'Wallet is busy, please try again.'}, 409
+    return {'message': 'An error occurred during the game. Transaction rolled back.'}, 500
+
+
+def game_response(choice, game_result, is_win, payout_amount, new_balance):
+    return {
+        'message': f'Congratulations, YOU WON! ({payout_amount:.2f})' if is_win else 'You lost.',
+        'your_choice': choice,
+        'result': game_result,
+        'is_win': is_win,
+        'payout': payout_amount,
+        'new_balance': new_balance
+    }
+
 
 @coinflip_bp.route('/game/coinflip/play', methods=['POST'])
-@get_limiter().limit("60 per minute")  # 60 games per minute
+@get_limiter().limit("60 per minute", exempt_when=is_idempotent_replay)  # 60 games per minute
 @login_required
 @csrf_required
+@idempotent
 def play_coinflip():
     """
     Play a coinflip game
@@ -44,6 +91,15 @@ def play_coinflip():
         type: string
         required: true
         description: CSRF token
+      - in: header
+        name: Idempotency-Key
+        type: string
+        required: false
+        maxLength: 128
+        description: |
+          Client-generated unique key. Retrying with the same key returns the
+          stored response (header Idempotent-Replayed: true) without charging
+          the wallet again or counting against the rate limit.
       - in: body
         name: body
         required: true
@@ -99,149 +155,30 @@ def play_coinflip():
         description: Insufficient balance or invalid CSRF token
       404:
         description: Wallet not found
+      409:
+        description: Wallet busy (concurrent update) or a request with the same Idempotency-Key is still in progress, retry the request
+      422:
+        description: Idempotency-Key was already used for a different request
     """
     user_id = session.get('user_id')
-    data = request.get_json()
 
-    if not data or 'amount' not in data or 'choice' not in data:
-        return jsonify({'message': 'Bet (amount) and choice are required!'}), 400
+    error, bet = validate_bet(request.get_json())
+    if error:
+        return jsonify({'message': error}), 400
+    bet_amount, choice = bet
 
-    try:
-        bet_amount = float(data['amount'])
-        choice = str(data['choice']).lower()
-    except ValueError:
-        return jsonify({'message': 'Bet (amount) must be a valid number!'}), 400
-
-    if bet_amount <= 0:
-        return jsonify({'message': 'Bet must be greater than zero!'}), 400
+    # Payout multiplier is read from the active rule set only on a win
+    game_result, is_win, payout_amount = CoinflipEngine(ActiveRules()).play(bet_amount, choice)
 
-    if choice not in ['yazi', 'tura']:
-        return jsonify({'message': "Choice must be 'yazi' (heads) or 'tura' (tails)!"}), 400
+    # Wallet check, game/bet/payout records and balance update in one transaction
+    result = GameService.process_game(
+        user_id, 'coinflip', bet_amount, 'choice', choice,
+        {'result': game_result, 'choice': choice, 'is_win': is_win},
+        is_win, payout_amount
+    )
 
-    conn = None
-    cursor = None
+    if not result['success']:
+        body, status = game_error(result, bet_amount)
+        return jsonify(body), status
 
-    try:
-        conn = get_db_connection()
-        if conn is None:
-            return jsonify({'message': 'Database server error!'}), 500
-
-        conn.start_transaction()
-        cursor = conn.cursor(dictionary=True)
-
-        sql_get_wallet = "SELECT wallet_id, balance FROM wallets WHERE user_id = %s FOR UPDATE"
-        cursor.execute(sql_get_wallet, (user_id,))
-        wallet = cursor.fetchone()
-
-        if not wallet:
-            conn.rollback()
-            return jsonify({'message': 'Wallet not found!'}), 404
-
-        wallet_id = wallet['wallet_id']
-        current_balance = float(wallet['balance'])
-
-        if current_balance < bet_amount:
-            conn.rollback()
-            return jsonify({
-                'message': 'Insufficient balance!',
-                'current_balance': current_balance,
-                'bet_amount': bet_amount
-            }), 403
-
-        # Get active rule set ID
-        rule_set_id = get_active_rule_set_id()
-        
-        # Create game record
-        sql_create_game = """
-            INSERT INTO games (user_id, rule_set_id, game_type, status)
-            VALUES (%s, %s, 'coinflip', 'ACTIVE')
-        """
-        cursor.execute(sql_create_game, (user_id, rule_set_id))
-        game_id = cursor.lastrowid
-        
-        # Deduct balance
-        sql_debit = "UPDATE wallets SET balance = balance - %s WHERE wallet_id = %s"
-        cursor.execute(sql_debit, (bet_amount, wallet_id))
-
-        # Create bet record
-        sql_create_bet = """
-            INSERT INTO bets (game_id, user_id, bet_type, bet_value, stake_amount)
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        cursor.execute(sql_create_bet, (game_id, user_id, 'choice', choice, bet_amount))
-        bet_id = cursor.lastrowid
-
-        game_result = random.choice(['yazi', 'tura'])
-        is_win = (choice == game_result)
-
-        new_balance = 0.0
-        
-        # Save game result
-        game_result_json = json.dumps({'result': game_result, 'choice': choice, 'is_win': is_win})
-        sql_update_game = """
-            UPDATE games 
-            SET game_result = %s, ended_at = NOW(), status = 'COMPLETED'
-            WHERE game_id = %s
-        """
-        cursor.execute(sql_update_game, (game_result_json, game_id))
-        
-        if is_win:
-            # Get payout multiplier from database, or use default
-            payout_multiplier = get_active_rule_value('coinflip_payout', DEFAULT_PAYOUT_MULTIPLIER)
-            payout_amount = bet_amount * payout_multiplier
-
-            # Add balance
-            sql_credit = "UPDATE wallets SET balance = balance + %s WHERE wallet_id = %s"
-            cursor.execute(sql_credit, (payout_amount, wallet_id))
-
-            # Create payout record
-            sql_create_payout = """
-                INSERT INTO payouts (bet_id, win_amount, outcome)
-                VALUES (%s, %s, 'WIN')
-            """
-            cursor.execute(sql_create_payout, (bet_id, payout_amount))
-
-            conn.commit()
-
-            cursor.execute("SELECT balance FROM wallets WHERE wallet_id = %s", (wallet_id,))
-            new_balance = cursor.fetchone()['balance']
-
-            return jsonify({
-                'message': f'Congratulations, YOU WON! ({payout_amount:.2f})',
-                'your_choice': choice,
-                'result': game_result,
-                'is_win': True,
-                'payout': payout_amount,
-                'new_balance': float(new_balance)
-            }), 200
-
-        else:
-            # Create payout record for loss (win_amount = 0)
-            sql_create_payout = """
-                INSERT INTO payouts (bet_id, win_amount, outcome)
-                VALUES (%s, 0, 'LOSS')
-            """
-            cursor.execute(sql_create_payout, (bet_id,))
-            
-            conn.commit()
-
-            cursor.execute("SELECT balance FROM wallets WHERE wallet_id = %s", (wallet_id,))
-            new_balance = cursor.fetchone()['balance']
-
-            return jsonify({
-                'message': 'You lost.',
-                'your_choice': choice,
-                'result': game_result,
-                'is_win': False,
-                'payout': 0,
-                'new_balance': float(new_balance)
-            }), 200
-
-    except Error as e:
-        if conn:
-            conn.rollback()
-        print(f"Coinflip Error: {e}")
-        return jsonify({'message': 'An error occurred during the game. Transaction rolled back.'}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+    return jsonify(game_response(choice, game_result, is_win, payout_amount, result['new_balance'])), 200
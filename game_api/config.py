@@ -2,6 +2,19 @@ import os
 from datetime import timedelta
 
 
+def _parse_shards(value):
+    """DB_SHARDS env değerini parse et: 'host:port/database,...' -> [dict, ...]"""
+    shards = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        address, database = entry.split('/', 1)
+        host, _, port = address.partition(':')
+        shards.append({'host': host, 'port': int(port or 3306), 'database': database})
+    return shards
+
+
 class Config:
 
     DEBUG = False
@@ -15,6 +28,167 @@ class Config:
         'database': 'game_db'
     }
 
+    # Read Replica (opsiyonel)
+    # DB_REPLICA_HOST set edilmezse @replica_read view'ları da primary'yi kullanır.
+    # Test için ikinci bir yerel MySQL instance'ı yeterli (örn. DB_REPLICA_PORT=3307).
+    DB_REPLICA_CONFIG = {
+        'host': os.environ.get('DB_REPLICA_HOST'),
+        'port': int(os.environ.get('DB_REPLICA_PORT', '3306')),
+        'user': os.environ.get('DB_REPLICA_USER', DB_CONFIG['user']),
+        'password': os.environ.get('DB_REPLICA_PASSWORD', DB_CONFIG['password']),
+        'database': os.environ.get('DB_REPLICA_DATABASE', DB_CONFIG['database'])
+    } if os.environ.get('DB_REPLICA_HOST') else None
+    DB_REPLICA_POOL_SIZE = int(os.environ.get('DB_REPLICA_POOL_SIZE', '5'))
+    DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', '2'))                      # saniye
+    DB_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', '1'))  # saniye
+    # Kullanıcının kendi yazma işleminden sonra okumaları bu süre boyunca primary'den yapılır
+    DB_READ_YOUR_WRITES_WINDOW = float(os.environ.get('DB_READ_YOUR_WRITES_WINDOW', '5'))      # saniye
+
+    # Sharding (opsiyonel)
+    # Kullanıcı verisi (wallets, games, bets, payouts, transactions, logs) user_id % N ile
+    # bu veritabanlarına dağıtılır; users/rule_sets/rules DB_CONFIG'te (directory) kalır.
+    # Format: "host:port/database,host:port/database" (kullanıcı/şifre DB_CONFIG'ten)
+    # Örn: DB_SHARDS="localhost:3306/game_shard_0,localhost:3306/game_shard_1"
+    DB_SHARDS = _parse_shards(os.environ.get('DB_SHARDS', ''))
+
+    # Wallet Concurrency
+    # 'pessimistic': wallet satırı SELECT ... FOR UPDATE ile tüm settlement boyunca kilitli kalır
+    # 'optimistic': kilitsiz okuma + version kolonu kontrol eden tek bir koşullu UPDATE
+    WALLET_CONCURRENCY_MODE = os.environ.get('WALLET_CONCURRENCY_MODE', 'pessimistic')
+    WALLET_OPTIMISTIC_MAX_RETRIES = int(os.environ.get('WALLET_OPTIMISTIC_MAX_RETRIES', '5'))
+
+    # Transaction Retry
+    # Deadlock (1213) ve lock wait timeout (1205) hatalarında unit of work yeniden çalıştırılır
+    DB_TX_MAX_ATTEMPTS = int(os.environ.get('DB_TX_MAX_ATTEMPTS', '3'))
+    DB_TX_BACKOFF_BASE = float(os.environ.get('DB_TX_BACKOFF_BASE', '0.02'))  # saniye
+    DB_TX_BACKOFF_MAX = float(os.environ.get('DB_TX_BACKOFF_MAX', '0.5'))     # saniye
+
+    # Database Timeouts (saniye)
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', '3'))
+    DB_READ_TIMEOUT = int(os.environ.get('DB_READ_TIMEOUT', '10'))
+    DB_WRITE_TIMEOUT = int(os.environ.get('DB_WRITE_TIMEOUT', '10'))
+
+    # Connection Pool
+    # Primary bağlantıları pool'dan gelir; 0 = her istekte yeni bağlantı
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
+    # Pool doluyken boş bağlantı için en fazla bu kadar beklenir, sonra 503 (saniye)
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '2'))
+    # true: bağlantı pool'a dönerken COM_RESET_CONNECTION (user değişkenleri ve temp tablolar
+    # da temizlenir, prepared statement'lar her istekte yeniden hazırlanır).
+    # false: oturum değişkenleri checkout'ta SET SESSION ile varsayılana döner
+    DB_POOL_RESET_SESSION = os.environ.get('DB_POOL_RESET_SESSION', 'false').lower() == 'true'
+    # Sık çalışan sorgular bağlantı başına bir kez prepare edilir (binary protocol)
+    DB_PREPARED_STATEMENTS = os.environ.get('DB_PREPARED_STATEMENTS', 'true').lower() == 'true'
+
+    # Async Serving (asgi.py)
+    # aiomysql pool boyutu (veritabanı/shard başına); pool doluyken istekler thread tutmadan bekler
+    ASYNC_DB_POOL_SIZE = int(os.environ.get('ASYNC_DB_POOL_SIZE', '20'))
+
+    # Database Circuit Breaker
+    # Art arda bu kadar bağlantı hatasından sonra istekler beklemeden 503 alır
+    DB_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('DB_BREAKER_FAILURE_THRESHOLD', '5'))
+    DB_BREAKER_PROBE_INTERVAL = float(os.environ.get('DB_BREAKER_PROBE_INTERVAL', '5'))  # saniye
+
+    # Idempotency-Key
+    # Kayıtlı cevaplar bu süre boyunca tekrar isteklere döndürülür
+    IDEMPOTENCY_TTL = int(os.environ.get('IDEMPOTENCY_TTL', str(24 * 3600)))  # saniye
+    # Process içi LRU cache'te tutulan en fazla anahtar sayısı
+    IDEMPOTENCY_CACHE_SIZE = int(os.environ.get('IDEMPOTENCY_CACHE_SIZE', '10000'))
+
+    # Kullanıcı durumu (ban / admin) cache'i
+    # Ban bu process'te hemen, diğer worker'larda en geç bu süre sonunda etkili olur
+    USER_STATUS_CACHE_TTL = float(os.environ.get('USER_STATUS_CACHE_TTL', '5'))  # saniye
+    USER_STATUS_CACHE_SIZE = int(os.environ.get('USER_STATUS_CACHE_SIZE', '10000'))
+
+    # Password Hashing
+    # werkzeug method string'i; değişince kullanıcılar bir sonraki girişte yeniden hash'lenir
+    # Uygun değer için: python calibrate_hash.py --target-ms 100
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    # Hash'leri hesaplayan process sayısı (0: request thread'inde hesapla)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+    # Bu kadar iş beklerken gelen login/register istekleri 503 alır
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', str(4 * PASSWORD_HASH_WORKERS or 1)))
+
+    # Audit Log (logs tablosu)
+    # true: kayıtlar arka plan thread'inde toplu yazılır, response beklemez
+    AUDIT_DEFERRED = os.environ.get('AUDIT_DEFERRED', 'true').lower() == 'true'
+    AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', '10000'))
+    AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', '100'))
+
+    # Conditional GET (ETag) için kullanıcı başına durum versiyonu
+    # Tüm worker'ların ve async sunucunun paylaştığı SQLite dosyası (memory://: yalnızca bu process)
+    STATE_VERSION_URI = os.environ.get(
+        'STATE_VERSION_URI',
+        'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'state.sqlite3')
+    )
+
+    # Rate Limiting
+    # Sadece yük testlerinde kapatılır (benchmarks/); Flask-Limiter da bu ayarı okur
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    # Sayaçlar tüm worker'ların paylaştığı SQLite dosyasında (memory:// her process'te ayrıdır)
+    RATELIMIT_STORAGE_URI = os.environ.get(
+        'RATELIMIT_STORAGE_URI',
+        'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ratelimit.sqlite3')
+    )
+    # Pencere sınırındaki patlamaları önlemek için sliding window counter
+    RATELIMIT_STRATEGY = os.environ.get('RATELIMIT_STRATEGY', 'sliding-window-counter')
+    # Büyük liste döndüren endpoint'ler global limitlerden daha fazla hak tüketir
+    RATELIMIT_ROUTE_COSTS = {
+        'admin.list_users': 5,
+        'admin.user_history': 5,
+        'admin.recent_games': 5,
+        'admin.top_players': 5,
+        'auth.get_my_games': 2,
+    }
+
+    # JSON
+    # orjson: C encoder (kuruluysa), stdlib: Python json modülü
+    JSON_BACKEND = os.environ.get('JSON_BACKEND', 'orjson')
+
+    # Response Compression
+    # Önde sıkıştırma yapan bir proxy varsa kapatılabilir
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))  # byte
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', '6'))  # gzip 1-9
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '4'))  # brotli 0-11
+    # Sıkıştırılan stream'ler bu kadar girdi biriktikçe flush edilir
+    COMPRESS_STREAM_FLUSH_SIZE = int(os.environ.get('COMPRESS_STREAM_FLUSH_SIZE', '16384'))  # byte
+    # Streaming liste cevaplarında cursor'dan bir seferde okunan satır sayısı
+    STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', '500'))
+
+    # Static Assets
+    # python build_static.py çıktısı; <dizin>/<site>/manifest.json yoksa kaynak klasörler servis edilir
+    STATIC_DIST_DIR = os.environ.get(
+        'STATIC_DIST_DIR',
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static_dist')
+    )
+
+    # Live Events (/admin/events SSE)
+    # Kopan client'ların Last-Event-ID ile devam edebileceği son olay sayısı
+    EVENTS_REPLAY_SIZE = int(os.environ.get('EVENTS_REPLAY_SIZE', '1000'))
+    # Abone başına bekleyen olay sınırı; dolunca yavaş abone ayrılır
+    EVENTS_SUBSCRIBER_BUFFER = int(os.environ.get('EVENTS_SUBSCRIBER_BUFFER', '256'))
+    # Her akış bir worker thread'i tutar (gunicorn gthread: WEB_THREADS)
+    EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('EVENTS_MAX_SUBSCRIBERS', '2'))
+    EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', '15'))  # saniye
+    # Akış bu süre sonunda kapanır, client yeniden bağlanır (yetki tekrar kontrol edilir)
+    EVENTS_STREAM_MAX_AGE = float(os.environ.get('EVENTS_STREAM_MAX_AGE', '300'))  # saniye
+    EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', '3000'))  # EventSource yeniden bağlanma
+    # Olayları tüm worker process'lere dağıtan broker (memory://: yalnızca yayınlayan process)
+    EVENTS_BROKER_URI = os.environ.get(
+        'EVENTS_BROKER_URI',
+        'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'events.sqlite3')
+    )
+    EVENTS_BROKER_POLL = float(os.environ.get('EVENTS_BROKER_POLL', '0.1'))  # saniye
+    # Async sunucuda (oyuncu WebSocket'leri) process başına açık bağlantı sınırı
+    ASYNC_EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('ASYNC_EVENTS_MAX_SUBSCRIBERS', '10000'))
+
+    # RTP Simulation (POST /admin/rule-sets/<id>/simulate, simulate_rtp.py)
+    # Bahis tipi başına el sayısı; 1M el tüm bahis tipleri için birkaç saniye sürer
+    SIMULATION_ROUNDS = int(os.environ.get('SIMULATION_ROUNDS', '1000000'))
+    # İstek bir worker thread'ini bu kadar el boyunca meşgul eder
+    SIMULATION_MAX_ROUNDS = int(os.environ.get('SIMULATION_MAX_ROUNDS', '5000000'))
+
     # Environment
     FLASK_ENV = os.environ.get('FLASK_ENV', 'development')
     IS_PRODUCTION = FLASK_ENV == 'production'
@@ -31,6 +205,20 @@ class Config:
             import warnings
             warnings.warn("Using default SECRET_KEY - set SECRET_KEY env var for production!")
 
+    # CSRF
+    # 'signed': HMAC(session id, zaman) token, session'a okuma/yazma yok
+    # 'session': token session'da saklanır (eski davranış)
+    CSRF_MODE = os.environ.get('CSRF_MODE', 'signed').lower()
+    # Virgülle ayrılmış anahtarlar: ilki imzalar, hepsi doğrular (anahtar rotasyonu)
+    CSRF_SECRET_KEYS = [
+        key.strip() for key in os.environ.get('CSRF_SECRET_KEYS', '').split(',') if key.strip()
+    ] or [SECRET_KEY]
+
+    # Metrics
+    # GET /metrics yalnızca admin oturumuna ya da "Authorization: Bearer <METRICS_TOKEN>" header'ına açık
+    # (scraper'lar için). Set edilmezse sadece admin oturumu.
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
     # Session Configuration
     SESSION_TYPE = 'filesystem'
     SESSION_FILE_DIR = os.path.join(os.path.dirname(__file__), 'flask_session_cache')
@@ -40,4 +228,9 @@ class Config:
     # Cookie Security
     SESSION_COOKIE_HTTPONLY = True   # JavaScript'in cookie'ye erişimini engeller (XSS koruması)
     SESSION_COOKIE_SAMESITE = 'Lax'  # CSRF koruması
-    SESSION_COOKIE_SECURE = IS_PRODUCTION  # Production'da True (HTTPS gerektirir)
\ No newline at end of file
+    SESSION_COOKIE_SECURE = IS_PRODUCTION  # Production'da True (HTTPS gerektirir)
+
+    # API Documentation
+    # false: Flasgger yüklenmez (/apidocs/ yok), /apispec.json build edilmiş dosyadan servis edilir
+    SWAGGER_UI = os.environ.get('SWAGGER_UI', 'false' if IS_PRODUCTION else 'true').lower() == 'true'
+    APISPEC_FILE = os.environ.get('APISPEC_FILE', os.path.join(STATIC_DIST_DIR, 'apispec.json'))
\ No newline at end of file
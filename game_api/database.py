@@ -1,15 +1,266 @@
+import re
+import threading
+import time
+from functools import wraps
 import mysql.connector
 from mysql.connector import Error
+from flask import g, has_request_context, request, session
 from werkzeug.security import generate_password_hash
 from .config import Config
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from . import pools
+from .sharding import is_sharded, shard_count, shard_index, get_shard_connection, SHARDED_TABLES
 
-def get_db_connection():
+
+def _connect():
+    return mysql.connector.connect(**Config.DB_CONFIG, **pools.connect_options())
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """
+    Primary connection pool
+
+    Oturum varsayılan olarak sıfırlanmaz (DB_POOL_RESET_SESSION=false):
+    prepared statement'lar sonraki isteklerde tekrar kullanılır, oturum
+    değişkenleri checkout'ta pools.checkout() tarafından varsayılana döner.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pools.create_pool('primary', Config.DB_POOL_SIZE, Config.DB_CONFIG)
+    return _pool
+
+
+def _connect_pooled():
+    """Pool'dan bağlantı al; pool doluysa DB_POOL_TIMEOUT kadar bekle (sonra PoolExhausted -> 503)"""
+    if Config.DB_POOL_SIZE <= 0:
+        return _connect()
+    return pools.checkout(_get_pool())
+
+
+def _probe():
+    conn = _connect()
     try:
-        conn = mysql.connector.connect(**Config.DB_CONFIG)
-        return conn
+        conn.ping()
+    finally:
+        conn.close()
+
+
+db_breaker = CircuitBreaker(
+    'mysql',
+    probe=_probe,
+    failure_threshold=Config.DB_BREAKER_FAILURE_THRESHOLD,
+    probe_interval=Config.DB_BREAKER_PROBE_INTERVAL,
+)
+
+
+def get_db_connection(shard_key=None):
+    """
+    Veritabanı bağlantısı
+
+    shard_key (user_id) verilirse ve sharding aktifse kullanıcının shard'ına
+    bağlanılır; wallets, games, bets, payouts, transactions ve logs
+    sorguları bu bağlantıyla yapılmalıdır.
+
+    @replica_read ile işaretlenmiş view'larda replica sağlıklıysa replica
+    bağlantısı döner; aksi halde primary kullanılır.
+
+    Primary breaker açıksa bağlantı denenmeden CircuitOpenError fırlatılır
+    (uygulama 503 döner); pool DB_POOL_TIMEOUT içinde boşalmazsa da
+    PoolExhausted (CircuitOpenError) fırlatılır, breaker'a hata yazılmaz.
+    Bağlantı hatasında None döner.
+    """
+    if shard_key is not None and is_sharded():
+        return get_shard_connection(shard_index(shard_key))
+
+    if has_request_context():
+        if g.get('db_read_only'):
+            conn = _get_replica_connection()
+            if conn is not None:
+                return conn
+
+    db_breaker.before_call()
+    try:
+        conn = _connect_pooled()
     except Error as e:
+        db_breaker.record_failure()
         print(f"Database connection error: {e}")
         return None
+    db_breaker.record_success()
+    return conn
+
+
+# ======================
+# Read Replica
+# ======================
+
+_replica_pool = None
+_replica_pool_lock = threading.Lock()
+_replica_lag = {'seconds': None, 'checked_at': 0.0}
+_replica_lag_lock = threading.Lock()
+_routing_stats = {'replica': 0, 'primary_read_your_writes': 0, 'primary_unhealthy': 0, 'primary_lagging': 0}
+_routing_stats_lock = threading.Lock()
+
+
+def _probe_replica():
+    conn = mysql.connector.connect(
+        **Config.DB_REPLICA_CONFIG,
+        connection_timeout=Config.DB_CONNECT_TIMEOUT,
+    )
+    try:
+        conn.ping()
+    finally:
+        conn.close()
+
+
+replica_breaker = CircuitBreaker(
+    'mysql-replica',
+    probe=_probe_replica,
+    failure_threshold=Config.DB_BREAKER_FAILURE_THRESHOLD,
+    probe_interval=Config.DB_BREAKER_PROBE_INTERVAL,
+)
+
+
+def replica_read(f):
+    """
+    View'ı salt okunur olarak işaretle: içindeki get_db_connection()
+    çağrıları mümkünse replica'ya yönlendirilir.
+
+    Kullanım:
+        @wallet_bp.route('/wallets/me', methods=['GET'])
+        @login_required
+        @replica_read
+        def get_my_wallet(): ...
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_read_only = True
+        return f(*args, **kwargs)
+
+    return decorated_function
+
+
+def _count_route(target):
+    with _routing_stats_lock:
+        _routing_stats[target] += 1
+
+
+def note_write():
+    """
+    Read-your-writes: commit edilen yazıdan sonra bu kullanıcının okumaları
+    DB_READ_YOUR_WRITES_WINDOW süresince primary'den yapılır
+
+    Commit'ten sonra çağrılır; rollback olan ya da hiç yazmayan istekler
+    kullanıcıyı primary'ye bağlamaz.
+    """
+    if Config.DB_REPLICA_CONFIG and has_request_context() and 'user_id' in session:
+        session['db_last_write_at'] = time.time()
+
+
+def _get_replica_pool():
+    """Replica pool'u; primary ile aynı checkout kuralları (pools.checkout)"""
+    global _replica_pool
+    if _replica_pool is None:
+        with _replica_pool_lock:
+            if _replica_pool is None:
+                _replica_pool = pools.create_pool('replica', Config.DB_REPLICA_POOL_SIZE, Config.DB_REPLICA_CONFIG)
+    return _replica_pool
+
+
+def _replica_lag_seconds(conn):
+    """
+    Replica gecikmesi (saniye), Config.DB_REPLICA_LAG_CHECK_INTERVAL kadar cache'lenir
+
+    SHOW REPLICA STATUS boş dönerse (replikasyon kurulmamış ayrı bir
+    instance) gecikme 0 kabul edilir. Replikasyon thread'leri durmuşsa None.
+    """
+    now = time.monotonic()
+    with _replica_lag_lock:
+        if now - _replica_lag['checked_at'] < Config.DB_REPLICA_LAG_CHECK_INTERVAL:
+            return _replica_lag['seconds']
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except Error:
+            cursor.execute("SHOW SLAVE STATUS")  # MySQL < 8.0.22
+        status = cursor.fetchone()
+    finally:
+        cursor.close()
+
+    if not status:
+        lag = 0.0
+    else:
+        behind = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+        lag = float(behind) if behind is not None else None
+
+    with _replica_lag_lock:
+        _replica_lag['seconds'] = lag
+        _replica_lag['checked_at'] = now
+    return lag
+
+
+def _get_replica_connection():
+    """
+    Replica bağlantısı veya primary'ye düşülmesi gerekiyorsa None
+    """
+    if not Config.DB_REPLICA_CONFIG:
+        return None
+
+    last_write = session.get('db_last_write_at')
+    if last_write and time.time() - last_write < Config.DB_READ_YOUR_WRITES_WINDOW:
+        _count_route('primary_read_your_writes')
+        return None
+
+    try:
+        replica_breaker.before_call()
+    except CircuitOpenError:
+        _count_route('primary_unhealthy')
+        return None
+
+    try:
+        conn = pools.checkout(_get_replica_pool())
+    except pools.PoolExhausted:
+        # DB_POOL_TIMEOUT içinde boşalmadı - primary'yi kullan, breaker'a hata yazma
+        _count_route('primary_unhealthy')
+        return None
+    except Error as e:
+        replica_breaker.record_failure()
+        print(f"Replica connection error: {e}")
+        _count_route('primary_unhealthy')
+        return None
+    replica_breaker.record_success()
+
+    try:
+        lag = _replica_lag_seconds(conn)
+    except Error as e:
+        print(f"Replica lag check error: {e}")
+        lag = None
+
+    if lag is None or lag > Config.DB_REPLICA_MAX_LAG:
+        conn.close()
+        _count_route('primary_lagging')
+        return None
+
+    _count_route('replica')
+    return conn
+
+
+def get_routing_stats():
+    """Replica yönlendirme sayaçları ve replica durumu"""
+    with _routing_stats_lock:
+        stats = dict(_routing_stats)
+    with _replica_lag_lock:
+        stats['replica_lag_seconds'] = _replica_lag['seconds']
+    stats['replica_configured'] = Config.DB_REPLICA_CONFIG is not None
+    stats['replica_breaker'] = replica_breaker.stats()
+    return stats
 
 def init_db():
     conn = get_db_connection()
@@ -37,6 +288,7 @@ def init_db():
             user_id INTEGER NOT NULL UNIQUE,
             balance DECIMAL(12,2) NOT NULL DEFAULT 0,
             currency CHAR(3) NOT NULL DEFAULT 'VRT',
+            version INTEGER NOT NULL DEFAULT 0,
             updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             FOREIGN KEY (user_id) REFERENCES users(user_id)
         );
@@ -127,6 +379,20 @@ def init_db():
             meta_data TEXT,
             FOREIGN KEY (user_id) REFERENCES users(user_id)
         );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            user_id INTEGER NOT NULL,
+            idem_key VARCHAR(128) NOT NULL,
+            request_hash CHAR(64) NOT NULL,
+            status_code SMALLINT NULL,
+            response_body MEDIUMTEXT NULL,
+            mimetype VARCHAR(100) NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            expires_at DATETIME NOT NULL,
+            PRIMARY KEY (user_id, idem_key),
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        );
         """
     ]
     
@@ -163,21 +429,21 @@ def init_db():
         "CREATE INDEX IF NOT EXISTS idx_users_is_admin ON users(is_admin)"
     ]
 
+    # Migrations - Columns added to existing tables after first release
+    migrations = [
+        # Optimistic concurrency for wallet updates
+        "ALTER TABLE wallets ADD COLUMN version INTEGER NOT NULL DEFAULT 0",
+    ]
+
     try:
-        for table_sql in tables:
-            cursor.execute(table_sql)
-        conn.commit()
-        print("Database tables checked/created successfully.")
-        
-        # Create indexes
-        for index_sql in indexes:
-            try:
-                cursor.execute(index_sql)
-            except Error:
-                pass  # Ignore if index already exists
-        conn.commit()
-        print("Indexes created.")
-        
+        if is_sharded():
+            # Directory: sadece global tablolar. Shard'lar: kullanıcı tabloları (global FK'ler olmadan)
+            apply_schema(conn, cursor, *_split_schema(tables, indexes, migrations, sharded=False))
+            for index in range(shard_count()):
+                init_shard(index, *_split_schema(tables, indexes, migrations, sharded=True))
+        else:
+            apply_schema(conn, cursor, tables, indexes, migrations)
+
         # Create default admin user
         admin_id = create_default_admin(conn, cursor)
         
@@ -191,6 +457,79 @@ def init_db():
         cursor.close()
         conn.close()
 
+def apply_schema(conn, cursor, tables, indexes, migrations):
+    """Tabloları, index'leri ve migration'ları verilen bağlantıda uygula"""
+    for table_sql in tables:
+        cursor.execute(table_sql)
+    conn.commit()
+    print("Database tables checked/created successfully.")
+    
+    # Create indexes
+    for index_sql in indexes:
+        try:
+            cursor.execute(index_sql)
+        except Error:
+            pass  # Ignore if index already exists
+    conn.commit()
+    print("Indexes created.")
+
+    # Apply migrations
+    for migration_sql in migrations:
+        try:
+            cursor.execute(migration_sql)
+        except Error:
+            pass  # Ignore if column already exists
+    conn.commit()
+
+
+def init_shard(index, tables, indexes, migrations):
+    """Shard veritabanını (yoksa) oluştur ve kullanıcı tablolarını uygula"""
+    config = {**Config.DB_CONFIG, **Config.DB_SHARDS[index]}
+    database = config.pop('database')
+
+    conn = None
+    cursor = None
+    try:
+        conn = mysql.connector.connect(**config, connection_timeout=Config.DB_CONNECT_TIMEOUT)
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+        conn.database = database
+        print(f"Shard {index} ({config['host']}:{config['port']}/{database}):")
+        apply_schema(conn, cursor, tables, indexes, migrations)
+    except Error as e:
+        print(f"Shard {index} creation error: {e}")
+    finally:
+        if cursor: cursor.close()
+        if conn: conn.close()
+
+
+def _schema_table(sql):
+    """DDL ifadesinin hedef tablosu"""
+    match = (re.search(r'\bON (\w+)\(', sql)
+             or re.search(r'ALTER TABLE (\w+)', sql)
+             or re.search(r'CREATE TABLE IF NOT EXISTS (\w+)', sql))
+    return match.group(1) if match else None
+
+
+def _split_schema(tables, indexes, migrations, sharded):
+    """
+    Şemayı directory (sharded=False) veya shard (sharded=True) için filtrele
+
+    Shard'larda users ve rule_sets bulunmadığından bunlara giden foreign
+    key'ler kaldırılır; bütünlük uygulama tarafında korunur.
+    """
+    def keep(sql):
+        return (_schema_table(sql) in SHARDED_TABLES) == sharded
+
+    tables = [sql for sql in tables if keep(sql)]
+    if sharded:
+        tables = [
+            re.sub(r',\s*FOREIGN KEY \(\w+\) REFERENCES (?:users|rule_sets)\(\w+\)', '', sql)
+            for sql in tables
+        ]
+    return tables, [sql for sql in indexes if keep(sql)], [sql for sql in migrations if keep(sql)]
+
+
 def create_default_admin(conn, cursor):
     """Create default admin user"""
     try:
@@ -208,7 +547,7 @@ def create_default_admin(conn, cursor):
         # Create admin user
         admin_email = 'admin@example.com'
         admin_password = 'admin'
-        hashed_password = generate_password_hash(admin_password)
+        hashed_password = generate_password_hash(admin_password, Config.PASSWORD_HASH_METHOD)
         
         cursor.execute("""
             INSERT INTO users (email, password_hash, is_admin, status)
@@ -217,10 +556,20 @@ def create_default_admin(conn, cursor):
         
         admin_id = cursor.lastrowid
         
-        # Create wallet for admin
-        cursor.execute("INSERT INTO wallets (user_id) VALUES (%s)", (admin_id,))
-        
         conn.commit()
+        
+        # Create wallet for admin (on the admin's shard when sharding is enabled)
+        shard_conn = get_db_connection(shard_key=admin_id) if is_sharded() else conn
+        if shard_conn is None:
+            raise Error(msg="Shard connection failed")
+        shard_cursor = shard_conn.cursor()
+        try:
+            shard_cursor.execute("INSERT INTO wallets (user_id) VALUES (%s)", (admin_id,))
+            shard_conn.commit()
+        finally:
+            shard_cursor.close()
+            if shard_conn is not conn:
+                shard_conn.close()
         print(f"\n[OK] Default admin user created:")
         print(f"   Email: {admin_email}")
         print(f"   Password: {admin_password}")
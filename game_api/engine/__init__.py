@@ -0,0 +1,44 @@
+"""
+Oyun motorları - Flask, session ve SQL'den bağımsız oyun mantığı
+
+Her motor bahisten sonucu ve ödemeyi hesaplar, I/O yapmaz:
+
+    CoinflipEngine   play(amount, choice)               -> (result, is_win, payout)
+    RouletteEngine   play(amount, bet_type, bet_value)  -> (game_result, payout)
+    BlackjackEngine  deal() / hit() / stand()           -> el durumu, (result, payout, message)
+
+Threaded ve async view'lar motorları kullanır; doğrulama, veritabanı, wallet
+ve cevap gövdeleri view'larda kalır. Toplu simülasyon ve benchmark'lar
+motorları Flask ve MySQL olmadan doğrudan çalıştırır (benchmarks/engine.py).
+
+Ödeme çarpanları .get(rule_type, default) arayüzlü bir nesneden okunur:
+    dict                 async sunucunun aktif kuralları, simülasyon
+    rules.ActiveRules()  threaded view'lar; değer yalnızca kazançta veritabanından okunur
+Eksik kural varsayılana düşer (DEFAULT_PAYOUT_TABLE).
+
+rng, random modülü (varsayılan) veya tekrarlanabilir sonuç için random.Random(seed) olabilir.
+"""
+from .blackjack import (
+    BlackjackEngine, SUITS, RANKS, DEALER_STANDS_ON, DEFAULT_BLACKJACK_PAYOUT, DEFAULT_NORMAL_PAYOUT,
+    get_deck, calculate_hand_value,
+)
+from .coinflip import CoinflipEngine, CHOICES, DEFAULT_PAYOUT_MULTIPLIER
+from .roulette import RouletteEngine, POCKETS, RED_NUMBERS, DEFAULT_PAYOUTS, get_color, get_parity
+
+# Aktif rule set'te kural yoksa oyunların kullandığı varsayılanlar
+DEFAULT_PAYOUT_TABLE = {
+    'coinflip_payout': DEFAULT_PAYOUT_MULTIPLIER,
+    'roulette_number_payout': DEFAULT_PAYOUTS['number'],
+    'roulette_color_payout': DEFAULT_PAYOUTS['color'],
+    'roulette_parity_payout': DEFAULT_PAYOUTS['parity'],
+    'blackjack_payout': DEFAULT_BLACKJACK_PAYOUT,
+    'blackjack_normal_payout': DEFAULT_NORMAL_PAYOUT
+}
+
+__all__ = [
+    'CoinflipEngine', 'RouletteEngine', 'BlackjackEngine', 'DEFAULT_PAYOUT_TABLE',
+    'CHOICES', 'DEFAULT_PAYOUT_MULTIPLIER',
+    'POCKETS', 'RED_NUMBERS', 'DEFAULT_PAYOUTS', 'get_color', 'get_parity',
+    'SUITS', 'RANKS', 'DEALER_STANDS_ON', 'DEFAULT_BLACKJACK_PAYOUT', 'DEFAULT_NORMAL_PAYOUT',
+    'get_deck', 'calculate_hand_value',
+]
@@ -0,0 +1,96 @@
+"""
+Kesin RTP - coinflip ve roulette ödeme tablolarının beklenen değeri
+
+Bu bahislerin sonucu tek bir eşit olasılıklı çekilişe bağlıdır; RTP
+simülasyona gerek kalmadan kesin hesaplanır:
+
+    coinflip         P(kazanç) = 1 / len(CHOICES)             RTP = P * coinflip_payout
+    roulette_<tip>   P(kazanç) = kazandıran cep / POCKETS     RTP = P * (1 + roulette_<tip>_payout)
+
+Kazandıran cepler tekerlekten sayılır (get_color / get_parity, RED_NUMBERS),
+motorun kullandığı kurallarla aynıdır; 0 renk ve tek/çift bahsini kaybettirir.
+Çarpanlar Fraction ile hesaplanır (1.95 -> 39/20), sonuçta yuvarlama hatası yoktur.
+
+Blackjack kapalı formda değildir; onun için simulation.py kullanılır.
+"""
+from fractions import Fraction
+from . import DEFAULT_PAYOUT_TABLE
+from .coinflip import CHOICES
+from .roulette import POCKETS, get_color, get_parity
+
+ANALYTIC_BET_TYPES = ('coinflip', 'roulette_number', 'roulette_color', 'roulette_parity')
+
+# Roulette bahis tipi: (olası bahis değerleri, cebin o tipteki değeri)
+_ROULETTE_BETS = {
+    'number': (range(POCKETS), lambda number: number),
+    'color': (('red', 'black'), get_color),
+    'parity': (('odd', 'even'), get_parity),
+}
+# Kayıtlı house_edge DECIMAL(5,2): iki ondalığa yuvarlanmış değerler tutarlı sayılır
+HOUSE_EDGE_TOLERANCE = 0.005
+
+
+def _exact(value):
+    # str üzerinden: 1.95 -> 39/20 (float'ın ikili açılımı değil)
+    return Fraction(str(value))
+
+
+def _result(win_probability, rtp):
+    return {
+        'win_probability': round(float(win_probability), 6),
+        'rtp': round(float(rtp), 6),
+        'house_edge': round(float(1 - rtp), 6),
+        'exact_rtp': str(rtp),
+    }
+
+
+def expected_returns(rules=None):
+    """
+    Bahis tipi başına kesin RTP
+
+    Bir bahis tipinin değerleri (ör. kırmızı / siyah) farklı sayıda cebe
+    sahip olsaydı en düşük RTP'li değer raporlanırdı; Avrupa ruletinde hepsi eşittir.
+
+    Args:
+        rules: {rule_type: float}; eksikler DEFAULT_PAYOUT_TABLE'dan
+
+    Returns:
+        dict: {bet_type: {'win_probability', 'rtp', 'house_edge', 'exact_rtp'}}
+    """
+    payouts = dict(DEFAULT_PAYOUT_TABLE)
+    payouts.update(rules or {})
+
+    win_probability = Fraction(1, len(CHOICES))
+    results = {'coinflip': _result(win_probability, win_probability * _exact(payouts['coinflip_payout']))}
+
+    for bet_type, (values, pocket_value) in _ROULETTE_BETS.items():
+        multiplier = 1 + _exact(payouts[f'roulette_{bet_type}_payout'])
+        win_probability = min(
+            Fraction(sum(1 for number in range(POCKETS) if pocket_value(number) == value), POCKETS)
+            for value in values
+        )
+        results[f'roulette_{bet_type}'] = _result(win_probability, win_probability * multiplier)
+
+    return results
+
+
+def check_house_edge(stored_house_edge, results):
+    """
+    Kayıtlı house_edge'i (yüzde) hesaplanan bahis tipi kenarlarıyla karşılaştır
+
+    Bahis tiplerinin kenarları farklı olabilir; kayıtlı değer en düşük ve en
+    yüksek kenar arasındaysa tutarlı sayılır.
+
+    Returns:
+        dict: {'stored_pct', 'min_pct', 'max_pct', 'consistent', 'bet_types'}
+    """
+    edges = [result['house_edge'] * 100 for result in results.values()]
+    low, high = round(min(edges), 4), round(max(edges), 4)
+    stored = None if stored_house_edge is None else float(stored_house_edge)
+    return {
+        'stored_pct': stored,
+        'min_pct': low,
+        'max_pct': high,
+        'consistent': stored is not None and low - HOUSE_EDGE_TOLERANCE <= stored <= high + HOUSE_EDGE_TOLERANCE,
+        'bet_types': results,
+    }
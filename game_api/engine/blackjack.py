@@ -0,0 +1,119 @@
+"""
+Blackjack motoru - tek deste, krupiye 17'de durur
+
+El durumu (deste, oyuncu ve krupiye elleri) çağıranda tutulur; view'lar
+bunu session'a ve games.game_state'e yazar. Motor yalnızca kart çeker ve
+eli değerlendirir.
+
+SECURITY: Krupiyeye başta tek kart verilir, ikinci kart oyun bitince
+çekilir; API cevaplarına kapalı kart sızmaz.
+"""
+import random
+
+# Default Blackjack payouts (used if no rule in rule system)
+DEFAULT_BLACKJACK_PAYOUT = 2.5  # 3:2 payout
+DEFAULT_NORMAL_PAYOUT = 2.0     # Normal win
+
+DEALER_STANDS_ON = 17
+
+# Card values
+SUITS = ['H', 'D', 'C', 'S']  # Hearts, Diamonds, Clubs, Spades
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+
+
+def get_deck():
+    return [{'suit': s, 'rank': r} for s in SUITS for r in RANKS]
+
+
+def calculate_hand_value(hand):
+    value = 0
+    aces = 0
+    for card in hand:
+        rank = card['rank']
+        if rank in ['J', 'Q', 'K']:
+            value += 10
+        elif rank == 'A':
+            aces += 1
+            value += 11
+        else:
+            value += int(rank)
+
+    while value > 21 and aces:
+        value -= 10
+        aces -= 1
+
+    return value
+
+
+class BlackjackEngine:
+    """
+    Args:
+        rules: .get(rule_type, default) arayüzlü kurallar (None: varsayılanlar)
+        rng: random modülü veya random.Random
+    """
+
+    def __init__(self, rules=None, rng=random):
+        self.rules = rules if rules is not None else {}
+        self.rng = rng
+
+    def deal(self):
+        """Shuffle a deck and deal; returns (deck, player_hand, dealer_hand)"""
+        deck = get_deck()
+        self.rng.shuffle(deck)
+
+        player_hand = [deck.pop(), deck.pop()]
+        # SECURITY: Deal only 1 card to Dealer, draw second card when game ends
+        dealer_hand = [deck.pop()]
+        return deck, player_hand, dealer_hand
+
+    @staticmethod
+    def hit(deck, player_hand):
+        """Oyuncuya bir kart çek; elin yeni değeri"""
+        player_hand.append(deck.pop())
+        return calculate_hand_value(player_hand)
+
+    @staticmethod
+    def reveal_dealer(deck, dealer_hand):
+        """SECURITY: Draw dealer's second card only when the game is over"""
+        while len(dealer_hand) < 2 and deck:
+            dealer_hand.append(deck.pop())
+
+    @classmethod
+    def play_dealer(cls, deck, dealer_hand):
+        """Reveal the second card, then the dealer draws until 17"""
+        cls.reveal_dealer(deck, dealer_hand)
+        while calculate_hand_value(dealer_hand) < DEALER_STANDS_ON and deck:
+            dealer_hand.append(deck.pop())
+
+    def score(self, amount, player_hand, dealer_hand, is_blackjack):
+        """
+        Determine the winner of a finished hand
+
+        Payout multipliers are read from the rules only when the player wins.
+
+        Returns:
+            (result, payout, message) - result: 'blackjack', 'win', 'lose' or 'push'
+        """
+        player_value = calculate_hand_value(player_hand)
+        dealer_value = calculate_hand_value(dealer_hand)
+
+        if is_blackjack and player_value == 21 and len(player_hand) == 2:
+            # Player has blackjack
+            if dealer_value == 21 and len(dealer_hand) == 2:
+                return 'push', amount, 'Both sides Blackjack! Push.'
+            payout = amount * self.rules.get('blackjack_payout', DEFAULT_BLACKJACK_PAYOUT)
+            return 'blackjack', payout, f'BLACKJACK! You won! (+{payout:.2f})'
+        if dealer_value > 21:
+            payout = amount * self.rules.get('blackjack_normal_payout', DEFAULT_NORMAL_PAYOUT)
+            return 'win', payout, f'Dealer busted! You won! (+{payout:.2f})'
+        if player_value > dealer_value:
+            payout = amount * self.rules.get('blackjack_normal_payout', DEFAULT_NORMAL_PAYOUT)
+            return 'win', payout, f'You won! (+{payout:.2f})'
+        if player_value < dealer_value:
+            return 'lose', 0, 'You lost.'
+        return 'push', amount, 'Push! Bet returned.'
+
+    def stand(self, amount, deck, player_hand, dealer_hand, is_blackjack=False):
+        """Krupiye elini oynar ve el değerlendirilir; returns (result, payout, message)"""
+        self.play_dealer(deck, dealer_hand)
+        return self.score(amount, player_hand, dealer_hand, is_blackjack)
@@ -0,0 +1,36 @@
+"""
+Coinflip motoru - kazanan bahis amount * coinflip_payout öder
+"""
+import random
+
+# Default payout multiplier (used if no rule in rule system)
+DEFAULT_PAYOUT_MULTIPLIER = 1.95
+CHOICES = ['yazi', 'tura']
+
+
+class CoinflipEngine:
+    """
+    Args:
+        rules: .get(rule_type, default) arayüzlü kurallar (None: varsayılanlar)
+        rng: random modülü veya random.Random
+    """
+
+    def __init__(self, rules=None, rng=random):
+        self.rules = rules if rules is not None else {}
+        self.rng = rng
+
+    def flip(self, choice):
+        """Returns (result, is_win)"""
+        result = self.rng.choice(CHOICES)
+        return result, choice == result
+
+    def payout(self, amount, is_win):
+        """Toplam ödeme (stake dahil); kayıpta 0"""
+        if not is_win:
+            return 0
+        return amount * self.rules.get('coinflip_payout', DEFAULT_PAYOUT_MULTIPLIER)
+
+    def play(self, amount, choice):
+        """Returns (result, is_win, payout)"""
+        result, is_win = self.flip(choice)
+        return result, is_win, self.payout(amount, is_win)
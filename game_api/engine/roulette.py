@@ -0,0 +1,83 @@
+"""
+Roulette motoru - Avrupa ruleti (tek sıfır, 37 cep)
+
+Kazanan bahis amount * (1 + roulette_<bet_type>_payout) öder (stake + kâr).
+0 hiçbir renk ya da tek/çift bahsini kazandırmaz.
+"""
+import random
+
+POCKETS = 37
+
+# Default Roulette Payouts (used if no rule in rule system)
+DEFAULT_PAYOUTS = {
+    'number': 35,  # Straight up
+    'color': 1,    # Red/Black
+    'parity': 1    # Odd/Even
+}
+
+# European Roulette Numbers (0-36)
+# Red numbers: 1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36
+RED_NUMBERS = {1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36}
+
+
+def get_color(number):
+    if number == 0:
+        return 'green'
+    return 'red' if number in RED_NUMBERS else 'black'
+
+
+def get_parity(number):
+    if number == 0:
+        return None
+    return 'even' if number % 2 == 0 else 'odd'
+
+
+class RouletteEngine:
+    """
+    Args:
+        rules: .get(rule_type, default) arayüzlü kurallar (None: varsayılanlar)
+        rng: random modülü veya random.Random
+    """
+
+    def __init__(self, rules=None, rng=random):
+        self.rules = rules if rules is not None else {}
+        self.rng = rng
+
+    def spin(self):
+        """Kazanan numara (0-36)"""
+        return self.rng.randint(0, POCKETS - 1)
+
+    @staticmethod
+    def evaluate(bet_type, bet_value, winning_number):
+        """Bahsi kazanan numaraya göre değerlendir; oyunla saklanan game_result dict'i"""
+        winning_color = get_color(winning_number)
+        winning_parity = get_parity(winning_number)
+
+        is_win = False
+        if bet_type == 'number':
+            is_win = (bet_value == winning_number)
+        elif bet_type == 'color':
+            is_win = (bet_value == winning_color)
+        elif bet_type == 'parity':
+            is_win = (bet_value == winning_parity)
+
+        return {
+            'winning_number': winning_number,
+            'winning_color': winning_color,
+            'winning_parity': winning_parity,
+            'bet_type': bet_type,
+            'bet_value': str(bet_value),
+            'is_win': is_win
+        }
+
+    def payout(self, amount, bet_type, is_win):
+        """Toplam ödeme (stake + kâr); kayıpta 0"""
+        if not is_win:
+            return 0
+        multiplier = self.rules.get(f'roulette_{bet_type}_payout', DEFAULT_PAYOUTS[bet_type])
+        return amount * (1 + multiplier)
+
+    def play(self, amount, bet_type, bet_value):
+        """Returns (game_result, payout)"""
+        game_result = self.evaluate(bet_type, bet_value, self.spin())
+        return game_result, self.payout(amount, bet_type, game_result['is_win'])
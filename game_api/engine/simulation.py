@@ -0,0 +1,210 @@
+"""
+Monte Carlo RTP simülasyonu - bir ödeme tablosunun oyuncuya dönüşü
+
+Her bahis tipi için milyonlarca el NumPy dizileriyle, el başına Python
+döngüsü olmadan oynanır. Kurallar motorlarla aynıdır:
+
+    coinflip         kazanç: stake * coinflip_payout
+    roulette_*       37 cep, kazanç: stake * (1 + roulette_<tip>_payout)
+    blackjack        tek deste, krupiye 17'de durur; oyuncu stand_on değerine kadar çeker.
+                     İlk iki kart 21 ise blackjack (krupiye de iki kartla 21 ise push).
+
+Sonuç, birim bahis başına dönüşün ortalaması (RTP), varyansı ve %95 güven
+aralığıdır:
+
+    simulate({'blackjack_normal_payout': 2.1}, rounds=1_000_000, seed=42, bet_types=['blackjack'])
+    -> {'payouts': {...}, 'results': {'blackjack': {
+           'rounds': 1000000, 'rtp': 0.983, 'house_edge': 0.017, 'variance': 1.036,
+           'std_dev': 1.0179, 'ci95': [0.981, 0.985],
+           'outcomes': {'blackjack': 0.0464, 'win': 0.3659, 'push': 0.0986, 'lose': 0.2051, 'bust': 0.2841}}}}
+
+NumPy opsiyoneldir; kurulu değilse simulate() RuntimeError verir
+(pip install numpy).
+"""
+import math
+from . import DEFAULT_PAYOUT_TABLE
+from .blackjack import DEALER_STANDS_ON
+from .roulette import POCKETS, RED_NUMBERS
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BET_TYPES = ('coinflip', 'roulette_number', 'roulette_color', 'roulette_parity', 'blackjack')
+DEFAULT_ROUNDS = 1_000_000
+# Bellek sınırı: blackjack parçası başına (CHUNK x 52) kartlık dizi
+CHUNK = 250_000
+Z_95 = 1.959964
+
+# Tek deste; J/Q/K 10, as 11 (elde gerekirse 1 sayılır)
+_CARD_VALUES = [v for v in (2, 3, 4, 5, 6, 7, 8, 9, 10, 10, 10, 10, 11) for _ in range(4)]
+
+
+def is_available():
+    return np is not None
+
+
+class _Accumulator:
+    """Parçalar halinde gelen dönüşlerin toplamı ve kareler toplamı"""
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.squares = 0.0
+        self.outcomes = {}
+
+    def add(self, returns, outcomes=None):
+        self.n += returns.size
+        self.total += float(returns.sum())
+        self.squares += float(np.square(returns).sum())
+        for name, count in (outcomes or {}).items():
+            self.outcomes[name] = self.outcomes.get(name, 0) + int(count)
+
+    def result(self):
+        mean = self.total / self.n
+        variance = max(0.0, (self.squares - self.n * mean * mean) / max(1, self.n - 1))
+        margin = Z_95 * math.sqrt(variance / self.n)
+        result = {
+            'rounds': self.n,
+            'rtp': round(mean, 6),
+            'house_edge': round(1 - mean, 6),
+            'variance': round(variance, 6),
+            'std_dev': round(math.sqrt(variance), 6),
+            'ci95': [round(mean - margin, 6), round(mean + margin, 6)],
+        }
+        if self.outcomes:
+            result['outcomes'] = {name: round(count / self.n, 6) for name, count in self.outcomes.items()}
+        return result
+
+
+# ======================
+# Oyunlar (birim bahis başına toplam dönüş dizisi)
+# ======================
+
+def _coinflip(rng, n, payouts):
+    wins = rng.random(n) < 0.5
+    return wins * payouts['coinflip_payout'], None
+
+
+def _roulette(rng, n, payouts, bet_type):
+    numbers = rng.integers(0, POCKETS, n)
+    if bet_type == 'number':
+        wins = numbers == 17  # her numara aynı olasılıkta
+    elif bet_type == 'color':
+        wins = np.isin(numbers, list(RED_NUMBERS))
+    else:
+        wins = (numbers != 0) & (numbers % 2 == 0)
+    return wins * (1 + payouts[f'roulette_{bet_type}_payout']), None
+
+
+def _add_card(total, soft, card):
+    """Eli kartla güncelle; 21'i aşan el asları 1'e çevirir (calculate_hand_value)"""
+    total = total + card
+    soft = soft + (card == 11)
+    while True:
+        reduce = (total > 21) & (soft > 0)
+        if not reduce.any():
+            return total, soft
+        total = total - 10 * reduce
+        soft = soft - reduce
+
+
+def _blackjack(rng, n, payouts, stand_on):
+    rows = np.arange(n)
+    decks = rng.permuted(np.tile(np.array(_CARD_VALUES, dtype=np.int8), (n, 1)), axis=1).astype(np.int16)
+
+    # Dağıtım sırası view'larla aynı: oyuncu 2, krupiye 1 kart
+    zeros = np.zeros(n, dtype=np.int16)
+    player, player_soft = _add_card(zeros, zeros, decks[:, 0])
+    player, player_soft = _add_card(player, player_soft, decks[:, 1])
+    dealer, dealer_soft = _add_card(zeros, zeros, decks[:, 2])
+    position = np.full(n, 3)
+
+    natural = player == 21
+    # Oyuncu stand_on'a kadar çeker (blackjack'te el hemen biter)
+    drawing = ~natural & (player < stand_on)
+    while drawing.any():
+        total, soft = _add_card(player, player_soft, decks[rows, position])
+        player = np.where(drawing, total, player)
+        player_soft = np.where(drawing, soft, player_soft)
+        position = position + drawing
+        drawing = drawing & (player < stand_on)
+    bust = player > 21
+
+    # Krupiye ikinci kartını açar ve 17'ye kadar çeker (oyuncu bust olsa da açılır, sonucu değiştirmez)
+    dealer, dealer_soft = _add_card(dealer, dealer_soft, decks[rows, position])
+    position = position + 1
+    dealer_natural = dealer == 21
+    drawing = ~bust & (dealer < DEALER_STANDS_ON)
+    while drawing.any():
+        total, soft = _add_card(dealer, dealer_soft, decks[rows, position])
+        dealer = np.where(drawing, total, dealer)
+        dealer_soft = np.where(drawing, soft, dealer_soft)
+        position = position + drawing
+        drawing = drawing & (dealer < DEALER_STANDS_ON)
+
+    normal = payouts['blackjack_normal_payout']
+    blackjack = natural & ~dealer_natural
+    natural_push = natural & dealer_natural
+    settled = ~natural & ~bust
+    win = settled & ((dealer > 21) | (player > dealer))
+    push = settled & (dealer <= 21) & (player == dealer)
+    lose = settled & ~win & ~push
+
+    returns = np.zeros(n)
+    returns[blackjack] = payouts['blackjack_payout']
+    returns[win] = normal
+    returns[natural_push | push] = 1.0
+
+    return returns, {
+        'blackjack': blackjack.sum(), 'win': win.sum(), 'push': (natural_push | push).sum(),
+        'lose': lose.sum(), 'bust': bust.sum(),
+    }
+
+
+# ======================
+# Giriş noktası
+# ======================
+
+def simulate(rules=None, rounds=DEFAULT_ROUNDS, seed=None, bet_types=BET_TYPES, stand_on=DEALER_STANDS_ON):
+    """
+    Ödeme tablosunu simüle et
+
+    Args:
+        rules: {rule_type: float}; eksikler DEFAULT_PAYOUT_TABLE'dan
+        rounds: Bahis tipi başına el sayısı
+        seed: Tekrarlanabilir sonuç için
+        bet_types: BET_TYPES'ın alt kümesi
+        stand_on: Blackjack oyuncu stratejisi (bu değerde ve üstünde durur)
+
+    Returns:
+        dict: {'payouts': {...}, 'results': {bet_type: {...}}}
+    """
+    if np is None:
+        raise RuntimeError('NumPy is required for simulation (pip install numpy)')
+    unknown = set(bet_types) - set(BET_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown bet types: {', '.join(sorted(unknown))}")
+
+    payouts = dict(DEFAULT_PAYOUT_TABLE)
+    payouts.update(rules or {})
+    rng = np.random.default_rng(seed)
+
+    results = {}
+    for bet_type in bet_types:
+        accumulator = _Accumulator()
+        remaining = rounds
+        while remaining > 0:
+            n = min(CHUNK, remaining)
+            if bet_type == 'coinflip':
+                returns, outcomes = _coinflip(rng, n, payouts)
+            elif bet_type == 'blackjack':
+                returns, outcomes = _blackjack(rng, n, payouts, stand_on)
+            else:
+                returns, outcomes = _roulette(rng, n, payouts, bet_type[len('roulette_'):])
+            accumulator.add(returns, outcomes)
+            remaining -= n
+        results[bet_type] = accumulator.result()
+
+    return {'payouts': payouts, 'results': results}
@@ -0,0 +1,427 @@
+"""
+Canlı olaylar - pub/sub, abone başına sınırlı tampon ve replay ring
+
+Settlement ve wallet yolları commit'ten sonra olay yayınlar; admin paneli
+(/admin/events, SSE) ve oyuncular (/me/ws, async sunucuda WebSocket)
+bunları alır, özet ve bakiye uçlarını tekrar tekrar çekmez.
+
+Topic'ler:
+    game       settle edilmiş oyun (admin akışı, tüm kullanıcılar)
+    balance    kullanıcının yeni bakiyesi (yalnızca o kullanıcıya)
+    blackjack  el durumu, view'ların döndürdüğü gövdenin aynısı (yalnızca o kullanıcıya)
+    rules      aktif rule set / ödeme tablosu değişti (herkese)
+
+  - Her olay "<epoch>-<sıra>" şeklinde artan bir id alır. Son
+    Config.EVENTS_REPLAY_SIZE olay ring'de tutulur; kopan client
+    Last-Event-ID ile bağlandığında aradaki olaylar ring'den gönderilir.
+    İstenen id ring'den düşmüşse ya da başka bir epoch'a aitse ilk
+    'ready' olayında reset=true döner, client özetleri REST'ten yükler.
+  - Abone tamponu Config.EVENTS_SUBSCRIBER_BUFFER olayla sınırlıdır. Dolan
+    (yavaş) abone ayrılır, publish hiçbir zaman beklemez. Client yeniden
+    bağlanıp ring'den devam eder.
+  - Process başına en fazla bus.max_subscribers akış açılır, fazlası 503 alır.
+
+Process'ler arası dağıtım broker.py üzerinden yapılır (EVENTS_BROKER_URI):
+publish olayı bir kuyruğa koyar, arka plan relay thread'i kuyruğu broker'a
+yazar ve broker'daki yeni olayları bu process'in abonelerine dağıtır. Bu
+durumda id'ler tüm worker'larda ortaktır. memory:// ile olaylar yalnızca
+yayınlandıkları process'te kalır.
+
+Kullanım:
+    publish_game(game_id, user_id, 'coinflip', stake, win_amount, 'WIN')
+    publish('balance', {'balance': 120.0, 'reason': 'deposit'}, user_id=user_id)
+
+    subscription = bus.subscribe(request.headers.get('Last-Event-ID'), topics={'game'})
+    Response(sse_stream(subscription), mimetype='text/event-stream')
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from flask import has_request_context, session
+from .broker import create_broker
+from .config import Config
+from .utils.json_provider import dumps, loads
+from .utils.logger import error_logger
+
+# Broker'a yazılmayı bekleyen olay sınırı (broker erişilemezken bellek büyümesin)
+_OUTBOX_SIZE = 10000
+# Relay bu kadar yazmada bir broker'daki eski olayları siler
+_PRUNE_EVERY = 1000
+
+
+class Subscription:
+    """Tek client'ın bekleyen olayları: (sıra, topic, user_id, data_json)"""
+
+    def __init__(self, maxsize, topics, user_id, start_id, reset, replay, waker=None):
+        self.topics = topics
+        self.user_id = user_id
+        self.start_id = start_id
+        self.reset = reset
+        self.closed = False
+        self.overflowed = False
+        self._maxsize = maxsize
+        self._waker = waker
+        self._events = deque(event for event in replay if self.wants(event[1], event[2]))
+        self._cond = threading.Condition()
+
+    def wants(self, topic, user_id):
+        """Topic filtresi; kullanıcıya özel olaylar yalnızca o kullanıcının aboneliğine"""
+        if self.topics is not None and topic not in self.topics:
+            return False
+        return self.user_id is None or user_id is None or user_id == self.user_id
+
+    def _wake(self):
+        self._cond.notify()
+        if self._waker is not None:
+            self._waker()
+
+    def put(self, event):
+        """Bus lock'u altında çağrılır; asla beklemez. Tampon doluysa abone ayrılır."""
+        with self._cond:
+            if self.closed:
+                return False
+            if len(self._events) >= self._maxsize:
+                self._events.clear()
+                self.overflowed = True
+                self.closed = True
+                self._wake()
+                return False
+            self._events.append(event)
+            self._wake()
+            return True
+
+    def get(self, timeout=0):
+        """Bekleyen tüm olayları al; yoksa en fazla timeout saniye bekle (async: 0)"""
+        with self._cond:
+            if not self._events and not self.closed and timeout:
+                self._cond.wait(timeout)
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._wake()
+
+
+class EventBus:
+    """Olay sırası ring'e ve abonelere aynı lock altında yazılır"""
+
+    def __init__(self, replay_size, subscriber_buffer, max_subscribers, broker=None):
+        self.max_subscribers = max_subscribers
+        self._replay_size = replay_size
+        self._subscriber_buffer = subscriber_buffer
+        self._broker = broker
+        self._lock = threading.Lock()
+        self._relay_lock = threading.Lock()
+        self._init_state()
+
+    def _init_state(self):
+        self._epoch = os.urandom(4).hex()
+        self._seq = 0
+        self._ring = deque(maxlen=self._replay_size)
+        self._subscribers = set()
+        self._outbox = None
+        self._relay_pid = None
+        self._totals = {'games': 0, 'wins': 0, 'total_bets': 0.0, 'total_payouts': 0.0, 'by_type': {}}
+        self._stats = {'published': 0, 'delivered': 0, 'dropped_slow': 0, 'replayed': 0,
+                       'resets': 0, 'rejected': 0, 'outbox_dropped': 0, 'broker_errors': 0,
+                       'relay_errors': 0}
+
+    def after_fork(self):
+        """Child process: master'dan kopyalanan ring, abone ve relay state'ini bırak"""
+        self._lock = threading.Lock()
+        self._relay_lock = threading.Lock()
+        self._init_state()
+
+    def event_id(self, seq):
+        return f"{self._epoch}-{seq}"
+
+    def _parse_id(self, event_id):
+        """Bu epoch'a ait id ise sıra numarası, değilse None"""
+        epoch, _, seq = (event_id or '').strip().partition('-')
+        if epoch != self._epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    # ======================
+    # Yayın
+    # ======================
+
+    def publish(self, topic, data, user_id=None):
+        """
+        Olayı yayınla; user_id verilirse yalnızca o kullanıcının aboneleri alır
+
+        Broker varsa olay kuyruğa konur ve relay thread'i tarafından dağıtılır.
+        """
+        payload = dumps(data)
+        self._ensure_relay()
+        if self._broker is None:
+            with self._lock:
+                self._seq += 1
+                self._deliver(self._seq, topic, user_id, payload)
+            return
+
+        try:
+            self._outbox.put_nowait((topic, user_id, payload))
+        except queue.Full:
+            with self._lock:
+                self._stats['outbox_dropped'] += 1
+
+    def _deliver(self, seq, topic, user_id, data):
+        """Lock altında: ring'e ekle, ilgili abonelere dağıt"""
+        if topic == 'game':
+            data = f'{{"game":{data},"totals":{dumps(self._record_game(loads(data)))}}}'
+
+        event = (seq, topic, user_id, data)
+        self._ring.append(event)
+        self._stats['published'] += 1
+
+        for subscription in list(self._subscribers):
+            if not subscription.wants(topic, user_id):
+                continue
+            if subscription.put(event):
+                self._stats['delivered'] += 1
+            else:
+                self._subscribers.discard(subscription)
+                if subscription.overflowed:
+                    self._stats['dropped_slow'] += 1
+
+    # ======================
+    # Broker relay
+    # ======================
+
+    def _ensure_relay(self):
+        """Relay thread'i ilk kullanımda (ve fork sonrası yeniden) başlat"""
+        if self._broker is None or self._relay_pid == os.getpid():
+            return
+        with self._relay_lock:
+            if self._relay_pid == os.getpid():
+                return
+            try:
+                epoch = self._broker.epoch()
+                last_id = self._broker.last_id()
+                backlog = self._broker.read_after(max(0, last_id - self._replay_size), self._replay_size)
+            except sqlite3.Error as e:
+                error_logger.error(f"Event broker unavailable, events stay in this process: {e}")
+                self._broker = None
+                return
+
+            with self._lock:
+                # Yeni başlayan worker'a bağlanan client da ring'den devam edebilsin
+                self._epoch = epoch
+                self._seq = last_id
+                for seq, topic, user_id, data in backlog:
+                    if topic == 'game':
+                        data = f'{{"game":{data},"totals":null}}'
+                    self._ring.append((seq, topic, user_id, data))
+            self._outbox = queue.Queue(maxsize=_OUTBOX_SIZE)
+            threading.Thread(
+                target=self._relay, args=(self._outbox, last_id), name='event-relay', daemon=True
+            ).start()
+            self._relay_pid = os.getpid()
+
+    def _relay(self, outbox, last_id):
+        written = 0
+        while True:
+            pending = []
+            try:
+                pending.append(outbox.get(timeout=Config.EVENTS_BROKER_POLL))
+                while len(pending) < _PRUNE_EVERY:
+                    pending.append(outbox.get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                if pending:
+                    self._broker.append(pending)
+                    written += len(pending)
+                    if written >= _PRUNE_EVERY:
+                        self._broker.prune(self._replay_size)
+                        written = 0
+                rows = self._broker.read_after(last_id)
+            except Exception as e:
+                # Relay ölürse _relay_pid set kaldığı için yeniden başlamaz; her hata loglanıp devam edilir
+                with self._lock:
+                    self._stats['broker_errors'] += 1
+                    if pending:
+                        self._stats['outbox_dropped'] += len(pending)
+                if isinstance(e, sqlite3.Error):
+                    error_logger.error(f"Event broker error: {e}")
+                else:
+                    error_logger.exception("Event broker relay error")
+                time.sleep(Config.EVENTS_BROKER_POLL)
+                continue
+
+            if rows:
+                with self._lock:
+                    for seq, topic, user_id, data in rows:
+                        self._seq = seq
+                        try:
+                            self._deliver(seq, topic, user_id, data)
+                        except Exception:
+                            # Bozuk satır atlanır, sonraki olaylar dağıtılmaya devam eder
+                            self._stats['relay_errors'] += 1
+                            error_logger.exception(f"Event {seq} ({topic}) could not be delivered")
+                last_id = rows[-1][0]
+
+    # ======================
+    # Abonelik
+    # ======================
+
+    def subscribe(self, last_event_id=None, topics=None, user_id=None, waker=None):
+        """
+        Yeni abone; last_event_id'den sonraki olaylar ring'den tampona konur
+
+        Args:
+            topics: Alınacak topic'ler (None: hepsi)
+            user_id: Oyuncu aboneliği; None ise tüm kullanıcıların olayları (admin)
+            waker: Yeni olayda çağrılır (async sunucu: loop.call_soon_threadsafe)
+
+        Returns:
+            Subscription veya None (max_subscribers dolu)
+        """
+        self._ensure_relay()
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                self._stats['rejected'] += 1
+                return None
+
+            replay = []
+            reset = False
+            start = self._seq
+            if last_event_id:
+                seq = self._parse_id(last_event_id)
+                oldest = self._ring[0][0] if self._ring else self._seq + 1
+                if seq is None or seq > self._seq or seq < oldest - 1:
+                    reset = True
+                    self._stats['resets'] += 1
+                else:
+                    replay = [event for event in self._ring if event[0] > seq]
+                    start = seq
+
+            subscription = Subscription(
+                self._subscriber_buffer, topics, user_id, self.event_id(start), reset, replay, waker
+            )
+            self._stats['replayed'] += len(subscription._events)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    # ======================
+    # Toplamlar ve sayaçlar
+    # ======================
+
+    def _record_game(self, game):
+        """Lock altında: bu process'in gördüğü oyunların toplamları"""
+        totals = self._totals
+        totals['games'] += 1
+        totals['wins'] += 1 if game['outcome'] == 'WIN' else 0
+        totals['total_bets'] += game['stake_amount']
+        totals['total_payouts'] += game['win_amount']
+        totals['by_type'][game['game_type']] = totals['by_type'].get(game['game_type'], 0) + 1
+        return self._totals_snapshot()
+
+    def _totals_snapshot(self):
+        totals = dict(self._totals, by_type=dict(self._totals['by_type']))
+        totals['house_profit'] = totals['total_bets'] - totals['total_payouts']
+        return totals
+
+    def totals(self):
+        with self._lock:
+            return self._totals_snapshot()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['broker'] = 'memory' if self._broker is None else 'sqlite'
+            stats['subscribers'] = len(self._subscribers)
+            stats['ring'] = len(self._ring)
+            stats['last_event_id'] = self.event_id(self._seq)
+            stats['pending'] = self._outbox.qsize() if self._outbox is not None else 0
+            stats['totals'] = self._totals_snapshot()
+        return stats
+
+
+bus = EventBus(
+    Config.EVENTS_REPLAY_SIZE, Config.EVENTS_SUBSCRIBER_BUFFER, Config.EVENTS_MAX_SUBSCRIBERS,
+    create_broker(Config.EVENTS_BROKER_URI)
+)
+
+
+def publish(topic, data, user_id=None):
+    """bus.publish kısayolu (commit'ten sonra çağrılır)"""
+    bus.publish(topic, data, user_id=user_id)
+
+
+def publish_game(game_id, user_id, game_type, stake_amount, win_amount, outcome, email=None):
+    """Settle edilmiş oyunu admin akışına yayınla"""
+    # E-posta oturumdan gelir; async sunucu kendi session'ından verir
+    if email is None and has_request_context():
+        email = session.get('email')
+    bus.publish('game', {
+        'game_id': game_id,
+        'user_id': user_id,
+        'player_email': email,
+        'game_type': game_type,
+        'stake_amount': float(stake_amount),
+        'win_amount': float(win_amount),
+        'outcome': outcome,
+        'started_at': datetime.now(),
+    })
+
+
+def ready_data(subscription):
+    """Her akışın ilk olayı: reset bayrağı (admin akışında bu process'in toplamları da)"""
+    data = {'reset': subscription.reset}
+    if subscription.user_id is None:
+        data['totals'] = bus.totals()
+    return dumps(data)
+
+
+def sse_stream(subscription):
+    """
+    Abonenin olaylarını text/event-stream olarak üret
+
+    İlk frame 'ready' olayıdır. Olay yokken EVENTS_HEARTBEAT aralıklarıyla
+    yorum satırı gönderilir; kopmuş client'lar bu yazmada fark edilir. Akış
+    EVENTS_STREAM_MAX_AGE sonunda kapanır, EventSource Last-Event-ID ile
+    yeniden bağlanır (yetki yeniden kontrol edilir).
+    """
+    yield (
+        f"retry: {Config.EVENTS_RETRY_MS}\n"
+        f"id: {subscription.start_id}\nevent: ready\ndata: {ready_data(subscription)}\n\n"
+    ).encode()
+
+    deadline = time.monotonic() + Config.EVENTS_STREAM_MAX_AGE
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            events = subscription.get(min(Config.EVENTS_HEARTBEAT, remaining))
+            if events:
+                yield ''.join(
+                    f"id: {bus.event_id(seq)}\nevent: {topic}\ndata: {data}\n\n"
+                    for seq, topic, _, data in events
+                ).encode()
+            elif subscription.closed:
+                return
+            else:
+                yield b": ping\n\n"
+    finally:
+        bus.unsubscribe(subscription)
+
+
+def get_event_stats():
+    """Yayın, abone, replay ve broker sayaçları (metrics için)"""
+    return bus.stats()
@@ -1,31 +1,99 @@
 import os
-from flask import Blueprint, send_from_directory
+import mimetypes
+from flask import Blueprint, request, send_from_directory
+from werkzeug.security import safe_join
+from .config import Config
+from .utils.json_provider import loads
 
 # Frontend klasörünün mutlak yolunu bul
 # Bu dosya: game_api/frontend_routes.py
 # Frontend: game_api/../frontend
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 FRONTEND_DIR = os.path.join(BASE_DIR, 'frontend')
+ADMIN_FRONTEND_DIR = os.path.join(BASE_DIR, 'admin_frontend')
+
+# Hash'li isimler içerik değişince değişir; tarayıcı bir yıl boyunca tekrar sormaz
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+PRECOMPRESSED = {'br': '.br', 'gzip': '.gz'}
+
+
+# Rate limiter
+def get_limiter():
+    from . import limiter
+    return limiter
+
+
+def load_site(name, source_dir):
+    """
+    build_static.py çıktısı varsa onu kullan
+
+    Returns:
+        tuple: (servis edilen klasör, {kaynak isim: hash'li isim})
+    """
+    dist_dir = os.path.join(Config.STATIC_DIST_DIR, name)
+    manifest_path = os.path.join(dist_dir, 'manifest.json')
+    if not os.path.isfile(manifest_path):
+        return source_dir, {}
+    with open(manifest_path, 'rb') as f:
+        return dist_dir, loads(f.read())
+
 
-frontend_bp = Blueprint('frontend', __name__, static_folder=FRONTEND_DIR, static_url_path='')
+def send_asset(directory, manifest, path):
+    """
+    Dosyayı gönder; client kabul ediyorsa hazır .br / .gz kardeşini
+
+    Hash'li isimler immutable, diğerleri (index.html, eski "script.js"
+    referansları) no-cache ile gönderilir. Build edilmemiş (kaynak)
+    klasörlerde eskisi gibi düz send_from_directory.
+    """
+    if not manifest:
+        return send_from_directory(directory, path)
+
+    immutable = path not in manifest and path in manifest.values()
+    path = manifest.get(path, path)
+    filename = path
+    encoding = None
+    full_path = safe_join(directory, path)
+    if full_path is not None:
+        available = [enc for enc, suffix in PRECOMPRESSED.items() if os.path.isfile(full_path + suffix)]
+        encoding = request.accept_encodings.best_match(available) if available else None
+        if encoding:
+            filename = path + PRECOMPRESSED[encoding]
+
+    response = send_from_directory(directory, filename, mimetype=mimetypes.guess_type(path)[0])
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE if immutable else 'no-cache'
+    return response
+
+
+FRONTEND_SERVE_DIR, FRONTEND_MANIFEST = load_site('frontend', FRONTEND_DIR)
+ADMIN_SERVE_DIR, ADMIN_MANIFEST = load_site('admin_frontend', ADMIN_FRONTEND_DIR)
+
+# Dosyalar aşağıdaki view'lardan servis edilir (blueprint static_folder'ı aynı
+# URL'leri yakalayıp ön sıkıştırılmış dosyaları atlardı)
+frontend_bp = Blueprint('frontend', __name__)
 
 @frontend_bp.route('/')
+@get_limiter().exempt
 def index():
-    return send_from_directory(FRONTEND_DIR, 'index.html')
+    return send_asset(FRONTEND_SERVE_DIR, FRONTEND_MANIFEST, 'index.html')
 
 @frontend_bp.route('/<path:path>')
+@get_limiter().exempt
 def serve_static(path):
-    return send_from_directory(FRONTEND_DIR, path)
+    return send_asset(FRONTEND_SERVE_DIR, FRONTEND_MANIFEST, path)
 
 # Admin Frontend Serving
-ADMIN_FRONTEND_DIR = os.path.join(BASE_DIR, 'admin_frontend')
-
-admin_fe_bp = Blueprint('admin_fe', __name__, static_folder=ADMIN_FRONTEND_DIR, static_url_path='/admin')
+admin_fe_bp = Blueprint('admin_fe', __name__)
 
 @admin_fe_bp.route('/admin/')
+@get_limiter().exempt
 def admin_index():
-    return send_from_directory(ADMIN_FRONTEND_DIR, 'index.html')
+    return send_asset(ADMIN_SERVE_DIR, ADMIN_MANIFEST, 'index.html')
 
 @admin_fe_bp.route('/admin/<path:path>')
+@get_limiter().exempt
 def serve_admin_static(path):
-    return send_from_directory(ADMIN_FRONTEND_DIR, path)
+    return send_asset(ADMIN_SERVE_DIR, ADMIN_MANIFEST, path)
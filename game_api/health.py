@@ -0,0 +1,150 @@
+import hmac
+from functools import wraps
+from flask import jsonify, request, Blueprint
+from .config import Config
+from .auth import admin_required
+from .database import db_breaker, get_routing_stats
+from .sharding import get_shard_stats
+from .circuit_breaker import CLOSED
+from .utils.db_utils import get_retry_stats
+from .utils.statements import get_statement_stats
+from .utils.passwords import get_hasher_stats
+from .utils.audit import get_audit_stats
+from .utils.compression import get_compression_stats
+from .events import get_event_stats
+from .services.user_service import UserService
+
+health_bp = Blueprint('health', __name__)
+
+# Rate limiter
+def get_limiter():
+    from . import limiter
+    return limiter
+
+@health_bp.route('/health', methods=['GET'])
+@get_limiter().exempt
+def health():
+    """
+    Health check
+
+    ---
+    tags:
+      - Operations
+    summary: Service health
+    description: |
+      Reports the database circuit breaker state without opening a new
+      connection, so it is cheap enough for load balancer probes.
+    responses:
+      200:
+        description: Database reachable (breaker CLOSED)
+        schema:
+          type: object
+          properties:
+            status:
+              type: string
+              example: ok
+            database:
+              type: string
+              example: CLOSED
+      503:
+        description: Database unavailable (breaker OPEN or HALF_OPEN)
+    """
+    state = db_breaker.state
+    if state != CLOSED:
+        return jsonify({'status': 'degraded', 'database': state}), 503
+    return jsonify({'status': 'ok', 'database': state}), 200
+
+def metrics_access_required(f):
+    """Admin session, or Authorization: Bearer <METRICS_TOKEN> for scrapers"""
+    admin_view = admin_required(f)
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = Config.METRICS_TOKEN
+        header = request.headers.get('Authorization', '')
+        if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+            return f(*args, **kwargs)
+        return admin_view(*args, **kwargs)
+
+    return decorated_function
+
+
+@health_bp.route('/metrics', methods=['GET'])
+@get_limiter().limit("60 per minute")
+@metrics_access_required
+def metrics():
+    """
+    Operational metrics
+
+    ---
+    tags:
+      - Operations
+    summary: Circuit breaker, transaction retry and replica routing counters
+    description: |
+      Requires an admin session or an `Authorization: Bearer <METRICS_TOKEN>`
+      header.
+    responses:
+      200:
+        description: Current counters
+        schema:
+          type: object
+          properties:
+            db_breaker:
+              type: object
+              properties:
+                state:
+                  type: string
+                  example: CLOSED
+                consecutive_failures:
+                  type: integer
+                total_failures:
+                  type: integer
+                rejected:
+                  type: integer
+                  description: Requests answered with 503 while the breaker was open
+                times_opened:
+                  type: integer
+            transaction_retries:
+              type: object
+              description: Retry counters per call site
+            db_routing:
+              type: object
+              description: Read-replica routing counters, lag and replica breaker state
+            db_shards:
+              type: array
+              description: Circuit breaker state of each shard that has been used
+            prepared_statements:
+              type: object
+              description: Statement prepares, reuses and plain (unregistered) executions inside transactions
+            user_status_cache:
+              type: object
+              description: Hits, misses, invalidations and size of the user status cache
+            password_hasher:
+              type: object
+              description: Hash/verify/rehash counts, queue depth and rejections of the hashing pool
+            audit_log:
+              type: object
+              description: Deferred audit writer counters (queued, written, inline, failed, pending)
+            compression:
+              type: object
+              description: Compressed, streamed and below-threshold responses, bytes in/out and ratio
+            live_events:
+              type: object
+              description: Published/replayed events, open and dropped (slow) subscribers, running game totals
+      401:
+        description: No admin session and no valid metrics token
+      403:
+        description: Logged in but not an admin
+    """
+    return jsonify({
+        'db_breaker': db_breaker.stats(),
+        'transaction_retries': get_retry_stats(),
+        'db_routing': get_routing_stats(),
+        'db_shards': get_shard_stats(),
+        'prepared_statements': get_statement_stats(),
+        'user_status_cache': UserService.get_cache_stats(),
+        'password_hasher': get_hasher_stats(),
+        'audit_log': get_audit_stats(),
+        'compression': get_compression_stats(),
+        'live_events': get_event_stats()
+    }), 200
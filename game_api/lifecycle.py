@@ -0,0 +1,66 @@
+"""
+Process lifecycle - Prefork sunucularda (gunicorn) fork öncesi/sonrası kaynak yönetimi
+
+Uygulama master process'te bir kez yüklenir (schema kontrolü dahil), sonra
+worker'lar fork edilir. Master'da açılan MySQL bağlantıları, thread'ler ve
+cache'ler child'a kopyalanır; paylaşılan socket'ler iki process'ten
+kullanılırsa protokol bozulur. Bu yüzden:
+
+  - release_before_fork(): master'daki pool bağlantılarını kapatır
+  - reinit_after_fork(): child'da pool'ları, thread pool'ları, breaker probe
+    thread'lerini ve process içi cache'leri sıfırlar
+
+gunicorn.conf.py bu fonksiyonları when_ready / post_fork hook'larından çağırır.
+Audit writer, password hash pool'u ve rate limit SQLite bağlantıları PID
+kontrolüyle kendiliğinden yeniden oluşturulur.
+"""
+from . import database, events, sharding
+from .services import user_service
+from .utils import idempotency, statements
+
+
+def _close_pool(pool):
+    """Pool'daki boştaki bağlantıları kapat"""
+    if pool is None:
+        return
+    while True:
+        try:
+            conn = pool.get_connection()
+        except Exception:
+            return
+        try:
+            conn._cnx.close()
+        except Exception:
+            pass
+
+
+def release_before_fork():
+    """Master process: fork'tan önce açık veritabanı bağlantılarını bırak"""
+    _close_pool(database._pool)
+    _close_pool(database._replica_pool)
+    for pool in sharding._pools.values():
+        _close_pool(pool)
+    database._pool = None
+    database._replica_pool = None
+    sharding._pools.clear()
+
+
+def reinit_after_fork():
+    """Child process: master'dan kopyalanan bağlantı ve state'i sıfırla"""
+    # Bağlantılar kapatılmadan bırakılır: socket'ler master ile ortak olabilir
+    database._pool = None
+    database._replica_pool = None
+    sharding._pools = {}
+    sharding._executor = None
+
+    database.db_breaker.after_fork()
+    database.replica_breaker.after_fork()
+    for breaker in sharding._breakers.values():
+        breaker.after_fork()
+
+    statements._registries.clear()
+    with idempotency._cache_lock:
+        idempotency._cache.clear()
+    with user_service._cache_lock:
+        user_service._cache.clear()
+    events.bus.after_fork()
@@ -0,0 +1,110 @@
+"""
+Connection pool yardımcıları - primary ve shard pool'ları aynı kurallarla çalışır
+
+  - create_pool(): MySQLConnectionPool; Config.DB_POOL_RESET_SESSION ile
+    bağlantı dönüşünde COM_RESET_CONNECTION yapılıp yapılmayacağı seçilir
+  - checkout(): pool doluysa Config.DB_POOL_TIMEOUT kadar boş bağlantı
+    bekler, süre dolarsa PoolExhausted (CircuitOpenError -> 503) fırlatır.
+    Pool'suz bağlantıya düşülmez; aksi halde yük altında MySQL bağlantı
+    sayısı pool boyutunu aşar.
+  - Checkout'ta önceki istekten kalan okunmamış sonuç ve transaction
+    temizlenir, oturum değişkenleri varsayılana döndürülür.
+"""
+import time
+from mysql.connector import pooling
+from mysql.connector.constants import DEFAULT_CONFIGURATION
+from .config import Config
+from .circuit_breaker import CircuitOpenError
+from .utils import statements
+
+# Bekleme sırasında pool'u yoklama aralığı (saniye)
+_POLL_MIN = 0.005
+_POLL_MAX = 0.05
+
+# pool_reset_session=False iken checkout'ta tek sorguyla geri alınan oturum durumu:
+# start_transaction(isolation_level=...) başarısız olursa "sonraki transaction"
+# seviyesi bağlantıda kalabilir; SET SESSION bunu da temizler.
+SQL_RESTORE_SESSION = (
+    "SET SESSION transaction_isolation = DEFAULT, SESSION transaction_read_only = DEFAULT, "
+    "SESSION sql_mode = DEFAULT, SESSION time_zone = DEFAULT, SESSION autocommit = 0"
+)
+
+
+class PoolExhausted(CircuitOpenError):
+    """Pool'da DB_POOL_TIMEOUT içinde boş bağlantı çıkmadı; breaker'a hata yazılmaz"""
+
+    def __init__(self, name):
+        super().__init__(name, retry_after=1)
+        self.args = (f"Connection pool '{name}' exhausted",)
+
+
+def connect_options():
+    """
+    Tüm bağlantılarda kullanılan timeout'lar
+
+    read_timeout / write_timeout mysql-connector-python 9.2.0 ile geldi; eski
+    sürümler bilinmeyen argümanda AttributeError fırlatır, orada verilmez.
+    """
+    options = {'connection_timeout': Config.DB_CONNECT_TIMEOUT}
+    if 'read_timeout' in DEFAULT_CONFIGURATION:
+        options['read_timeout'] = Config.DB_READ_TIMEOUT
+        options['write_timeout'] = Config.DB_WRITE_TIMEOUT
+    return options
+
+
+def create_pool(name, size, config):
+    return pooling.MySQLConnectionPool(
+        pool_name=name,
+        pool_size=size,
+        pool_reset_session=Config.DB_POOL_RESET_SESSION,
+        **config,
+        **connect_options(),
+    )
+
+
+def checkout(pool):
+    """
+    Pool'dan bağlantı al
+
+    Raises:
+        PoolExhausted: DB_POOL_TIMEOUT içinde bağlantı boşalmadı
+        mysql.connector.Error: bağlantı (yeniden) kurulamadı
+    """
+    deadline = time.monotonic() + Config.DB_POOL_TIMEOUT
+    delay = _POLL_MIN
+    while True:
+        try:
+            conn = pool.get_connection()
+            break
+        except pooling.PoolError:
+            # Pool dolu; bağlantı hataları InterfaceError olarak yukarı çıkar
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise PoolExhausted(pool.pool_name)
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, _POLL_MAX)
+
+    try:
+        _clean(conn)
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+def _clean(conn):
+    """Önceki kullanıcıdan kalan durumu temizle"""
+    if conn.unread_result:
+        conn.consume_results()
+    if conn.in_transaction:
+        conn.rollback()
+
+    if Config.DB_POOL_RESET_SESSION:
+        # Oturum dönüşte sıfırlandı, sunucudaki prepared statement'lar da gitti
+        statements.forget(conn)
+    else:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SQL_RESTORE_SESSION)
+        finally:
+            cursor.close()
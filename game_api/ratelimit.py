@@ -0,0 +1,179 @@
+"""
+Rate limit storage - Tüm worker process'lerin paylaştığı SQLite tabanlı sayaçlar
+
+Flask-Limiter'ın "memory://" storage'ı her process'te ayrı sayaç tutar; N
+worker ile kullanıcı limitin N katını kullanabilir. Bu modül `limits`
+kütüphanesine "sqlite://" şemasını ekler:
+
+    RATELIMIT_STORAGE_URI=sqlite:////var/run/oddcity/ratelimit.sqlite3
+
+Sliding window counter stratejisi desteklenir: önceki ve mevcut pencerenin
+sayaçları tek bir IMMEDIATE transaction içinde okunup artırılır, bu yüzden
+kontrol + artırma tek dosya kilidiyle atomiktir (memory storage'daki gibi
+geri alma gerekmez). Bağlantılar thread başına açık tutulur ve WAL modunda
+çalışır.
+
+Redis erişimi olan ortamlarda RATELIMIT_STORAGE_URI=redis://... de kullanılabilir.
+"""
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+from urllib.parse import urlparse
+from flask import request
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+from .config import Config
+
+# Limit decorator'ı olmayan endpoint'lere uygulanan limitler (endpoint başına)
+DEFAULT_LIMITS = ["200 per day", "50 per hour"]
+
+# Her bu kadar yazmada bir süresi dolmuş sayaçlar silinir
+_PURGE_EVERY = 1000
+
+
+class SQLiteStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """
+    Aynı makinedeki process'ler arasında paylaşılan rate limit storage'ı
+
+    URI: sqlite:///relative/path.db veya sqlite:////absolute/path.db
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        # sqlite:///rel.db -> 'rel.db', sqlite:////abs.db -> '/abs.db'
+        self.path = urlparse(uri).path[1:] or 'ratelimit.sqlite3'
+        self.timeout = float(options.get('timeout', 1.0))
+        self._local = threading.local()
+        self._writes = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+        conn = self._conn()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS counters (
+                key TEXT PRIMARY KEY,
+                count INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self):
+        # Thread (ve fork sonrası process) başına bir bağlantı
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _get(self, conn, key, now):
+        row = conn.execute(
+            "SELECT count FROM counters WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def _incr(self, conn, key, expiry, amount, now):
+        # Süresi dolmuş sayaç sıfırdan başlar ve yeni expiry alır
+        conn.execute("""
+            INSERT INTO counters (key, count, expires_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                count = CASE WHEN expires_at > ? THEN count + excluded.count ELSE excluded.count END,
+                expires_at = CASE WHEN expires_at > ? THEN expires_at ELSE excluded.expires_at END
+        """, (key, amount, now + expiry, now, now))
+        self._writes += 1
+        if self._writes % _PURGE_EVERY == 0:
+            conn.execute("DELETE FROM counters WHERE expires_at <= ?", (now,))
+        return self._get(conn, key, now)
+
+    def incr(self, key, expiry, amount=1):
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            count = self._incr(conn, key, expiry, amount, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def get(self, key):
+        return self._get(self._conn(), key, time.time())
+
+    def get_expiry(self, key):
+        row = self._conn().execute(
+            "SELECT expires_at FROM counters WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else time.time()
+
+    def clear(self, key):
+        self._conn().execute("DELETE FROM counters WHERE key = ?", (key,))
+
+    def reset(self):
+        return self._conn().execute("DELETE FROM counters").rowcount
+
+    def check(self):
+        try:
+            self._conn().execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _window(self, conn, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self._get(conn, previous_key, now)
+        current_count = self._get(conn, current_key, now)
+        previous_ttl = 0.0 if previous_count == 0 else (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return previous_key, current_key, previous_count, previous_ttl, current_count, current_ttl
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+
+        conn = self._conn()
+        now = time.time()
+        # Okuma + kontrol + artırma tek transaction'da (process'ler arası atomik)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _, current_key, previous_count, previous_ttl, current_count, _ = self._window(conn, key, expiry, now)
+            weighted_count = previous_count * previous_ttl / expiry + current_count
+            allowed = floor(weighted_count) + amount <= limit
+            if allowed:
+                self._incr(conn, current_key, 2 * expiry, amount, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed
+
+    def get_sliding_window(self, key, expiry):
+        conn = self._conn()
+        _, _, previous_count, previous_ttl, current_count, current_ttl = self._window(conn, key, expiry, time.time())
+        return previous_count, previous_ttl, current_count, current_ttl
+
+    def clear_sliding_window(self, key, expiry):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, time.time())
+        self.clear(previous_key)
+        self.clear(current_key)
+
+
+def route_cost():
+    """
+    Varsayılan (global) limitlerden düşülecek miktar
+
+    Büyük liste döndüren endpoint'ler Config.RATELIMIT_ROUTE_COSTS'taki
+    ağırlık kadar hak tüketir; diğerleri 1.
+    """
+    return Config.RATELIMIT_ROUTE_COSTS.get(request.endpoint, 1)
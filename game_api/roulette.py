@@ -1,11 +1,10 @@
-import random
-import json
 from flask import Blueprint, request, jsonify, session
-from .database import get_db_connection
 from .auth import login_required
-from .rules import get_active_rule_value, get_active_rule_set_id
+from .engine import RouletteEngine, DEFAULT_PAYOUTS
+from .rules import ActiveRules
+from .services.game_service import GameService
 from .utils.csrf import csrf_required
-from mysql.connector import Error
+from .utils.idempotency import idempotent, is_idempotent_replay
 
 roulette_bp = Blueprint('roulette', __name__)
 
@@ -14,31 +13,73 @@ def get_limiter():
     from . import limiter
     return limiter
 
-# Default Roulette Payouts (used if no rule in rule system)
-DEFAULT_PAYOUTS = {
-    'number': 35,  # Straight up
-    'color': 1,    # Red/Black
-    'parity': 1    # Odd/Even
-}
 
-# European Roulette Numbers (0-36)
-# Red numbers: 1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36
-RED_NUMBERS = {1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36}
+# Shared by the threaded (Flask) and async (game_api.aio) endpoints
+def validate_bet(data):
+    """Returns (error message, None) or (None, (amount, bet_type, bet_value))"""
+    if not data or 'amount' not in data or 'bet_type' not in data or 'bet_value' not in data:
+        return 'Missing data! (amount, bet_type, bet_value)', None
 
-def get_color(number):
-    if number == 0:
-        return 'green'
-    return 'red' if number in RED_NUMBERS else 'black'
+    try:
+        amount = float(data['amount'])
+        bet_type = data['bet_type']
+        bet_value = data['bet_value']
+    except ValueError:
+        return 'Invalid data format!', None
 
-def get_parity(number):
-    if number == 0:
-        return None
-    return 'even' if number % 2 == 0 else 'odd'
+    if amount <= 0:
+        return 'Bet amount must be greater than 0!', None
+
+    if bet_type not in DEFAULT_PAYOUTS:
+        return 'Invalid bet type!', None
+
+    # Validate bet_value based on bet_type
+    if bet_type == 'number':
+        try:
+            bet_value = int(bet_value)
+            if not (0 <= bet_value <= 36):
+                raise ValueError
+        except ValueError:
+            return 'Invalid number! (must be between 0-36)', None
+    elif bet_type == 'color':
+        if bet_value not in ['red', 'black']:
+            return 'Invalid color! (red or black)', None
+    elif bet_type == 'parity':
+        if bet_value not in ['odd', 'even']:
+            return 'Invalid odd/even selection! (odd or even)', None
+
+    return None, (amount, bet_type, bet_value)
+
+
+def game_error(result):
+    """(body, status) for a failed GameService.process_game result"""
+    error = result.get('error')
+    if error == 'db_unavailable':
+        return {'message': 'Database error!'}, 500
+    if error == 'wallet_not_found':
+        return {'message': 'Wallet not found!'}, 404
+    if error == 'insufficient_balance':
+        return {'message': 'Insufficient balance!'}, 400
+    if error == 'wallet_conflict':
+        return {'message': 'Wallet is busy, please try again.'}, 409
+    return {'message': 'An error occurred during the game.'}, 500
+
+
+def game_response(game_result, payout, new_balance):
+    return {
+        'message': 'YOU WON!' if game_result['is_win'] else 'You lost.',
+        'winning_number': game_result['winning_number'],
+        'winning_color': game_result['winning_color'],
+        'is_win': game_result['is_win'],
+        'payout': payout,
+        'new_balance': new_balance
+    }
 
 @roulette_bp.route('/game/roulette/play', methods=['POST'])
-@get_limiter().limit("60 per minute")  # 60 games per minute
+@get_limiter().limit("60 per minute", exempt_when=is_idempotent_replay)  # 60 games per minute
 @login_required
 @csrf_required
+@idempotent
 def play_roulette():
     """
     Play a roulette game
@@ -62,6 +103,15 @@ def play_roulette():
         type: string
         required: true
         description: CSRF token
+      - in: header
+        name: Idempotency-Key
+        type: string
+        required: false
+        maxLength: 128
+        description: |
+          Client-generated unique key. Retrying with the same key returns the
+          stored response (header Idempotent-Replayed: true) without charging
+          the wallet again or counting against the rate limit.
       - in: body
         name: body
         required: true
@@ -126,162 +176,29 @@ def play_roulette():
         description: Invalid CSRF token
       404:
         description: Wallet not found
+      409:
+        description: Wallet busy (concurrent update) or a request with the same Idempotency-Key is still in progress, retry the request
+      422:
+        description: Idempotency-Key was already used for a different request
     """
     user_id = session.get('user_id')
-    data = request.get_json()
-
-    if not data or 'amount' not in data or 'bet_type' not in data or 'bet_value' not in data:
-        return jsonify({'message': 'Missing data! (amount, bet_type, bet_value)'}), 400
-
-    try:
-        amount = float(data['amount'])
-        bet_type = data['bet_type']
-        bet_value = data['bet_value']
-    except ValueError:
-        return jsonify({'message': 'Invalid data format!'}), 400
-
-    if amount <= 0:
-        return jsonify({'message': 'Bet amount must be greater than 0!'}), 400
-
-    if bet_type not in DEFAULT_PAYOUTS:
-        return jsonify({'message': 'Invalid bet type!'}), 400
-
-    # Validate bet_value based on bet_type
-    if bet_type == 'number':
-        try:
-            bet_value = int(bet_value)
-            if not (0 <= bet_value <= 36):
-                raise ValueError
-        except ValueError:
-            return jsonify({'message': 'Invalid number! (must be between 0-36)'}), 400
-    elif bet_type == 'color':
-        if bet_value not in ['red', 'black']:
-            return jsonify({'message': 'Invalid color! (red or black)'}), 400
-    elif bet_type == 'parity':
-        if bet_value not in ['odd', 'even']:
-            return jsonify({'message': 'Invalid odd/even selection! (odd or even)'}), 400
-
-    conn = None
-    cursor = None
-
-    try:
-        conn = get_db_connection()
-        if conn is None:
-            return jsonify({'message': 'Database error!'}), 500
-
-        conn.start_transaction()
-        cursor = conn.cursor(dictionary=True)
-
-        # Check balance
-        cursor.execute("SELECT wallet_id, balance FROM wallets WHERE user_id = %s FOR UPDATE", (user_id,))
-        wallet = cursor.fetchone()
-
-        if not wallet:
-            conn.rollback()
-            return jsonify({'message': 'Wallet not found!'}), 404
-
-        wallet_id = wallet['wallet_id']
-        balance = float(wallet['balance'])
-
-        if balance < amount:
-            conn.rollback()
-            return jsonify({'message': 'Insufficient balance!'}), 400
-
-        # Get active rule set ID
-        rule_set_id = get_active_rule_set_id()
-        
-        # Create game record
-        sql_create_game = """
-            INSERT INTO games (user_id, rule_set_id, game_type, status)
-            VALUES (%s, %s, 'roulette', 'ACTIVE')
-        """
-        cursor.execute(sql_create_game, (user_id, rule_set_id))
-        game_id = cursor.lastrowid
-
-        # Deduct balance
-        cursor.execute("UPDATE wallets SET balance = balance - %s WHERE wallet_id = %s", (amount, wallet_id))
-        
-        # Create bet record
-        sql_create_bet = """
-            INSERT INTO bets (game_id, user_id, bet_type, bet_value, stake_amount)
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        cursor.execute(sql_create_bet, (game_id, user_id, bet_type, str(bet_value), amount))
-        bet_id = cursor.lastrowid
-
-        # Play Roulette
-        winning_number = random.randint(0, 36)
-        winning_color = get_color(winning_number)
-        winning_parity = get_parity(winning_number)
 
-        is_win = False
-        if bet_type == 'number':
-            is_win = (bet_value == winning_number)
-        elif bet_type == 'color':
-            is_win = (bet_value == winning_color)
-        elif bet_type == 'parity':
-            is_win = (bet_value == winning_parity)
-        
-        # Save game result
-        game_result_json = json.dumps({
-            'winning_number': winning_number,
-            'winning_color': winning_color,
-            'winning_parity': winning_parity,
-            'bet_type': bet_type,
-            'bet_value': str(bet_value),
-            'is_win': is_win
-        })
-        sql_update_game = """
-            UPDATE games 
-            SET game_result = %s, ended_at = NOW(), status = 'COMPLETED'
-            WHERE game_id = %s
-        """
-        cursor.execute(sql_update_game, (game_result_json, game_id))
-        
-        payout = 0
-        if is_win:
-            # Get payout multiplier from database
-            rule_key = f'roulette_{bet_type}_payout'
-            multiplier = get_active_rule_value(rule_key, DEFAULT_PAYOUTS[bet_type])
-            # Original stake + profit
-            payout = amount * (1 + multiplier)
-            
-            # Add balance
-            cursor.execute("UPDATE wallets SET balance = balance + %s WHERE wallet_id = %s", (payout, wallet_id))
-            
-            # Create payout record
-            sql_create_payout = """
-                INSERT INTO payouts (bet_id, win_amount, outcome)
-                VALUES (%s, %s, 'WIN')
-            """
-            cursor.execute(sql_create_payout, (bet_id, payout))
-        else:
-            # Create payout record in case of loss
-            sql_create_payout = """
-                INSERT INTO payouts (bet_id, win_amount, outcome)
-                VALUES (%s, 0, 'LOSS')
-            """
-            cursor.execute(sql_create_payout, (bet_id,))
+    error, bet = validate_bet(request.get_json())
+    if error:
+        return jsonify({'message': error}), 400
+    amount, bet_type, bet_value = bet
 
-        conn.commit()
+    # Play Roulette (payout multiplier is read from the active rule set only on a win)
+    game_result, payout = RouletteEngine(ActiveRules()).play(amount, bet_type, bet_value)
+    is_win = game_result['is_win']
 
-        # Get new balance
-        cursor.execute("SELECT balance FROM wallets WHERE wallet_id = %s", (wallet_id,))
-        new_balance = float(cursor.fetchone()['balance'])
+    # Wallet check, game/bet/payout records and balance update in one transaction
+    result = GameService.process_game(
+        user_id, 'roulette', amount, bet_type, bet_value, game_result, is_win, payout
+    )
 
-        return jsonify({
-            'message': 'YOU WON!' if is_win else 'You lost.',
-            'winning_number': winning_number,
-            'winning_color': winning_color,
-            'is_win': is_win,
-            'payout': payout,
-            'new_balance': new_balance
-        }), 200
+    if not result['success']:
+        body, status = game_error(result)
+        return jsonify(body), status
 
-    except Error as e:
-        if conn: conn.rollback()
-        print(f"Roulette error: {e}")
-        return jsonify({'message': f'An error occurred: {e}'}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+    return jsonify(game_response(game_result, payout, result['new_balance'])), 200
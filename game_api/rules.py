@@ -1,11 +1,20 @@
 from flask import jsonify, request, Blueprint, session
-from .database import get_db_connection
+from .config import Config
+from .database import get_db_connection, note_write, replica_read
+from .engine import DEALER_STANDS_ON
+from .engine.analytic import expected_returns, check_house_edge
+from .sharding import fan_out
 from .auth import admin_required
 from .utils.csrf import csrf_required
 from mysql.connector import Error
 
 rules_bp = Blueprint('rules', __name__)
 
+# Rate limiter
+def get_limiter():
+    from . import limiter
+    return limiter
+
 # Rule types - Rule types used for games
 RULE_TYPES = {
     'coinflip_payout': 'Coin Flip Payout Multiplier',
@@ -20,6 +29,7 @@ RULE_TYPES = {
 
 @rules_bp.route('/admin/rule-sets', methods=['GET'])
 @admin_required
+@replica_read
 def list_rule_sets():
     """
     List all rule sets (Admin only)
@@ -28,7 +38,10 @@ def list_rule_sets():
     tags:
       - Admin Rules
     summary: List rule sets
-    description: Returns all rule sets with their details.
+    description: |
+      Returns all rule sets with their rules. For the closed-form bets
+      (coinflip, roulette) the exact house edge is computed from the
+      payouts and compared with the stored house_edge.
     security:
       - session: []
       - admin: []
@@ -62,6 +75,36 @@ def list_rule_sets():
               created_by:
                 type: string
                 example: admin@example.com
+              rules:
+                type: array
+                items:
+                  type: object
+                  properties:
+                    rule_id:
+                      type: integer
+                    rule_type:
+                      type: string
+                    rule_param:
+                      type: string
+              house_edge_check:
+                type: object
+                description: Exact house edge of the closed-form bets against the stored house_edge
+                properties:
+                  stored_pct:
+                    type: number
+                    example: 5.0
+                  min_pct:
+                    type: number
+                    example: 2.5
+                  max_pct:
+                    type: number
+                    example: 2.7027
+                  consistent:
+                    type: boolean
+                    example: false
+                  bet_types:
+                    type: object
+                    description: "Per bet type: win_probability, rtp, house_edge, exact_rtp"
       401:
         description: Not authenticated
       403:
@@ -72,17 +115,29 @@ def list_rule_sets():
     
     cursor = conn.cursor(dictionary=True)
     try:
+        # Rule set'ler ve kuralları tek sorguda (rule set başına bir satır grubu)
         query = """
             SELECT rs.rule_set_id, rs.name, rs.description, rs.house_edge, 
                    rs.is_active, rs.start_at, rs.end_at,
-                   u.email as created_by
+                   u.email as created_by,
+                   r.rule_id, r.rule_type, r.rule_param
             FROM rule_sets rs
             LEFT JOIN users u ON rs.created_by_admin_id = u.user_id
-            ORDER BY rs.rule_set_id ASC
+            LEFT JOIN rules r ON r.rule_set_id = rs.rule_set_id
+            ORDER BY rs.rule_set_id ASC, r.rule_id ASC
         """
         cursor.execute(query)
-        rule_sets = cursor.fetchall()
-        return jsonify(rule_sets), 200
+
+        rule_sets = {}
+        for row in cursor.fetchall():
+            rule = {key: row.pop(key) for key in ('rule_id', 'rule_type', 'rule_param')}
+            rule_set = rule_sets.setdefault(row['rule_set_id'], dict(row, rules=[]))
+            if rule['rule_id'] is not None:
+                rule_set['rules'].append(rule)
+
+        for rule_set in rule_sets.values():
+            rule_set['house_edge_check'] = house_edge_check(rule_set)
+        return jsonify(list(rule_sets.values())), 200
     except Error as e:
         print(f"Rule sets list error: {e}")
         return jsonify({'message': f'Error: {e}'}), 500
@@ -180,6 +235,7 @@ def create_rule_set():
 
         cursor.execute(sql, val)
         conn.commit()
+        note_write()
 
         return jsonify({'message': 'Rule set created successfully!', 'rule_set_id': cursor.lastrowid}), 201
 
@@ -194,6 +250,7 @@ def create_rule_set():
 
 @rules_bp.route('/admin/rule-sets/<int:rule_set_id>', methods=['GET'])
 @admin_required
+@replica_read
 def get_rule_set(rule_set_id):
     """
     Get rule set details (Admin only)
@@ -247,6 +304,9 @@ def get_rule_set(rule_set_id):
                     type: string
                   rule_param:
                     type: string
+            house_edge_check:
+              type: object
+              description: Exact house edge of the closed-form bets against the stored house_edge (see list)
       401:
         description: Not authenticated
       403:
@@ -283,6 +343,7 @@ def get_rule_set(rule_set_id):
         rules = cursor.fetchall()
         
         rule_set['rules'] = rules
+        rule_set['house_edge_check'] = house_edge_check(rule_set)
         return jsonify(rule_set), 200
     except Error as e:
         print(f"Rule set detail error: {e}")
@@ -363,6 +424,8 @@ def activate_rule_set(rule_set_id):
             return jsonify({'message': 'Rule set not found'}), 404
         
         conn.commit()
+        note_write()
+        publish_rule_set()
         return jsonify({'message': 'Rule set activated.'}), 200
     except Error as e:
         conn.rollback()
@@ -437,6 +500,8 @@ def deactivate_rule_set(rule_set_id):
             return jsonify({'message': 'Rule set not found'}), 404
         
         conn.commit()
+        note_write()
+        publish_rule_set()
         return jsonify({'message': 'Rule set deactivated.'}), 200
     except Error as e:
         return jsonify({'message': f'Error: {e}'}), 500
@@ -522,8 +587,12 @@ def delete_rule_set(rule_set_id):
             return jsonify({'message': 'Active rule set cannot be deleted! Activate another rule set first.'}), 400
         
         # Check if games have been played with this rule set
-        cursor.execute("SELECT COUNT(*) as game_count FROM games WHERE rule_set_id = %s", (rule_set_id,))
-        game_count = cursor.fetchone()['game_count']
+        # games tablosu shard'larda olabilir - tüm shard'lardaki sayıların toplamı
+        def count_games(shard_cursor):
+            shard_cursor.execute("SELECT COUNT(*) as game_count FROM games WHERE rule_set_id = %s", (rule_set_id,))
+            return shard_cursor.fetchone()['game_count']
+
+        game_count = sum(fan_out(count_games))
         
         if game_count > 0:
             return jsonify({
@@ -539,13 +608,14 @@ def delete_rule_set(rule_set_id):
         cursor.execute("DELETE FROM rule_sets WHERE rule_set_id = %s", (rule_set_id,))
         
         conn.commit()
+        note_write()
         
         return jsonify({
             'message': f'Rule set "{rule_set["name"]}" deleted successfully!',
             'deleted_rules': deleted_rules
         }), 200
         
-    except Error as e:
+    except (Error, ConnectionError) as e:
         conn.rollback()
         return jsonify({'message': f'Error: {e}'}), 500
     finally:
@@ -641,9 +711,11 @@ def add_rule(rule_set_id):
     
     cursor = conn.cursor()
     try:
-        # Check if rule set exists
-        cursor.execute("SELECT rule_set_id FROM rule_sets WHERE rule_set_id = %s", (rule_set_id,))
-        if not cursor.fetchone():
+        # Check if rule set exists (FOR UPDATE: a concurrent activation waits and publishes with this rule)
+        cursor.execute("SELECT rule_set_id, is_active FROM rule_sets WHERE rule_set_id = %s FOR UPDATE", (rule_set_id,))
+        rule_set = cursor.fetchone()
+        if not rule_set:
+            conn.rollback()
             return jsonify({'message': 'Rule set not found'}), 404
         
         # Add rule
@@ -653,6 +725,11 @@ def add_rule(rule_set_id):
         """, (rule_set_id, rule_type, rule_param))
         
         conn.commit()
+        note_write()
+        # Only the active rule set is served to the games
+        is_active = rule_set[1]
+        if is_active:
+            publish_rule_set()
         return jsonify({
             'message': 'Rule added successfully!',
             'rule_id': cursor.lastrowid
@@ -666,6 +743,184 @@ def add_rule(rule_set_id):
         cursor.close()
         conn.close()
 
+def load_rule_set_payouts(cursor, rule_set_id):
+    """
+    Rule set'in bilgileri ve {rule_type: float} kuralları (simülasyon, RTP hesabı)
+
+    Sayıya çevrilemeyen kurallar atlanır; oyunlar da bunlar için varsayılanı kullanır.
+
+    Returns:
+        dict veya None (rule set yok)
+    """
+    cursor.execute(
+        "SELECT rule_set_id, name, house_edge, is_active FROM rule_sets WHERE rule_set_id = %s",
+        (rule_set_id,)
+    )
+    rule_set = cursor.fetchone()
+    if not rule_set:
+        return None
+
+    cursor.execute("SELECT rule_type, rule_param FROM rules WHERE rule_set_id = %s", (rule_set_id,))
+    rule_set['rules'] = parse_rules(cursor.fetchall())
+    return rule_set
+
+def parse_rules(rows):
+    """rules satırlarından {rule_type: float}; sayıya çevrilemeyenler atlanır"""
+    rules = {}
+    for row in rows:
+        try:
+            rules[row['rule_type']] = float(row['rule_param'])
+        except (TypeError, ValueError):
+            pass
+    return rules
+
+def house_edge_check(rule_set):
+    """Kapalı formdaki bahislerin kesin house edge'i ile kayıtlı house_edge'in karşılaştırması"""
+    return check_house_edge(rule_set['house_edge'], expected_returns(parse_rules(rule_set['rules'])))
+
+@rules_bp.route('/admin/rule-sets/<int:rule_set_id>/simulate', methods=['POST'])
+@get_limiter().limit("10 per minute")
+@admin_required
+@csrf_required
+def simulate_rule_set(rule_set_id):
+    """
+    Simulate the return to player of a rule set (Admin only)
+
+    ---
+    tags:
+      - Admin Rules
+    summary: Simulate rule set RTP
+    description: |
+      Plays the given number of rounds for every bet type under the rule set's
+      payouts (Monte Carlo, NumPy) and reports RTP, variance and a 95%
+      confidence interval. Run it before activating a rule set.
+      Rules in the body override the stored ones, so a payout can be tried
+      before it is added. Requires CSRF token.
+    security:
+      - session: []
+      - admin: []
+      - csrf: []
+    consumes:
+      - application/json
+    parameters:
+      - in: path
+        name: rule_set_id
+        type: integer
+        required: true
+        description: Rule set ID
+      - in: header
+        name: X-CSRF-Token
+        type: string
+        required: true
+        description: CSRF token
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            rounds:
+              type: integer
+              example: 1000000
+              description: Rounds per bet type (default SIMULATION_ROUNDS, max SIMULATION_MAX_ROUNDS)
+            seed:
+              type: integer
+              description: Fixed seed for repeatable results
+            bet_types:
+              type: array
+              items:
+                type: string
+                enum: [coinflip, roulette_number, roulette_color, roulette_parity, blackjack]
+            stand_on:
+              type: integer
+              example: 17
+              description: Blackjack player strategy - hit below this value
+            rules:
+              type: object
+              example: {"blackjack_normal_payout": 2.1}
+              description: Payout overrides by rule_type
+            csrf_token:
+              type: string
+    responses:
+      200:
+        description: Simulation results
+        schema:
+          type: object
+          properties:
+            rule_set_id:
+              type: integer
+            name:
+              type: string
+            house_edge:
+              type: number
+              description: Stored house edge of the rule set
+            payouts:
+              type: object
+              description: Payout table used (stored rules, overrides and defaults)
+            results:
+              type: object
+              description: "Per bet type: rounds, rtp, house_edge, variance, std_dev, ci95, outcomes (blackjack)"
+      400:
+        description: Invalid simulation parameters
+      401:
+        description: Not authenticated
+      403:
+        description: Admin access required or invalid CSRF token
+      404:
+        description: Rule set not found
+      503:
+        description: NumPy is not installed
+    """
+    # NumPy yalnızca simülasyon istendiğinde yüklenir (uygulama açılışını yavaşlatmaz)
+    from .engine import simulation
+
+    data = request.get_json(silent=True) or {}
+    try:
+        rounds = int(data.get('rounds', Config.SIMULATION_ROUNDS))
+        seed = None if data.get('seed') is None else int(data['seed'])
+        stand_on = int(data.get('stand_on', DEALER_STANDS_ON))
+        bet_types = list(data.get('bet_types') or simulation.BET_TYPES)
+        overrides = {str(k): float(v) for k, v in (data.get('rules') or {}).items()}
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({'message': 'Invalid simulation parameters!'}), 400
+
+    if not 1 <= rounds <= Config.SIMULATION_MAX_ROUNDS:
+        return jsonify({'message': f'rounds must be between 1 and {Config.SIMULATION_MAX_ROUNDS}!'}), 400
+    if not 2 <= stand_on <= 21:
+        return jsonify({'message': 'stand_on must be between 2 and 21!'}), 400
+    if set(bet_types) - set(simulation.BET_TYPES):
+        return jsonify({'message': 'Invalid bet type!'}), 400
+    if set(overrides) - set(RULE_TYPES):
+        return jsonify({'message': 'Invalid rule type!'}), 400
+    if not simulation.is_available():
+        return jsonify({'message': 'Simulation requires NumPy on the server.'}), 503
+
+    conn = get_db_connection()
+    if not conn: return jsonify({'message': 'Database error'}), 500
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        rule_set = load_rule_set_payouts(cursor, rule_set_id)
+    except Error as e:
+        return jsonify({'message': f'Error: {e}'}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+    if not rule_set:
+        return jsonify({'message': 'Rule set not found'}), 404
+
+    # Simülasyon veritabanı bağlantısı tutmadan çalışır
+    result = simulation.simulate(
+        dict(rule_set['rules'], **overrides), rounds=rounds, seed=seed, bet_types=bet_types, stand_on=stand_on
+    )
+    return jsonify({
+        'rule_set_id': rule_set['rule_set_id'],
+        'name': rule_set['name'],
+        'house_edge': rule_set['house_edge'],
+        **result
+    }), 200
+
 @rules_bp.route('/admin/rule-types', methods=['GET'])
 @admin_required
 def get_rule_types():
@@ -711,6 +966,11 @@ def get_rule_types():
     """
     return jsonify(RULE_TYPES), 200
 
+def publish_rule_set():
+    """Oyunculara yeni ödeme tablosunu gönder (bootstrap blackjack üzerinden rules'u import eder)"""
+    from .bootstrap import publish_rule_set as publish
+    publish()
+
 def get_active_rule_set_id():
     """Aktif rule set'in ID'sini döndürür"""
     conn = get_db_connection()
@@ -729,6 +989,36 @@ def get_active_rule_set_id():
         cursor.close()
         conn.close()
 
+def get_rule_set_names(rule_set_ids):
+    """
+    Rule set ID'lerini isimlere eşler (shard'lardaki oyun kayıtlarını zenginleştirmek için)
+
+    Returns:
+        dict: {rule_set_id: name}
+    """
+    rule_set_ids = sorted({rid for rid in rule_set_ids if rid is not None})
+    if not rule_set_ids:
+        return {}
+
+    conn = get_db_connection()
+    if not conn:
+        return {}
+
+    cursor = conn.cursor()
+    try:
+        placeholders = ', '.join(['%s'] * len(rule_set_ids))
+        cursor.execute(
+            f"SELECT rule_set_id, name FROM rule_sets WHERE rule_set_id IN ({placeholders})",
+            rule_set_ids
+        )
+        return {rule_set_id: name for rule_set_id, name in cursor.fetchall()}
+    except Error as e:
+        print(f"Rule set name fetch error: {e}")
+        return {}
+    finally:
+        cursor.close()
+        conn.close()
+
 def get_active_rule_value(rule_type, default_value):
     """
     Aktif rule set'ten belirli bir rule_type için rule değerini alır.
@@ -770,4 +1060,14 @@ def get_active_rule_value(rule_type, default_value):
     finally:
         cursor.close()
         conn.close()
-    
\ No newline at end of file
+
+
+class ActiveRules:
+    """
+    Aktif rule set'in kuralları, oyun motorlarının beklediği dict.get arayüzüyle
+
+    Değer yalnızca motor istediğinde (kazançta) veritabanından okunur.
+    """
+
+    def get(self, rule_type, default_value):
+        return get_active_rule_value(rule_type, default_value)
@@ -1,4 +1,4 @@
 # Services module
 from .wallet_service import WalletService
 from .game_service import GameService
-
+from .user_service import UserService
@@ -1,10 +1,18 @@
 """
 Game Service - Tüm oyun işlemlerini yönetir
 """
-import json
+from typing import Iterable
 from ..database import get_db_connection
-from ..rules import get_active_rule_set_id, get_active_rule_value
+from ..sharding import fan_out, is_sharded
+from ..rules import get_active_rule_set_id, get_active_rule_value, get_rule_set_names
+from ..utils.db_utils import run_in_transaction
+from ..utils.json_provider import dumps, loads
 from ..utils.logger import game_logger
+from ..utils.streaming import CursorBatches
+from . import settlement
+from .settlement import (  # noqa: F401 (aio ve benchmark'lar buradan import eder)
+    SQL_INSERT_GAME, SQL_INSERT_BET, SQL_INSERT_PAYOUT, SQL_COMPLETE_GAME, run_steps,
+)
 from .wallet_service import WalletService
 from mysql.connector import Error
 
@@ -25,10 +33,7 @@ class GameService:
         """
         rule_set_id = get_active_rule_set_id()
         
-        cursor.execute("""
-            INSERT INTO games (user_id, rule_set_id, game_type, status)
-            VALUES (%s, %s, %s, 'ACTIVE')
-        """, (user_id, rule_set_id, game_type))
+        cursor.execute(SQL_INSERT_GAME, (user_id, rule_set_id, game_type))
         
         game_id = cursor.lastrowid
         game_logger.debug(f"Game created: id={game_id}, type={game_type}, user={user_id}")
@@ -43,10 +48,7 @@ class GameService:
         Returns:
             bet_id
         """
-        cursor.execute("""
-            INSERT INTO bets (game_id, user_id, bet_type, bet_value, stake_amount)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (game_id, user_id, bet_type, bet_value, stake_amount))
+        cursor.execute(SQL_INSERT_BET, (game_id, user_id, bet_type, bet_value, stake_amount))
         
         bet_id = cursor.lastrowid
         game_logger.debug(f"Bet created: id={bet_id}, game={game_id}, amount={stake_amount}")
@@ -64,10 +66,7 @@ class GameService:
         Returns:
             payout_id
         """
-        cursor.execute("""
-            INSERT INTO payouts (bet_id, win_amount, outcome)
-            VALUES (%s, %s, %s)
-        """, (bet_id, win_amount, outcome))
+        cursor.execute(SQL_INSERT_PAYOUT, (bet_id, win_amount, outcome))
         
         payout_id = cursor.lastrowid
         game_logger.debug(f"Payout created: id={payout_id}, bet={bet_id}, amount={win_amount}, outcome={outcome}")
@@ -79,13 +78,9 @@ class GameService:
         """
         Oyunu tamamla ve sonucu kaydet
         """
-        result_json = json.dumps(game_result)
+        result_json = dumps(game_result)
         
-        cursor.execute("""
-            UPDATE games 
-            SET game_result = %s, ended_at = NOW(), status = 'COMPLETED'
-            WHERE game_id = %s
-        """, (result_json, game_id))
+        cursor.execute(SQL_COMPLETE_GAME, (result_json, game_id))
         
         game_logger.debug(f"Game completed: id={game_id}")
     
@@ -113,84 +108,45 @@ class GameService:
                 'new_balance': float,
                 ...game_result
             }
+            Hata durumunda 'error': 'db_unavailable' | 'wallet_not_found' |
+            'insufficient_balance' (+ 'current_balance') | 'wallet_conflict' | 'db_error'
         """
-        conn = None
-        cursor = None
+        rule_set_id = get_active_rule_set_id()
+
+        def work(conn, cursor):
+            return run_steps(settlement.play(
+                user_id, rule_set_id, game_type, bet_amount, bet_type, bet_value,
+                game_result, is_win, payout_amount
+            ), cursor)
         
         try:
-            conn = get_db_connection()
-            if not conn:
-                return {'success': False, 'message': 'Database error'}
-            
-            conn.start_transaction()
-            cursor = conn.cursor(dictionary=True)
-            
-            # 1. Bakiye kontrolü
-            has_enough, wallet_id, balance = WalletService.check_balance(user_id, bet_amount, cursor)
-            
-            if not wallet_id:
-                conn.rollback()
-                return {'success': False, 'message': 'Cüzdan bulunamadı'}
-            
-            if not has_enough:
-                conn.rollback()
-                return {
-                    'success': False,
-                    'message': f'Yetersiz bakiye. Mevcut: {balance:.2f}'
-                }
-            
-            # 2. Game oluştur
-            game_id, rule_set_id = GameService.create_game(user_id, game_type, cursor)
-            
-            # 3. Bahis miktarını düş
-            WalletService.debit(wallet_id, bet_amount, cursor)
-            
-            # 4. Bet oluştur
-            bet_id = GameService.create_bet(game_id, user_id, bet_type, str(bet_value), bet_amount, cursor)
-            
-            # 5. Oyunu tamamla
-            GameService.complete_game(game_id, game_result, cursor)
-            
-            # 6. Payout işle
-            if is_win:
-                WalletService.credit(wallet_id, payout_amount, cursor)
-                GameService.create_payout(bet_id, payout_amount, 'WIN', cursor)
-            else:
-                GameService.create_payout(bet_id, 0, 'LOSS', cursor)
-            
-            conn.commit()
-            
-            # 7. Yeni bakiyeyi al
-            new_balance = WalletService.get_balance(wallet_id, cursor)
-            
-            # Log
-            outcome = 'WIN' if is_win else 'LOSS'
-            game_logger.info(
-                f"Game played: type={game_type}, user={user_id}, bet={bet_amount}, "
-                f"outcome={outcome}, payout={payout_amount}, new_balance={new_balance}"
+            result = run_in_transaction(
+                work, site=f'game.{game_type}', isolation_level=WalletService.isolation_level(),
+                shard_key=user_id
             )
-            
-            return {
-                'success': True,
-                'game_id': game_id,
-                'new_balance': new_balance,
-                **game_result
-            }
-            
+        except ConnectionError:
+            return settlement.db_unavailable_result()
         except Error as e:
-            if conn: conn.rollback()
             game_logger.error(f"Game processing error: {e}")
-            return {'success': False, 'message': 'Oyun sırasında bir hata oluştu'}
-        finally:
-            if cursor: cursor.close()
-            if conn: conn.close()
+            return settlement.db_error_result('Oyun sırasında bir hata oluştu')
+        
+        if result['success']:
+            settlement.game_committed(user_id, game_type, bet_amount, is_win, payout_amount, result)
+        
+        return result
     
     @staticmethod
-    def get_user_games(user_id: int, game_type: str = None, limit: int = 20, offset: int = 0) -> list:
+    def get_user_games(user_id: int, game_type: str = None, limit: int = 20, offset: int = 0) -> Iterable[list]:
         """
         Kullanıcının oyun geçmişini getir
+
+        Satırlar cursor'dan parça parça okunur (stream_json_array ile
+        kullanılır); bağlantı parçalar bitince ya da close() ile bırakılır.
+        Stream bağlantıyı tutarken aynı pool'dan ikinci bağlantı alınmaz:
+        sharding kapalıyken rule set isimleri sorguda join edilir.
         """
-        conn = get_db_connection()
+        sharded = is_sharded()
+        conn = get_db_connection(shard_key=user_id)
         if not conn:
             return []
         
@@ -205,18 +161,22 @@ class GameService:
                     g.started_at,
                     g.ended_at,
                     g.status,
-                    rs.name as rule_set_name,
+                    {rule_set},
                     b.bet_type,
                     b.bet_value,
                     b.stake_amount,
                     p.win_amount,
                     p.outcome
                 FROM games g
-                LEFT JOIN rule_sets rs ON g.rule_set_id = rs.rule_set_id
                 LEFT JOIN bets b ON b.game_id = g.game_id
                 LEFT JOIN payouts p ON p.bet_id = b.bet_id
+                {rule_set_join}
                 WHERE g.user_id = %s
-            """
+            """.format(
+                # Sharded: rule_sets directory'de, isimler parça başına ayrı pool'dan okunur
+                rule_set='g.rule_set_id' if sharded else 'rs.name AS rule_set_name',
+                rule_set_join='' if sharded else 'LEFT JOIN rule_sets rs ON rs.rule_set_id = g.rule_set_id',
+            )
             params = [user_id]
             
             if game_type:
@@ -227,28 +187,31 @@ class GameService:
             params.extend([limit, offset])
             
             cursor.execute(sql, params)
-            games = cursor.fetchall()
-            
-            # JSON parse
-            for game in games:
-                if game['game_result']:
-                    try:
-                        game['game_result'] = json.loads(game['game_result'])
-                    except:
-                        pass
-                if game['stake_amount']:
-                    game['stake_amount'] = float(game['stake_amount'])
-                if game['win_amount']:
-                    game['win_amount'] = float(game['win_amount'])
-            
-            return games
             
         except Error as e:
             game_logger.error(f"Get user games error: {e}")
-            return []
-        finally:
             cursor.close()
             conn.close()
+            return []
+        
+        return CursorBatches(cursor, conn, transform=GameService._format_games)
+    
+    @staticmethod
+    def _format_games(games: list) -> list:
+        if games and 'rule_set_id' in games[0]:
+            # rule_sets directory veritabanında - isimleri parça başına tek sorguyla al
+            rule_set_names = get_rule_set_names(game['rule_set_id'] for game in games)
+            for game in games:
+                game['rule_set_name'] = rule_set_names.get(game.pop('rule_set_id'))
+        
+        # JSON parse
+        for game in games:
+            if game['game_result']:
+                try:
+                    game['game_result'] = loads(game['game_result'])
+                except ValueError:
+                    pass
+        return games
     
     @staticmethod
     def get_game_stats(user_id: int = None, game_type: str = None, days: int = 30) -> dict:
@@ -265,38 +228,53 @@ class GameService:
                 'win_rate': float
             }
         """
-        conn = get_db_connection()
-        if not conn:
-            return {}
+        sql = """
+            SELECT 
+                COUNT(DISTINCT g.game_id) as total_games,
+                COALESCE(SUM(b.stake_amount), 0) as total_bets,
+                COALESCE(SUM(p.win_amount), 0) as total_payouts,
+                SUM(CASE WHEN p.outcome = 'WIN' THEN 1 ELSE 0 END) as win_count,
+                SUM(CASE WHEN p.outcome = 'LOSS' THEN 1 ELSE 0 END) as loss_count
+            FROM games g
+            LEFT JOIN bets b ON b.game_id = g.game_id
+            LEFT JOIN payouts p ON p.bet_id = b.bet_id
+            WHERE g.status = 'COMPLETED'
+            AND g.started_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
+        """
+        params = [days]
         
-        cursor = conn.cursor(dictionary=True)
+        if user_id:
+            sql += " AND g.user_id = %s"
+            params.append(user_id)
+        
+        if game_type:
+            sql += " AND g.game_type = %s"
+            params.append(game_type)
+        
+        def query(cursor):
+            cursor.execute(sql, params)
+            return cursor.fetchone()
         
         try:
-            sql = """
-                SELECT 
-                    COUNT(DISTINCT g.game_id) as total_games,
-                    COALESCE(SUM(b.stake_amount), 0) as total_bets,
-                    COALESCE(SUM(p.win_amount), 0) as total_payouts,
-                    SUM(CASE WHEN p.outcome = 'WIN' THEN 1 ELSE 0 END) as win_count,
-                    SUM(CASE WHEN p.outcome = 'LOSS' THEN 1 ELSE 0 END) as loss_count
-                FROM games g
-                LEFT JOIN bets b ON b.game_id = g.game_id
-                LEFT JOIN payouts p ON p.bet_id = b.bet_id
-                WHERE g.status = 'COMPLETED'
-                AND g.started_at >= DATE_SUB(NOW(), INTERVAL %s DAY)
-            """
-            params = [days]
-            
             if user_id:
-                sql += " AND g.user_id = %s"
-                params.append(user_id)
-            
-            if game_type:
-                sql += " AND g.game_type = %s"
-                params.append(game_type)
+                conn = get_db_connection(shard_key=user_id)
+                if not conn:
+                    return {}
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    rows = [query(cursor)]
+                finally:
+                    cursor.close()
+                    conn.close()
+            else:
+                # Tüm kullanıcılar: her shard'da aynı sorgu, sonuçlar toplanır
+                rows = fan_out(query)
             
-            cursor.execute(sql, params)
-            stats = cursor.fetchone()
+            rows = [row for row in rows if row]
+            stats = {
+                key: sum(row[key] or 0 for row in rows)
+                for key in ('total_games', 'total_bets', 'total_payouts', 'win_count', 'loss_count')
+            } if rows else None
             
             if stats:
                 win_count = int(stats['win_count'] or 0)
@@ -323,10 +301,7 @@ class GameService:
                 'profit': 0
             }
             
-        except Error as e:
+        except (Error, ConnectionError) as e:
             game_logger.error(f"Get game stats error: {e}")
             return {}
-        finally:
-            cursor.close()
-            conn.close()
 
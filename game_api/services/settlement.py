@@ -0,0 +1,318 @@
+"""
+Settlement adımları - Wallet ve oyun transaction'larının I/O'suz karar mantığı
+
+Threaded (mysql-connector) ve async (aiomysql) service'ler aynı kuralları
+çalıştırır: bakiye kontrolü, concurrency modu, optimistic version retry,
+kayıtlar ve sonuç dict'leri. Her unit of work bir generator'dır; çalıştıracağı
+sorguyu Query olarak yield eder, cevabı Reply olarak alır ve sonucu return
+eder. Sorguyu çalıştırmak sürücünün işidir:
+
+    result = run_steps(transfer(user_id, amount, 'DEPOSIT'), cursor)           # threaded
+    result = await run_steps_async(transfer(user_id, amount, 'DEPOSIT'), cursor)  # aio/services.py
+
+Hata sonuçları Rollback ile fırlatılır, sürücüden geçip run_in_transaction'a ulaşır.
+Commit sonrası işler (log, ETag versiyonu, olaylar) transfer_committed() ve
+game_committed() içindedir; iki mod da commit'ten sonra bunları çağırır.
+"""
+from typing import NamedTuple
+from ..config import Config
+from ..events import publish, publish_game
+from ..sharding import is_sharded
+from ..utils.db_utils import Rollback
+from ..utils.etag import bump_state_version
+from ..utils.json_provider import dumps
+from ..utils.logger import game_logger
+from ..utils.statements import prepared
+
+
+# Settlement yolundaki sık çalışan sorgular (bağlantı başına bir kez prepare edilir)
+SQL_WALLET = prepared("SELECT wallet_id, balance, version FROM wallets WHERE user_id = %s")
+SQL_WALLET_FOR_UPDATE = prepared("SELECT wallet_id, balance, version FROM wallets WHERE user_id = %s FOR UPDATE")
+SQL_WALLET_APPLY = prepared(
+    "UPDATE wallets SET balance = balance + %s, version = version + 1 WHERE wallet_id = %s"
+)
+SQL_WALLET_APPLY_VERSIONED = prepared(
+    "UPDATE wallets SET balance = balance + %s, version = version + 1 "
+    "WHERE wallet_id = %s AND version = %s AND balance >= %s"
+)
+SQL_WALLET_CURRENT = prepared("SELECT balance, version FROM wallets WHERE wallet_id = %s")
+SQL_WALLET_BALANCE = prepared("SELECT balance FROM wallets WHERE wallet_id = %s")
+SQL_CREATE_WALLET = "INSERT IGNORE INTO wallets (user_id) VALUES (%s)"
+SQL_INSERT_TRANSACTION = """
+    INSERT INTO transactions (user_id, wallet_id, amount, tx_type)
+    VALUES (%s, %s, %s, %s)
+"""
+
+# Her oyunda çalışan insert/update'ler
+SQL_INSERT_GAME = prepared("""
+    INSERT INTO games (user_id, rule_set_id, game_type, status)
+    VALUES (%s, %s, %s, 'ACTIVE')
+""")
+SQL_INSERT_BET = prepared("""
+    INSERT INTO bets (game_id, user_id, bet_type, bet_value, stake_amount)
+    VALUES (%s, %s, %s, %s, %s)
+""")
+SQL_INSERT_PAYOUT = prepared("""
+    INSERT INTO payouts (bet_id, win_amount, outcome)
+    VALUES (%s, %s, %s)
+""")
+SQL_COMPLETE_GAME = prepared("""
+    UPDATE games
+    SET game_result = %s, ended_at = NOW(), status = 'COMPLETED'
+    WHERE game_id = %s
+""")
+
+
+class Query(NamedTuple):
+    """Çalıştırılacak sorgu; fetch=True ise ilk satır Reply.row'da döner"""
+    sql: str
+    params: tuple = ()
+    fetch: bool = False
+
+
+class Reply(NamedTuple):
+    """Sürücünün sorgu cevabı"""
+    row: dict = None
+    rowcount: int = -1
+    lastrowid: int = None
+
+
+def run_steps(steps, cursor):
+    """Unit of work'ü senkron cursor ile çalıştır (dictionary cursor / StatementCursor)"""
+    reply = None
+    while True:
+        try:
+            query = steps.send(reply)
+        except StopIteration as stop:
+            return stop.value
+        cursor.execute(query.sql, query.params)
+        reply = Reply(cursor.fetchone() if query.fetch else None, cursor.rowcount, cursor.lastrowid)
+
+
+def is_optimistic() -> bool:
+    return Config.WALLET_CONCURRENCY_MODE == 'optimistic'
+
+
+# ======================
+# Sonuç dict'leri
+# ======================
+
+def wallet_not_found_result() -> dict:
+    return {'success': False, 'message': 'Cüzdan bulunamadı', 'error': 'wallet_not_found'}
+
+
+def insufficient_result(balance: float) -> dict:
+    """Yetersiz bakiye hata sonucu"""
+    return {
+        'success': False,
+        'message': f'Yetersiz bakiye. Mevcut: {balance:.2f}',
+        'error': 'insufficient_balance',
+        'current_balance': balance
+    }
+
+
+def conflict_result() -> dict:
+    """Optimistic retry'ları tükendiğinde dönen hata sonucu"""
+    return {'success': False, 'message': 'Cüzdan meşgul, tekrar deneyin', 'error': 'wallet_conflict'}
+
+
+def db_unavailable_result() -> dict:
+    return {'success': False, 'message': 'Database error', 'error': 'db_unavailable'}
+
+
+def db_error_result(message: str) -> dict:
+    return {'success': False, 'message': message, 'error': 'db_error'}
+
+
+# ======================
+# Adımlar
+# ======================
+
+def get_wallet(user_id: int, for_update: bool = False):
+    """
+    Returns: {'wallet_id', 'balance', 'version'} veya None
+
+    Sharding açıkken kayıt, wallet'ı user'dan ayrı bir transaction'da
+    shard'a yazar; yazılamadıysa wallet burada, ilk kullanımda oluşturulur.
+    """
+    sql = SQL_WALLET_FOR_UPDATE if for_update else SQL_WALLET
+    wallet = (yield Query(sql, (user_id,), fetch=True)).row
+    if not wallet and is_sharded():
+        yield Query(SQL_CREATE_WALLET, (user_id,))
+        wallet = (yield Query(sql, (user_id,), fetch=True)).row
+    if wallet:
+        wallet['balance'] = float(wallet['balance'])
+    return wallet
+
+
+def get_balance(wallet_id: int):
+    reply = yield Query(SQL_WALLET_BALANCE, (wallet_id,), fetch=True)
+    return float(reply.row['balance']) if reply.row else 0.0
+
+
+def reserve(user_id: int, amount: float):
+    """
+    Wallet'ı oku ve bakiyeyi kontrol et (pessimistic modda satır kilitlenir)
+
+    Returns:
+        (has_enough, wallet) - wallet bulunamazsa (False, None)
+    """
+    wallet = yield from get_wallet(user_id, for_update=not is_optimistic())
+    if not wallet:
+        return False, None
+    return wallet['balance'] >= amount, wallet
+
+
+def settle(wallet: dict, debit_amount: float, credit_amount: float):
+    """
+    Bahis ve ödeme farkını wallet'a tek bir UPDATE ile uygula
+
+    Transaction içindeki son yazma olmalıdır. Optimistic modda version ve
+    bakiye kontrolü yapan UPDATE, çakışmada güncel satırla tekrar denenir.
+
+    Returns:
+        (status, balance) - status: 'OK', 'INSUFFICIENT' veya 'CONFLICT'.
+        'OK' ise balance yeni bakiyedir, aksi halde güncel bakiye.
+    """
+    wallet_id = wallet['wallet_id']
+    delta = credit_amount - debit_amount
+
+    # Pessimistic mod: satır zaten kilitli. Sadece kredi: atomik artış, kayıp güncelleme olmaz.
+    if not is_optimistic() or debit_amount <= 0:
+        yield Query(SQL_WALLET_APPLY, (delta, wallet_id))
+        return 'OK', (yield from get_balance(wallet_id))
+
+    version = wallet['version']
+    for attempt in range(Config.WALLET_OPTIMISTIC_MAX_RETRIES + 1):
+        reply = yield Query(SQL_WALLET_APPLY_VERSIONED, (delta, wallet_id, version, debit_amount))
+
+        if reply.rowcount == 1:
+            wallet['version'] = version + 1
+            return 'OK', (yield from get_balance(wallet_id))
+
+        # Başka bir işlem araya girdi - güncel satırı oku ve tekrar dene
+        current = (yield Query(SQL_WALLET_CURRENT, (wallet_id,), fetch=True)).row
+        if not current or float(current['balance']) < debit_amount:
+            return 'INSUFFICIENT', float(current['balance']) if current else 0.0
+
+        version = current['version']
+        game_logger.debug(f"Wallet {wallet_id} version conflict, retry {attempt + 1}")
+
+    game_logger.warning(f"Wallet {wallet_id} optimistic update gave up after {attempt + 1} attempts")
+    return 'CONFLICT', float(current['balance'])
+
+
+def settle_or_rollback(wallet: dict, debit_amount: float, credit_amount: float):
+    """settle(); INSUFFICIENT / CONFLICT sonucunu Rollback ile fırlat. Returns: yeni bakiye"""
+    status, balance = yield from settle(wallet, debit_amount, credit_amount)
+    if status == 'INSUFFICIENT':
+        raise Rollback(insufficient_result(balance))
+    if status == 'CONFLICT':
+        raise Rollback(conflict_result())
+    return balance
+
+
+def transfer(user_id: int, amount: float, tx_type: str):
+    """
+    Deposit / withdraw unit of work
+
+    Args:
+        tx_type: 'DEPOSIT' veya 'WITHDRAW'
+
+    Returns:
+        {'success': True, 'message': str, 'new_balance': float}
+    """
+    is_withdraw = tx_type == 'WITHDRAW'
+    has_enough, wallet = yield from reserve(user_id, amount)
+
+    if not wallet:
+        raise Rollback(wallet_not_found_result())
+
+    if is_withdraw and not has_enough:
+        raise Rollback(insufficient_result(wallet['balance']))
+
+    yield Query(SQL_INSERT_TRANSACTION, (user_id, wallet['wallet_id'], amount, tx_type))
+
+    if is_withdraw:
+        balance = yield from settle_or_rollback(wallet, amount, 0)
+    else:
+        balance = yield from settle_or_rollback(wallet, 0, amount)
+
+    return {
+        'success': True,
+        'message': f"{amount} VIRTUAL {'çekildi' if is_withdraw else 'yatırıldı'}",
+        'new_balance': balance
+    }
+
+
+def play(user_id: int, rule_set_id, game_type: str, bet_amount: float, bet_type: str,
+         bet_value, game_result: dict, is_win: bool, payout_amount: float):
+    """
+    Tek hamlelik oyun unit of work'ü: bakiye kontrolü, game/bet/payout kayıtları, settle
+
+    Returns:
+        {'success': True, 'game_id': int, 'new_balance': float, **game_result}
+    """
+    # 1. Bakiye kontrolü (optimistic modda kilitsiz okuma)
+    has_enough, wallet = yield from reserve(user_id, bet_amount)
+
+    if not wallet:
+        raise Rollback(wallet_not_found_result())
+
+    if not has_enough:
+        raise Rollback(insufficient_result(wallet['balance']))
+
+    # 2. Game, bet ve sonuç
+    game_id = (yield Query(SQL_INSERT_GAME, (user_id, rule_set_id, game_type))).lastrowid
+    bet_id = (yield Query(SQL_INSERT_BET, (game_id, user_id, bet_type, str(bet_value), bet_amount))).lastrowid
+    yield Query(SQL_COMPLETE_GAME, (dumps(game_result), game_id))
+    game_logger.debug(f"Game recorded: id={game_id}, bet={bet_id}, type={game_type}, user={user_id}")
+
+    # 3. Payout kaydı
+    win_amount = payout_amount if is_win else 0
+    yield Query(SQL_INSERT_PAYOUT, (bet_id, win_amount, 'WIN' if is_win else 'LOSS'))
+
+    # 4. Bahis ve kazancı tek UPDATE ile uygula (son yazma - kilit süresi minimum)
+    new_balance = yield from settle_or_rollback(wallet, bet_amount, win_amount)
+
+    return {
+        'success': True,
+        'game_id': game_id,
+        'new_balance': new_balance,
+        **game_result
+    }
+
+
+# ======================
+# Commit sonrası
+# ======================
+
+def publish_balance(user_id: int, balance: float, reason: str):
+    """
+    Yeni bakiyeyi kullanıcının açık oturumlarına yayınla (commit'ten sonra)
+
+    Args:
+        reason: 'deposit', 'withdraw' veya oyun tipi
+    """
+    publish('balance', {'balance': float(balance), 'reason': reason}, user_id=user_id)
+
+
+def transfer_committed(user_id: int, amount: float, tx_type: str, result: dict):
+    """Başarılı deposit / withdraw sonrası: log, ETag versiyonu, bakiye olayı"""
+    game_logger.info(f"{tx_type.title()}: user={user_id}, amount={amount}, new_balance={result['new_balance']}")
+    bump_state_version(user_id)
+    publish_balance(user_id, result['new_balance'], tx_type.lower())
+
+
+def game_committed(user_id: int, game_type: str, bet_amount: float, is_win: bool, payout_amount: float,
+                   result: dict, email=None):
+    """Başarılı oyun sonrası: log, ETag versiyonu, oyun ve bakiye olayları"""
+    outcome = 'WIN' if is_win else 'LOSS'
+    game_logger.info(
+        f"Game played: type={game_type}, user={user_id}, bet={bet_amount}, "
+        f"outcome={outcome}, payout={payout_amount}, new_balance={result['new_balance']}"
+    )
+    bump_state_version(user_id)
+    publish_game(result['game_id'], user_id, game_type, bet_amount, payout_amount if is_win else 0,
+                 outcome, email=email)
+    publish_balance(user_id, result['new_balance'], game_type)
@@ -0,0 +1,135 @@
+"""
+User Service - Kullanıcı durumu (status / is_admin) için process içi cache
+
+login_required ve admin_required her istekte durumu buradan okur. Kayıtlar
+Config.USER_STATUS_CACHE_TTL saniye yaşar; ban/unban gibi değişikliklerde
+invalidate() çağrılır, böylece bu process'te hemen, diğer worker'larda en
+geç TTL sonunda etkili olur.
+"""
+import threading
+import time
+from collections import OrderedDict
+from ..config import Config
+from ..database import get_db_connection
+from ..utils.logger import auth_logger
+from mysql.connector import Error
+
+
+_cache = OrderedDict()  # user_id -> (expires_at, {'status': str, 'is_admin': bool} veya None)
+_cache_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+# Veritabanına ulaşılamadığında döner; çağıran session'a güvenir
+UNKNOWN = object()
+# cached(): kayıt yok (None geçerli bir değer: kullanıcı silinmiş)
+MISS = object()
+
+SQL_USER_STATUS = "SELECT status, is_admin FROM users WHERE user_id = %s"
+
+LOGIN_REQUIRED_ERROR = {'message': 'You must log in to perform this action.'}
+BANNED_ERROR = {'message': 'Your account has been banned.'}
+
+
+class UserService:
+    """
+    Kullanıcı durumu için service class
+    """
+
+    @staticmethod
+    def get_status(user_id: int):
+        """
+        Kullanıcının güncel durumu
+
+        Returns:
+            {'status': 'ACTIVE' | 'BANNED', 'is_admin': bool}, kullanıcı yoksa None,
+            veritabanı hatasında UNKNOWN
+        """
+        status = UserService.cached(user_id)
+        if status is not MISS:
+            return status
+
+        status = UserService._load(user_id)
+        if status is not UNKNOWN:
+            UserService.remember(user_id, status)
+        return status
+
+    @staticmethod
+    def cached(user_id: int):
+        """Cache'teki durum; yoksa veya süresi dolduysa MISS (async mod kendi sorgusunu yapar)"""
+        with _cache_lock:
+            entry = _cache.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                _cache.move_to_end(user_id)
+                _stats['hits'] += 1
+                return entry[1]
+            _stats['misses'] += 1
+        return MISS
+
+    @staticmethod
+    def remember(user_id: int, status):
+        """Veritabanından okunan durumu cache'e yaz"""
+        with _cache_lock:
+            _cache[user_id] = (time.monotonic() + Config.USER_STATUS_CACHE_TTL, status)
+            _cache.move_to_end(user_id)
+            while len(_cache) > Config.USER_STATUS_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    @staticmethod
+    def _load(user_id: int):
+        conn = get_db_connection()
+        if conn is None:
+            return UNKNOWN
+
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(SQL_USER_STATUS, (user_id,))
+            row = cursor.fetchone()
+        except Error as e:
+            auth_logger.error(f"User status lookup error: user={user_id}, {e}")
+            return UNKNOWN
+        finally:
+            cursor.close()
+            conn.close()
+
+        if not row:
+            return None
+        return {'status': row['status'], 'is_admin': bool(row['is_admin'])}
+
+    @staticmethod
+    def check_session(session, status) -> tuple:
+        """
+        login_required kararı (threaded ve async ortak)
+
+        Ban ve silinme session süresini beklemeden etkili olur: session temizlenir.
+        Rol değiştiyse session'daki is_admin güncellenir (değişmediyse yazılmaz).
+        Durum bilinmiyorsa (UNKNOWN) session'a güvenilir.
+
+        Returns:
+            (error, modified) - error: (body, status_code) veya None;
+            modified: session değişti mi (async mod dosyaya geri yazar)
+        """
+        if status is None:
+            session.clear()
+            return (LOGIN_REQUIRED_ERROR, 401), True
+        if status is UNKNOWN:
+            return None, False
+        if status['status'] == 'BANNED':
+            session.clear()
+            return (BANNED_ERROR, 403), True
+        if session.get('is_admin') != status['is_admin']:
+            session['is_admin'] = status['is_admin']
+            return None, True
+        return None, False
+
+    @staticmethod
+    def invalidate(user_id: int):
+        """Durum veya rol değiştiğinde çağrılır"""
+        with _cache_lock:
+            _cache.pop(user_id, None)
+            _stats['invalidations'] += 1
+
+    @staticmethod
+    def get_cache_stats() -> dict:
+        """Metrics için cache sayaçları"""
+        with _cache_lock:
+            return {**_stats, 'size': len(_cache)}
@@ -2,253 +2,205 @@
 Wallet Service - Tüm wallet işlemlerini yönetir
 """
 from ..database import get_db_connection
+from ..utils.db_utils import run_in_transaction, RETRYABLE_ERRNOS
 from ..utils.logger import game_logger
+from . import settlement
+from .settlement import (  # noqa: F401 (aio ve benchmark'lar buradan import eder)
+    SQL_WALLET, SQL_WALLET_FOR_UPDATE, SQL_WALLET_APPLY, SQL_WALLET_APPLY_VERSIONED,
+    SQL_WALLET_CURRENT, SQL_WALLET_BALANCE, run_steps,
+)
 from mysql.connector import Error
 
 
 class WalletService:
     """
     Wallet işlemleri için service class
+
+    İki concurrency modu desteklenir (Config.WALLET_CONCURRENCY_MODE):
+      - pessimistic: wallet satırı SELECT ... FOR UPDATE ile okunur ve
+        transaction sonuna kadar kilitli kalır.
+      - optimistic: wallet kilitsiz okunur, bakiye farkı transaction'ın en
+        sonunda version ve bakiye kontrolü yapan tek bir UPDATE ile uygulanır.
+        Satır kilidi yalnızca bu UPDATE ile commit arasında tutulur.
+
+    Karar mantığı services/settlement.py'dedir (async service ile ortak);
+    bu class onu mysql-connector cursor'ı ile çalıştırır.
     """
-    
+
+    @staticmethod
+    def is_optimistic() -> bool:
+        """Optimistic concurrency modu aktif mi?"""
+        return settlement.is_optimistic()
+
+    @staticmethod
+    def isolation_level():
+        """
+        Wallet transaction'ları için isolation level
+
+        Optimistic modda READ COMMITTED kullanılır; böylece version çakışmasından
+        sonraki tekrar okuma snapshot'ı değil son commit edilmiş satırı görür.
+        """
+        return 'READ COMMITTED' if WalletService.is_optimistic() else None
+
     @staticmethod
     def get_wallet(user_id: int, cursor=None, for_update: bool = False):
         """
         Kullanıcının wallet bilgilerini getir
-        
+
         Args:
             user_id: Kullanıcı ID
             cursor: Varsa mevcut cursor'ı kullan
             for_update: Transaction için kilitlensin mi?
-        
+
         Returns:
-            dict: {'wallet_id': int, 'balance': float} veya None
+            dict: {'wallet_id': int, 'balance': float, 'version': int} veya None
         """
         own_cursor = cursor is None
         conn = None
-        
+
         try:
             if own_cursor:
-                conn = get_db_connection()
+                conn = get_db_connection(shard_key=user_id)
                 if not conn:
                     return None
                 cursor = conn.cursor(dictionary=True)
-            
-            sql = "SELECT wallet_id, balance FROM wallets WHERE user_id = %s"
-            if for_update:
-                sql += " FOR UPDATE"
-            
-            cursor.execute(sql, (user_id,))
-            wallet = cursor.fetchone()
-            
-            if wallet:
-                wallet['balance'] = float(wallet['balance'])
-            
+
+            wallet = run_steps(settlement.get_wallet(user_id, for_update), cursor)
+            if own_cursor:
+                conn.commit()  # ilk kullanımda oluşturulan wallet
             return wallet
-            
+
         except Error as e:
+            if e.errno in RETRYABLE_ERRNOS:
+                raise  # run_in_transaction yeniden denesin
             game_logger.error(f"Wallet fetch error: {e}")
             return None
         finally:
             if own_cursor:
                 if cursor: cursor.close()
                 if conn: conn.close()
-    
+
     @staticmethod
-    def check_balance(user_id: int, amount: float, cursor=None) -> tuple:
+    def reserve(user_id: int, amount: float, cursor) -> tuple:
+        """
+        Settlement için wallet'ı oku ve bakiyeyi kontrol et
+
+        Pessimistic modda satır kilitlenir, optimistic modda kilitsiz okunur.
+        Dönen wallet dict'i daha sonra settle()'a verilir.
+
+        Returns:
+            (has_enough, wallet) - wallet bulunamazsa (False, None)
+        """
+        return run_steps(settlement.reserve(user_id, amount), cursor)
+
+    @staticmethod
+    def check_balance(user_id: int, amount: float, cursor) -> tuple:
         """
         Bakiye kontrolü yap
-        
+
         Returns:
             (has_enough, wallet_id, current_balance)
         """
-        wallet = WalletService.get_wallet(user_id, cursor, for_update=True)
-        
+        has_enough, wallet = WalletService.reserve(user_id, amount, cursor)
+
         if not wallet:
             return False, None, 0
-        
-        has_enough = wallet['balance'] >= amount
+
         return has_enough, wallet['wallet_id'], wallet['balance']
-    
-    @staticmethod
-    def debit(wallet_id: int, amount: float, cursor) -> bool:
-        """
-        Wallet'tan para düş
-        
-        Args:
-            wallet_id: Wallet ID
-            amount: Düşülecek miktar
-            cursor: Database cursor (transaction içinde olmalı)
-        
-        Returns:
-            bool: Başarılı mı?
-        """
-        try:
-            cursor.execute(
-                "UPDATE wallets SET balance = balance - %s WHERE wallet_id = %s",
-                (amount, wallet_id)
-            )
-            game_logger.debug(f"Wallet {wallet_id} debited: {amount}")
-            return True
-        except Error as e:
-            game_logger.error(f"Wallet debit error: {e}")
-            return False
-    
+
     @staticmethod
-    def credit(wallet_id: int, amount: float, cursor) -> bool:
+    def settle(wallet: dict, debit_amount: float, credit_amount: float, cursor) -> tuple:
         """
-        Wallet'a para ekle
-        
+        Bahis ve ödeme farkını wallet'a tek bir UPDATE ile uygula
+
+        Transaction içindeki son yazma işlemi olarak çağrılmalıdır.
+
         Args:
-            wallet_id: Wallet ID
-            amount: Eklenecek miktar
+            wallet: reserve() veya get_wallet() ile okunan wallet dict'i
+            debit_amount: Düşülecek miktar (bahis)
+            credit_amount: Eklenecek miktar (kazanç)
             cursor: Database cursor (transaction içinde olmalı)
-        
+
         Returns:
-            bool: Başarılı mı?
+            (status, balance) - status: 'OK', 'INSUFFICIENT' veya 'CONFLICT'.
+            'OK' ise balance yeni bakiyedir, aksi halde güncel bakiye.
         """
-        try:
-            cursor.execute(
-                "UPDATE wallets SET balance = balance + %s WHERE wallet_id = %s",
-                (amount, wallet_id)
-            )
-            game_logger.debug(f"Wallet {wallet_id} credited: {amount}")
-            return True
-        except Error as e:
-            game_logger.error(f"Wallet credit error: {e}")
-            return False
-    
+        return run_steps(settlement.settle(wallet, debit_amount, credit_amount), cursor)
+
     @staticmethod
     def get_balance(wallet_id: int, cursor) -> float:
         """
         Güncel bakiyeyi getir
         """
         try:
-            cursor.execute(
-                "SELECT balance FROM wallets WHERE wallet_id = %s",
-                (wallet_id,)
-            )
-            result = cursor.fetchone()
-            return float(result['balance']) if result else 0.0
+            return run_steps(settlement.get_balance(wallet_id), cursor)
         except Error as e:
+            if e.errno in RETRYABLE_ERRNOS:
+                raise  # run_in_transaction yeniden denesin
             game_logger.error(f"Balance fetch error: {e}")
             return 0.0
-    
+
     @staticmethod
     def deposit(user_id: int, amount: float) -> dict:
         """
         Para yatırma işlemi
-        
+
         Returns:
             {'success': bool, 'message': str, 'new_balance': float}
+            Hata durumunda 'error': 'db_unavailable' | 'wallet_not_found' | 'db_error'
         """
-        conn = None
-        cursor = None
-        
-        try:
-            conn = get_db_connection()
-            if not conn:
-                return {'success': False, 'message': 'Database error'}
-            
-            conn.start_transaction()
-            cursor = conn.cursor(dictionary=True)
-            
-            # GÜVENLİK: Row lock ile race condition önle
-            wallet = WalletService.get_wallet(user_id, cursor, for_update=True)
-            if not wallet:
-                conn.rollback()
-                return {'success': False, 'message': 'Cüzdan bulunamadı'}
-            
-            wallet_id = wallet['wallet_id']
-            old_balance = wallet['balance']
-            
-            # Para ekle
-            WalletService.credit(wallet_id, amount, cursor)
-            
-            # Transaction kaydı
-            cursor.execute("""
-                INSERT INTO transactions (user_id, wallet_id, amount, tx_type)
-                VALUES (%s, %s, %s, 'DEPOSIT')
-            """, (user_id, wallet_id, amount))
-            
-            conn.commit()
-            
-            new_balance = WalletService.get_balance(wallet_id, cursor)
-            
-            game_logger.info(f"Deposit: user={user_id}, amount={amount}, new_balance={new_balance}")
-            
-            return {
-                'success': True,
-                'message': f'{amount} VIRTUAL yatırıldı',
-                'new_balance': new_balance
-            }
-            
-        except Error as e:
-            if conn: conn.rollback()
-            game_logger.error(f"Deposit error: {e}")
-            return {'success': False, 'message': 'İşlem hatası'}
-        finally:
-            if cursor: cursor.close()
-            if conn: conn.close()
-    
+        return WalletService._transfer(user_id, amount, 'DEPOSIT')
+
     @staticmethod
     def withdraw(user_id: int, amount: float) -> dict:
         """
         Para çekme işlemi
-        
+
         Returns:
             {'success': bool, 'message': str, 'new_balance': float}
+            Hata durumunda 'error': 'db_unavailable' | 'wallet_not_found' |
+            'insufficient_balance' (+ 'current_balance') | 'wallet_conflict' | 'db_error'
         """
-        conn = None
-        cursor = None
-        
+        return WalletService._transfer(user_id, amount, 'WITHDRAW')
+
+    @staticmethod
+    def _transfer(user_id: int, amount: float, tx_type: str) -> dict:
+        """deposit / withdraw: settlement.transfer tek transaction'da"""
+        def work(conn, cursor):
+            return run_steps(settlement.transfer(user_id, amount, tx_type), cursor)
+
         try:
-            conn = get_db_connection()
-            if not conn:
-                return {'success': False, 'message': 'Database error'}
-            
-            conn.start_transaction()
-            cursor = conn.cursor(dictionary=True)
-            
-            has_enough, wallet_id, balance = WalletService.check_balance(user_id, amount, cursor)
-            
-            if not wallet_id:
-                conn.rollback()
-                return {'success': False, 'message': 'Cüzdan bulunamadı'}
-            
-            if not has_enough:
-                conn.rollback()
-                return {
-                    'success': False,
-                    'message': f'Yetersiz bakiye. Mevcut: {balance:.2f}'
-                }
-            
-            # Para düş
-            WalletService.debit(wallet_id, amount, cursor)
-            
-            # Transaction kaydı
-            cursor.execute("""
-                INSERT INTO transactions (user_id, wallet_id, amount, tx_type)
-                VALUES (%s, %s, %s, 'WITHDRAW')
-            """, (user_id, wallet_id, amount))
-            
-            conn.commit()
-            
-            new_balance = WalletService.get_balance(wallet_id, cursor)
-            
-            game_logger.info(f"Withdraw: user={user_id}, amount={amount}, new_balance={new_balance}")
-            
-            return {
-                'success': True,
-                'message': f'{amount} VIRTUAL çekildi',
-                'new_balance': new_balance
-            }
-            
+            result = run_in_transaction(
+                work, site=f'wallet.{tx_type.lower()}', isolation_level=WalletService.isolation_level(),
+                shard_key=user_id
+            )
+        except ConnectionError:
+            return settlement.db_unavailable_result()
         except Error as e:
-            if conn: conn.rollback()
-            game_logger.error(f"Withdraw error: {e}")
-            return {'success': False, 'message': 'İşlem hatası'}
-        finally:
-            if cursor: cursor.close()
-            if conn: conn.close()
+            game_logger.error(f"{tx_type.title()} error: {e}")
+            return settlement.db_error_result('İşlem hatası')
+
+        if result['success']:
+            settlement.transfer_committed(user_id, amount, tx_type, result)
 
+        return result
+
+    @staticmethod
+    def publish_balance(user_id: int, balance: float, reason: str):
+        """
+        Yeni bakiyeyi kullanıcının açık oturumlarına yayınla (commit'ten sonra)
+
+        Args:
+            reason: 'deposit', 'withdraw' veya oyun tipi
+        """
+        settlement.publish_balance(user_id, balance, reason)
+
+    @staticmethod
+    def insufficient_result(balance: float) -> dict:
+        """Yetersiz bakiye hata sonucu"""
+        return settlement.insufficient_result(balance)
+
+    @staticmethod
+    def conflict_result() -> dict:
+        """Optimistic retry'ları tükendiğinde dönen hata sonucu"""
+        return settlement.conflict_result()
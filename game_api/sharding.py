@@ -0,0 +1,178 @@
+"""
+Shard router - user_id'ye göre kullanıcı verisini N veritabanına dağıtır
+
+Shard'lanan tablolar: wallets, games, bets, payouts, transactions, logs,
+idempotency_keys.
+Global tablolar (users, rule_sets, rules) Config.DB_CONFIG'teki directory
+veritabanında kalır.
+
+Config.DB_SHARDS boşsa sharding kapalıdır; tüm tablolar tek veritabanındadır
+ve shard_key verilen bağlantılar da directory'ye gider.
+
+Kullanım:
+    conn = get_db_connection(shard_key=user_id)   # kullanıcının shard'ı
+
+    def work(cursor):
+        cursor.execute("SELECT COUNT(*) AS n FROM games")
+        return cursor.fetchone()['n']
+
+    total = sum(fan_out(work))                    # tüm shard'larda paralel
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import mysql.connector
+from mysql.connector import Error
+from .config import Config
+from .circuit_breaker import CircuitBreaker
+from . import pools
+
+SHARDED_TABLES = ('wallets', 'games', 'bets', 'payouts', 'transactions', 'logs', 'idempotency_keys')
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+_pools = {}
+_pools_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def is_sharded() -> bool:
+    """Sharding aktif mi?"""
+    return bool(Config.DB_SHARDS)
+
+
+def shard_count() -> int:
+    return len(Config.DB_SHARDS) if is_sharded() else 1
+
+
+def shard_index(user_id: int) -> int:
+    """Kullanıcının shard numarası"""
+    return int(user_id) % shard_count()
+
+
+def _shard_config(index: int) -> dict:
+    """
+    Shard bağlantı ayarları
+
+    init_command her bağlantıda (reconnect ve oturum sıfırlama dahil) çalışır:
+    shard i, AUTO_INCREMENT id'lerini i+1, i+1+N, i+1+2N, ... sırasıyla
+    üretir. Böylece game_id / bet_id / wallet_id gibi id'ler shard'lar arasında
+    çakışmaz.
+    """
+    return {
+        **Config.DB_CONFIG,
+        'init_command': (
+            f"SET SESSION auto_increment_increment = {shard_count()}, "
+            f"SESSION auto_increment_offset = {index + 1}"
+        ),
+        **Config.DB_SHARDS[index],
+    }
+
+
+def _connect_shard(index: int):
+    return mysql.connector.connect(**_shard_config(index), **pools.connect_options())
+
+
+def _breaker(index: int) -> CircuitBreaker:
+    """Her shard'ın kendi circuit breaker'ı"""
+    breaker = _breakers.get(index)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(index)
+            if breaker is None:
+                def probe():
+                    conn = _connect_shard(index)
+                    try:
+                        conn.ping()
+                    finally:
+                        conn.close()
+
+                breaker = CircuitBreaker(
+                    f'mysql-shard-{index}',
+                    probe=probe,
+                    failure_threshold=Config.DB_BREAKER_FAILURE_THRESHOLD,
+                    probe_interval=Config.DB_BREAKER_PROBE_INTERVAL,
+                )
+                _breakers[index] = breaker
+    return breaker
+
+
+def _get_pool(index: int):
+    """Shard'ın connection pool'u (primary ile aynı boyut ve kurallar)"""
+    pool = _pools.get(index)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(index)
+            if pool is None:
+                pool = pools.create_pool(f'shard-{index}', Config.DB_POOL_SIZE, _shard_config(index))
+                _pools[index] = pool
+    return pool
+
+
+def get_shard_connection(index: int):
+    """
+    Shard bağlantısı (DB_POOL_SIZE > 0 ise shard'ın pool'undan)
+
+    Breaker açıksa ya da pool DB_POOL_TIMEOUT içinde boşalmazsa
+    CircuitOpenError fırlatılır, bağlantı hatasında None döner.
+    """
+    breaker = _breaker(index)
+    breaker.before_call()
+    try:
+        conn = pools.checkout(_get_pool(index)) if Config.DB_POOL_SIZE > 0 else _connect_shard(index)
+    except Error as e:
+        breaker.record_failure()
+        print(f"Shard {index} connection error: {e}")
+        return None
+    breaker.record_success()
+    return conn
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, len(Config.DB_SHARDS)), thread_name_prefix='shard'
+                )
+    return _executor
+
+
+def fan_out(work):
+    """
+    `work(cursor)`'ı her shard'da paralel çalıştır, sonuçları shard sırasıyla döndür
+
+    Sharding kapalıysa work() bu thread'de tek sefer çalışır (replica
+    yönlendirmesi dahil normal get_db_connection() kuralları geçerlidir).
+
+    Raises:
+        ConnectionError: Bir shard'a bağlanılamazsa
+        mysql.connector.Error: Sorgu hataları
+    """
+    if not is_sharded():
+        from .database import get_db_connection
+        return [_run_on(get_db_connection(), work, 0)]
+
+    def run(index):
+        return _run_on(get_shard_connection(index), work, index)
+
+    futures = [_get_executor().submit(run, index) for index in range(shard_count())]
+    return [future.result() for future in futures]
+
+
+def _run_on(conn, work, index):
+    if conn is None:
+        raise ConnectionError(f"Shard {index} connection failed")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return work(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def get_shard_stats():
+    """Shard breaker durumları (metrics için)"""
+    with _breakers_lock:
+        return [_breakers[index].stats() for index in sorted(_breakers)]
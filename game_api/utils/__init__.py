@@ -1,5 +1,5 @@
 # Utils module
-from .db_utils import db_transaction, get_cursor
+from .db_utils import db_transaction, get_cursor, run_in_transaction, Rollback, get_retry_stats
 from .validators import validate_email, validate_password, validate_bet_amount
 from .logger import get_logger
 
@@ -0,0 +1,154 @@
+"""
+Deferred audit writer - logs tablosu kayıtları response'u bekletmeden arka planda yazılır
+
+    log_action(user_id, 'LOGIN', request.remote_addr)
+
+Kayıtlar bounded bir kuyruğa girer; arka plan thread'i kuyruğu shard'a göre
+gruplayıp tek multi-row INSERT ile yazar. Kuyruk doluysa kayıt çağıran
+thread'de hemen yazılır (kayıp olmaz). Process kapanırken kuyruk boşaltılır.
+"""
+import atexit
+import os
+import queue
+import threading
+from collections import defaultdict
+from mysql.connector import Error
+from ..circuit_breaker import CircuitOpenError
+from ..config import Config
+from ..database import get_db_connection
+from ..sharding import is_sharded, shard_index
+from .logger import get_logger
+
+audit_logger = get_logger('game_api.audit')
+
+_queue = None
+_queue_pid = None
+_worker = None
+_lock = threading.Lock()
+_stats = {'queued': 0, 'written': 0, 'inline': 0, 'failed': 0, 'batches': 0}
+_stats_lock = threading.Lock()
+
+_STOP = object()
+
+
+def _count(key, n=1):
+    with _stats_lock:
+        _stats[key] += n
+
+
+def _write(rows):
+    """Aynı shard'a ait kayıtları tek INSERT ile yaz"""
+    conn = get_db_connection(shard_key=rows[0][0])
+    if conn is None:
+        raise ConnectionError("Audit log connection failed")
+
+    cursor = conn.cursor()
+    try:
+        placeholders = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+        cursor.execute(
+            f"INSERT INTO logs (user_id, action_type, ip_address, meta_data) VALUES {placeholders}",
+            [value for row in rows for value in row]
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _flush(rows):
+    groups = defaultdict(list)
+    for row in rows:
+        groups[shard_index(row[0]) if is_sharded() else 0].append(row)
+
+    for group in groups.values():
+        try:
+            _write(group)
+            _count('written', len(group))
+            _count('batches')
+        except (Error, ConnectionError, CircuitOpenError) as e:
+            _count('failed', len(group))
+            audit_logger.error(f"Audit log write failed ({len(group)} rows): {e}")
+
+
+def _flush_safely(rows):
+    # Beklenmeyen bir hata writer thread'ini öldürmesin; batch kaybedilir, thread devam eder
+    try:
+        _flush(rows)
+    except Exception:
+        _count('failed', len(rows))
+        audit_logger.exception(f"Audit writer failed on a batch of {len(rows)} rows")
+
+
+def _run(q):
+    while True:
+        item = q.get()
+        if item is _STOP:
+            return
+        rows = [item]
+        # Kuyrukta bekleyenleri aynı batch'e al
+        while len(rows) < Config.AUDIT_BATCH_SIZE:
+            try:
+                item = q.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                _flush_safely(rows)
+                return
+            rows.append(item)
+        _flush_safely(rows)
+
+
+def _get_queue():
+    """Kuyruk ve writer thread'i ilk kullanımda, fork sonrası ve thread ölmüşse yeniden başlat"""
+    global _queue, _queue_pid, _worker
+    pid = os.getpid()
+    if _queue is None or _queue_pid != pid or not _worker.is_alive():
+        with _lock:
+            if _queue is None or _queue_pid != pid:
+                _queue = queue.Queue(maxsize=Config.AUDIT_QUEUE_SIZE)
+                _queue_pid = pid
+                _worker = None
+            if _worker is None or not _worker.is_alive():
+                # Aynı kuyruk korunur; bekleyen kayıtları yeni thread yazar
+                _worker = threading.Thread(target=_run, args=(_queue,), name='audit-writer', daemon=True)
+                _worker.start()
+    return _queue
+
+
+def log_action(user_id, action_type, ip_address=None, meta_data=None):
+    """logs tablosuna kayıt ekle (response'u bekletmez)"""
+    row = (user_id, action_type, ip_address, meta_data)
+    if Config.AUDIT_DEFERRED:
+        try:
+            _get_queue().put_nowait(row)
+            _count('queued')
+            return
+        except queue.Full:
+            pass
+
+    _count('inline')
+    _flush([row])
+
+
+def flush_audit_log(timeout=5.0):
+    """Kuyruktaki kayıtları yaz ve writer thread'i durdur"""
+    global _queue, _worker
+    if _queue is None or _queue_pid != os.getpid():
+        return
+    try:
+        _queue.put(_STOP, timeout=timeout)
+    except queue.Full:
+        audit_logger.warning(f"Audit queue still full at shutdown, {_queue.qsize()} rows dropped")
+        return
+    _worker.join(timeout)
+    _queue = None
+
+
+def get_audit_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['pending'] = _queue.qsize() if _queue is not None else 0
+    return stats
+
+
+atexit.register(flush_audit_log)
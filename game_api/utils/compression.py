@@ -0,0 +1,170 @@
+"""
+Response sıkıştırma - Accept-Encoding'e göre brotli / gzip
+
+Config.COMPRESS_MIN_SIZE'dan küçük cevaplar olduğu gibi gönderilir; küçük
+gövdelerde sıkıştırma CPU'ya değmez. Streaming cevaplarda (stream_json_array)
+karar için önce COMPRESS_MIN_SIZE kadar parça okunur; stream bu boyuta
+ulaşmadan biterse gövde sıkıştırılmadan tek parça gönderilir. Sıkıştırılan
+stream'ler COMPRESS_STREAM_FLUSH_SIZE byte biriktikçe flush edilir.
+
+brotli paketi kuruluysa ve client kabul ediyorsa br, yoksa gzip kullanılır.
+
+Kullanım:
+    app.after_request(compress_response)   # en son çalışması için ilk kaydedilir
+"""
+import itertools
+import threading
+import zlib
+from flask import request
+from ..config import Config
+
+try:
+    import brotli
+except ImportError:  # sadece gzip
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/javascript',
+    'text/plain',
+    'image/svg+xml',
+}
+
+ENCODINGS = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+_stats = {'compressed': 0, 'streamed': 0, 'skipped_small': 0, 'bytes_in': 0, 'bytes_out': 0}
+_stats_lock = threading.Lock()
+
+
+class _Compressor:
+    """Tek cevap için artımlı sıkıştırıcı"""
+
+    def __init__(self, encoding):
+        if encoding == 'br':
+            self._br = brotli.Compressor(quality=Config.COMPRESS_BROTLI_QUALITY)
+        else:
+            self._br = None
+            # wbits=31: gzip header + trailer
+            self._gz = zlib.compressobj(Config.COMPRESS_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data, flush=False):
+        if self._br is not None:
+            out = self._br.process(data)
+            return out + self._br.flush() if flush else out
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        if self._br is not None:
+            return self._br.finish()
+        return self._gz.flush()
+
+
+def compress(data, encoding):
+    """Tek seferde sıkıştır (önceden hazırlanıp cache'lenen gövdeler için)"""
+    compressor = _Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def _record(**counts):
+    with _stats_lock:
+        for key, value in counts.items():
+            _stats[key] += value
+
+
+def _encode(chunk):
+    return chunk.encode() if isinstance(chunk, str) else chunk
+
+
+def _peek(chunks):
+    """
+    COMPRESS_MIN_SIZE byte'a ulaşana kadar parça oku
+
+    Returns:
+        (okunan parçalar, kalan iterator) - stream bittiyse kalan None
+    """
+    head, size = [], 0
+    rest = iter(chunks)
+    for chunk in rest:
+        chunk = _encode(chunk)
+        head.append(chunk)
+        size += len(chunk)
+        if size >= Config.COMPRESS_MIN_SIZE:
+            return head, rest
+    return head, None
+
+
+def _compress_stream(head, rest, chunks, encoding):
+    compressor = _Compressor(encoding)
+    pending = 0
+    try:
+        for chunk in itertools.chain(head, rest):
+            chunk = _encode(chunk)
+            # Küçük parçalar birleştirilir: her flush sıkıştırma oranını düşürür
+            pending += len(chunk)
+            flush = pending >= Config.COMPRESS_STREAM_FLUSH_SIZE
+            if flush:
+                pending = 0
+            out = compressor.compress(chunk, flush=flush)
+            _record(bytes_in=len(chunk), bytes_out=len(out))
+            if out:
+                yield out
+        out = compressor.finish()
+        _record(bytes_out=len(out))
+        yield out
+    finally:
+        # Client koptuğunda içteki generator da kapansın (DB bağlantısı bırakılır)
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+
+
+def compress_response(response):
+    """after_request: uygun cevapları client'ın kabul ettiği encoding ile sıkıştır"""
+    if (
+        not Config.COMPRESS_ENABLED
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough  # send_file: dosya olduğu gibi
+        or 'Content-Encoding' in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        head, rest = _peek(response.response)
+        if rest is None:
+            response.set_data(b''.join(head))
+            _record(skipped_small=1)
+            return response
+        response.response = _compress_stream(head, rest, response.response, encoding)
+        response.headers.pop('Content-Length', None)
+        _record(streamed=1)
+    else:
+        data = response.get_data()
+        if len(data) < Config.COMPRESS_MIN_SIZE:
+            _record(skipped_small=1)
+            return response
+        compressed = compress(data, encoding)
+        response.set_data(compressed)
+        _record(compressed=1, bytes_in=len(data), bytes_out=len(compressed))
+
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def get_compression_stats():
+    """Sıkıştırma sayaçları (metrics için)"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['encodings'] = ENCODINGS
+    stats['ratio'] = round(stats['bytes_out'] / stats['bytes_in'], 3) if stats['bytes_in'] else None
+    return stats
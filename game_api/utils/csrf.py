@@ -1,13 +1,21 @@
 """
 CSRF (Cross-Site Request Forgery) Protection Module
 Provides token-based CSRF protection for sensitive endpoints.
+
+Two modes (Config.CSRF_MODE):
+- 'signed' (default): the token is an HMAC of (session id, issue time) made
+  with Config.CSRF_SECRET_KEYS. Issuing and validating it needs no session
+  reads or writes. The first key signs; all keys validate (key rotation).
+- 'session': a random token stored in the session (original behaviour).
 """
 import secrets
 import hmac
 import hashlib
+import time
 from functools import wraps
 from flask import session, request, jsonify
 from datetime import datetime, timedelta
+from ..config import Config
 
 
 # CSRF Token settings
@@ -18,11 +26,67 @@ CSRF_SESSION_KEY = '_csrf_token'
 CSRF_TIMESTAMP_KEY = '_csrf_timestamp'
 
 
+def _session_id():
+    """Server-side session id; None when the session interface has none"""
+    return getattr(session, 'sid', None)
+
+
+def _key_id(key):
+    return hashlib.sha256(key.encode()).hexdigest()[:8]
+
+
+def _signature(key, sid, issued_at):
+    message = f"{sid}.{issued_at}".encode()
+    return hmac.new(key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def _use_signed_tokens():
+    return Config.CSRF_MODE == 'signed' and _session_id() is not None
+
+
+def generate_signed_csrf_token():
+    """
+    Generates a stateless token: <key id>.<issue time>.<HMAC(session id, issue time)>
+    Nothing is written to the session.
+    """
+    key = Config.CSRF_SECRET_KEYS[0]
+    issued_at = int(time.time())
+    return f"{_key_id(key)}.{issued_at}.{_signature(key, _session_id(), issued_at)}"
+
+
+def validate_signed_csrf_token(token, sid=None):
+    """
+    Validates a stateless token against the current session id
+    (or `sid`, for callers outside a Flask request such as game_api.aio).
+    Accepts tokens signed with any configured key that have not expired.
+    """
+    if sid is None:
+        sid = _session_id()
+
+    try:
+        key_id, issued_at, signature = token.split('.')
+        issued_at = int(issued_at)
+    except (ValueError, AttributeError):
+        return False
+
+    if time.time() - issued_at > CSRF_TOKEN_EXPIRY_HOURS * 3600:
+        return False
+
+    for key in Config.CSRF_SECRET_KEYS:
+        if hmac.compare_digest(_key_id(key), key_id):
+            expected = _signature(key, sid, issued_at)
+            return hmac.compare_digest(expected, signature)
+    return False
+
+
 def generate_csrf_token():
     """
     Generates a new CSRF token and stores it in the session.
     Returns the token for client use.
     """
+    if _use_signed_tokens():
+        return generate_signed_csrf_token()
+
     token = secrets.token_hex(CSRF_TOKEN_LENGTH)
     session[CSRF_SESSION_KEY] = token
     session[CSRF_TIMESTAMP_KEY] = datetime.utcnow().isoformat()
@@ -33,7 +97,11 @@ def get_csrf_token():
     """
     Gets the current CSRF token from session.
     If no token exists or it's expired, generates a new one.
+    In signed mode a fresh stateless token is returned instead.
     """
+    if _use_signed_tokens():
+        return generate_signed_csrf_token()
+
     token = session.get(CSRF_SESSION_KEY)
     timestamp_str = session.get(CSRF_TIMESTAMP_KEY)
     
@@ -55,15 +123,46 @@ def validate_csrf_token(token):
     Validates the provided CSRF token against the session token.
     Uses constant-time comparison to prevent timing attacks.
     """
-    session_token = session.get(CSRF_SESSION_KEY)
-    
+    if _use_signed_tokens():
+        return validate_signed_csrf_token(token)
+
+    return compare_session_token(session.get(CSRF_SESSION_KEY), token)
+
+
+def compare_session_token(session_token, token):
+    """Session mode: constant-time comparison (shared with game_api.aio)"""
     if not session_token or not token:
         return False
-    
-    # Constant-time comparison
     return hmac.compare_digest(session_token, token)
 
 
+def token_from_body(data):
+    """csrf_token field of a JSON body, if any"""
+    return data.get('csrf_token') if data else None
+
+
+def csrf_error(token, validate):
+    """
+    csrf_required decision, shared with game_api.aio
+
+    Returns:
+        (body, status_code) when the request must be rejected, else None
+    """
+    if not token:
+        return {
+            'message': 'CSRF token eksik! Güvenlik hatası.',
+            'error': 'csrf_token_missing'
+        }, 403
+
+    if not validate(token):
+        return {
+            'message': 'Geçersiz CSRF token! Sayfa yenilenebilir.',
+            'error': 'csrf_token_invalid'
+        }, 403
+
+    return None
+
+
 def csrf_required(f):
     """
     Decorator to require CSRF token validation for a route.
@@ -82,24 +181,12 @@ def csrf_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Get token from header first, then from JSON body
-        token = request.headers.get(CSRF_HEADER_NAME)
-        
-        if not token:
-            data = request.get_json(silent=True)
-            if data:
-                token = data.get('csrf_token')
-        
-        if not token:
-            return jsonify({
-                'message': 'CSRF token eksik! Güvenlik hatası.',
-                'error': 'csrf_token_missing'
-            }), 403
+        token = request.headers.get(CSRF_HEADER_NAME) or token_from_body(request.get_json(silent=True))
         
-        if not validate_csrf_token(token):
-            return jsonify({
-                'message': 'Geçersiz CSRF token! Sayfa yenilenebilir.',
-                'error': 'csrf_token_invalid'
-            }), 403
+        error = csrf_error(token, validate_csrf_token)
+        if error:
+            body, status_code = error
+            return jsonify(body), status_code
         
         return f(*args, **kwargs)
     
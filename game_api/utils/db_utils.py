@@ -1,31 +1,68 @@
 """
 Database utility functions - Transaction management
 """
+import random
+import threading
+import time
+from collections import defaultdict
 from contextlib import contextmanager
-from ..database import get_db_connection
+from mysql.connector import Error
+from ..config import Config
+from ..database import get_db_connection, note_write
+from .logger import get_logger
+from .statements import StatementCursor
+
+
+db_logger = get_logger('game_api.db')
+
+# Tekrar denenebilir MySQL hataları
+ER_LOCK_WAIT_TIMEOUT = 1205
+ER_LOCK_DEADLOCK = 1213
+RETRYABLE_ERRNOS = {ER_LOCK_WAIT_TIMEOUT, ER_LOCK_DEADLOCK}
+
+# Call site bazında retry sayaçları
+_retry_stats = defaultdict(lambda: {'retries': 0, 'deadlocks': 0, 'lock_timeouts': 0, 'exhausted': 0})
+_retry_stats_lock = threading.Lock()
+
+
+class Rollback(Exception):
+    """
+    Unit of work içinden fırlatılır: transaction geri alınır ve
+    run_in_transaction() hata yerine `result` değerini döndürür.
+    """
+
+    def __init__(self, result=None):
+        super().__init__()
+        self.result = result
 
 
 @contextmanager
-def db_transaction():
+def db_transaction(shard_key=None):
     """
     Transaction context manager - Otomatik commit/rollback
-    
+
     Kullanım:
         with db_transaction() as (conn, cursor):
             cursor.execute("INSERT INTO ...")
             # Başarılı olursa otomatik commit
             # Hata olursa otomatik rollback
+
+    Kullanıcı tablolarında shard_key=user_id verilmelidir.
+
+    Not: with bloğu tekrar çalıştırılamaz; deadlock/lock timeout
+    durumunda otomatik retry için run_in_transaction() kullanın.
     """
-    conn = get_db_connection()
+    conn = get_db_connection(shard_key=shard_key)
     if conn is None:
         raise ConnectionError("Database connection failed")
-    
+
     cursor = conn.cursor(dictionary=True)
-    
+
     try:
         conn.start_transaction()
         yield conn, cursor
         conn.commit()
+        note_write()
     except Exception as e:
         conn.rollback()
         raise e
@@ -34,22 +71,119 @@ def db_transaction():
         conn.close()
 
 
+def run_in_transaction(work, site, isolation_level=None, max_attempts=None, shard_key=None):
+    """
+    Unit of work'ü transaction içinde çalıştır, deadlock ve lock wait
+    timeout hatalarında jitter'lı backoff ile yeniden dene
+
+    `work(conn, cursor)` her denemede baştan çağrılır; bu yüzden
+    veritabanı dışında (session, response) yan etkisi olmamalıdır.
+    work() herhangi bir hata fırlatırsa transaction geri alınır.
+
+    Kullanım:
+        def work(conn, cursor):
+            cursor.execute("UPDATE ...")
+            if not ok:
+                raise Rollback({'success': False})
+            return {'success': True}
+
+        result = run_in_transaction(work, site='wallet.deposit', shard_key=user_id)
+
+    Args:
+        work: conn ve dictionary cursor (StatementCursor) alan fonksiyon
+        site: Retry istatistikleri için call site adı
+        isolation_level: Örn. 'READ COMMITTED' (None = sunucu varsayılanı)
+        max_attempts: Varsayılan Config.DB_TX_MAX_ATTEMPTS
+        shard_key: Kullanıcı tabloları için user_id (sharding aktifse shard seçer)
+
+    Returns:
+        work() dönüş değeri veya Rollback.result
+
+    Raises:
+        ConnectionError: Bağlantı kurulamazsa
+        mysql.connector.Error: Tekrar denenemeyen ya da denemeleri tükenen hatalar
+    """
+    attempts = max_attempts or Config.DB_TX_MAX_ATTEMPTS
+
+    conn = get_db_connection(shard_key=shard_key)
+    if conn is None:
+        raise ConnectionError("Database connection failed")
+
+    # prepared() ile kayıtlı sorgular bağlantının prepared statement'larını kullanır
+    cursor = StatementCursor(conn)
+
+    try:
+        for attempt in range(1, attempts + 1):
+            try:
+                conn.start_transaction(isolation_level=isolation_level)
+                result = work(conn, cursor)
+                conn.commit()
+                note_write()
+                return result
+            except Rollback as r:
+                conn.rollback()
+                return r.result
+            except Error as e:
+                conn.rollback()
+                if e.errno not in RETRYABLE_ERRNOS:
+                    raise
+                if attempt == attempts:
+                    _record_retry(site, e.errno, exhausted=True)
+                    db_logger.error(f"Transaction {site} failed after {attempts} attempts: {e}")
+                    raise
+                _record_retry(site, e.errno)
+                db_logger.warning(f"Transaction {site} retry {attempt}/{attempts - 1}: {e.msg}")
+                time.sleep(_backoff_delay(attempt))
+            except Exception:
+                # work() içindeki MySQL dışı hatalar: bağlantı pool'a açık transaction ile dönmesin
+                conn.rollback()
+                raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _backoff_delay(attempt):
+    """Full jitter exponential backoff (saniye)"""
+    ceiling = min(Config.DB_TX_BACKOFF_MAX, Config.DB_TX_BACKOFF_BASE * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+
+def _record_retry(site, errno, exhausted=False):
+    with _retry_stats_lock:
+        stats = _retry_stats[site]
+        if exhausted:
+            stats['exhausted'] += 1
+            return
+        stats['retries'] += 1
+        if errno == ER_LOCK_DEADLOCK:
+            stats['deadlocks'] += 1
+        else:
+            stats['lock_timeouts'] += 1
+
+
+def get_retry_stats():
+    """Call site bazında retry sayaçlarının kopyasını döndür"""
+    with _retry_stats_lock:
+        return {site: dict(stats) for site, stats in _retry_stats.items()}
+
+
 @contextmanager
-def get_cursor(dictionary=True):
+def get_cursor(dictionary=True, shard_key=None):
     """
     Basit cursor context manager (transaction olmadan)
-    
+
     Kullanım:
         with get_cursor() as cursor:
             cursor.execute("SELECT * FROM users")
             result = cursor.fetchall()
     """
-    conn = get_db_connection()
+    conn = get_db_connection(shard_key=shard_key)
     if conn is None:
         raise ConnectionError("Database connection failed")
-    
+
     cursor = conn.cursor(dictionary=dictionary)
-    
+
     try:
         yield cursor
         conn.commit()
@@ -59,4 +193,3 @@ def get_cursor(dictionary=True):
     finally:
         cursor.close()
         conn.close()
-
@@ -0,0 +1,176 @@
+"""
+Conditional GET - Kullanıcı durumuna bağlı okumalar için ETag / 304
+
+Her kullanıcının bir durum versiyonu vardır. Versiyon tüm worker process'lerin
+ve async sunucunun paylaştığı bir SQLite dosyasında, user_id ile tutulur
+(STATE_VERSION_URI); kullanıcının bütün oturum ve cihazları aynı versiyonu görür.
+Settlement, deposit ve withdraw commit edildikten sonra çağıran versiyonu
+değiştirir (bump_state_version). ETag bu versiyondan üretildiği için
+If-None-Match kontrolü MySQL tablolarına gitmeden yapılır.
+
+Kullanım:
+    @auth_bp.route('/me', methods=['GET'])
+    @login_required
+    @conditional_get
+    @replica_read
+    def get_current_user(): ...
+"""
+import hashlib
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from functools import wraps
+from urllib.parse import urlparse
+from flask import current_app, request, session
+from ..config import Config
+from .logger import get_logger
+
+etag_logger = get_logger('game_api.etag')
+
+
+class SQLiteVersionStore:
+    """
+    user_id -> durum versiyonu (paylaşılan SQLite dosyası)
+
+    Bağlantılar thread (ve fork sonrası process) başına açılır, WAL modunda
+    çalışır (bkz. broker.SQLiteBroker).
+    """
+
+    def __init__(self, path, timeout=1.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS state_versions (user_id INTEGER PRIMARY KEY, version TEXT NOT NULL)"
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, user_id):
+        conn = self._conn()
+        # Okuma yazma kilidi almaz; yalnızca kaydı olmayan kullanıcının ilk okumasında yazılır
+        row = conn.execute("SELECT version FROM state_versions WHERE user_id = ?", (user_id,)).fetchone()
+        if row is not None:
+            return row[0]
+        # Eşzamanlı ilk okumalar aynı değeri görür
+        conn.execute(
+            "INSERT OR IGNORE INTO state_versions (user_id, version) VALUES (?, ?)",
+            (user_id, secrets.token_hex(8))
+        )
+        return conn.execute("SELECT version FROM state_versions WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+    def bump(self, user_id):
+        self._conn().execute(
+            "INSERT INTO state_versions (user_id, version) VALUES (?, ?) "
+            "ON CONFLICT (user_id) DO UPDATE SET version = excluded.version",
+            (user_id, secrets.token_hex(8))
+        )
+
+
+class MemoryVersionStore:
+    """Tek process (memory://); diğer worker'lar değişikliği görmez"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            return self._versions.setdefault(user_id, secrets.token_hex(8))
+
+    def bump(self, user_id):
+        with self._lock:
+            self._versions[user_id] = secrets.token_hex(8)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                uri = urlparse(Config.STATE_VERSION_URI)
+                if uri.scheme == 'memory':
+                    _store = MemoryVersionStore()
+                elif uri.scheme == 'sqlite':
+                    _store = SQLiteVersionStore(uri.path[1:] or 'state.sqlite3')
+                else:
+                    raise ValueError(f"Unsupported STATE_VERSION_URI: {Config.STATE_VERSION_URI}")
+    return _store
+
+
+def bump_state_version(user_id):
+    """
+    Kullanıcının durum versiyonunu değiştir
+
+    Bakiye veya oyun geçmişi değiştiğinde, transaction commit edildikten sonra
+    çağrılır; kullanıcının tüm oturumlarındaki önceki ETag'ler geçersiz olur.
+    """
+    try:
+        _get_store().bump(user_id)
+    except sqlite3.Error as e:
+        etag_logger.error(f"State version bump failed: user={user_id}, {e}")
+
+
+def get_state_version(user_id):
+    """Kullanıcının durum versiyonu; okunamazsa None (ETag üretilmez)"""
+    try:
+        return _get_store().get(user_id)
+    except sqlite3.Error as e:
+        etag_logger.error(f"State version read failed: user={user_id}, {e}")
+        return None
+
+
+def _etag():
+    version = get_state_version(session['user_id'])
+    if version is None:
+        return None
+    # Gün de dahil: /me/stats gibi zaman penceresi olan okumalar yazma olmadan da değişir
+    digest = hashlib.sha1()
+    digest.update(version.encode())
+    digest.update(request.full_path.encode())
+    digest.update(time.strftime('%Y-%m-%d', time.gmtime()).encode())
+    return digest.hexdigest()[:20]
+
+
+def conditional_get(f):
+    """
+    GET view'ına ETag ekle, eşleşen If-None-Match'e 304 dön
+
+    View sadece ETag eşleşmediğinde çalışır (ve veritabanına gider).
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        etag = _etag()
+        if etag is None:
+            # Versiyon okunamadı: 304 riske edilmez, view her zaman çalışır
+            return f(*args, **kwargs)
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        # Tarayıcı her seferinde doğrulasın; ara proxy'ler saklamasın
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    return decorated_function
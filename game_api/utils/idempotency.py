@@ -0,0 +1,325 @@
+"""
+Idempotency-Key desteği - Tekrarlanan bahis ve wallet isteklerine kayıtlı cevabı döndürür
+
+İstemci isteği `Idempotency-Key` header'ı ile gönderir. Anahtar kullanıcıya
+özeldir ve Config.IDEMPOTENCY_TTL saniye boyunca saklanır:
+
+  1. İlk istek anahtarı rezerve eder (idempotency_keys satırı), view çalışır
+     ve oluşan cevap aynı satıra yazılır.
+  2. Aynı anahtarla gelen tekrar istek view'ı (ve wallet'ı) hiç çalıştırmadan
+     kayıtlı cevabı alır. Sık tekrarlanan anahtarlar process içi LRU
+     cache'ten, veritabanına gitmeden cevaplanır.
+  3. İlk istek hâlâ işlenirken gelen tekrar 409 alır. Farklı bir body ile
+     tekrar kullanılan anahtar 422 alır.
+
+SQL'ler, LRU cache ve karar fonksiyonları (check_key, check_entry,
+should_store) async sunucuyla ortaktır; aio/idempotency.py aynı tabloyu
+aiomysql ile kullanır.
+
+Kullanım:
+    @coinflip_bp.route('/game/coinflip/play', methods=['POST'])
+    @get_limiter().limit("60 per minute", exempt_when=is_idempotent_replay)
+    @login_required
+    @csrf_required
+    @idempotent
+    def play_coinflip(): ...
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, jsonify, request, session, Response
+from mysql.connector import Error
+from ..config import Config
+from ..database import get_db_connection
+from .logger import get_logger
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAY_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 128
+
+# Bu durum kodları geçici kabul edilir ve saklanmaz; istemci aynı anahtarla tekrar deneyebilir
+TRANSIENT_STATUSES = {409, 429}
+
+idempotency_logger = get_logger('game_api.idempotency')
+
+_cache = OrderedDict()  # (user_id, key) -> (expires_at, fingerprint, status, body, mimetype)
+_cache_lock = threading.Lock()
+
+SQL_LOOKUP = """
+    SELECT request_hash, status_code, response_body, mimetype,
+           UNIX_TIMESTAMP(expires_at) AS expires_at
+    FROM idempotency_keys
+    WHERE user_id = %s AND idem_key = %s AND expires_at > NOW()
+"""
+# Bu kullanıcının süresi dolmuş anahtarlarını temizle (aynı anahtar dahil)
+SQL_PURGE_EXPIRED = "DELETE FROM idempotency_keys WHERE user_id = %s AND expires_at <= NOW()"
+SQL_RESERVE = """
+    INSERT INTO idempotency_keys (user_id, idem_key, request_hash, expires_at)
+    VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+"""
+SQL_RELEASE = "DELETE FROM idempotency_keys WHERE user_id = %s AND idem_key = %s"
+SQL_STORE = """
+    UPDATE idempotency_keys
+    SET status_code = %s, response_body = %s, mimetype = %s
+    WHERE user_id = %s AND idem_key = %s
+"""
+ERRNO_DUPLICATE = 1062
+
+
+def request_key(headers, session):
+    """(user_id, key) veya anahtar yoksa None"""
+    key = headers.get(IDEMPOTENCY_HEADER)
+    user_id = session.get('user_id')
+    if not key or not user_id:
+        return None
+    return user_id, key
+
+
+def fingerprint(method, path, body):
+    """Aynı anahtarın farklı bir istek için kullanılmasını yakalamak için istek özeti"""
+    digest = hashlib.sha256()
+    digest.update(method.encode())
+    digest.update(path.encode())
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def check_key(key):
+    """Anahtar geçersizse (body, status_code), değilse None"""
+    if len(key) > MAX_KEY_LENGTH:
+        return {
+            'message': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters.',
+            'error': 'idempotency_key_invalid'
+        }, 400
+    return None
+
+
+def check_entry(entry, request_fingerprint):
+    """
+    Kayıtlı anahtar için karar
+
+    Returns:
+        (body, status_code) hata cevabı veya None (kayıtlı cevap tekrar oynatılır)
+    """
+    if entry is None or entry == 'PENDING':
+        return {
+            'message': 'A request with this Idempotency-Key is still being processed.',
+            'error': 'idempotency_key_in_progress'
+        }, 409
+
+    if entry[1] != request_fingerprint:
+        return {
+            'message': f'{IDEMPOTENCY_HEADER} was already used for a different request.',
+            'error': 'idempotency_key_reused'
+        }, 422
+
+    return None
+
+
+def should_store(status_code):
+    """Cevap saklanır mı? Geçici hatalarda rezervasyon kaldırılır, istemci tekrar dener"""
+    return status_code < 500 and status_code not in TRANSIENT_STATUSES
+
+
+def entry_from_row(cache_key, row):
+    """
+    SQL_LOOKUP satırını cache entry'sine çevir
+
+    Returns:
+        None (yok/süresi dolmuş), 'PENDING' (işleniyor) veya cache entry tuple'ı
+    """
+    if not row:
+        return None
+    if row['status_code'] is None:
+        return 'PENDING'
+
+    entry = (float(row['expires_at']), row['request_hash'], row['status_code'],
+             row['response_body'], row['mimetype'])
+    cache_put(cache_key, entry)
+    return entry
+
+
+def stored(cache_key, request_fingerprint, status_code, body, mimetype):
+    """Saklanan cevabı LRU'ya da yaz"""
+    cache_put(cache_key, (time.time() + Config.IDEMPOTENCY_TTL, request_fingerprint, status_code, body, mimetype))
+
+
+def _request_key():
+    return request_key(request.headers, session)
+
+
+def _fingerprint():
+    return fingerprint(request.method, request.path, request.get_data())
+
+
+def cache_get(cache_key):
+    with _cache_lock:
+        entry = _cache.get(cache_key)
+        if entry is None:
+            return None
+        if entry[0] < time.time():
+            del _cache[cache_key]
+            return None
+        _cache.move_to_end(cache_key)
+        return entry
+
+
+def cache_put(cache_key, entry):
+    with _cache_lock:
+        _cache[cache_key] = entry
+        _cache.move_to_end(cache_key)
+        while len(_cache) > Config.IDEMPOTENCY_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _load(user_id, key):
+    """
+    Kayıtlı anahtarı getir
+
+    Returns:
+        None (yok/süresi dolmuş), 'PENDING' (işleniyor) veya cache entry tuple'ı
+    """
+    conn = get_db_connection(shard_key=user_id)
+    if conn is None:
+        return None
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(SQL_LOOKUP, (user_id, key))
+        row = cursor.fetchone()
+    except Error as e:
+        idempotency_logger.error(f"Idempotency lookup error: {e}")
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+    return entry_from_row((user_id, key), row)
+
+
+def _lookup(cache_key):
+    """Önce LRU, sonra veritabanı"""
+    return cache_get(cache_key) or _load(*cache_key)
+
+
+def _reserve(user_id, key, fingerprint):
+    """
+    Anahtarı bu istek için rezerve et
+
+    Returns:
+        True: rezerve edildi, False: başka bir istek zaten rezerve etmiş,
+        None: veritabanı hatası (istek idempotency olmadan işlenir)
+    """
+    conn = get_db_connection(shard_key=user_id)
+    if conn is None:
+        return None
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(SQL_PURGE_EXPIRED, (user_id,))
+        cursor.execute(SQL_RESERVE, (user_id, key, fingerprint, Config.IDEMPOTENCY_TTL))
+        conn.commit()
+        return True
+    except Error as e:
+        conn.rollback()
+        if e.errno == ERRNO_DUPLICATE:
+            return False
+        idempotency_logger.error(f"Idempotency reserve error: {e}")
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _complete(user_id, key, fingerprint, response):
+    """Cevabı kaydet; geçici hatalarda rezervasyonu kaldır"""
+    conn = get_db_connection(shard_key=user_id)
+    if conn is None:
+        return
+
+    cursor = conn.cursor()
+    try:
+        if not should_store(response.status_code):
+            cursor.execute(SQL_RELEASE, (user_id, key))
+        else:
+            body = response.get_data(as_text=True)
+            cursor.execute(SQL_STORE, (response.status_code, body, response.mimetype, user_id, key))
+            stored((user_id, key), fingerprint, response.status_code, body, response.mimetype)
+        conn.commit()
+    except Error as e:
+        conn.rollback()
+        idempotency_logger.error(f"Idempotency store error: {e}")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _replay(entry):
+    _, _, status, body, mimetype = entry
+    response = Response(body, status=status, mimetype=mimetype)
+    response.headers[REPLAY_HEADER] = 'true'
+    return response
+
+
+def is_idempotent_replay():
+    """
+    Limiter `exempt_when` callback'i: kayıtlı cevabı olan tekrar istekler
+    rate limit'e sayılmaz. Arama sonucu g'de saklanır, view tekrar aramaz.
+    """
+    cache_key = _request_key()
+    if cache_key is None or check_key(cache_key[1]):
+        return False
+
+    entry = _lookup(cache_key)
+    g.idempotency_lookup = (cache_key, entry)
+    return isinstance(entry, tuple) and entry[1] == _fingerprint()
+
+
+def idempotent(f):
+    """
+    View'ı Idempotency-Key header'ına göre idempotent yap
+
+    Header yoksa view normal çalışır.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        cache_key = _request_key()
+        if cache_key is None:
+            return f(*args, **kwargs)
+
+        user_id, key = cache_key
+        error = check_key(key)
+        if error:
+            body, status_code = error
+            return jsonify(body), status_code
+
+        request_fingerprint = _fingerprint()
+
+        lookup = g.pop('idempotency_lookup', None)
+        entry = lookup[1] if lookup and lookup[0] == cache_key else _lookup(cache_key)
+        if entry is None:
+            reserved = _reserve(user_id, key, request_fingerprint)
+            if reserved is None:
+                return f(*args, **kwargs)
+            if reserved:
+                try:
+                    response = current_app.make_response(f(*args, **kwargs))
+                except Exception:
+                    _complete(user_id, key, request_fingerprint, Response(status=500))
+                    raise
+                _complete(user_id, key, request_fingerprint, response)
+                return response
+            # Aynı anda gelen başka bir istek rezerve etti
+            entry = _lookup(cache_key)
+
+        error = check_entry(entry, request_fingerprint)
+        if error:
+            body, status_code = error
+            return jsonify(body), status_code
+
+        return _replay(entry)
+
+    return decorated_function
+
@@ -0,0 +1,96 @@
+"""
+JSON provider - HTTP cevapları ve veritabanı JSON kolonları için tek encoder
+
+MySQL DECIMAL kolonları Decimal, DATETIME kolonları datetime olarak gelir.
+Bu modül ikisini de doğrudan serialize eder: Decimal -> sayı,
+datetime/date -> ISO 8601. Satırları jsonify'dan önce float'a çevirmeye
+gerek kalmaz.
+
+Backend Config.JSON_BACKEND ile seçilir:
+    orjson  - C implementasyonu, bytes üretir (kuruluysa varsayılan)
+    stdlib  - Python json modülü, orjson yoksa kullanılır
+
+Kullanım:
+    app.json = OddJSONProvider(app)        # jsonify -> dumps_bytes
+    dumps(game_state)                      # games.game_result / game_state kolonları
+    loads(row['game_result'])
+"""
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, time
+from flask.json.provider import JSONProvider
+from ..config import Config
+
+try:
+    import orjson
+except ImportError:  # stdlib backend'e düş
+    orjson = None
+
+
+def _default(obj):
+    """Backend'in kendi başına serialize edemediği tipler"""
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (date, time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None and Config.JSON_BACKEND == 'orjson':
+    BACKEND = 'orjson'
+    # int anahtarlı dict'ler (rule_set_id -> ...) stdlib'deki gibi string'e çevrilir
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj):
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    def dumps(obj):
+        # JSON kolonları str ister; MySQL binary charset'li JSON değerini reddeder
+        return orjson.dumps(obj, default=_default, option=_OPTIONS).decode()
+
+    loads = orjson.loads
+else:
+    BACKEND = 'stdlib'
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(',', ':'))
+
+    def dumps_bytes(obj):
+        return _encoder.encode(obj).encode()
+
+    def dumps(obj):
+        return _encoder.encode(obj)
+
+    loads = json.loads
+
+
+class OddJSONProvider(JSONProvider):
+    """
+    Flask JSON provider - jsonify, request.get_json ve tojson bunu kullanır
+
+    Cevap gövdesi doğrudan bytes olarak üretilir; anahtarlar sıralanmaz ve
+    çıktı her zaman kompakttır.
+    """
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # tojson / Flasgger gibi özel argüman isteyenler için stdlib
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,141 @@
+"""
+Password hashing - Yavaş hash işlemleri request thread'i yerine process pool'da çalışır
+
+    hashed = hash_password(password)
+    if verify_password(user['password_hash'], password):
+        new_hash = rehash_if_needed(user['password_hash'], password)
+        if new_hash:
+            ...  # Config.PASSWORD_HASH_METHOD değişti, yeni hash'i kaydet
+
+Pool'da Config.PASSWORD_HASH_MAX_PENDING'den fazla iş beklerken gelen istekler
+sıraya girmez, PasswordHasherBusy fırlatılır (uygulama 503 döner).
+Config.PASSWORD_HASH_WORKERS = 0 ise hash'ler çağıran thread'de hesaplanır.
+
+Pool işçileri fork ile değil forkserver (yoksa spawn) ile başlatılır: çok
+thread'li bir worker'da fork, başka bir thread'in tuttuğu kilitleri kopyalar
+ve child kilitlenebilir. Forkserver yalnızca werkzeug.security'yi yükler.
+
+Parametre seçimi için: python calibrate_hash.py --target-ms 100
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from ..config import Config
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+_stats = {'hashed': 0, 'verified': 0, 'rehashed': 0, 'rejected': 0}
+
+# Parametresiz yazılan method'ların werkzeug varsayılanları ('scrypt' == 'scrypt:32768:8:1')
+_METHOD_DEFAULTS = {
+    'scrypt': ('32768', '8', '1'),
+    'pbkdf2': ('sha256', str(DEFAULT_PBKDF2_ITERATIONS)),
+}
+
+
+class PasswordHasherBusy(Exception):
+    """Hash kuyruğu dolu, uygulama 503 döner"""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+def _mp_context():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        # Varsayılan preload __main__'dir (run.py -> create_app); forkserver uygulamayı yüklemesin
+        context.set_forkserver_preload(['werkzeug.security'])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def _get_pool():
+    """Process pool'u ilk kullanımda (ve fork sonrası yeniden) oluştur"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = ProcessPoolExecutor(max_workers=Config.PASSWORD_HASH_WORKERS, mp_context=_mp_context())
+                _pool_pid = pid
+    return _pool
+
+
+def _run(fn, *args):
+    global _pending
+    if Config.PASSWORD_HASH_WORKERS <= 0:
+        return fn(*args)
+
+    with _pending_lock:
+        if _pending >= Config.PASSWORD_HASH_MAX_PENDING:
+            _stats['rejected'] += 1
+            raise PasswordHasherBusy()
+        _pending += 1
+    try:
+        return _get_pool().submit(fn, *args).result()
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+
+def _count(key):
+    with _pending_lock:
+        _stats[key] += 1
+
+
+def hash_password(password: str) -> str:
+    """Config.PASSWORD_HASH_METHOD ile hash üret"""
+    _count('hashed')
+    return _run(generate_password_hash, password, Config.PASSWORD_HASH_METHOD)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    _count('verified')
+    return _run(check_password_hash, password_hash, password)
+
+
+def _normalize_method(method: str) -> tuple:
+    """
+    'scrypt' -> ('scrypt', ('32768', '8', '1')), 'pbkdf2:sha256' -> ('pbkdf2', ('sha256', '1000000'))
+
+    Eksik parametreler werkzeug varsayılanlarıyla tamamlanır, sayılar sadeleştirilir.
+    """
+    name, *params = method.split(':')
+    defaults = _METHOD_DEFAULTS.get(name, ())
+    params = params + list(defaults[len(params):])
+    return name, tuple(str(int(param)) if param.isdigit() else param for param in params)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """Hash güncel parametrelerle mi üretilmiş? ('scrypt:32768:8:1$salt$hash')"""
+    return _normalize_method(password_hash.split('$', 1)[0]) != _normalize_method(Config.PASSWORD_HASH_METHOD)
+
+
+def rehash_if_needed(password_hash: str, password: str):
+    """
+    Doğrulanmış şifre eski parametrelerle hash'lenmişse yeni hash'i döndür
+
+    Returns:
+        str: Kaydedilecek yeni hash, güncelse None
+    """
+    if not needs_rehash(password_hash):
+        return None
+    _count('rehashed')
+    return hash_password(password)
+
+
+def get_hasher_stats() -> dict:
+    """Metrics için sayaçlar"""
+    with _pending_lock:
+        return {
+            **_stats,
+            'pending': _pending,
+            'workers': Config.PASSWORD_HASH_WORKERS,
+            'method': Config.PASSWORD_HASH_METHOD
+        }
@@ -0,0 +1,131 @@
+"""
+Prepared statement registry - Sık çalışan SQL'ler fiziksel bağlantı başına bir kez prepare edilir
+
+Kullanım:
+    WALLET_BALANCE = prepared("SELECT balance FROM wallets WHERE wallet_id = %s")
+
+    cursor = StatementCursor(conn)
+    cursor.execute(WALLET_BALANCE, (wallet_id,))   # binary protocol, prepare sadece ilk seferde
+    cursor.execute("SELECT ...")                  # kayıtlı olmayan SQL: normal cursor
+
+Prepared statement'lar bağlantı kapanana kadar yaşar; istekler arası tekrar
+kullanım için bağlantıların pool'dan gelmesi ve oturumun sıfırlanmaması
+(DB_POOL_RESET_SESSION=false, varsayılan) gerekir.
+"""
+import threading
+import weakref
+from ..config import Config
+
+# SQL metni -> kayıtlı string nesnesi. MySQLCursorPrepared aynı nesne
+# (`is`) geldiğinde tekrar prepare etmez, bu yüzden hep kanonik nesne kullanılır.
+_registered = {}
+
+# Fiziksel bağlantı -> {'connection_id': int, 'cursors': {sql: prepared cursor}}
+_registries = weakref.WeakKeyDictionary()
+
+_stats = {'prepares': 0, 'reuses': 0, 'plain': 0}
+_stats_lock = threading.Lock()
+
+
+def prepared(sql):
+    """SQL'i prepared statement olarak kaydet ve kanonik string'i döndür"""
+    return _registered.setdefault(sql, sql)
+
+
+def _physical(conn):
+    # PooledMySQLConnection her checkout'ta yeni wrapper döner; registry asıl bağlantıya bağlanır
+    return getattr(conn, '_cnx', None) or conn
+
+
+def _prepared_cursor(conn, sql):
+    cnx = _physical(conn)
+    registry = _registries.get(cnx)
+    if registry is None or registry['connection_id'] != cnx.connection_id:
+        # Yeni bağlantı ya da reconnect: sunucudaki eski statement'lar gitti
+        registry = {'connection_id': cnx.connection_id, 'cursors': {}}
+        _registries[cnx] = registry
+
+    cursor = registry['cursors'].get(sql)
+    if cursor is None:
+        cursor = cnx.cursor(prepared=True, dictionary=True)
+        registry['cursors'][sql] = cursor
+        _count('prepares')
+    else:
+        _count('reuses')
+    return cursor
+
+
+def forget(conn):
+    """Oturumu sıfırlanmış bağlantının registry'sini bırak (connection_id değişmez)"""
+    _registries.pop(_physical(conn), None)
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def get_statement_stats():
+    """Prepare / tekrar kullanım sayaçlarının kopyası"""
+    with _stats_lock:
+        return dict(_stats)
+
+
+class StatementCursor:
+    """
+    Dictionary cursor gibi davranır; prepared() ile kaydedilmiş SQL'leri
+    bağlantının prepared statement'ı üzerinden çalıştırır
+
+    Prepared sonuçlar hemen okunur (buffer), böylece aynı bağlantıda
+    sonraki komutlar "unread result" hatası vermez.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._plain = conn.cursor(dictionary=True)
+        self._active = self._plain
+        self._rows = []
+        self._rowcount = -1
+        self._lastrowid = None
+
+    def execute(self, sql, params=()):
+        canonical = _registered.get(sql) if Config.DB_PREPARED_STATEMENTS else None
+        if canonical is None:
+            _count('plain')
+            self._active = self._plain
+            self._plain.execute(sql, params)
+            return
+
+        cursor = _prepared_cursor(self._conn, canonical)
+        cursor.execute(canonical, tuple(params))
+        self._active = None
+        self._rows = cursor.fetchall() if cursor.description else []
+        self._rowcount = cursor.rowcount
+        self._lastrowid = cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._active.rowcount if self._active is not None else self._rowcount
+
+    @property
+    def lastrowid(self):
+        return self._active.lastrowid if self._active is not None else self._lastrowid
+
+    def fetchone(self):
+        if self._active is not None:
+            return self._active.fetchone()
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        if self._active is not None:
+            return self._active.fetchall()
+        rows, self._rows = self._rows, []
+        return rows
+
+    def __getattr__(self, name):
+        # Diğer özellikler (description, ...) aktif cursor'dan
+        return getattr(self._active if self._active is not None else self._plain, name)
+
+    def close(self):
+        # Prepared cursor'lar bağlantıyla birlikte yaşar, sadece normal cursor kapanır
+        self._plain.close()
@@ -0,0 +1,101 @@
+"""
+Streaming JSON - büyük liste cevaplarını cursor'dan parça parça üret
+
+Liste endpoint'leri tüm satırları fetchall() ile belleğe alıp tek bir JSON
+string'i üretmek yerine satırları Config.STREAM_BATCH_SIZE'lık parçalar
+halinde okur ve her parçayı hemen yazar. Çıktı jsonify ile aynıdır.
+
+Kullanım:
+    cursor.execute(sql, params)
+    return stream_json_array(CursorBatches(cursor, conn))   # cursor ve bağlantı cevap kapanınca bırakılır
+
+Header'lar ilk parçadan önce gönderildiği için stream ortasındaki bir
+veritabanı hatası 500 dönemez; hata loglanır ve cevap yarım kalır.
+"""
+from flask import current_app, stream_with_context
+from ..config import Config
+from .json_provider import dumps_bytes
+from .logger import error_logger
+
+
+class CursorBatches:
+    """
+    Cursor'daki satırları fetchmany() ile liste parçaları halinde döndür
+
+    transform verilirse her parça yazılmadan önce ondan geçer (örn. shard
+    satırlarını directory'deki email / rule set isimleriyle zenginleştirmek).
+    close() satırlar bitmeden de çağrılabilir (client bağlantıyı kopardı);
+    cursor ve bağlantı her durumda bir kez bırakılır.
+    """
+
+    def __init__(self, cursor, conn, transform=None, size=None):
+        self._cursor = cursor
+        self._conn = conn
+        self._transform = transform
+        self._size = size or Config.STREAM_BATCH_SIZE
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._conn is None:
+            raise StopIteration
+        rows = self._cursor.fetchmany(self._size)
+        if not rows:
+            self.close()
+            raise StopIteration
+        return self._transform(rows) if self._transform else rows
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            if conn.unread_result:
+                conn.consume_results()  # okunmamış satırlar kalmışsa cursor kapanamaz
+            self._cursor.close()
+        finally:
+            conn.close()
+
+
+def batched(rows, size=None):
+    """Bellekteki satırları (örn. shard'lardan birleştirilmiş) parçalara böl"""
+    size = size or Config.STREAM_BATCH_SIZE
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _encode_array(batches):
+    yield b'['
+    separator = b''
+    try:
+        for batch in batches:
+            if batch:
+                # Parça başına tek dumps çağrısı: "[a,b,c]" -> "a,b,c"
+                yield separator + dumps_bytes(batch)[1:-1]
+                separator = b','
+    except Exception as e:
+        error_logger.error(f"JSON stream aborted: {e}")
+        raise
+    yield b']\n'
+
+
+def stream_json_array(batches):
+    """
+    Satır parçalarından (list'lerden oluşan iterable) JSON array cevabı üret
+
+    Parçalar request context'i içinde üretilir (session, g ve replica
+    yönlendirmesi kullanılabilir). batches'in close()'u varsa cevap
+    kapanırken çağrılır.
+    """
+    response = current_app.response_class(stream_with_context(_encode_array(batches)), mimetype='application/json')
+    close = getattr(batches, 'close', None)
+    if close:
+        response.call_on_close(close)
+    return response
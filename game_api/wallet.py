@@ -1,7 +1,11 @@
 from flask import jsonify, request, Blueprint, session
-from .database import get_db_connection
+from .database import get_db_connection, replica_read
+from .sharding import is_sharded
 from .auth import login_required
+from .services.wallet_service import WalletService
 from .utils.csrf import csrf_required
+from .utils.idempotency import idempotent, is_idempotent_replay
+from .utils.etag import conditional_get
 from mysql.connector import Error
 
 wallet_bp = Blueprint('wallet', __name__)
@@ -11,8 +15,69 @@ def get_limiter():
     from . import limiter
     return limiter
 
+# users tablosu shard'da değil - email session'dan alınır
+SQL_WALLET_INFO = """
+    SELECT w.balance, w.currency, w.updated_at
+    FROM wallets w
+    WHERE w.user_id = %s
+"""
+
+
+# Shared by the threaded (Flask) and async (game_api.aio) endpoints
+def wallet_or_new(wallet_info):
+    """With sharding the wallet is created on first use; until then show an empty one"""
+    if wallet_info is None and is_sharded():
+        return {'balance': 0, 'currency': 'VRT', 'updated_at': None}
+    return wallet_info
+
+
+def parse_amount(data, missing_message):
+    """Returns (error message, None) or (None, amount)"""
+    if not data or 'amount' not in data:
+        return missing_message, None
+
+    try:
+        amount = float(data['amount'])
+    except ValueError:
+        return 'Amount must be a valid number!', None
+
+    if amount <= 0:
+        return 'Amount must be greater than zero!', None
+
+    return None, amount
+
+
+def deposit_error(result):
+    """(body, status) for a failed WalletService.deposit result"""
+    error = result.get('error')
+    if error == 'db_unavailable':
+        return {'message': 'Database server error!'}, 500
+    if error == 'wallet_not_found':
+        return {'message': 'User wallet not found!'}, 404
+    return {'message': 'An error occurred during deposit.'}, 500
+
+
+def withdraw_error(result, amount):
+    """(body, status) for a failed WalletService.withdraw result"""
+    error = result.get('error')
+    if error == 'db_unavailable':
+        return {'message': 'Database server error!'}, 500
+    if error == 'wallet_not_found':
+        return {'message': 'Wallet not found!'}, 404
+    if error == 'insufficient_balance':
+        return {
+            'message': 'Insufficient balance!',
+            'current_balance': result['current_balance'],
+            'withdraw_amount': amount
+        }, 400
+    if error == 'wallet_conflict':
+        return {'message': 'Wallet is busy, please try again.'}, 409
+    return {'message': 'An error occurred during withdrawal.'}, 500
+
 @wallet_bp.route('/wallets/me', methods=['GET'])
 @login_required
+@conditional_get
+@replica_read
 def get_my_wallet():
     """
     Get current user's wallet information
@@ -46,6 +111,8 @@ def get_my_wallet():
                 updated_at:
                   type: string
                   format: date-time
+      304:
+        description: Not modified - If-None-Match matches the current ETag (no database query)
       401:
         description: Not authenticated
       404:
@@ -56,25 +123,19 @@ def get_my_wallet():
     conn = None
     cursor = None
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(shard_key=user_id)
         if conn is None:
             return jsonify({'message': 'Database server error!'}), 500
 
         cursor = conn.cursor(dictionary=True)
 
-        sql = """
-            SELECT u.email, w.balance, w.currency, w.updated_at
-            FROM wallets w
-            JOIN users u ON w.user_id = u.user_id
-            WHERE w.user_id = %s
-        """
-        cursor.execute(sql, (user_id,))
-        wallet_info = cursor.fetchone()
+        cursor.execute(SQL_WALLET_INFO, (user_id,))
+        wallet_info = wallet_or_new(cursor.fetchone())
 
         if not wallet_info:
             return jsonify({'message': 'Wallet not found!'}), 404
 
-        wallet_info['balance'] = float(wallet_info['balance'])
+        wallet_info = {'email': session.get('email'), **wallet_info}
 
         return jsonify({'wallet': wallet_info}), 200
 
@@ -86,9 +147,10 @@ def get_my_wallet():
         if conn: conn.close()
 
 @wallet_bp.route('/wallets/me/deposit', methods=['POST'])
-@get_limiter().limit("20 per hour")  # 20 deposits per hour
+@get_limiter().limit("20 per hour", exempt_when=is_idempotent_replay)  # 20 deposits per hour
 @login_required
 @csrf_required
+@idempotent
 def deposit_to_wallet():
     """
     Deposit virtual currency to wallet
@@ -111,6 +173,15 @@ def deposit_to_wallet():
         type: string
         required: true
         description: CSRF token
+      - in: header
+        name: Idempotency-Key
+        type: string
+        required: false
+        maxLength: 128
+        description: |
+          Client-generated unique key. Retrying with the same key returns the
+          stored response (header Idempotent-Replayed: true) without charging
+          the wallet again or counting against the rate limit.
       - in: body
         name: body
         required: true
@@ -150,77 +221,35 @@ def deposit_to_wallet():
         description: Invalid CSRF token
       404:
         description: Wallet not found
+      409:
+        description: A request with the same Idempotency-Key is still in progress, retry the request
+      422:
+        description: Idempotency-Key was already used for a different request
     """
     user_id = session.get('user_id')
     user_email = session.get('email')
 
-    data = request.get_json()
-    if not data or 'amount' not in data:
-        return jsonify({'message': 'Amount is required!'}), 400
-
-    try:
-        amount = float(data['amount'])
-    except ValueError:
-        return jsonify({'message': 'Amount must be a valid number!'}), 400
-
-    if amount <= 0:
-        return jsonify({'message': 'Amount must be greater than zero!'}), 400
-
-    conn = None
-    cursor = None
-
-    try:
-        conn = get_db_connection()
-        if conn is None:
-            return jsonify({'message': 'Database server error!'}), 500
-
-        conn.start_transaction()
-
-        cursor = conn.cursor(dictionary=True)
-
-        # SECURITY: Prevent race condition with Row lock
-        sql_get_wallet = "SELECT wallet_id, balance FROM wallets WHERE user_id = %s FOR UPDATE"
-        cursor.execute(sql_get_wallet, (user_id,))
-        wallet = cursor.fetchone()
-
-        if not wallet:
-            conn.rollback()
-            return jsonify({'message': 'User wallet not found!'}), 404
-
-        wallet_id = wallet['wallet_id']
-
-        # Update balance
-        sql_update_wallet = "UPDATE wallets SET balance = balance + %s WHERE wallet_id = %s"
-        cursor.execute(sql_update_wallet, (amount, wallet_id))
-
-        # Calculate new balance
-        new_balance = float(wallet['balance']) + amount
+    error, amount = parse_amount(request.get_json(), 'Amount is required!')
+    if error:
+        return jsonify({'message': error}), 400
 
-        # Transaction log
-        sql_log_tx = "INSERT INTO transactions (user_id, wallet_id, amount, tx_type) VALUES (%s, %s, %s, 'DEPOSIT')"
-        cursor.execute(sql_log_tx, (user_id, wallet_id, amount))
+    result = WalletService.deposit(user_id, amount)
 
-        conn.commit()
+    if not result['success']:
+        body, status = deposit_error(result)
+        return jsonify(body), status
 
-        return jsonify({
-            'message': f'Success! {amount} VIRTUAL added to your wallet.',
-            'user': user_email,
-            'new_balance': float(new_balance)
-        }), 200
-
-    except Error as e:
-        if conn:
-            conn.rollback()
-        print(f"Deposit error: {e}")
-        return jsonify({'message': 'An error occurred during deposit.'}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
+    return jsonify({
+        'message': f'Success! {amount} VIRTUAL added to your wallet.',
+        'user': user_email,
+        'new_balance': result['new_balance']
+    }), 200
 
 @wallet_bp.route('/wallets/me/withdraw', methods=['POST'])
-@get_limiter().limit("10 per hour")  # 10 withdrawals per hour
+@get_limiter().limit("10 per hour", exempt_when=is_idempotent_replay)  # 10 withdrawals per hour
 @login_required
 @csrf_required
+@idempotent
 def withdraw_from_wallet():
     """
     Withdraw virtual currency from wallet
@@ -243,6 +272,15 @@ def withdraw_from_wallet():
         type: string
         required: true
         description: CSRF token
+      - in: header
+        name: Idempotency-Key
+        type: string
+        required: false
+        maxLength: 128
+        description: |
+          Client-generated unique key. Retrying with the same key returns the
+          stored response (header Idempotent-Replayed: true) without charging
+          the wallet again or counting against the rate limit.
       - in: body
         name: body
         required: true
@@ -294,80 +332,26 @@ def withdraw_from_wallet():
         description: Invalid CSRF token
       404:
         description: Wallet not found
+      409:
+        description: Wallet busy (concurrent update) or a request with the same Idempotency-Key is still in progress, retry the request
+      422:
+        description: Idempotency-Key was already used for a different request
     """
     user_id = session.get('user_id')
     user_email = session.get('email')
 
-    data = request.get_json()
-    if not data or 'amount' not in data:
-        return jsonify({'message': 'Withdrawal amount is required!'}), 400
-
-    try:
-        amount = float(data['amount'])
-    except ValueError:
-        return jsonify({'message': 'Amount must be a valid number!'}), 400
+    error, amount = parse_amount(request.get_json(), 'Withdrawal amount is required!')
+    if error:
+        return jsonify({'message': error}), 400
 
-    if amount <= 0:
-        return jsonify({'message': 'Amount must be greater than zero!'}), 400
+    result = WalletService.withdraw(user_id, amount)
 
-    conn = None
-    cursor = None
+    if not result['success']:
+        body, status = withdraw_error(result, amount)
+        return jsonify(body), status
 
-    try:
-        conn = get_db_connection()
-        if conn is None:
-            return jsonify({'message': 'Database server error!'}), 500
-
-        conn.start_transaction()
-        cursor = conn.cursor(dictionary=True)
-
-        sql_get_balance = "SELECT balance FROM wallets WHERE user_id = %s FOR UPDATE"
-        cursor.execute(sql_get_balance, (user_id,))
-        result = cursor.fetchone()
-
-        if not result:
-            conn.rollback()
-            return jsonify({'message': 'Wallet not found!'}), 404
-
-        balance = float(result['balance'])
-
-        if balance < amount:
-            conn.rollback()
-            return jsonify({
-                'message': 'Insufficient balance!',
-                'current_balance': balance,
-                'withdraw_amount': amount
-            }), 400
-
-        # Get wallet_id (already got it with SELECT FOR UPDATE)
-        cursor.execute("SELECT wallet_id FROM wallets WHERE user_id = %s", (user_id,))
-        wallet = cursor.fetchone()
-        wallet_id = wallet['wallet_id']
-
-        # Update balance
-        sql_update_wallet = "UPDATE wallets SET balance = balance - %s WHERE wallet_id = %s"
-        cursor.execute(sql_update_wallet, (amount, wallet_id))
-
-        # Calculate new balance
-        new_balance = balance - amount
-
-        # Transaction log
-        sql_log_tx = "INSERT INTO transactions (user_id, wallet_id, amount, tx_type) VALUES (%s, %s, %s, 'WITHDRAW')"
-        cursor.execute(sql_log_tx, (user_id, wallet_id, amount))
-
-        conn.commit()
-
-        return jsonify({
-            'message': f'Success! {amount} VIRTUAL withdrawn from your wallet.',
-            'user': user_email,
-            'new_balance': float(new_balance)
-        }), 200
-
-    except Error as e:
-        if conn:
-            conn.rollback()
-        print(f"Withdrawal error: {e}")
-        return jsonify({'message': 'An error occurred during withdrawal.'}), 500
-    finally:
-        if cursor: cursor.close()
-        if conn: conn.close()
\ No newline at end of file
+    return jsonify({
+        'message': f'Success! {amount} VIRTUAL withdrawn from your wallet.',
+        'user': user_email,
+        'new_balance': result['new_balance']
+    }), 200
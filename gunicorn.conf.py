@@ -0,0 +1,52 @@
+"""
+Production sunucu ayarları (gunicorn)
+
+Kullanım:
+    gunicorn -c gunicorn.conf.py run:app
+
+Tüm değerler environment variable ile değiştirilebilir:
+    WEB_BIND=0.0.0.0:3001 WEB_WORKERS=4 WEB_THREADS=8 gunicorn -c gunicorn.conf.py run:app
+
+Graceful reload (bağlantılar kesilmeden worker'ları yenile):
+    kill -HUP <master pid>
+preload_app açık olduğu için HUP kodu yeniden yüklemez; yeni kod için
+    kill -USR2 <master pid>   # yeni master + worker'lar başlar
+    kill -WINCH <eski master pid> && kill -QUIT <eski master pid>
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:3001')
+
+# Worker sayısı: CPU başına 2 + 1 (I/O ağırlıklı uygulama, istekler çoğunlukla MySQL bekler)
+workers = int(os.environ.get('WEB_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+# Worker başına thread; 1'den büyükse gthread worker kullanılır
+threads = int(os.environ.get('WEB_THREADS', '4'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Keep-alive: aynı bağlantıdan gelen art arda istekler için (frontend polling)
+keepalive = int(os.environ.get('WEB_KEEPALIVE', '5'))
+timeout = int(os.environ.get('WEB_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', '30'))
+
+# Bellek sızıntılarına karşı worker'ları periyodik olarak yenile (aynı anda değil)
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', '10000'))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', '1000'))
+
+# Uygulama (ve init_db schema kontrolü) master'da bir kez yüklenir, worker'lar fork edilir
+preload_app = True
+
+accesslog = os.environ.get('WEB_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def when_ready(server):
+    """Worker'lar fork edilmeden önce master'daki DB bağlantılarını bırak"""
+    from game_api.lifecycle import release_before_fork
+    release_before_fork()
+
+
+def post_fork(server, worker):
+    """Her worker'da pool'ları, probe thread'lerini ve cache'leri yeniden başlat"""
+    from game_api.lifecycle import reinit_after_fork
+    reinit_after_fork()
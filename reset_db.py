@@ -1,4 +1,5 @@
 from game_api.database import get_db_connection, init_db
+from game_api.sharding import is_sharded, shard_count, get_shard_connection, SHARDED_TABLES
 
 def reset_db():
     conn = get_db_connection()
@@ -10,7 +11,7 @@ def reset_db():
     
     # Sırayla tabloları sil (Foreign Key kısıtlamaları yüzünden sıra önemli)
     tables_to_drop = [
-        'logs', 'game_rule_snapshots', 'transactions', 'payouts', 'bets', 'games', 'rules', 'rule_sets', 'wallets', 'users'
+        'idempotency_keys', 'logs', 'game_rule_snapshots', 'transactions', 'payouts', 'bets', 'games', 'rules', 'rule_sets', 'wallets', 'users'
     ]
 
     try:
@@ -23,6 +24,12 @@ def reset_db():
             
         cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
         conn.commit()
+
+        # Shard'lardaki kullanıcı tablolarını da sil
+        if is_sharded():
+            for index in range(shard_count()):
+                drop_shard_tables(index)
+
         print("Tüm tablolar başarıyla silindi.")
         
         # Yeniden oluştur
@@ -35,5 +42,23 @@ def reset_db():
         cursor.close()
         conn.close()
 
+def drop_shard_tables(index):
+    shard_conn = get_shard_connection(index)
+    if shard_conn is None:
+        print(f"Shard {index} bağlantısı kurulamadı, atlanıyor.")
+        return
+
+    shard_cursor = shard_conn.cursor()
+    try:
+        shard_cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in reversed(SHARDED_TABLES):
+            shard_cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            print(f"Shard {index} tablo silindi: {table}")
+        shard_cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        shard_conn.commit()
+    finally:
+        shard_cursor.close()
+        shard_conn.close()
+
 if __name__ == "__main__":
     reset_db()
@@ -0,0 +1,111 @@
+"""
+RTP simülasyonu - bir ödeme tablosunun oyuncuya dönüşünü Monte Carlo ile ölç
+
+Bahis tipi başına milyonlarca el oynar (game_api.engine.simulation, NumPy)
+ve RTP, house edge, standart sapma ve %95 güven aralığını yazar. Bir rule
+set'i aktif etmeden önce çalıştırılır. Coinflip ve roulette için kesin RTP
+(game_api.engine.analytic) de yazılır; simülasyon onunla doğrulanabilir.
+
+Kullanım:
+    python simulate_rtp.py                                    # varsayılan ödeme tablosu
+    python simulate_rtp.py --rule-set 3                       # veritabanındaki rule set
+    python simulate_rtp.py --rule-set 3 --rule blackjack_normal_payout=2.1
+    python simulate_rtp.py --rounds 5000000 --seed 42 --games blackjack --stand-on 16
+    python simulate_rtp.py --json
+"""
+import argparse
+import json
+import sys
+import time
+from game_api.engine import DEALER_STANDS_ON
+from game_api.engine import simulation
+from game_api.engine.analytic import expected_returns
+from game_api.rules import RULE_TYPES
+
+
+def parse_rule(text):
+    rule_type, _, value = text.partition('=')
+    if rule_type not in RULE_TYPES:
+        raise argparse.ArgumentTypeError(f"unknown rule type: {rule_type} ({', '.join(RULE_TYPES)})")
+    try:
+        return rule_type, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid value: {text} (expected rule_type=number)")
+
+
+def load_rule_set(rule_set_id):
+    """Rule set'i veritabanından oku (yalnızca --rule-set ile)"""
+    from game_api.database import get_db_connection
+    from game_api.rules import load_rule_set_payouts
+
+    conn = get_db_connection()
+    if not conn:
+        sys.exit('Database connection failed')
+    cursor = conn.cursor(dictionary=True)
+    try:
+        rule_set = load_rule_set_payouts(cursor, rule_set_id)
+    finally:
+        cursor.close()
+        conn.close()
+    if not rule_set:
+        sys.exit(f'Rule set {rule_set_id} not found')
+    return rule_set
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rule-set', type=int, help='Simulate this rule set from the database')
+    parser.add_argument('--rule', type=parse_rule, action='append', default=[], metavar='TYPE=VALUE',
+                        help='Payout override (repeatable)')
+    parser.add_argument('--rounds', type=int, default=simulation.DEFAULT_ROUNDS, help='Rounds per bet type')
+    parser.add_argument('--seed', type=int, default=None, help='Fixed seed for repeatable results')
+    parser.add_argument('--games', nargs='+', choices=simulation.BET_TYPES, default=list(simulation.BET_TYPES))
+    parser.add_argument('--stand-on', type=int, default=DEALER_STANDS_ON, help='Blackjack: player hits below this value')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON')
+    args = parser.parse_args()
+
+    if not simulation.is_available():
+        sys.exit('NumPy is required: pip install numpy')
+    if args.rounds < 1:
+        parser.error('--rounds must be at least 1')
+
+    rules = {}
+    title = 'default payouts'
+    rule_set = None
+    if args.rule_set is not None:
+        rule_set = load_rule_set(args.rule_set)
+        rules.update(rule_set['rules'])
+        title = f"rule set {rule_set['rule_set_id']} ({rule_set['name']})"
+    rules.update(dict(args.rule))
+
+    started = time.perf_counter()
+    result = simulation.simulate(rules, rounds=args.rounds, seed=args.seed, bet_types=args.games,
+                                 stand_on=args.stand_on)
+    elapsed = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"\n{title}, {args.rounds:,} rounds per bet type, {elapsed:.1f} s")
+    for rule_type, value in result['payouts'].items():
+        print(f"   {rule_type:<26}{value:>8g}")
+    if rule_set is not None and rule_set['house_edge'] is not None:
+        print(f"   {'stored house_edge (%)':<26}{float(rule_set['house_edge']):>8g}")
+
+    exact = expected_returns(rules)
+    print(f"\n   {'bet type':<18}{'RTP':>9}{'edge':>9}{'std dev':>10}{'95% CI':>22}{'exact RTP':>12}")
+    for bet_type, stats in result['results'].items():
+        low, high = stats['ci95']
+        exact_rtp = f"{exact[bet_type]['rtp'] * 100:.3f}%" if bet_type in exact else '-'
+        print(f"   {bet_type:<18}{stats['rtp'] * 100:>8.2f}%{stats['house_edge'] * 100:>8.2f}%"
+              f"{stats['std_dev']:>10.3f}   [{low * 100:.2f}%, {high * 100:.2f}%]{exact_rtp:>12}")
+
+    blackjack = result['results'].get('blackjack')
+    if blackjack:
+        outcomes = ', '.join(f"{name} {share * 100:.1f}%" for name, share in blackjack['outcomes'].items())
+        print(f"\n   blackjack outcomes (player hits below {args.stand_on}): {outcomes}")
+
+
+if __name__ == '__main__':
+    main()